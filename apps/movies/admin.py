@@ -2,7 +2,7 @@ from django.contrib import admin
 from django.utils.html import format_html
 from django import forms
 from django.conf import settings
-from .models import Movie, Subtitle
+from .models import EmailBroadcast, Movie, Subtitle, TranscodeJob
 from .widgets import S3DirectUploadWidget
 
 
@@ -189,3 +189,17 @@ class MovieAdmin(admin.ModelAdmin):
                  getattr(obj, field_name).name = field_data
         
         super().save_model(request, obj, form, change)
+
+
+@admin.register(TranscodeJob)
+class TranscodeJobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'movie', 'status', 'attempts', 'max_attempts', 'worker_id', 'heartbeat_at', 'created_at']
+    list_filter = ['status', 'created_at']
+    raw_id_fields = ['movie']
+
+
+@admin.register(EmailBroadcast)
+class EmailBroadcastAdmin(admin.ModelAdmin):
+    list_display = ['id', 'movie', 'kind', 'status', 'sent_count', 'failed_count', 'worker_id', 'created_at', 'finished_at']
+    list_filter = ['kind', 'status', 'created_at']
+    raw_id_fields = ['movie']
@@ -0,0 +1,329 @@
+"""
+Queued delivery of new-movie / new-trailer announcement emails.
+
+The admin request only records an EmailBroadcast (``queue_announcement``;
+a constraint keeps it to one unfinished broadcast per movie and kind);
+``manage.py run_email_worker`` sends it:
+
+- Recipients: opted-in user ids are copied into EmailDelivery rows in
+  keyset-paginated chunks of EMAIL_RECIPIENT_CHUNK, with a cursor on the
+  broadcast, so the user table is never loaded into memory at once and a
+  restart continues from the last chunk.
+- Sending: pending deliveries go out in batches of EMAIL_BATCH_SIZE over one
+  SMTP connection per batch (``get_connection()``), throttled to
+  EMAIL_RATE_LIMIT messages per second. Each batch is marked sent before the
+  next one starts, so a crashed worker re-sends at most one batch.
+- Leases: a broadcast is held by one worker for EMAIL_LEASE_SECONDS, renewed
+  after every batch. A dead worker's broadcast is picked up again once its
+  lease expires.
+- Retries: a failed message stays pending until EMAIL_MAX_ATTEMPTS; messages
+  that failed in a pass are retried after EMAIL_RETRY_BACKOFF seconds.
+"""
+import logging
+import os
+import socket
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .emails import render_new_movie_email, render_new_trailer_email
+from .models import EmailBroadcast, EmailDelivery
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+# kind → (User opt-in field, renderer)
+KINDS = {
+    'new_movie':   ('notify_new_movies',   render_new_movie_email),
+    'new_trailer': ('notify_new_trailers', render_new_trailer_email),
+}
+
+
+def _lease_seconds():
+    return getattr(settings, 'EMAIL_LEASE_SECONDS', 300)
+
+
+def _lease_until(seconds=None):
+    return timezone.now() + timedelta(seconds=_lease_seconds() if seconds is None else seconds)
+
+
+def default_worker_id():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+class _RateLimiter:
+    """Spaces calls to ``wait()`` at least 1/rate seconds apart (rate <= 0 disables it)."""
+
+    def __init__(self, rate, clock=time.monotonic, sleep=time.sleep):
+        self.interval = 1.0 / rate if rate and rate > 0 else 0.0
+        self._clock = clock
+        self._sleep = sleep
+        self._next = None
+
+    def wait(self):
+        if not self.interval:
+            return
+        now = self._clock()
+        if self._next is not None and now < self._next:
+            self._sleep(self._next - now)
+            now = self._next
+        self._next = now + self.interval
+
+
+# ─────────────────────────────────────────────
+# Producer side (web process)
+# ─────────────────────────────────────────────
+
+def queue_announcement(movie, kind):
+    """
+    Queue a ``kind`` announcement for ``movie`` and return its broadcast.
+    An unfinished broadcast of the same kind for the movie is reused.
+    """
+    if kind not in KINDS:
+        raise ValueError(f'Unknown announcement kind: {kind}')
+    try:
+        return _queue(movie, kind)
+    except IntegrityError:
+        # A concurrent request created the broadcast first; the
+        # emailbroadcast_one_active_per_kind constraint allows only one.
+        broadcast = EmailBroadcast.objects.filter(
+            movie=movie, kind=kind, status__in=('queued', 'sending'),
+        ).first()
+        if broadcast is not None:
+            return broadcast
+        return _queue(movie, kind)
+
+
+def _queue(movie, kind):
+    with transaction.atomic():
+        broadcast = (
+            EmailBroadcast.objects.select_for_update()
+            .filter(movie=movie, kind=kind, status__in=('queued', 'sending'))
+            .first()
+        )
+        if broadcast is None:
+            broadcast = EmailBroadcast.objects.create(movie=movie, kind=kind)
+            logger.info(f'[Email] Queued {kind} broadcast #{broadcast.id} for "{movie.title}"')
+    return broadcast
+
+
+# ─────────────────────────────────────────────
+# Worker side
+# ─────────────────────────────────────────────
+
+def claim_broadcast(worker_id):
+    """
+    Lease the oldest queued broadcast, or one whose lease has expired, to
+    ``worker_id``. Returns None if there is none.
+    """
+    now = timezone.now()
+    due = Q(status='queued') | Q(status='sending', lease_expires_at__lt=now)
+    with transaction.atomic():
+        broadcast = (
+            EmailBroadcast.objects.select_for_update(skip_locked=True)
+            .filter(due)
+            .order_by('created_at', 'id')
+            .first()
+        )
+        if broadcast is None:
+            return None
+        claimed = EmailBroadcast.objects.filter(pk=broadcast.pk).filter(due).update(
+            status='sending',
+            worker_id=worker_id,
+            lease_expires_at=_lease_until(),
+            started_at=broadcast.started_at or now,
+        )
+    if not claimed:
+        return None
+    broadcast.refresh_from_db()
+    logger.info(f'[Email] Broadcast #{broadcast.id} claimed by {worker_id}')
+    return broadcast
+
+
+def _owned(broadcast):
+    return EmailBroadcast.objects.filter(pk=broadcast.pk, status='sending', worker_id=broadcast.worker_id)
+
+
+def renew_lease(broadcast):
+    """Returns False if another worker took the broadcast over."""
+    return bool(_owned(broadcast).update(lease_expires_at=_lease_until()))
+
+
+def release(broadcast, delay):
+    """Give the broadcast up; it becomes claimable again after ``delay`` seconds."""
+    return _owned(broadcast).update(worker_id='', lease_expires_at=_lease_until(delay))
+
+
+def materialize_recipients(broadcast):
+    """
+    Copy opted-in users into EmailDelivery rows, one keyset chunk per
+    transaction. Returns False if the lease was lost.
+    """
+    opt_in_field, _ = KINDS[broadcast.kind]
+    chunk = getattr(settings, 'EMAIL_RECIPIENT_CHUNK', 1000)
+    recipients = (
+        User.objects.filter(**{opt_in_field: True}, is_active=True)
+        .exclude(email=None)
+        .exclude(email='')
+        .order_by('id')
+    )
+    while not broadcast.recipients_ready:
+        rows = list(recipients.filter(id__gt=broadcast.recipients_cursor).values_list('id', 'email')[:chunk])
+        with transaction.atomic():
+            EmailDelivery.objects.bulk_create(
+                [EmailDelivery(broadcast=broadcast, user_id=user_id, email=email) for user_id, email in rows],
+                ignore_conflicts=True,
+            )
+            if rows:
+                broadcast.recipients_cursor = rows[-1][0]
+            broadcast.recipients_ready = len(rows) < chunk
+            updated = _owned(broadcast).update(
+                recipients_cursor=broadcast.recipients_cursor,
+                recipients_ready=broadcast.recipients_ready,
+                lease_expires_at=_lease_until(),
+            )
+            if not updated:
+                transaction.set_rollback(True)
+                return False
+    return True
+
+
+def _send_batch(deliveries, subject, plain, html, limiter):
+    """Send ``deliveries`` over one connection. Returns (sent ids, {id: error})."""
+    sent, errors = [], {}
+    connection = get_connection(fail_silently=False)
+    connection.open()  # connection-level failures propagate to the caller
+    try:
+        for delivery in deliveries:
+            limiter.wait()
+            msg = EmailMultiAlternatives(
+                subject=subject,
+                body=plain,
+                from_email=settings.DEFAULT_FROM_EMAIL,
+                to=[delivery.email],
+                connection=connection,
+            )
+            msg.attach_alternative(html, 'text/html')
+            try:
+                msg.send(fail_silently=False)
+                sent.append(delivery.id)
+            except Exception as e:
+                errors[delivery.id] = str(e) or e.__class__.__name__
+    finally:
+        connection.close()
+    return sent, errors
+
+
+def _record_batch(broadcast, deliveries, sent, errors):
+    now = timezone.now()
+    max_attempts = getattr(settings, 'EMAIL_MAX_ATTEMPTS', 3)
+    with transaction.atomic():
+        if sent:
+            EmailDelivery.objects.filter(id__in=sent).update(
+                status='sent', sent_at=now, attempts=F('attempts') + 1, last_error=None,
+            )
+        given_up = 0
+        for delivery in deliveries:
+            if delivery.id not in errors:
+                continue
+            final = delivery.attempts + 1 >= max_attempts
+            given_up += final
+            EmailDelivery.objects.filter(id=delivery.id).update(
+                status='failed' if final else 'pending',
+                attempts=F('attempts') + 1,
+                last_error=errors[delivery.id],
+            )
+        EmailBroadcast.objects.filter(pk=broadcast.pk).update(
+            sent_count=F('sent_count') + len(sent),
+            failed_count=F('failed_count') + given_up,
+        )
+
+
+def send_pending(broadcast, limiter=None, stop=None):
+    """
+    One pass over the broadcast's pending deliveries, in id order. Returns
+    False if the lease was lost or ``stop`` was set (the broadcast is then
+    released for immediate pickup).
+    """
+    _, render = KINDS[broadcast.kind]
+    subject, plain, html = render(broadcast.movie)
+    limiter = limiter or _RateLimiter(getattr(settings, 'EMAIL_RATE_LIMIT', 0))
+    batch_size = getattr(settings, 'EMAIL_BATCH_SIZE', 100)
+    last_id = 0
+    while True:
+        deliveries = list(
+            broadcast.deliveries.filter(status='pending', id__gt=last_id).order_by('id')[:batch_size]
+        )
+        if not deliveries:
+            return True
+        last_id = deliveries[-1].id
+        sent, errors = _send_batch(deliveries, subject, plain, html, limiter)
+        _record_batch(broadcast, deliveries, sent, errors)
+        if errors:
+            logger.warning(f'[Email] Broadcast #{broadcast.id}: {len(errors)} of {len(deliveries)} message(s) failed in this batch')
+        if not renew_lease(broadcast):
+            logger.warning(f'[Email] Broadcast #{broadcast.id} lost its lease')
+            return False
+        if stop is not None and stop.is_set():
+            release(broadcast, 0)
+            return False
+
+
+def run_broadcast(broadcast, limiter=None, stop=None):
+    """Materialise recipients and send every pending delivery of a claimed broadcast."""
+    backoff = getattr(settings, 'EMAIL_RETRY_BACKOFF', 300)
+    try:
+        if not materialize_recipients(broadcast) or not send_pending(broadcast, limiter, stop):
+            return
+    except Exception as e:
+        # SMTP unreachable, DB hiccup... — leave everything pending and try again later.
+        logger.exception(f'[Email] Broadcast #{broadcast.id} interrupted: {e}')
+        release(broadcast, backoff)
+        return
+
+    if broadcast.deliveries.filter(status='pending').exists():
+        release(broadcast, backoff)
+        return
+    _owned(broadcast).update(status='done', finished_at=timezone.now(), lease_expires_at=None)
+    broadcast.refresh_from_db()
+    logger.info(
+        f'[Email] Broadcast #{broadcast.id} ({broadcast.kind}) for "{broadcast.movie.title}": '
+        f'{broadcast.sent_count} sent, {broadcast.failed_count} failed'
+    )
+
+
+class EmailWorker:
+    """
+    Polls for broadcasts and sends them one at a time — a single sender is
+    what keeps the whole process under EMAIL_RATE_LIMIT.
+    """
+
+    def __init__(self, poll_interval=None, worker_id=None):
+        self.poll_interval = poll_interval or getattr(settings, 'EMAIL_POLL_INTERVAL', 10)
+        self.worker_id = worker_id or default_worker_id()
+        self.limiter = _RateLimiter(getattr(settings, 'EMAIL_RATE_LIMIT', 0))
+        self._stop = threading.Event()
+
+    def stop(self):
+        """Stop after the current batch; the unfinished broadcast is resumed later."""
+        self._stop.set()
+
+    def run(self, once=False):
+        """Work until ``stop()``. With ``once`` the worker exits when nothing is due."""
+        while not self._stop.is_set():
+            close_old_connections()
+            broadcast = claim_broadcast(self.worker_id)
+            if broadcast is not None:
+                run_broadcast(broadcast, self.limiter, self._stop)
+                continue
+            if once:
+                break
+            self._stop.wait(self.poll_interval)
@@ -0,0 +1,61 @@
+"""
+Per-process daemon thread that periodically drains a write-behind buffer.
+
+Shared by the watch-progress buffer and the view counter: both collect
+writes in the cache and flush them to the database in bulk.
+"""
+import atexit
+import logging
+import threading
+import time
+
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicFlusher:
+    """
+    Calls ``flush()`` every ``interval()`` seconds while ``has_pending()``.
+
+    The thread is started lazily on the first buffered write, and pending
+    work is flushed once more when the process exits.
+    """
+
+    def __init__(self, name, flush, interval, has_pending):
+        self.name = name
+        self.flush = flush
+        self.interval = interval
+        self.has_pending = has_pending
+        self._thread = None
+        self._lock = threading.Lock()
+        atexit.register(self._flush_on_exit)
+
+    def ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._loop, name=self.name, daemon=True)
+            self._thread.start()
+
+    def _loop(self):
+        while True:
+            time.sleep(max(self.interval(), 1))
+            if not self.has_pending():
+                continue
+            close_old_connections()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception(f'[{self.name}] Background flush crashed')
+            finally:
+                close_old_connections()
+
+    def _flush_on_exit(self):
+        if self.has_pending():
+            try:
+                self.flush()
+            except Exception:
+                logger.exception(f'[{self.name}] Final flush on shutdown failed')
@@ -0,0 +1,117 @@
+"""
+Versioned read-through cache for the public catalog list endpoints.
+
+Cached bodies contain only anonymous data (``has_purchased`` is always
+False); the per-user overlay is applied after the cache read so logged-in
+viewers share the same cached pages.
+
+View counts change on every stream, so they are not allowed to bump the
+version; ``apply_live_views`` refreshes them per request instead (stored
+count plus the view counter's unflushed delta).
+
+Invalidation is version-based: every cache key embeds the current catalog
+version, and saving or deleting a Movie/Subtitle bumps that version (see
+signals.py). Stale entries are never read again and simply expire.
+
+The version key has to live in a shared cache (REDIS_URL) for a bump to
+reach every gunicorn worker. With the per-process development default, only
+the worker that handled the edit sees it; the others serve their cached
+pages until CATALOG_CACHE_TIMEOUT.
+"""
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Movie
+from .serializers import purchased_movie_ids
+from .view_counter import pending_views
+
+logger = logging.getLogger(__name__)
+
+CATALOG_VERSION_KEY = 'movies:catalog:version'
+
+
+def get_catalog_version():
+    """Return the current catalog version, initialising it on first use."""
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        cache.add(CATALOG_VERSION_KEY, 1, timeout=None)
+        version = cache.get(CATALOG_VERSION_KEY, 1)
+    return version
+
+
+def bump_catalog_version():
+    """Invalidate every cached catalog page by moving to a new version."""
+    try:
+        cache.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        # Key missing (first write, or evicted) — start a fresh version.
+        cache.add(CATALOG_VERSION_KEY, 1, timeout=None)
+        cache.incr(CATALOG_VERSION_KEY)
+    except Exception as exc:
+        # A cache outage must never break a Movie/Subtitle save.
+        logger.warning(f'Could not bump catalog cache version: {exc}')
+
+
+def catalog_cache_key(endpoint, sort, page):
+    return f'movies:catalog:v{get_catalog_version()}:{endpoint}:{sort}:{page}'
+
+
+def get_or_build_page(endpoint, sort, page, build):
+    """
+    Return the cached body for (endpoint, sort, page), calling ``build()``
+    and storing its result on a miss.
+    """
+    try:
+        key = catalog_cache_key(endpoint, sort, page)
+        body = cache.get(key)
+    except Exception as exc:
+        logger.warning(f'Catalog cache read failed: {exc}')
+        return build()
+
+    if body is None:
+        body = build()
+        try:
+            cache.set(key, body, timeout=getattr(settings, 'CATALOG_CACHE_TIMEOUT', 300))
+        except Exception as exc:
+            logger.warning(f'Catalog cache write failed: {exc}')
+    return body
+
+
+def apply_purchase_overlay(body, user):
+    """
+    Return a copy of a cached page body with ``has_purchased`` resolved for
+    ``user`` in a single query. The cached body itself is never mutated.
+    """
+    results = body['results']
+    purchased_ids = purchased_movie_ids(user, [m['id'] for m in results])
+    return {
+        **body,
+        'results': [
+            {**m, 'has_purchased': m['id'] in purchased_ids}
+            for m in results
+        ],
+    }
+
+
+def apply_live_views(body, resort=False):
+    """
+    Return a copy of a page body with live view counts: the stored
+    Movie.views plus unflushed views from the view counter. One PK lookup.
+
+    ``resort`` re-orders the page by the live counts (popularity lists).
+    """
+    results = body['results']
+    if not results:
+        return body
+    ids = [m['id'] for m in results]
+    stored = dict(Movie.objects.filter(id__in=ids).values_list('id', 'views'))
+    pending = pending_views(ids)
+    results = [
+        {**m, 'views': stored.get(m['id'], m['views']) + pending.get(m['id'], 0)}
+        for m in results
+    ]
+    if resort:
+        results.sort(key=lambda m: (-m['views'], -m['id']))
+    return {**body, 'results': results}
@@ -1,44 +1,249 @@
+"""
+CloudFront signed URLs for HLS playback.
+
+The private key is parsed once per process and the ``CloudFrontSigner`` is
+reused across requests (it used to be rebuilt, and the PEM re-parsed, for
+every signature).
+
+Expiry times are rounded up to the end of a CLOUDFRONT_SIGNATURE_BUCKET
+window, so every stream of the same resource inside a window produces the
+same URL; those are served from a per-process LRU instead of being signed
+again. A URL is therefore valid for between ``expiry_seconds`` and
+``expiry_seconds`` + one bucket.
+
+Signed-cookie mode (CLOUDFRONT_SIGNED_COOKIES): instead of signing single
+URLs, ``set_hls_cookies`` signs one custom policy for the wildcard
+resource ``movies/hls/{movie_id}/*``. The stream endpoint sends it as
+CloudFront-Policy / -Signature / -Key-Pair-Id cookies, so every rendition
+playlist and segment is authorised without per-object signatures and the
+segment URLs stay identical (cacheable) for every viewer.
+"""
+import base64
+import json
 import logging
-from datetime import datetime, timezone, timedelta
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
 
 from django.conf import settings
 
 logger = logging.getLogger(__name__)
 
+SIGNED_URL_CACHE_SIZE = 4096
 
-def sign_hls_url(plain_url: str, expiry_seconds: int = 3600) -> str:
-    """
-    Return a CloudFront signed URL valid for `expiry_seconds`.
+_warned_no_cookie_domain = False
 
-    Requires CLOUDFRONT_KEY_PAIR_ID and CLOUDFRONT_PRIVATE_KEY in settings.
-    Falls back to the plain URL if signing is not configured (e.g. local dev).
+
+class _SignedURLCache:
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            url = self._data.get(key)
+            if url is not None:
+                self._data.move_to_end(key)
+            return url
+
+    def set(self, key, url):
+        with self._lock:
+            self._data[key] = url
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+signed_url_cache = _SignedURLCache(SIGNED_URL_CACHE_SIZE)
+
+_signer = None
+_signer_config = None
+_signer_lock = threading.Lock()
+
+
+def _build_signer(key_pair_id, private_key_pem):
+    from botocore.signers import CloudFrontSigner
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import padding
+
+    pem_bytes = (
+        private_key_pem.encode()
+        if isinstance(private_key_pem, str)
+        else private_key_pem
+    )
+    private_key = serialization.load_pem_private_key(pem_bytes, password=None)
+
+    def rsa_signer(message):
+        return private_key.sign(message, padding.PKCS1v15(), hashes.SHA1())
+
+    return CloudFrontSigner(key_pair_id, rsa_signer)
+
+
+def get_signer():
+    """
+    Return the process-wide CloudFrontSigner, or None if signing is not
+    configured. Rebuilt only if the key settings change.
     """
+    global _signer, _signer_config
     key_pair_id = getattr(settings, 'CLOUDFRONT_KEY_PAIR_ID', None)
     private_key_pem = getattr(settings, 'CLOUDFRONT_PRIVATE_KEY', None)
-
     if not key_pair_id or not private_key_pem:
+        return None
+
+    config = (key_pair_id, private_key_pem)
+    if _signer_config == config:
+        return _signer
+    with _signer_lock:
+        if _signer_config != config:
+            _signer = _build_signer(key_pair_id, private_key_pem)
+            _signer_config = config
+        return _signer
+
+
+def expiry_for(expiry_seconds, now=None):
+    """Unix expiry time: ``expiry_seconds`` after the end of the current bucket."""
+    bucket = getattr(settings, 'CLOUDFRONT_SIGNATURE_BUCKET', 300)
+    now = int(time.time() if now is None else now)
+    return (now // bucket + 1) * bucket + expiry_seconds
+
+
+def sign_urls(plain_urls, expiry_seconds: int = 3600):
+    """
+    Sign several URLs (e.g. a master playlist and its subtitle tracks) with
+    one shared expiry. Returns the signed URLs in the same order; None
+    entries are passed through.
+
+    Requires CLOUDFRONT_KEY_PAIR_ID and CLOUDFRONT_PRIVATE_KEY in settings.
+    Falls back to the plain URLs if signing is not configured (e.g. local dev).
+    """
+    try:
+        signer = get_signer()
+    except Exception:
+        logger.exception('Failed to load CloudFront signing key — returning plain URLs')
+        return list(plain_urls)
+    if signer is None:
         logger.debug('CloudFront signing not configured — returning plain URL')
-        return plain_url
+        return list(plain_urls)
+
+    expires_at = expiry_for(expiry_seconds)
+    date_less_than = datetime.fromtimestamp(expires_at, tz=timezone.utc)
+    signed = []
+    for url in plain_urls:
+        if not url:
+            signed.append(url)
+            continue
+        key = (url, expires_at)
+        signed_url = signed_url_cache.get(key)
+        if signed_url is None:
+            try:
+                signed_url = signer.generate_presigned_url(url, date_less_than=date_less_than)
+            except Exception:
+                logger.exception('Failed to sign CloudFront URL — returning plain URL')
+                signed.append(url)
+                continue
+            signed_url_cache.set(key, signed_url)
+        signed.append(signed_url)
+    return signed
+
+
+def sign_hls_url(plain_url: str, expiry_seconds: int = 3600) -> str:
+    """
+    Return a CloudFront signed URL valid for at least `expiry_seconds`.
+    Falls back to the plain URL if signing is not configured.
+    """
+    return sign_urls([plain_url], expiry_seconds)[0]
+
+
+# ─────────────────────────────────────────────
+# Signed cookies (custom policy, wildcard resource)
+# ─────────────────────────────────────────────
+
+def _cloudfront_b64(data: bytes) -> str:
+    """Base64 with CloudFront's URL-safe substitutions (+ → -, = → _, / → ~)."""
+    return base64.b64encode(data).decode().translate(str.maketrans('+=/', '-_~'))
 
+
+def hls_cookie_resource(movie_id) -> str:
+    return f'https://{settings.AWS_S3_CUSTOM_DOMAIN}/movies/hls/{movie_id}/*'
+
+
+def hls_cookie_path(movie_id) -> str:
+    # Scope the cookies to one movie's HLS tree so streams of different
+    # movies in the same browser do not overwrite each other.
+    return f'/movies/hls/{movie_id}/'
+
+
+def signed_cookies(resource: str, expiry_seconds: int = 3600):
+    """
+    Return ({cookie name: value}, expires_at) granting access to ``resource``
+    (may end in ``*``), or (None, None) if signing is not configured or fails.
+    Cached per (resource, expiry bucket) like signed URLs.
+    """
     try:
-        from cryptography.hazmat.primitives import hashes, serialization
-        from cryptography.hazmat.primitives.asymmetric import padding
-        from botocore.signers import CloudFrontSigner
-
-        pem_bytes = (
-            private_key_pem.encode()
-            if isinstance(private_key_pem, str)
-            else private_key_pem
-        )
+        signer = get_signer()
+    except Exception:
+        logger.exception('Failed to load CloudFront signing key — no signed cookies')
+        return None, None
+    if signer is None:
+        return None, None
+
+    expires_at = expiry_for(expiry_seconds)
+    key = ('cookie', resource, expires_at)
+    cookies = signed_url_cache.get(key)
+    if cookies is None:
+        policy = json.dumps(
+            {'Statement': [{
+                'Resource': resource,
+                'Condition': {'DateLessThan': {'AWS:EpochTime': expires_at}},
+            }]},
+            separators=(',', ':'),
+        ).encode()
+        try:
+            signature = signer.rsa_signer(policy)
+        except Exception:
+            logger.exception('Failed to sign CloudFront cookie policy')
+            return None, None
+        cookies = {
+            'CloudFront-Policy': _cloudfront_b64(policy),
+            'CloudFront-Signature': _cloudfront_b64(signature),
+            'CloudFront-Key-Pair-Id': signer.key_id,
+        }
+        signed_url_cache.set(key, cookies)
+    return cookies, expires_at
 
-        def rsa_signer(message):
-            private_key = serialization.load_pem_private_key(pem_bytes, password=None)
-            return private_key.sign(message, padding.PKCS1v15(), hashes.SHA1())
 
-        expire_at = datetime.now(tz=timezone.utc) + timedelta(seconds=expiry_seconds)
-        return CloudFrontSigner(key_pair_id, rsa_signer).generate_presigned_url(
-            plain_url, date_less_than=expire_at
+def set_hls_cookies(response, movie_id, expiry_seconds: int = 3600):
+    """
+    Attach the signed cookies for ``movies/hls/{movie_id}/*`` to ``response``.
+    Returns False (and sets nothing) if signing is unavailable or no
+    CLOUDFRONT_COOKIE_DOMAIN is configured: host-only cookies would stay on
+    the API host and never reach CloudFront, so the caller signs URLs instead.
+    """
+    global _warned_no_cookie_domain
+    domain = getattr(settings, 'CLOUDFRONT_COOKIE_DOMAIN', '')
+    if not domain:
+        if not _warned_no_cookie_domain:
+            logger.warning('CLOUDFRONT_SIGNED_COOKIES is on but CLOUDFRONT_COOKIE_DOMAIN is empty — signing URLs instead')
+            _warned_no_cookie_domain = True
+        return False
+    cookies, expires_at = signed_cookies(hls_cookie_resource(movie_id), expiry_seconds)
+    if cookies is None:
+        return False
+    max_age = max(expires_at - int(time.time()), 0)
+    for name, value in cookies.items():
+        response.set_cookie(
+            name, value,
+            max_age=max_age,
+            domain=domain,
+            path=hls_cookie_path(movie_id),
+            secure=True,
+            httponly=True,
+            samesite='None',
         )
-    except Exception:
-        logger.exception('Failed to sign CloudFront URL — returning plain URL')
-        return plain_url
+    return True
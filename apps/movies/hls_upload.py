@@ -0,0 +1,182 @@
+"""
+Parallel upload of HLS output to S3.
+
+A two-hour film is thousands of small ``.ts`` segments, so uploading them
+one ``upload_file`` at a time dominated transcode time. ``HLSUploader``
+shares one boto3 client (thread-safe, with a connection pool sized to the
+thread pool) across HLS_UPLOAD_CONCURRENCY threads, retries each object up
+to HLS_UPLOAD_RETRIES times, and reports progress to ``Movie.hls_progress``.
+
+Playlists are uploaded only after every segment has landed, so a player can
+never fetch a playlist that references a missing segment.
+
+Streaming mode (HLS_UPLOAD_STREAMING): ``watch()`` runs next to ffmpeg and
+uploads each segment as soon as ffmpeg finishes it. ffmpeg writes segments
+as ``*.ts.tmp`` and renames them when complete (``hls_flags=temp_file``),
+so any ``*.ts`` file on disk is safe to upload.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from pathlib import Path
+
+import boto3
+from botocore.config import Config
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_INTERVAL = 2  # seconds between Movie.hls_progress writes
+
+
+def s3_client(max_pool_connections=None):
+    """boto3 S3 client whose HTTP pool can serve every upload thread at once."""
+    return boto3.client(
+        's3',
+        aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+        region_name=settings.AWS_S3_REGION_NAME,
+        config=Config(
+            max_pool_connections=max_pool_connections or settings.HLS_UPLOAD_CONCURRENCY,
+            retries={'mode': 'standard'},
+        ),
+    )
+
+
+def _object_args(path: Path):
+    if path.suffix == '.m3u8':
+        return {'ContentType': 'application/vnd.apple.mpegurl', 'CacheControl': 'max-age=0'}
+    return {'ContentType': 'video/MP2T', 'CacheControl': 'max-age=86400'}
+
+
+class HLSUploader:
+    """
+    Uploads files under ``local_dir`` to ``movies/hls/{movie_id}/`` on a
+    bounded thread pool. Use as a context manager.
+
+    ``expected`` is the estimated number of objects (for progress while
+    streaming, when the final count is not known yet).
+    """
+
+    def __init__(self, s3, movie_id, local_dir, expected=None, concurrency=None):
+        self.s3 = s3
+        self.movie_id = movie_id
+        self.local_dir = Path(local_dir)
+        self.expected = expected
+        self.bucket = settings.AWS_STORAGE_BUCKET_NAME
+        self.retries = settings.HLS_UPLOAD_RETRIES
+        self._pool = ThreadPoolExecutor(
+            max_workers=concurrency or settings.HLS_UPLOAD_CONCURRENCY,
+            thread_name_prefix=f'hls-upload-{movie_id}',
+        )
+        self._lock = threading.Lock()
+        self._submitted = set()
+        self._futures = []
+        self._done = 0
+        self._last_report = 0.0
+        self._last_percent = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._pool.shutdown(wait=True, cancel_futures=exc[0] is not None)
+
+    def key_for(self, path: Path):
+        return f'movies/hls/{self.movie_id}/{path.relative_to(self.local_dir).as_posix()}'
+
+    # ── Uploading ────────────────────────────────
+
+    def submit(self, path: Path):
+        """Queue one file (ignored if already queued)."""
+        with self._lock:
+            if path in self._submitted:
+                return
+            self._submitted.add(path)
+            self._futures.append(self._pool.submit(self._upload, path))
+
+    def _upload(self, path: Path):
+        key = self.key_for(path)
+        for attempt in range(1, self.retries + 1):
+            try:
+                self.s3.upload_file(str(path), self.bucket, key, ExtraArgs=_object_args(path))
+                break
+            except Exception as e:
+                if attempt == self.retries:
+                    raise RuntimeError(f'Upload of {key} failed after {attempt} attempt(s): {e}') from e
+                logger.warning(f'[HLS] [{self.movie_id}] Upload of {key} failed (attempt {attempt}): {e} — retrying')
+                time.sleep(min(2 ** (attempt - 1), 10))
+        with self._lock:
+            self._done += 1
+
+    def segments(self):
+        return sorted(self.local_dir.rglob('*.ts'))
+
+    def upload_all(self):
+        """Upload every remaining segment, then the playlists; raise on the first failure."""
+        for path in self.segments():
+            self.submit(path)
+        self.wait()
+        for path in sorted(self.local_dir.rglob('*.m3u8'), key=lambda p: p.name == 'master.m3u8'):
+            self.submit(path)  # master playlist last
+        self.wait()
+        self.report_progress(complete=True)
+
+    def wait(self):
+        """Block until every queued upload finishes, reporting progress meanwhile."""
+        while True:
+            with self._lock:
+                pending = [f for f in self._futures if not f.done()]
+                failed = next((f for f in self._futures if f.done() and f.exception()), None)
+            if failed is not None:
+                raise failed.exception()
+            if not pending:
+                return
+            wait(pending, timeout=PROGRESS_INTERVAL)
+            self.report_progress()
+
+    def watch(self, stop: threading.Event, poll_interval=1.0):
+        """Streaming mode: upload finished segments until ``stop`` is set."""
+        try:
+            while not stop.wait(poll_interval):
+                for path in self.segments():
+                    self.submit(path)
+                self.report_progress()
+        finally:
+            connections.close_all()  # this thread's connections only
+
+    # ── Progress ────────────────────────────────
+
+    @property
+    def total(self):
+        with self._lock:
+            submitted = len(self._submitted)
+        return max(submitted, self.expected or 0)
+
+    def report_progress(self, complete=False):
+        """Write the percentage to Movie.hls_progress (throttled; 100 only once complete)."""
+        now = time.monotonic()
+        if complete:
+            percent = 100
+        else:
+            if now - self._last_report < PROGRESS_INTERVAL:
+                return
+            total = self.total
+            if not total:
+                return
+            with self._lock:
+                done = self._done
+            percent = min(done * 100 // total, 99)
+        if percent == self._last_percent:
+            return
+        from .models import Movie
+        try:
+            Movie.objects.filter(id=self.movie_id).update(hls_progress=percent)
+        except Exception as e:
+            # Progress is informational — never let it break an upload.
+            logger.warning(f'[HLS] [{self.movie_id}] Could not record upload progress: {e}')
+            return
+        self._last_report = now
+        self._last_percent = percent
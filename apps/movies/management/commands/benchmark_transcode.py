@@ -0,0 +1,52 @@
+import tempfile
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.movies.transcoding import TRANSCODE_MODES, _parallelism, _probe_duration, _run_ffmpeg, check_ffmpeg
+
+
+class Command(BaseCommand):
+    help = 'Compare HLS transcode modes on a local video: wall-clock seconds per minute of source'
+
+    def add_arguments(self, parser):
+        parser.add_argument('source', help='Path to a local source video')
+        parser.add_argument(
+            '--modes', nargs='+', choices=TRANSCODE_MODES, default=list(TRANSCODE_MODES),
+            help='Modes to run, in order (default: all)',
+        )
+
+    def handle(self, *args, **options):
+        src = Path(options['source'])
+        if not src.is_file():
+            raise CommandError(f'Source not found: {src}')
+        try:
+            check_ffmpeg()
+        except RuntimeError as e:
+            raise CommandError(str(e))
+
+        minutes = _probe_duration(src) / 60
+        workers, threads = _parallelism(4)
+        self.stdout.write(
+            f'Source: {src.name} ({minutes:.1f} min) — pool of {workers} process(es), {threads} ffmpeg thread(s) each'
+        )
+
+        results = []
+        for mode in options['modes']:
+            with tempfile.TemporaryDirectory() as tmp:
+                out_dir = Path(tmp) / 'out'
+                self.stdout.write(f'  {mode}...')
+                started = time.perf_counter()
+                # 'segments' falls back to 'renditions' below HLS_SEGMENT_PARALLEL_MIN_SECONDS.
+                _run_ffmpeg(src, out_dir, mode=mode)
+                elapsed = time.perf_counter() - started
+            results.append((mode, elapsed))
+
+        baseline = results[0][1]
+        self.stdout.write('')
+        self.stdout.write(f'{"mode":<12}{"wall (s)":>10}{"s / source min":>16}{"speedup":>10}')
+        for mode, elapsed in results:
+            self.stdout.write(
+                f'{mode:<12}{elapsed:>10.1f}{elapsed / minutes:>16.2f}{baseline / elapsed:>9.2f}x'
+            )
@@ -0,0 +1,27 @@
+import signal
+
+from django.core.management.base import BaseCommand
+
+from apps.movies.announcements import EmailWorker
+
+
+class Command(BaseCommand):
+    help = 'Send queued new-movie / new-trailer announcement emails (EmailBroadcast) in rate-limited batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--poll-interval', type=float, help='Seconds between queue polls (default: EMAIL_POLL_INTERVAL)')
+        parser.add_argument('--once', action='store_true', help='Exit once no broadcast is due instead of polling forever')
+
+    def handle(self, *args, **options):
+        worker = EmailWorker(poll_interval=options.get('poll_interval'))
+
+        def _shutdown(signum, frame):
+            self.stdout.write('Shutting down — finishing the current batch...')
+            worker.stop()
+
+        signal.signal(signal.SIGTERM, _shutdown)
+        signal.signal(signal.SIGINT, _shutdown)
+
+        self.stdout.write(f'Email worker {worker.worker_id} started')
+        worker.run(once=options['once'])
+        self.stdout.write(self.style.SUCCESS('Email worker stopped.'))
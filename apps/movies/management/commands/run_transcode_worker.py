@@ -0,0 +1,33 @@
+import signal
+
+from django.core.management.base import BaseCommand
+
+from apps.movies.transcode_queue import TranscodeWorker
+
+
+class Command(BaseCommand):
+    help = 'Run queued HLS transcodes (TranscodeJob) with a bounded number of concurrent ffmpeg processes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, help='Max transcodes at once (default: TRANSCODE_CONCURRENCY)')
+        parser.add_argument('--poll-interval', type=float, help='Seconds between queue polls (default: TRANSCODE_POLL_INTERVAL)')
+        parser.add_argument('--once', action='store_true', help='Exit once the queue is drained instead of polling forever')
+
+    def handle(self, *args, **options):
+        worker = TranscodeWorker(
+            concurrency=options.get('concurrency'),
+            poll_interval=options.get('poll_interval'),
+        )
+
+        def _shutdown(signum, frame):
+            self.stdout.write('Shutting down — waiting for running transcodes to finish...')
+            worker.stop()
+
+        signal.signal(signal.SIGTERM, _shutdown)
+        signal.signal(signal.SIGINT, _shutdown)
+
+        self.stdout.write(
+            f'Transcode worker {worker.worker_id} started (concurrency={worker.concurrency})'
+        )
+        worker.run(once=options['once'])
+        self.stdout.write(self.style.SUCCESS('Transcode worker stopped.'))
@@ -0,0 +1,85 @@
+# Generated by Django 6.0.3 on 2026-10-17 02:04
+
+import unicodedata
+
+import django.contrib.postgres.search
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations, models
+from django.db.models import Value
+
+GIN_INDEX_NAME = 'movies_movie_search_vector_gin'
+
+# Frozen copies of the apps.movies.search helpers as of this migration, so
+# later changes to that module don't alter what the backfill does.
+SEARCH_CONFIG = 'simple'
+
+
+def normalize(text):
+    text = unicodedata.normalize('NFKD', text or '')
+    return ''.join(c for c in text if not unicodedata.combining(c)).lower()
+
+
+def build_search_document(movie):
+    parts = [
+        movie.title,
+        movie.overview,
+        ' '.join(str(g) for g in (movie.genres or [])),
+        ' '.join(str(c) for c in (movie.cast or [])),
+        movie.producer or '',
+    ]
+    return normalize(' '.join(p for p in parts if p))
+
+
+def search_vector_for(title, document):
+    return (
+        SearchVector(Value(normalize(title)), weight='A', config=SEARCH_CONFIG)
+        + SearchVector(Value(document), weight='B', config=SEARCH_CONFIG)
+    )
+
+
+def backfill_search_index(apps, schema_editor):
+    """Build the search document (and tsvector on PostgreSQL) for existing movies."""
+    Movie = apps.get_model('movies', 'Movie')
+    is_postgres = schema_editor.connection.vendor == 'postgresql'
+    for movie in Movie.objects.all().iterator():
+        document = build_search_document(movie)
+        values = {'search_document': document}
+        if is_postgres:
+            values['search_vector'] = search_vector_for(movie.title, document)
+        Movie.objects.filter(pk=movie.pk).update(**values)
+
+
+def create_gin_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {GIN_INDEX_NAME} '
+            f'ON movies_movie USING gin (search_vector)'
+        )
+
+
+def drop_gin_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(f'DROP INDEX IF EXISTS {GIN_INDEX_NAME}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0011_migrate_subtitle_files'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='movie',
+            name='search_document',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='movie',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_search_index, migrations.RunPython.noop),
+        # GIN indexes are PostgreSQL-only; SQLite (tests) uses the in-process index.
+        migrations.RunPython(create_gin_index, drop_gin_index),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.3 on 2026-10-17 02:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0013_transcodejob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='movie',
+            name='hls_progress',
+            field=models.PositiveSmallIntegerField(default=0, help_text='Percent of the HLS output uploaded to S3 while processing'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 6.0.3 on 2026-10-17 04:03
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def cancel_duplicate_active_jobs(apps, schema_editor):
+    """Keep one active job per movie (running first, then the oldest) so the constraint can be added."""
+    TranscodeJob = apps.get_model('movies', 'TranscodeJob')
+    active = TranscodeJob.objects.filter(status__in=['queued', 'running'])
+    kept = set()
+    duplicates = []
+    for job in active.order_by('movie_id', '-status', 'created_at', 'id'):  # 'running' > 'queued'
+        if job.movie_id in kept:
+            duplicates.append(job.pk)
+        else:
+            kept.add(job.movie_id)
+    TranscodeJob.objects.filter(pk__in=duplicates).update(
+        status='cancelled', finished_at=timezone.now(), lease_expires_at=None,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0015_email_broadcast'),
+    ]
+
+    operations = [
+        migrations.RunPython(cancel_duplicate_active_jobs, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='transcodejob',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ['queued', 'running'])), fields=('movie',), name='transcodejob_one_active_per_movie'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 6.0.3 on 2026-10-17 04:05
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def finish_duplicate_broadcasts(apps, schema_editor):
+    """Keep one unfinished broadcast per (movie, kind) (sending first, then the oldest) so the constraint can be added."""
+    EmailBroadcast = apps.get_model('movies', 'EmailBroadcast')
+    active = EmailBroadcast.objects.filter(status__in=['queued', 'sending'])
+    kept = set()
+    duplicates = []
+    for broadcast in active.order_by('movie_id', 'kind', '-status', 'created_at', 'id'):  # 'sending' > 'queued'
+        key = (broadcast.movie_id, broadcast.kind)
+        if key in kept:
+            duplicates.append(broadcast.pk)
+        else:
+            kept.add(key)
+    EmailBroadcast.objects.filter(pk__in=duplicates).update(
+        status='done', finished_at=timezone.now(), lease_expires_at=None,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0016_transcodejob_one_active_per_movie'),
+    ]
+
+    operations = [
+        migrations.RunPython(finish_duplicate_broadcasts, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='emailbroadcast',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ['queued', 'sending'])), fields=('movie', 'kind'), name='emailbroadcast_one_active_per_kind'),
+        ),
+    ]
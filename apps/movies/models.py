@@ -1,4 +1,5 @@
 from django.db import models, transaction
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import FileExtensionValidator
 from django.conf import settings
 
@@ -134,6 +135,14 @@ class Movie(models.Model):
     hls_error_message = models.TextField(blank=True, null=True)
     hls_started_at = models.DateTimeField(null=True, blank=True)
     hls_completed_at = models.DateTimeField(null=True, blank=True)
+    hls_progress = models.PositiveSmallIntegerField(
+        default=0,
+        help_text='Percent of the HLS output uploaded to S3 while processing',
+    )
+
+    # Full-text search (maintained on save — see search.py)
+    search_document = models.TextField(blank=True, default='', editable=False)
+    search_vector = SearchVectorField(null=True, editable=False)
 
     # Status
     release_date = models.DateField()
@@ -155,9 +164,16 @@ class Movie(models.Model):
         return self.title
     
     def increment_views(self):
-        """Increment view count when video is watched"""
+        """
+        Count a view when the video is watched.
+
+        Buffered in the shared view counter and flushed in batches with
+        F('views') + n (see view_counter.py), so concurrent streams never
+        lose increments or contend for this row.
+        """
+        from .view_counter import record_view
+        record_view(self.pk)
         self.views += 1
-        self.save(update_fields=['views'])
     
     @property
     def thumbnail_url(self):
@@ -273,4 +289,143 @@ class WatchProgress(models.Model):
         ordering = ['-last_watched_at']
 
     def __str__(self):
-        return f'{self.user} → {self.movie.title} ({self.progress_seconds}s)'
\ No newline at end of file
+        return f'{self.user} → {self.movie.title} ({self.progress_seconds}s)'
+
+class TranscodeJob(models.Model):
+    """
+    One queued HLS transcode of a movie, run by ``manage.py run_transcode_worker``.
+
+    A running job holds a lease that its worker renews with heartbeats; a job
+    whose lease expires (worker killed, deploy) is claimed again by any
+    worker. Failed attempts are retried with exponential backoff until
+    ``max_attempts`` is reached. See transcode_queue.py.
+    """
+    STATUS_CHOICES = [
+        ('queued',    'Queued'),
+        ('running',   'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed',    'Failed'),
+        ('cancelled', 'Cancelled'),
+    ]
+    ACTIVE_STATUSES = ('queued', 'running')
+
+    movie = models.ForeignKey(
+        Movie,
+        on_delete=models.CASCADE,
+        related_name='transcode_jobs',
+    )
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    # Earliest time the job may be claimed (pushed back on retry).
+    run_after = models.DateTimeField()
+    worker_id = models.CharField(max_length=100, blank=True, default='')
+    lease_expires_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='transcodejob_claim_idx'),
+        ]
+        constraints = [
+            # At most one queued/running job (ACTIVE_STATUSES) per movie, so two
+            # ffmpeg runs never write the same movies/hls/<id>/ prefix.
+            models.UniqueConstraint(
+                fields=['movie'],
+                condition=models.Q(status__in=['queued', 'running']),
+                name='transcodejob_one_active_per_movie',
+            ),
+        ]
+
+    def __str__(self):
+        return f'Transcode #{self.id} — movie {self.movie_id} ({self.status})'
+
+
+class EmailBroadcast(models.Model):
+    """
+    One new-movie / new-trailer announcement to every opted-in user, sent by
+    ``manage.py run_email_worker``. Per-recipient state lives in
+    EmailDelivery so an interrupted broadcast resumes where it stopped.
+    See announcements.py.
+    """
+    KIND_CHOICES = [
+        ('new_movie',   'New movie'),
+        ('new_trailer', 'New trailer'),
+    ]
+    STATUS_CHOICES = [
+        ('queued',  'Queued'),
+        ('sending', 'Sending'),
+        ('done',    'Done'),
+    ]
+
+    movie = models.ForeignKey(
+        Movie,
+        on_delete=models.CASCADE,
+        related_name='email_broadcasts',
+    )
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued', db_index=True)
+    # Recipient materialisation: last user id copied into EmailDelivery.
+    recipients_cursor = models.BigIntegerField(default=0)
+    recipients_ready = models.BooleanField(default=False)
+    worker_id = models.CharField(max_length=100, blank=True, default='')
+    lease_expires_at = models.DateTimeField(null=True, blank=True)
+    sent_count = models.PositiveIntegerField(default=0)
+    failed_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        constraints = [
+            # At most one unfinished broadcast per (movie, kind), so a double
+            # click never emails every opted-in user twice.
+            models.UniqueConstraint(
+                fields=['movie', 'kind'],
+                condition=models.Q(status__in=['queued', 'sending']),
+                name='emailbroadcast_one_active_per_kind',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.get_kind_display()} — {self.movie.title} ({self.status})'
+
+
+class EmailDelivery(models.Model):
+    """Delivery state of one broadcast email to one user."""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sent',    'Sent'),
+        ('failed',  'Failed'),
+    ]
+
+    broadcast = models.ForeignKey(
+        EmailBroadcast,
+        on_delete=models.CASCADE,
+        related_name='deliveries',
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='email_deliveries',
+    )
+    email = models.EmailField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True, null=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ('broadcast', 'user')
+        indexes = [
+            models.Index(fields=['broadcast', 'status', 'id'], name='emaildelivery_pending_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.email} — broadcast #{self.broadcast_id} ({self.status})'
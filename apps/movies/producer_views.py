@@ -1,8 +1,8 @@
-import csv
+import itertools
+
 from django.db import transaction
 from django.db.models import Sum, Count, Q, Avg, ExpressionWrapper, FloatField, F
-from django.db.models.functions import Coalesce, TruncDay, TruncMonth, TruncWeek
-from django.http import HttpResponse
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from datetime import timedelta
 from rest_framework.views import APIView
@@ -13,20 +13,14 @@ from drf_spectacular.utils import extend_schema, inline_serializer, OpenApiParam
 from drf_spectacular.types import OpenApiTypes
 
 from apps.users.permissions import IsProducerRole
+from apps.users.pagination import approximate_count, cursor_requested, keyset_paginate
 from apps.movies.models import Movie, WatchProgress
 from apps.movies.serializers import ProducerMovieListSerializer, ProducerMovieDetailSerializer
 from apps.payments.models import Payment, WithdrawalRequest
 from apps.payments.serializers import WithdrawalRequestSerializer, get_producer_wallet, producer_split
-
-
-def _csv_response(filename, headers, rows):
-    """Return a CSV file download response."""
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
-    writer = csv.writer(response)
-    writer.writerow(headers)
-    writer.writerows(rows)
-    return response
+from apps.payments.wallet import lock_wallet, summarize_wallet
+from apps.users import exports, rollups
+from apps.users.models import DailyMovieStats
 
 
 def _safe_page(request):
@@ -83,12 +77,20 @@ class ProducerMyMoviesView(ProducerBaseView):
                 default=1,
                 description='Page number (20 results per page)',
             ),
+            OpenApiParameter(
+                name='cursor',
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                required=False,
+                description='Opt into cursor pagination (empty for the first page, then `next_cursor`). Ignores `page`.',
+            ),
         ],
         responses={
             200: inline_serializer(
                 name='ProducerMovieListResponse',
                 fields={
                     'page': drf_serializers.IntegerField(),
+                    'next_cursor': drf_serializers.CharField(allow_null=True, required=False, help_text='Cursor mode only'),
                     'total_results': drf_serializers.IntegerField(),
                     'total_pages': drf_serializers.IntegerField(),
                     'results': ProducerMovieListSerializer(many=True),
@@ -103,6 +105,14 @@ class ProducerMyMoviesView(ProducerBaseView):
             producer_profile=request.user
         ).order_by('-created_at')
 
+        if cursor_requested(request):
+            page_movies, next_cursor = keyset_paginate(movies, request, '-created_at')
+            return Response({
+                'results': ProducerMovieListSerializer(page_movies, many=True).data,
+                'next_cursor': next_cursor,
+                'total_results': approximate_count(movies),
+            })
+
         page = _safe_page(request)
         page_size = 20
         start = (page - 1) * page_size
@@ -183,8 +193,7 @@ class ProducerReportView(ProducerBaseView):
                              required=False, description='Filter revenue from this date (YYYY-MM-DD)'),
             OpenApiParameter('end_date', OpenApiTypes.DATE, OpenApiParameter.QUERY,
                              required=False, description='Filter revenue up to this date inclusive (YYYY-MM-DD)'),
-            OpenApiParameter('export', OpenApiTypes.STR, OpenApiParameter.QUERY,
-                             required=False, enum=['csv'], description='Set to "csv" to download as CSV'),
+            exports.EXPORT_PARAMETER,
         ],
         responses={
             200: inline_serializer(
@@ -304,14 +313,15 @@ class ProducerReportView(ProducerBaseView):
                 },
             })
 
-        if request.GET.get('export') == 'csv':
+        fmt = exports.export_format(request)
+        if fmt:
             headers = [
                 'Movie Title', 'Upload Date', 'Release Date', 'Price (RWF)', 'Views',
                 'Total Watch Time (min)', 'Avg Watch Duration (min)', 'Completion Rate',
                 'Total Revenue (RWF)', 'Platform Commission (RWF)', 'Net Earnings (RWF)',
                 'Purchase Count', 'Pending Payments', 'Failed Payments',
             ]
-            rows = [
+            rows = (
                 [
                     m['title'],
                     m['upload_date'].date() if m['upload_date'] else '',
@@ -329,8 +339,8 @@ class ProducerReportView(ProducerBaseView):
                     m['payment_statuses']['failed'],
                 ]
                 for m in movies_data
-            ]
-            return _csv_response('my-movies-report.csv', headers, rows)
+            )
+            return exports.csv_export('my-movies-report.csv', headers, rows, fmt)
 
         return Response({
             'date_range': {'start_date': since.date(), 'end_date': until.date()},
@@ -353,12 +363,20 @@ class ProducerWithdrawalsView(ProducerBaseView):
                 default=1,
                 description='Page number (20 results per page)',
             ),
+            OpenApiParameter(
+                name='cursor',
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                required=False,
+                description='Opt into cursor pagination (empty for the first page, then `next_cursor`). Ignores `page`.',
+            ),
         ],
         responses={
             200: inline_serializer(
                 name='ProducerWithdrawalListResponse',
                 fields={
                     'page': drf_serializers.IntegerField(),
+                    'next_cursor': drf_serializers.CharField(allow_null=True, required=False, help_text='Cursor mode only'),
                     'total_results': drf_serializers.IntegerField(),
                     'total_pages': drf_serializers.IntegerField(),
                     'results': WithdrawalRequestSerializer(many=True),
@@ -369,7 +387,15 @@ class ProducerWithdrawalsView(ProducerBaseView):
         },
     )
     def get(self, request):
-        qs = WithdrawalRequest.objects.filter(producer=request.user)
+        qs = WithdrawalRequest.objects.filter(producer=request.user).order_by('-created_at')
+        if cursor_requested(request):
+            withdrawals, next_cursor = keyset_paginate(qs, request, '-created_at')
+            return Response({
+                'results': WithdrawalRequestSerializer(withdrawals, many=True).data,
+                'next_cursor': next_cursor,
+                'total_results': approximate_count(qs),
+            })
+
         page = _safe_page(request)
         page_size = 20
         start = (page - 1) * page_size
@@ -403,22 +429,12 @@ class ProducerWithdrawalsView(ProducerBaseView):
 
         amount = serializer.validated_data['amount']
 
-        # Hold a row-level lock on all non-rejected withdrawal rows for this
-        # producer before computing the available balance.  Without this lock,
-        # two concurrent requests can both read the same balance, both pass the
-        # check, and together overspend (TOCTOU race).
+        # Lock the producer's wallet row before reading the balance. Without
+        # this lock, two concurrent requests can both read the same balance,
+        # both pass the check, and together overspend (TOCTOU race). The new
+        # request's ledger entry is written under the same lock.
         with transaction.atomic():
-            locked = WithdrawalRequest.objects.select_for_update().filter(
-                producer=request.user,
-                status__in=['Pending', 'Approved', 'Processing', 'Completed'],
-            ).aggregate(total=Coalesce(Sum('amount'), 0))['total']
-
-            raw_revenue = Payment.objects.filter(
-                movie__producer_profile=request.user,
-                status='Completed',
-            ).aggregate(total=Coalesce(Sum('amount'), 0))['total']
-
-            balance = producer_split(raw_revenue)[0] - locked
+            balance = summarize_wallet(lock_wallet(request.user.id))['wallet_balance']
 
             if amount > balance:
                 return Response(
@@ -580,8 +596,7 @@ class ProducerEarningsReportView(ProducerBaseView):
                              required=False, description='Trend start date (YYYY-MM-DD). Overrides period default.'),
             OpenApiParameter('end_date', OpenApiTypes.DATE, OpenApiParameter.QUERY,
                              required=False, description='Trend end date inclusive (YYYY-MM-DD). Defaults to today.'),
-            OpenApiParameter('export', OpenApiTypes.STR, OpenApiParameter.QUERY,
-                             required=False, enum=['csv'], description='Set to "csv" to download as CSV'),
+            exports.EXPORT_PARAMETER,
         ],
         responses={
             200: inline_serializer(
@@ -628,50 +643,39 @@ class ProducerEarningsReportView(ProducerBaseView):
         period = request.query_params.get('period', 'monthly')
 
         if period == 'daily':
-            trunc_fn = TruncDay
             default_days = 30
         elif period == 'weekly':
-            trunc_fn = TruncWeek
             default_days = 84  # 12 weeks
         else:
             period = 'monthly'
-            trunc_fn = TruncMonth
             default_days = 365
 
         since, until = _parse_date_range(request, default_days=default_days)
 
-        # ── Trend (period-grouped, date-range filtered) ─────────────────────
-        rows = (
-            Payment.objects.filter(
-                movie__producer_profile=request.user,
-                status='Completed',
-                created_at__gte=since,
-                created_at__lte=until,
-            )
-            .annotate(bucket=trunc_fn('created_at'))
-            .values('bucket')
-            .annotate(gross=Coalesce(Sum('amount'), 0), count=Count('id'))
-            .order_by('bucket')
+        # ── Trend (daily rollups re-bucketed in memory, date-range filtered) ─
+        rollups.ensure_fresh()
+        mine = DailyMovieStats.objects.filter(producer=request.user, purchases__gt=0)
+        first_day, last_day = rollups.day_range(since, until)
+        daily = (
+            mine.filter(day__gte=first_day, day__lte=last_day)
+            .values('day')
+            .annotate(gross=Sum('revenue'), count=Sum('purchases'))
         )
 
         trend = []
-        for row in rows:
-            gross = row['gross']
+        for start, totals in rollups.rebucket(daily, period, ('gross', 'count')):
+            gross = totals['gross']
             earnings, commission = producer_split(gross)
             trend.append({
-                'period_start': row['bucket'],
+                'period_start': rollups.period_start(start),
                 'gross_revenue': gross,
                 'platform_commission': commission,
                 'producer_earnings': earnings,
-                'transactions': row['count'],
+                'transactions': totals['count'],
             })
 
         # ── All-time KPIs (not date-filtered — always lifetime totals) ───────
-        all_payments = Payment.objects.filter(
-            movie__producer_profile=request.user,
-            status='Completed',
-        )
-        agg = all_payments.aggregate(gross=Coalesce(Sum('amount'), 0), purchases=Count('id'))
+        agg = mine.aggregate(gross=Coalesce(Sum('revenue'), 0), purchases=Coalesce(Sum('purchases'), 0))
         total_gross = agg['gross']
         total_purchases = agg['purchases']
         total_net_earnings, total_platform_commission = producer_split(total_gross)
@@ -680,9 +684,9 @@ class ProducerEarningsReportView(ProducerBaseView):
         avg_revenue_per_movie = total_gross // total_movies if total_movies > 0 else 0
 
         best_row = (
-            all_payments
+            mine
             .values('movie_id', 'movie__title')
-            .annotate(revenue=Sum('amount'))
+            .annotate(revenue=Sum('revenue'))
             .order_by('-revenue')
             .first()
         )
@@ -713,7 +717,8 @@ class ProducerEarningsReportView(ProducerBaseView):
             'best_movie': best_movie,
         }
 
-        if request.GET.get('export') == 'csv':
+        fmt = exports.export_format(request)
+        if fmt:
             kpi_headers = ['KPI', 'Value']
             kpi_rows = [
                 ['Total Gross Revenue (RWF)', kpis['total_gross_revenue']],
@@ -728,24 +733,16 @@ class ProducerEarningsReportView(ProducerBaseView):
             ]
             trend_headers = ['Period Start', 'Gross Revenue (RWF)',
                              'Platform Commission (RWF)', 'Net Earnings (RWF)', 'Transactions']
-            trend_rows = [
+            trend_rows = (
                 [
                     t['period_start'].date() if t['period_start'] else '',
                     t['gross_revenue'], t['platform_commission'],
                     t['producer_earnings'], t['transactions'],
                 ]
                 for t in trend
-            ]
-            from django.http import HttpResponse
-            response = HttpResponse(content_type='text/csv')
-            response['Content-Disposition'] = f'attachment; filename="earnings-report-{period}.csv"'
-            import csv as _csv
-            writer = _csv.writer(response)
-            writer.writerows(kpi_rows)
-            writer.writerow([])
-            writer.writerow(trend_headers)
-            writer.writerows(trend_rows)
-            return response
+            )
+            rows = itertools.chain(kpi_rows, [[], trend_headers], trend_rows)
+            return exports.csv_export(f'earnings-report-{period}.csv', None, rows, fmt)
 
         return Response({
             'kpis': kpis,
@@ -765,11 +762,13 @@ class ProducerTransactionHistoryView(ProducerBaseView):
         description=(
             'Returns two DB-paginated sections: completed incoming payments and all withdrawal '
             'requests. Only Completed payments are included in the earnings section. '
-            'Use the `?page` parameter for both sections simultaneously.'
+            'Use the `?page` parameter for both sections simultaneously. '
+            'Add ?export=csv to stream the full history (both sections) as one CSV file.'
         ),
         parameters=[
             OpenApiParameter('page', OpenApiTypes.INT, OpenApiParameter.QUERY,
                              required=False, default=1, description='Page number (20 per page)'),
+            exports.EXPORT_PARAMETER,
         ],
         responses={
             200: inline_serializer(
@@ -819,6 +818,27 @@ class ProducerTransactionHistoryView(ProducerBaseView):
             status='Completed',
         ).select_related('movie').order_by('-created_at')
 
+        withdrawals_qs = WithdrawalRequest.objects.filter(
+            producer=request.user,
+        ).order_by('-created_at')
+
+        fmt = exports.export_format(request)
+        if fmt:
+            headers = ['Type', 'ID', 'Movie', 'Gross Amount (RWF)', 'Your Earnings (RWF)',
+                       'Withdrawal Amount (RWF)', 'Status', 'Date']
+            rows = itertools.chain(
+                (
+                    ['Payment', p.id, p.movie.title if p.movie else 'Unknown', p.amount,
+                     producer_split(p.amount)[0], '', p.status, p.created_at]
+                    for p in exports.iterate(payments_qs)
+                ),
+                (
+                    ['Withdrawal', w.id, '', '', '', w.amount, w.status, w.created_at]
+                    for w in exports.iterate(withdrawals_qs)
+                ),
+            )
+            return exports.csv_export('transaction-history.csv', headers, rows, fmt)
+
         payments_total = payments_qs.count()
         payment_entries = []
         for p in payments_qs[start:start + page_size]:
@@ -831,10 +851,6 @@ class ProducerTransactionHistoryView(ProducerBaseView):
                 'date': p.created_at,
             })
 
-        withdrawals_qs = WithdrawalRequest.objects.filter(
-            producer=request.user,
-        ).order_by('-created_at')
-
         withdrawals_total = withdrawals_qs.count()
 
         return Response({
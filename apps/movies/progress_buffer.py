@@ -0,0 +1,186 @@
+"""
+Write-behind buffer for watch-progress heartbeats.
+
+Players POST progress every ~15 s, which makes WatchProgressView our
+highest write-QPS endpoint. Instead of an ``update_or_create`` per
+heartbeat:
+
+1. ``record_progress`` stores each heartbeat in the shared cache under its
+   own key, ``watchprogress:buffer:<user>:<movie>:<seq>``, where ``seq``
+   comes from an atomic per-pair counter (``cache.incr``). The previous
+   heartbeat's key is dropped, so repeated heartbeats coalesce. The pair and
+   its latest entry are also kept in this process's dirty map.
+2. A daemon thread calls ``flush()`` every WATCH_PROGRESS_FLUSH_INTERVAL
+   seconds, writing all dirty pairs with one ``INSERT ... ON CONFLICT DO
+   UPDATE`` batch. When the counter shows a newer heartbeat (seen by another
+   worker), that one is written instead. Afterwards only the exact keys that
+   were written are deleted, so a heartbeat that arrives mid-flush is never
+   removed. The local copy covers entries the cache evicted before the flush.
+3. Reads (``buffered_progress``) overlay unflushed entries on top of the
+   WatchProgress rows, so GET progress / Continue Watching / My List never
+   lag behind the player.
+
+WATCH_PROGRESS_FLUSH_INTERVAL = 0 turns the buffer into write-through
+(every heartbeat flushes immediately), which is what the test suite uses.
+"""
+import logging
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .background import PeriodicFlusher
+from .models import Movie, WatchProgress
+
+logger = logging.getLogger(__name__)
+
+BUFFER_TTL = 3600  # unflushed entries survive a missed flush or two
+SEQ_TTL = 86400    # counters outlive any viewing session, so seqs never restart mid-session
+_UPDATE_FIELDS = ['progress_seconds', 'duration_seconds', 'completed', 'last_watched_at']
+
+# (user_id, movie_id) → (seq, entry) recorded by this process and not yet flushed.
+_dirty = {}
+_dirty_lock = threading.Lock()
+
+
+def _seq_key(user_id, movie_id):
+    return f'watchprogress:seq:{user_id}:{movie_id}'
+
+
+def _buffer_key(user_id, movie_id, seq):
+    return f'watchprogress:buffer:{user_id}:{movie_id}:{seq}'
+
+
+def _flush_interval():
+    return getattr(settings, 'WATCH_PROGRESS_FLUSH_INTERVAL', 10)
+
+
+def _as_progress(user_id, movie_id, entry):
+    """Unsaved WatchProgress carrying a buffered entry (serializer-compatible)."""
+    return WatchProgress(user_id=user_id, movie_id=movie_id, **entry)
+
+
+def _next_seq(user_id, movie_id):
+    key = _seq_key(user_id, movie_id)
+    for _ in range(3):
+        cache.add(key, 0, timeout=SEQ_TTL)
+        try:
+            return cache.incr(key)
+        except ValueError:  # expired between add and incr
+            continue
+    raise RuntimeError(f'Could not allocate a progress sequence for {key}')
+
+
+def record_progress(user_id, movie_id, progress_seconds, duration_seconds):
+    """
+    Buffer one heartbeat and return it as an unsaved WatchProgress.
+
+    Marked completed once the viewer reaches ≥ 90% of the total duration.
+    """
+    completed = duration_seconds > 0 and progress_seconds >= duration_seconds * 0.9
+    entry = {
+        'progress_seconds': progress_seconds,
+        'duration_seconds': duration_seconds,
+        'completed': completed,
+        'last_watched_at': timezone.now(),
+    }
+    seq = _next_seq(user_id, movie_id)
+    cache.set(_buffer_key(user_id, movie_id, seq), entry, timeout=BUFFER_TTL)
+    if seq > 1:
+        cache.delete(_buffer_key(user_id, movie_id, seq - 1))  # superseded
+
+    with _dirty_lock:
+        _dirty[(user_id, movie_id)] = (seq, entry)
+
+    if _flush_interval() > 0:
+        _flusher.ensure_started()
+    else:
+        flush()
+    return _as_progress(user_id, movie_id, entry)
+
+
+def buffered_progress(user_id, movie_ids):
+    """
+    Return {movie_id: unsaved WatchProgress} for this user's unflushed
+    heartbeats among ``movie_ids``. Two cache round trips.
+    """
+    seq_keys = {_seq_key(user_id, movie_id): movie_id for movie_id in movie_ids}
+    seqs = cache.get_many(seq_keys)
+    buffer_keys = {
+        _buffer_key(user_id, movie_id, seqs[key]): movie_id
+        for key, movie_id in seq_keys.items() if key in seqs
+    }
+    return {
+        buffer_keys[key]: _as_progress(user_id, buffer_keys[key], entry)
+        for key, entry in cache.get_many(buffer_keys).items()
+    }
+
+
+def _latest(pending):
+    """
+    {(user_id, movie_id): (seq, entry)} to write: this process's entry, or a
+    newer one another worker buffered. Pairs whose newer entry is not in the
+    cache are left to the process that recorded it.
+    """
+    current = cache.get_many([_seq_key(*pair) for pair in pending])
+    newer = {}
+    for pair, (seq, _) in pending.items():
+        latest = current.get(_seq_key(*pair))
+        if latest is not None and latest > seq:
+            newer[_buffer_key(*pair, latest)] = (pair, latest)
+    found = cache.get_many(newer)
+
+    chosen = {}
+    for pair, (seq, entry) in pending.items():
+        latest = current.get(_seq_key(*pair))
+        if latest is None or latest <= seq:
+            chosen[pair] = (seq, entry)
+            continue
+        key = _buffer_key(*pair, latest)
+        if key in found:
+            chosen[pair] = (latest, found[key])
+    return chosen
+
+
+def flush():
+    """
+    Write every dirty (user, movie) pair to WatchProgress in bulk.
+    Returns the number of rows upserted.
+    """
+    global _dirty
+    with _dirty_lock:
+        if not _dirty:
+            return 0
+        pending, _dirty = _dirty, {}
+
+    chosen = _latest(pending)
+    rows = [_as_progress(user_id, movie_id, entry) for (user_id, movie_id), (_, entry) in chosen.items()]
+
+    # Skip movies deleted since the heartbeat — one FK violation would fail the batch.
+    live = set(Movie.objects.filter(id__in={r.movie_id for r in rows}).values_list('id', flat=True))
+    rows = [r for r in rows if r.movie_id in live]
+
+    try:
+        WatchProgress.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=['user', 'movie'],
+            update_fields=_UPDATE_FIELDS,
+            batch_size=500,
+        )
+    except Exception:
+        with _dirty_lock:
+            # Heartbeats recorded since the swap are newer; keep them.
+            _dirty = {**pending, **_dirty}
+        logger.exception(f'[WatchProgress] Flush of {len(rows)} row(s) failed — will retry')
+        return 0
+
+    # Only the keys written above: a newer heartbeat lives under a higher seq.
+    cache.delete_many([_buffer_key(*pair, seq) for pair, (seq, _) in chosen.items()])
+    return len(rows)
+
+
+_flusher = PeriodicFlusher(
+    'watch-progress-flusher', flush, _flush_interval, has_pending=lambda: bool(_dirty),
+)
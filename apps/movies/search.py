@@ -0,0 +1,200 @@
+"""
+Full-text search for the movie catalog.
+
+Every movie keeps a normalised ``search_document`` (title, overview, genres,
+cast, producer) that is rebuilt on save.
+
+PostgreSQL: ``Movie.search_vector`` holds a weighted ``tsvector`` (title = A,
+everything else = B) behind a GIN index. Queries are prefix-matched so
+search-as-you-type works, and results are ordered by ``ts_rank``.
+
+Other backends (SQLite in tests / local dev): an in-process inverted index
+built from ``search_document``. It is rebuilt lazily whenever the catalog
+version changes, so a lookup only touches the postings for the query terms.
+"""
+import bisect
+import math
+import re
+import threading
+import unicodedata
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection
+from django.db.models import Case, F, IntegerField, Value, When
+
+from .catalog_cache import get_catalog_version
+
+# 'simple' = no stemming or stop words: titles and cast names are a mix of
+# Kinyarwanda, French, Swahili and English.
+SEARCH_CONFIG = 'simple'
+
+# Fields that feed the search document; saves that touch none of them skip reindexing.
+SEARCH_FIELDS = {'title', 'overview', 'genres', 'cast', 'producer', 'is_active'}
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def normalize(text):
+    """Lower-case and strip accents so 'Café' and 'cafe' index the same."""
+    text = unicodedata.normalize('NFKD', text or '')
+    return ''.join(c for c in text if not unicodedata.combining(c)).lower()
+
+
+def tokenize(text):
+    return _TOKEN_RE.findall(normalize(text))
+
+
+def build_search_document(movie):
+    """Return the normalised text indexed for a movie (title first)."""
+    parts = [
+        movie.title,
+        movie.overview,
+        ' '.join(str(g) for g in (movie.genres or [])),
+        ' '.join(str(c) for c in (movie.cast or [])),
+        movie.producer or '',
+    ]
+    return normalize(' '.join(p for p in parts if p))
+
+
+def search_vector_for(title, document):
+    """Weighted tsvector expression: title terms rank above the rest."""
+    return (
+        SearchVector(Value(normalize(title)), weight='A', config=SEARCH_CONFIG)
+        + SearchVector(Value(document), weight='B', config=SEARCH_CONFIG)
+    )
+
+
+def update_search_index(movie, document_saved=True):
+    """
+    Persist the search data for one movie after it was saved.
+
+    ``document_saved`` is False when the save used ``update_fields`` without
+    ``search_document``; the freshly built document is written here instead.
+    The tsvector is only maintained on PostgreSQL.
+    """
+    values = {}
+    if not document_saved:
+        values['search_document'] = movie.search_document
+    if connection.vendor == 'postgresql':
+        values['search_vector'] = search_vector_for(movie.title, movie.search_document)
+    if values:
+        type(movie).objects.filter(pk=movie.pk).update(**values)
+
+
+# ─────────────────────────────────────────────
+# In-process inverted index (non-PostgreSQL fallback)
+# ─────────────────────────────────────────────
+
+class InvertedIndex:
+    """
+    token → {movie_id: weight} postings over active movies.
+
+    A term's weight is its frequency in the document, with a bonus when it
+    appears in the title. Terms are kept sorted so prefix lookups are a
+    bisect plus a short scan.
+    """
+
+    TITLE_BONUS = 4.0
+
+    def __init__(self, rows):
+        self.postings = {}
+        self.views = {}
+        for movie_id, title, document, views in rows:
+            self.views[movie_id] = views
+            title_tokens = set(tokenize(title))
+            for token in tokenize(document):
+                bucket = self.postings.setdefault(token, {})
+                bonus = self.TITLE_BONUS if token in title_tokens and movie_id not in bucket else 0.0
+                bucket[movie_id] = bucket.get(movie_id, 0.0) + 1.0 + bonus
+        self.terms = sorted(self.postings)
+        self.size = len(self.views)
+
+    def _prefix_postings(self, prefix):
+        matches = {}
+        start = bisect.bisect_left(self.terms, prefix)
+        for term in self.terms[start:]:
+            if not term.startswith(prefix):
+                break
+            for movie_id, weight in self.postings[term].items():
+                matches[movie_id] = max(matches.get(movie_id, 0.0), weight)
+        return matches
+
+    def search(self, tokens):
+        """Return movie IDs matching every token (prefix match), best first."""
+        scores = None
+        for token in tokens:
+            matches = self._prefix_postings(token)
+            if not matches:
+                return []
+            idf = math.log(1 + self.size / len(matches))
+            if scores is None:
+                scores = {mid: w * idf for mid, w in matches.items()}
+            else:
+                scores = {
+                    mid: score + matches[mid] * idf
+                    for mid, score in scores.items() if mid in matches
+                }
+            if not scores:
+                return []
+        return sorted(scores, key=lambda mid: (-scores[mid], -self.views[mid], -mid))
+
+
+_index = None
+_index_version = None
+_index_lock = threading.Lock()
+
+
+def get_index():
+    """Return the inverted index for the current catalog version."""
+    global _index, _index_version
+    from .models import Movie
+
+    version = get_catalog_version()
+    with _index_lock:
+        if _index is None or _index_version != version:
+            rows = Movie.objects.filter(is_active=True).values_list(
+                'id', 'title', 'search_document', 'views'
+            )
+            _index = InvertedIndex(rows)
+            _index_version = version
+        return _index
+
+
+def reset_index():
+    """Drop the local index; the next search rebuilds it."""
+    global _index
+    with _index_lock:
+        _index = None
+
+
+# ─────────────────────────────────────────────
+# Public API
+# ─────────────────────────────────────────────
+
+def search_movies(queryset, q):
+    """
+    Filter ``queryset`` to movies matching ``q`` and order them by relevance
+    (ties broken by popularity).
+    """
+    tokens = tokenize(q)
+    if not tokens:
+        return queryset.none()
+
+    if connection.vendor == 'postgresql':
+        query = SearchQuery(
+            ' & '.join(f'{t}:*' for t in tokens),
+            search_type='raw',
+            config=SEARCH_CONFIG,
+        )
+        return queryset.filter(search_vector=query).annotate(
+            rank=SearchRank(F('search_vector'), query),
+        ).order_by('-rank', '-views', '-id')
+
+    ids = get_index().search(tokens)
+    if not ids:
+        return queryset.none()
+    relevance = Case(
+        *[When(pk=pk, then=position) for position, pk in enumerate(ids)],
+        output_field=IntegerField(),
+    )
+    return queryset.filter(pk__in=ids).order_by(relevance)
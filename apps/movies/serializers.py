@@ -1,8 +1,19 @@
 from rest_framework import serializers
-from apps.payments.models import Payment
+from apps.payments.entitlements import entitled_movie_ids, has_entitlement
 from .models import Movie, WatchProgress, Subtitle, LANGUAGE_CHOICES
 
 
+def purchased_movie_ids(user, movie_ids):
+    """
+    Return the subset of ``movie_ids`` the user has purchased.
+
+    Resolves ``has_purchased`` for a whole page of movies in a single query.
+    Pass the result to MovieSerializer / MovieDetailSerializer as the
+    ``purchased_ids`` context key.
+    """
+    return entitled_movie_ids(user, list(movie_ids))
+
+
 class MovieSerializer(serializers.ModelSerializer):
     """Basic movie serializer for list views"""
 
@@ -54,6 +65,8 @@ class MovieSerializer(serializers.ModelSerializer):
 
     def get_subtitles(self, obj):
         """Returns all subtitle tracks ordered by display order then language code."""
+        # Subtitle.Meta.ordering already sorts by (ordering, language_code);
+        # calling .order_by() here would bypass prefetch_related('subtitles').
         return [
             {
                 'id': s.id,
@@ -62,7 +75,7 @@ class MovieSerializer(serializers.ModelSerializer):
                 'url': s.subtitle_file.url if s.subtitle_file else None,
                 'is_default': s.is_default,
             }
-            for s in obj.subtitles.all().order_by('ordering', 'language_code')
+            for s in obj.subtitles.all()
         ]
 
     def get_producer_profile(self, obj):
@@ -76,13 +89,14 @@ class MovieSerializer(serializers.ModelSerializer):
         }
 
     def get_has_purchased(self, obj):
-        """True if the authenticated user has a completed payment for this movie."""
+        """True if the authenticated user has purchased this movie."""
+        purchased_ids = self.context.get('purchased_ids')
+        if purchased_ids is not None:
+            return obj.id in purchased_ids
         request = self.context.get('request')
-        if request is None or not request.user.is_authenticated:
+        if request is None:
             return False
-        return Payment.objects.filter(
-            user=request.user, movie=obj, status='Completed'
-        ).exists()
+        return has_entitlement(request.user, obj.id)
 
 
 class MovieDetailSerializer(serializers.ModelSerializer):
@@ -144,7 +158,7 @@ class MovieDetailSerializer(serializers.ModelSerializer):
                 'url': s.subtitle_file.url if s.subtitle_file else None,
                 'is_default': s.is_default,
             }
-            for s in obj.subtitles.all().order_by('ordering', 'language_code')
+            for s in obj.subtitles.all()
         ]
 
     def get_producer_profile(self, obj):
@@ -157,13 +171,14 @@ class MovieDetailSerializer(serializers.ModelSerializer):
         }
 
     def get_has_purchased(self, obj):
-        """True if the authenticated user has a completed payment for this movie."""
+        """True if the authenticated user has purchased this movie."""
+        purchased_ids = self.context.get('purchased_ids')
+        if purchased_ids is not None:
+            return obj.id in purchased_ids
         request = self.context.get('request')
-        if request is None or not request.user.is_authenticated:
+        if request is None:
             return False
-        return Payment.objects.filter(
-            user=request.user, movie=obj, status='Completed'
-        ).exists()
+        return has_entitlement(request.user, obj.id)
 
 
 class ProducerMovieListSerializer(serializers.ModelSerializer):
@@ -303,15 +318,11 @@ class MovieVideoAccessSerializer(serializers.ModelSerializer):
         ]
 
     def get_access_granted(self, obj):
-        """Return True if the requesting user has a completed payment for this movie."""
+        """Return True if the requesting user has purchased this movie."""
         request = self.context.get('request')
-        if request is None or not request.user.is_authenticated:
+        if request is None:
             return False
-        return Payment.objects.filter(
-            user=request.user,
-            movie=obj,
-            status='Completed',
-        ).exists()
+        return has_entitlement(request.user, obj.id)
 
 
 class MovieCreateSerializer(serializers.ModelSerializer):
@@ -359,6 +370,19 @@ class WatchProgressSerializer(serializers.ModelSerializer):
         return attrs
 
 
+class WatchProgressInputSerializer(serializers.Serializer):
+    """Validates a progress heartbeat without touching the database."""
+    progress_seconds = serializers.IntegerField(min_value=0, max_value=2147483647, required=False, default=0)
+    duration_seconds = serializers.IntegerField(min_value=0, max_value=2147483647, required=False, default=0)
+
+    def validate(self, attrs):
+        if attrs['duration_seconds'] and attrs['progress_seconds'] > attrs['duration_seconds']:
+            raise serializers.ValidationError(
+                {'progress_seconds': 'progress_seconds cannot exceed duration_seconds.'}
+            )
+        return attrs
+
+
 class MyListMovieSerializer(serializers.ModelSerializer):
     """
     Movie card shown in "My List" and "Continue Watching".
@@ -0,0 +1,43 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from . import search
+from .catalog_cache import bump_catalog_version
+from .models import Movie, Subtitle
+
+
+def _touches_search(update_fields):
+    return not update_fields or bool(set(update_fields) & search.SEARCH_FIELDS)
+
+
+@receiver(pre_save, sender=Movie)
+def movie_build_search_document(sender, instance, update_fields=None, **kwargs):
+    if _touches_search(update_fields):
+        instance.search_document = search.build_search_document(instance)
+
+
+@receiver(post_save, sender=Movie)
+def movie_saved(sender, instance, update_fields=None, **kwargs):
+    if _touches_search(update_fields):
+        search.update_search_index(
+            instance,
+            document_saved=not update_fields or 'search_document' in update_fields,
+        )
+        search.reset_index()
+    # Saves that only touch the view count must not empty the catalog cache;
+    # catalog pages overlay live view counts instead (see catalog_cache.py).
+    if update_fields and set(update_fields) <= {'views'}:
+        return
+    bump_catalog_version()
+
+
+@receiver(post_delete, sender=Movie)
+def movie_deleted(sender, instance, **kwargs):
+    search.reset_index()
+    bump_catalog_version()
+
+
+@receiver(post_save, sender=Subtitle)
+@receiver(post_delete, sender=Subtitle)
+def subtitle_changed(sender, instance, **kwargs):
+    bump_catalog_version()
@@ -0,0 +1,162 @@
+from datetime import date, timedelta
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.db import IntegrityError, transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from . import announcements
+from .announcements import _RateLimiter, claim_broadcast, queue_announcement, run_broadcast
+from .models import EmailBroadcast, EmailDelivery, Movie
+
+User = get_user_model()
+
+LOCMEM = 'django.core.mail.backends.locmem.EmailBackend'
+
+
+class FlakyBackend(EmailBackend):
+    """locmem backend that rejects every message to an address starting with 'bounce'."""
+
+    def send_messages(self, messages):
+        if any(m.to[0].startswith('bounce') for m in messages):
+            raise OSError('550 mailbox unavailable')
+        return super().send_messages(messages)
+
+
+@override_settings(
+    EMAIL_BACKEND=LOCMEM, EMAIL_RATE_LIMIT=0, EMAIL_BATCH_SIZE=2, EMAIL_RECIPIENT_CHUNK=2,
+    EMAIL_MAX_ATTEMPTS=2, EMAIL_RETRY_BACKOFF=60,
+)
+class AnnouncementQueueTests(TestCase):
+
+    def setUp(self):
+        self.movie = Movie.objects.create(
+            title='Premiere', overview='Test', release_date=date.today(), duration_minutes=90,
+        )
+        for i in range(5):
+            User.objects.create_user(email=f'fan{i}@example.com', password='Password123!', role='Viewer')
+        User.objects.create_user(
+            email='quiet@example.com', password='Password123!', role='Viewer', notify_new_movies=False,
+        )
+
+    def _run(self):
+        run_broadcast(claim_broadcast('worker-a'))
+
+    def test_queue_reuses_an_unfinished_broadcast(self):
+        first = queue_announcement(self.movie, 'new_movie')
+        self.assertEqual(queue_announcement(self.movie, 'new_movie'), first)
+        self.assertNotEqual(queue_announcement(self.movie, 'new_trailer'), first)
+
+    def test_one_unfinished_broadcast_per_kind(self):
+        queue_announcement(self.movie, 'new_movie')
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            EmailBroadcast.objects.create(movie=self.movie, kind='new_movie', status='sending')
+        EmailBroadcast.objects.update(status='done')
+        self.assertEqual(queue_announcement(self.movie, 'new_movie').status, 'queued')
+
+    def test_concurrent_queue_reuses_the_winning_broadcast(self):
+        winner = queue_announcement(self.movie, 'new_movie')
+        # The loser's locking read ran before the winner committed, so it saw no broadcast.
+        with patch.object(EmailBroadcast.objects, 'select_for_update', return_value=EmailBroadcast.objects.none()):
+            broadcast = queue_announcement(self.movie, 'new_movie')
+        self.assertEqual(broadcast, winner)
+        self.assertEqual(EmailBroadcast.objects.count(), 1)
+
+    def test_sends_each_batch_over_one_connection(self):
+        queue_announcement(self.movie, 'new_movie')
+        with patch('apps.movies.announcements.get_connection', wraps=announcements.get_connection) as conn:
+            self._run()
+        self.assertEqual(conn.call_count, 3)  # 5 recipients, batches of 2
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox), [f'fan{i}@example.com' for i in range(5)])
+        self.assertEqual(mail.outbox[0].subject, 'Now Showing: Premiere')
+
+        broadcast = EmailBroadcast.objects.get()
+        self.assertEqual((broadcast.status, broadcast.sent_count, broadcast.failed_count), ('done', 5, 0))
+        self.assertTrue(broadcast.recipients_ready)
+
+    def test_resume_skips_delivered_recipients(self):
+        broadcast = queue_announcement(self.movie, 'new_movie')
+        claimed = claim_broadcast('dead-worker')
+        announcements.materialize_recipients(claimed)
+        EmailDelivery.objects.filter(email__in=['fan0@example.com', 'fan1@example.com']).update(status='sent')
+        EmailBroadcast.objects.update(lease_expires_at=timezone.now() - timedelta(seconds=1))
+
+        self._run()
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox), [f'fan{i}@example.com' for i in range(2, 5)])
+        broadcast.refresh_from_db()
+        self.assertEqual(broadcast.status, 'done')
+
+    @override_settings(EMAIL_BACKEND='apps.movies.tests_announcements.FlakyBackend')
+    def test_failed_messages_are_retried_then_given_up(self):
+        User.objects.create_user(email='bounce@example.com', password='Password123!', role='Viewer')
+        queue_announcement(self.movie, 'new_movie')
+        self._run()
+
+        broadcast = EmailBroadcast.objects.get()
+        bounce = EmailDelivery.objects.get(email='bounce@example.com')
+        self.assertEqual((broadcast.status, broadcast.sent_count), ('sending', 5))
+        self.assertEqual((bounce.status, bounce.attempts), ('pending', 1))
+        self.assertIsNone(claim_broadcast('worker-b'), 'retry must wait out the backoff')
+
+        EmailBroadcast.objects.update(lease_expires_at=timezone.now() - timedelta(seconds=1))
+        self._run()
+        broadcast.refresh_from_db()
+        bounce.refresh_from_db()
+        self.assertEqual((bounce.status, bounce.attempts), ('failed', 2))
+        self.assertIn('mailbox unavailable', bounce.last_error)
+        self.assertEqual((broadcast.status, broadcast.sent_count, broadcast.failed_count), ('done', 5, 1))
+        self.assertEqual(len(mail.outbox), 5)
+
+    def test_unreachable_smtp_leaves_deliveries_pending(self):
+        queue_announcement(self.movie, 'new_movie')
+        with patch.object(EmailBackend, 'open', side_effect=ConnectionRefusedError('smtp down')):
+            self._run()
+        self.assertEqual(EmailDelivery.objects.filter(status='pending').count(), 5)
+        self.assertEqual(EmailBroadcast.objects.get().worker_id, '')
+
+    def test_worker_drains_queue(self):
+        queue_announcement(self.movie, 'new_movie')
+        queue_announcement(self.movie, 'new_trailer')
+        announcements.EmailWorker(poll_interval=0.01).run(once=True)
+        self.assertEqual(set(EmailBroadcast.objects.values_list('status', flat=True)), {'done'})
+        self.assertEqual(len(mail.outbox), 11)  # quiet@ still wants trailers
+
+
+class RateLimiterTests(SimpleTestCase):
+
+    def test_spaces_messages_to_the_rate(self):
+        now = [100.0]
+        sleeps = []
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            now[0] += seconds
+
+        limiter = _RateLimiter(4, clock=lambda: now[0], sleep=sleep)
+        for _ in range(3):
+            limiter.wait()
+        self.assertEqual(sleeps, [0.25, 0.25])
+
+    def test_zero_rate_never_sleeps(self):
+        limiter = _RateLimiter(0, sleep=lambda s: self.fail('slept'))
+        limiter.wait()
+        limiter.wait()
+
+
+@override_settings(EMAIL_BACKEND=LOCMEM)
+class MovieCreateQueuesAnnouncementTests(APITestCase):
+
+    def test_create_queues_instead_of_sending(self):
+        admin = User.objects.create_user(email='admin@example.com', password='Password123!', role='Admin')
+        self.client.force_authenticate(user=admin)
+        response = self.client.post('/api/movies/create/', {
+            'title': 'Queued', 'overview': 'Test', 'release_date': date.today(), 'duration_minutes': 90,
+        }, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(EmailBroadcast.objects.get().kind, 'new_movie')
@@ -0,0 +1,138 @@
+from datetime import date
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from apps.payments.entitlements import entitlement_cache
+from apps.payments.models import Payment
+from . import progress_buffer
+from .models import Movie, WatchProgress
+
+User = get_user_model()
+
+
+@override_settings(WATCH_PROGRESS_FLUSH_INTERVAL=60)
+@patch('apps.movies.progress_buffer._flusher')
+class WatchProgressBufferTests(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        entitlement_cache.clear()
+        progress_buffer._dirty.clear()
+        self.viewer = User.objects.create_user(
+            email='viewer@example.com', password='Password123!', role='Viewer',
+        )
+        self.movies = [
+            Movie.objects.create(
+                title=f'Movie {i}', overview='Test', release_date=date.today(), duration_minutes=90,
+            )
+            for i in range(2)
+        ]
+        for movie in self.movies:
+            Payment.objects.create(user=self.viewer, movie=movie, amount=500, status='Completed')
+        self.client.force_authenticate(user=self.viewer)
+
+    def _beat(self, movie, progress, duration=5400):
+        return self.client.post(
+            f'/api/movies/{movie.id}/progress/',
+            {'progress_seconds': progress, 'duration_seconds': duration},
+            format='json',
+        )
+
+    def test_heartbeats_are_coalesced_and_flushed_in_bulk(self, _flusher):
+        for progress in (15, 30, 45):
+            self._beat(self.movies[0], progress)
+        self._beat(self.movies[1], 60)
+        self.assertFalse(WatchProgress.objects.exists())
+
+        # One existence check for live movies + one bulk upsert.
+        with self.assertNumQueries(2):
+            self.assertEqual(progress_buffer.flush(), 2)
+        self.assertEqual(
+            WatchProgress.objects.get(user=self.viewer, movie=self.movies[0]).progress_seconds, 45
+        )
+        self.assertEqual(progress_buffer.buffered_progress(self.viewer.id, [m.id for m in self.movies]), {})
+
+        # Flush updates existing rows in place.
+        self._beat(self.movies[0], 90)
+        progress_buffer.flush()
+        self.assertEqual(WatchProgress.objects.count(), 2)
+        self.assertEqual(
+            WatchProgress.objects.get(user=self.viewer, movie=self.movies[0]).progress_seconds, 90
+        )
+
+    def test_heartbeat_during_flush_is_kept(self, _flusher):
+        self._beat(self.movies[0], 15)
+        bulk_create = WatchProgress.objects.bulk_create
+
+        def racing_bulk_create(*args, **kwargs):
+            # Heartbeats land after the flush read the buffer, before it cleans up.
+            self._beat(self.movies[0], 30)
+            self._beat(self.movies[1], 45)
+            return bulk_create(*args, **kwargs)
+
+        with patch.object(WatchProgress.objects, 'bulk_create', side_effect=racing_bulk_create):
+            self.assertEqual(progress_buffer.flush(), 1)
+        self.assertEqual(WatchProgress.objects.get(movie=self.movies[0]).progress_seconds, 15)
+
+        buffered = progress_buffer.buffered_progress(self.viewer.id, [m.id for m in self.movies])
+        self.assertEqual({m: wp.progress_seconds for m, wp in buffered.items()},
+                         {self.movies[0].id: 30, self.movies[1].id: 45})
+        self.assertEqual(progress_buffer.flush(), 2)
+        self.assertEqual(
+            {wp.movie_id: wp.progress_seconds for wp in WatchProgress.objects.all()},
+            {self.movies[0].id: 30, self.movies[1].id: 45},
+        )
+
+    def test_newer_heartbeat_from_another_worker_wins(self, _flusher):
+        self._beat(self.movies[0], 15)
+        # Another worker records a later heartbeat for the same pair.
+        with patch.object(progress_buffer, '_dirty', {}):
+            self._beat(self.movies[0], 75)
+        progress_buffer.flush()
+        self.assertEqual(WatchProgress.objects.get(movie=self.movies[0]).progress_seconds, 75)
+
+    def test_evicted_entries_are_still_flushed(self, _flusher):
+        self._beat(self.movies[0], 15)
+        cache.clear()
+        self.assertEqual(progress_buffer.flush(), 1)
+        self.assertEqual(WatchProgress.objects.get(movie=self.movies[0]).progress_seconds, 15)
+
+    def test_heartbeat_is_cheap(self, _flusher):
+        self._beat(self.movies[0], 15)  # primes the entitlement LRU
+        with self.assertNumQueries(0):
+            response = self._beat(self.movies[0], 30)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['progress_seconds'], 30)
+
+    def test_reads_see_unflushed_progress(self, _flusher):
+        self._beat(self.movies[0], 120)
+
+        response = self.client.get(f'/api/movies/{self.movies[0].id}/progress/')
+        self.assertEqual(response.data['progress_seconds'], 120)
+
+        response = self.client.get('/api/movies/continue-watching/')
+        self.assertEqual([m['id'] for m in response.data], [self.movies[0].id])
+        self.assertEqual(response.data[0]['progress_seconds'], 120)
+
+        response = self.client.get('/api/movies/my-list/')
+        progress = {m['id']: m['progress_seconds'] for m in response.data}
+        self.assertEqual(progress[self.movies[0].id], 120)
+
+    def test_unflushed_completion_hides_from_continue_watching(self, _flusher):
+        self._beat(self.movies[0], 100)
+        progress_buffer.flush()
+        self._beat(self.movies[0], 5000)  # ≥ 90% → completed, not yet flushed
+
+        response = self.client.get('/api/movies/continue-watching/')
+        self.assertEqual(response.data, [])
+
+    def test_invalid_heartbeat_rejected(self, _flusher):
+        response = self._beat(self.movies[0], 6000, duration=5400)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self._beat(self.movies[0], 'abc')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,152 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from apps.payments.models import Payment
+from .models import Movie, Subtitle
+
+User = get_user_model()
+
+
+class CatalogTestBase(APITestCase):
+    """Five active movies with subtitles; the viewer has bought the first two."""
+
+    def setUp(self):
+        cache.clear()
+        self.producer = User.objects.create_user(
+            email='producer@example.com',
+            password='Password123!',
+            first_name='Producer',
+            last_name='User',
+            role='Producer',
+        )
+        self.viewer = User.objects.create_user(
+            email='viewer@example.com',
+            password='Password123!',
+            role='Viewer',
+        )
+        tomorrow = timezone.now().date() + timedelta(days=1)
+        self.movies = []
+        for i in range(5):
+            movie = Movie.objects.create(
+                title=f'Query Movie {i}',
+                overview='Query count test',
+                price=1000,
+                rating=4.5,
+                views=i,
+                release_date=tomorrow,
+                producer_profile=self.producer,
+            )
+            Subtitle.objects.create(
+                movie=movie,
+                language_code='en',
+                subtitle_file=f'movies/subtitles/{movie.id}/en.vtt',
+            )
+            self.movies.append(movie)
+
+        for movie in self.movies[:2]:
+            Payment.objects.create(user=self.viewer, movie=movie, amount=1000, status='Completed')
+        Payment.objects.create(user=self.viewer, movie=self.movies[2], amount=1000, status='Failed')
+
+        self.client.force_authenticate(user=self.viewer)
+
+    def _assert_list(self, url, num_queries):
+        with self.assertNumQueries(num_queries):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 5)
+
+        purchased = {m['id'] for m in response.data['results'] if m['has_purchased']}
+        self.assertEqual(purchased, {self.movies[0].id, self.movies[1].id})
+        self.assertTrue(all(m['subtitles'] for m in response.data['results']))
+        self.assertTrue(all(m['producer_profile'] for m in response.data['results']))
+
+
+class ListViewQueryCountTests(CatalogTestBase):
+    """
+    List endpoints must run a fixed number of queries per request, no matter
+    how many movies are on the page: count + page + subtitles + purchases.
+    """
+
+    def test_discover(self):
+        self._assert_list('/api/movies/discover/', 5)
+
+    def test_search(self):
+        # Warm the in-process search index (SQLite fallback) first.
+        self.client.get('/api/movies/search/?q=Query')
+        self._assert_list('/api/movies/search/?q=Query', 4)
+
+    def test_popular(self):
+        self._assert_list('/api/movies/popular/', 5)
+
+    def test_now_playing(self):
+        self._assert_list('/api/movies/now-playing/', 5)
+
+    def test_top_rated(self):
+        self._assert_list('/api/movies/top-rated/', 5)
+
+    def test_upcoming(self):
+        self._assert_list('/api/movies/upcoming/', 5)
+
+    def test_movies_by_producer(self):
+        # One extra query to load the producer itself.
+        self._assert_list(f'/api/movies/producers/{self.producer.id}/', 6)
+
+    def test_anonymous_skips_purchase_query(self):
+        self.client.force_authenticate(user=None)
+        with self.assertNumQueries(4):
+            response = self.client.get('/api/movies/popular/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(any(m['has_purchased'] for m in response.data['results']))
+
+
+class CatalogCacheTests(CatalogTestBase):
+    """Cached catalog pages are shared across users and invalidated on writes."""
+
+    def test_cache_hit_only_resolves_views_and_purchases(self):
+        self.client.get('/api/movies/popular/')
+        self._assert_list('/api/movies/popular/', 2)
+
+    def test_cache_hit_is_shared_with_anonymous_users(self):
+        self.client.get('/api/movies/popular/')
+        self.client.force_authenticate(user=None)
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/movies/popular/')
+        self.assertFalse(any(m['has_purchased'] for m in response.data['results']))
+
+    def test_pages_and_sorts_are_cached_separately(self):
+        self.client.get('/api/movies/discover/?sort_by=popularity.desc')
+        with self.assertNumQueries(5):
+            self.client.get('/api/movies/discover/?sort_by=rating.desc')
+        # An empty page skips the subtitle, view and purchase lookups.
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/movies/discover/?page=2')
+        self.assertEqual(response.data['results'], [])
+
+    def test_movie_save_invalidates_cache(self):
+        self.client.get('/api/movies/popular/')
+        movie = self.movies[0]
+        movie.title = 'Renamed'
+        movie.save()
+        with self.assertNumQueries(5):
+            response = self.client.get('/api/movies/popular/')
+        self.assertIn('Renamed', [m['title'] for m in response.data['results']])
+
+    def test_subtitle_delete_invalidates_cache(self):
+        self.client.get('/api/movies/popular/')
+        Subtitle.objects.filter(movie=self.movies[0]).delete()
+        response = self.client.get('/api/movies/popular/')
+        movie = next(m for m in response.data['results'] if m['id'] == self.movies[0].id)
+        self.assertEqual(movie['subtitles'], [])
+
+    def test_view_count_save_keeps_cache(self):
+        self.client.get('/api/movies/popular/')
+        self.movies[0].increment_views()
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/movies/popular/')
+        movie = next(m for m in response.data['results'] if m['id'] == self.movies[0].id)
+        self.assertEqual(movie['views'], self.movies[0].views)
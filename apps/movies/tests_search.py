@@ -0,0 +1,95 @@
+from datetime import date
+
+from django.test import SimpleTestCase
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from .models import Movie
+from .search import InvertedIndex, build_search_document, tokenize
+
+
+class MovieSearchTests(APITestCase):
+    url = '/api/movies/search/'
+
+    def setUp(self):
+        self.inkotanyi = Movie.objects.create(
+            title='Inkotanyi',
+            overview='A story of courage.',
+            genres=['Drama', 'History'],
+            cast=['Jean Bosco'],
+            release_date=date.today(),
+            views=5,
+        )
+        self.courage = Movie.objects.create(
+            title='Courage',
+            overview='Friends on the road.',
+            genres=['Comédie'],
+            cast=['Aline Uwase'],
+            release_date=date.today(),
+            views=1,
+        )
+        self.hidden = Movie.objects.create(
+            title='Hidden Courage',
+            overview='Not released yet.',
+            release_date=date.today(),
+            is_active=False,
+        )
+
+    def _ids(self, q):
+        response = self.client.get(self.url, {'q': q})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [m['id'] for m in response.data['results']]
+
+    def test_title_match_ranks_above_overview_match(self):
+        self.assertEqual(self._ids('courage'), [self.courage.id, self.inkotanyi.id])
+
+    def test_matches_genres_and_cast(self):
+        self.assertEqual(self._ids('history'), [self.inkotanyi.id])
+        self.assertEqual(self._ids('uwase'), [self.courage.id])
+
+    def test_prefix_and_accent_insensitive(self):
+        self.assertEqual(self._ids('inko'), [self.inkotanyi.id])
+        self.assertEqual(self._ids('comedie'), [self.courage.id])
+
+    def test_all_terms_must_match(self):
+        self.assertEqual(self._ids('courage road'), [self.courage.id])
+        self.assertEqual(self._ids('courage missing'), [])
+
+    def test_inactive_movies_excluded(self):
+        self.assertNotIn(self.hidden.id, self._ids('hidden'))
+
+    def test_index_follows_saves(self):
+        self.assertEqual(self._ids('kigali'), [])
+        self.courage.overview = 'Set in Kigali.'
+        self.courage.save(update_fields=['overview'])
+        self.courage.refresh_from_db()
+        self.assertIn('kigali', self.courage.search_document)
+        self.assertEqual(self._ids('kigali'), [self.courage.id])
+
+    def test_punctuation_only_query_returns_nothing(self):
+        response = self.client.get(self.url, {'q': '!!'})
+        self.assertEqual(response.data['total_results'], 0)
+
+    def test_blank_query_rejected(self):
+        response = self.client.get(self.url, {'q': '  '})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class InvertedIndexTests(SimpleTestCase):
+
+    def test_tokenize_normalises(self):
+        self.assertEqual(tokenize('Café, NOIR!'), ['cafe', 'noir'])
+
+    def test_search_document(self):
+        movie = Movie(title='Umuco', overview='Culture', genres=['Drama'], cast=['Eric'], producer='Ikigembe')
+        self.assertEqual(build_search_document(movie), 'umuco culture drama eric ikigembe')
+
+    def test_ranking_prefers_title_then_views(self):
+        index = InvertedIndex([
+            (1, 'Other', 'other night', 100),
+            (2, 'Night', 'night', 1),
+            (3, 'Else', 'else night', 50),
+        ])
+        self.assertEqual(index.search(['night']), [2, 1, 3])
+        self.assertEqual(index.search(['nig', 'oth']), [1])
+        self.assertEqual(index.search(['zzz']), [])
@@ -0,0 +1,154 @@
+import base64
+import json
+from datetime import date
+from unittest.mock import patch
+from urllib.parse import parse_qs, urlparse
+
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import padding, rsa
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from apps.payments.entitlements import entitlement_cache
+from apps.payments.models import Payment
+from . import cloudfront_signing
+from .cloudfront_signing import expiry_for, sign_hls_url, sign_urls, signed_url_cache
+from .models import Movie
+
+User = get_user_model()
+
+_KEY = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+_PEM = _KEY.private_bytes(
+    serialization.Encoding.PEM,
+    serialization.PrivateFormat.TraditionalOpenSSL,
+    serialization.NoEncryption(),
+).decode()
+
+MASTER = 'https://cdn.example.com/movies/hls/7/master.m3u8'
+SUBTITLE = 'https://cdn.example.com/movies/subtitles/7/en.vtt'
+
+
+@override_settings(CLOUDFRONT_KEY_PAIR_ID='KTEST', CLOUDFRONT_PRIVATE_KEY=_PEM, CLOUDFRONT_SIGNATURE_BUCKET=300)
+class CloudFrontSigningTests(SimpleTestCase):
+
+    def setUp(self):
+        signed_url_cache.clear()
+        cloudfront_signing._signer_config = None
+
+    def test_key_is_parsed_once(self):
+        with patch(
+            'cryptography.hazmat.primitives.serialization.load_pem_private_key',
+            wraps=serialization.load_pem_private_key,
+        ) as load:
+            sign_hls_url(MASTER)
+            sign_hls_url(MASTER.replace('7', '8'))
+        self.assertEqual(load.call_count, 1)
+
+    def test_repeat_streams_in_a_bucket_reuse_the_signature(self):
+        signer = cloudfront_signing.get_signer()
+        with patch.object(signer, 'generate_presigned_url', wraps=signer.generate_presigned_url) as sign:
+            first = sign_hls_url(MASTER)
+            second = sign_hls_url(MASTER)
+        self.assertEqual(first, second)
+        self.assertEqual(sign.call_count, 1)
+        query = parse_qs(urlparse(first).query)
+        self.assertEqual(query['Key-Pair-Id'], ['KTEST'])
+        self.assertEqual(int(query['Expires'][0]) % 300, 3600 % 300)
+
+    def test_expiry_covers_the_requested_window(self):
+        self.assertEqual(expiry_for(3600, now=1000), 1200 + 3600)
+        self.assertEqual(expiry_for(3600, now=1199), 1200 + 3600)
+        self.assertEqual(expiry_for(3600, now=1200), 1500 + 3600)
+
+    def test_batch_signs_master_and_subtitles_with_one_expiry(self):
+        master, subtitle, missing = sign_urls([MASTER, SUBTITLE, None])
+        self.assertIsNone(missing)
+        self.assertTrue(master.startswith(MASTER + '?'))
+        self.assertTrue(subtitle.startswith(SUBTITLE + '?'))
+        self.assertEqual(
+            parse_qs(urlparse(master).query)['Expires'],
+            parse_qs(urlparse(subtitle).query)['Expires'],
+        )
+
+    @override_settings(CLOUDFRONT_PRIVATE_KEY='')
+    def test_plain_urls_when_not_configured(self):
+        self.assertEqual(sign_urls([MASTER, SUBTITLE]), [MASTER, SUBTITLE])
+
+
+def _cloudfront_b64decode(value):
+    return base64.b64decode(value.translate(str.maketrans('-_~', '+=/')))
+
+
+@override_settings(
+    CLOUDFRONT_KEY_PAIR_ID='KTEST', CLOUDFRONT_PRIVATE_KEY=_PEM, AWS_S3_CUSTOM_DOMAIN='cdn.example.com',
+)
+class SignedCookieTests(SimpleTestCase):
+
+    def setUp(self):
+        signed_url_cache.clear()
+        cloudfront_signing._signer_config = None
+
+    def test_one_signature_covers_the_movie_hls_tree(self):
+        cookies, expires_at = cloudfront_signing.signed_cookies(cloudfront_signing.hls_cookie_resource(7))
+        policy = _cloudfront_b64decode(cookies['CloudFront-Policy'])
+        statement = json.loads(policy)['Statement'][0]
+        self.assertEqual(statement['Resource'], 'https://cdn.example.com/movies/hls/7/*')
+        self.assertEqual(statement['Condition']['DateLessThan']['AWS:EpochTime'], expires_at)
+        self.assertEqual(cookies['CloudFront-Key-Pair-Id'], 'KTEST')
+        # Raises InvalidSignature if the signature does not match the policy.
+        _KEY.public_key().verify(
+            _cloudfront_b64decode(cookies['CloudFront-Signature']), policy, padding.PKCS1v15(), hashes.SHA1(),
+        )
+
+    @override_settings(CLOUDFRONT_KEY_PAIR_ID='')
+    def test_no_cookies_when_not_configured(self):
+        self.assertEqual(cloudfront_signing.signed_cookies('https://cdn.example.com/movies/hls/7/*'), (None, None))
+
+
+@override_settings(
+    CLOUDFRONT_KEY_PAIR_ID='KTEST', CLOUDFRONT_PRIVATE_KEY=_PEM, AWS_S3_CUSTOM_DOMAIN='cdn.example.com',
+    CLOUDFRONT_SIGNED_COOKIES=True, CLOUDFRONT_COOKIE_DOMAIN='.example.com',
+)
+class StreamCookieModeTests(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        entitlement_cache.clear()
+        signed_url_cache.clear()
+        self.viewer = User.objects.create_user(email='viewer@example.com', password='Password123!', role='Viewer')
+        self.movie = Movie.objects.create(
+            title='Cookie', overview='Test', release_date=date.today(), duration_minutes=90,
+            hls_status='ready', hls_master_key='movies/hls/1/master.m3u8',
+        )
+        Payment.objects.create(user=self.viewer, movie=self.movie, amount=500, status='Completed')
+        self.client.force_authenticate(user=self.viewer)
+
+    def test_stream_sets_wildcard_cookies_and_unsigned_playlist(self):
+        response = self.client.get(f'/api/movies/{self.movie.id}/stream/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['stream_auth'], 'cookie')
+        self.assertEqual(response.data['stream_url'], self.movie.hls_url)
+        for name in ('CloudFront-Policy', 'CloudFront-Signature', 'CloudFront-Key-Pair-Id'):
+            cookie = response.cookies[name]
+            self.assertEqual(cookie['path'], f'/movies/hls/{self.movie.id}/')
+            self.assertEqual(cookie['domain'], '.example.com')
+            self.assertTrue(cookie['secure'])
+            self.assertTrue(cookie['httponly'])
+
+    @override_settings(CLOUDFRONT_COOKIE_DOMAIN='')
+    def test_no_cookie_domain_falls_back_to_signed_urls(self):
+        # Host-only cookies would never be sent to the CloudFront host.
+        response = self.client.get(f'/api/movies/{self.movie.id}/stream/')
+        self.assertEqual(response.data['stream_auth'], 'url')
+        self.assertIn('Signature=', response.data['stream_url'])
+        self.assertNotIn('CloudFront-Policy', response.cookies)
+
+    @override_settings(CLOUDFRONT_SIGNED_COOKIES=False)
+    def test_url_mode_signs_the_playlist(self):
+        response = self.client.get(f'/api/movies/{self.movie.id}/stream/')
+        self.assertEqual(response.data['stream_auth'], 'url')
+        self.assertIn('Signature=', response.data['stream_url'])
+        self.assertNotIn('CloudFront-Policy', response.cookies)
@@ -0,0 +1,178 @@
+from concurrent.futures import Future
+from datetime import date, timedelta
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from . import transcode_queue
+from .models import Movie, TranscodeJob
+from .transcoding import start_hls_transcode
+
+User = get_user_model()
+
+
+@override_settings(TRANSCODE_MAX_ATTEMPTS=2, TRANSCODE_RETRY_BACKOFF=60, TRANSCODE_LEASE_SECONDS=300)
+class TranscodeQueueTests(TestCase):
+
+    def setUp(self):
+        self.movie = Movie.objects.create(
+            title='Queued', overview='Test', release_date=date.today(), duration_minutes=90,
+            video_file='movies/videos/queued.mp4',
+        )
+
+    def _claim(self, worker_id='worker-a'):
+        return transcode_queue.claim_job(worker_id)
+
+    def test_start_queues_one_job_per_movie(self):
+        job = start_hls_transcode(self.movie.id)
+        self.assertEqual(job.status, 'queued')
+        self.assertIsNone(start_hls_transcode(self.movie.id))
+        self.assertEqual(TranscodeJob.objects.count(), 1)
+        self.movie.refresh_from_db()
+        self.assertEqual(self.movie.hls_status, 'processing')
+
+    def test_force_cancels_the_active_job(self):
+        first = start_hls_transcode(self.movie.id)
+        self._claim()
+        second = start_hls_transcode(self.movie.id, force=True)
+        first.refresh_from_db()
+        self.assertEqual(first.status, 'cancelled')
+        self.assertEqual(second.status, 'queued')
+
+    def test_job_is_claimed_once(self):
+        start_hls_transcode(self.movie.id)
+        job = self._claim('worker-a')
+        self.assertEqual((job.status, job.attempts, job.worker_id), ('running', 1, 'worker-a'))
+        self.assertIsNotNone(job.lease_expires_at)
+        self.assertIsNone(self._claim('worker-b'))
+
+    @patch('apps.movies.transcoding.transcode_movie', return_value='movies/hls/1/master.m3u8')
+    def test_successful_run_marks_movie_ready(self, _transcode):
+        start_hls_transcode(self.movie.id)
+        transcode_queue.run_job(self._claim())
+        self.movie.refresh_from_db()
+        self.assertEqual(self.movie.hls_status, 'ready')
+        self.assertEqual(TranscodeJob.objects.get().status, 'succeeded')
+
+    @patch('apps.movies.transcoding.transcode_movie', side_effect=RuntimeError('ffmpeg exploded'))
+    def test_failures_retry_with_backoff_then_fail_the_movie(self, _transcode):
+        start_hls_transcode(self.movie.id)
+        before = timezone.now()
+        transcode_queue.run_job(self._claim())
+
+        job = TranscodeJob.objects.get()
+        self.assertEqual((job.status, job.attempts, job.last_error), ('queued', 1, 'ffmpeg exploded'))
+        self.assertGreaterEqual(job.run_after, before + timedelta(seconds=60))
+        self.assertIsNone(self._claim(), 'job must wait out its backoff')
+
+        TranscodeJob.objects.update(run_after=timezone.now())
+        transcode_queue.run_job(self._claim())
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('failed', 2))
+        self.movie.refresh_from_db()
+        self.assertEqual(self.movie.hls_status, 'failed')
+        self.assertEqual(self.movie.hls_error_message, 'ffmpeg exploded')
+
+    def test_expired_lease_is_requeued(self):
+        start_hls_transcode(self.movie.id)
+        job = self._claim('dead-worker')
+        TranscodeJob.objects.update(lease_expires_at=timezone.now() - timedelta(seconds=1))
+
+        self.assertEqual(transcode_queue.reclaim_expired_leases(), 1)
+        # The dead worker's lease is gone: it can neither heartbeat nor finish.
+        self.assertFalse(transcode_queue.heartbeat(job))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('queued', 1))
+        self.assertIn('stopped heartbeating', job.last_error)
+
+        TranscodeJob.objects.update(run_after=timezone.now())
+        self.assertEqual(self._claim('worker-b').attempts, 2)
+
+    @patch('apps.movies.transcoding.mark_ready')
+    def test_superseded_job_does_not_mark_ready(self, mark_ready):
+        start_hls_transcode(self.movie.id)
+        job = self._claim()
+        start_hls_transcode(self.movie.id, force=True)
+        self.assertFalse(transcode_queue.complete_job(job, 'movies/hls/1/master.m3u8'))
+        mark_ready.assert_not_called()
+
+    def test_one_active_job_per_movie(self):
+        start_hls_transcode(self.movie.id)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            TranscodeJob.objects.create(movie=self.movie, run_after=timezone.now())
+
+    def test_concurrent_enqueue_reuses_the_winning_job(self):
+        winner = transcode_queue.enqueue_transcode(self.movie.id)
+        # The loser's locking read ran before the winner committed, so it saw no active job.
+        with patch.object(TranscodeJob.objects, 'select_for_update', return_value=TranscodeJob.objects.none()):
+            job = transcode_queue.enqueue_transcode(self.movie.id)
+        self.assertEqual(job, winner)
+        self.assertEqual(TranscodeJob.objects.count(), 1)
+
+    def test_orphaned_processing_movies_are_requeued(self):
+        Movie.objects.filter(id=self.movie.id).update(hls_status='processing')
+        self.assertEqual(transcode_queue.requeue_orphans(), 1)
+        self.assertEqual(transcode_queue.requeue_orphans(), 0)
+
+
+class InlineExecutor:
+    """ThreadPoolExecutor stand-in that runs jobs on submit (in-memory SQLite is not thread-friendly)."""
+
+    def __init__(self, max_workers, thread_name_prefix=''):
+        self.max_workers = max_workers
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    def submit(self, fn, *args):
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+
+@patch('apps.movies.transcode_queue.ThreadPoolExecutor', InlineExecutor)
+@patch('apps.movies.transcode_queue.close_old_connections')
+class TranscodeWorkerTests(TestCase):
+
+    @patch('apps.movies.transcoding.transcode_movie', return_value='movies/hls/1/master.m3u8')
+    def test_worker_drains_queue(self, _transcode, _close):
+        movies = [
+            Movie.objects.create(
+                title=f'Movie {i}', overview='Test', release_date=date.today(), duration_minutes=90,
+            )
+            for i in range(3)
+        ]
+        for movie in movies:
+            start_hls_transcode(movie.id)
+        transcode_queue.TranscodeWorker(concurrency=2, poll_interval=0.01).run(once=True)
+        self.assertEqual(set(TranscodeJob.objects.values_list('status', flat=True)), {'succeeded'})
+        self.assertEqual(Movie.objects.filter(hls_status='ready').count(), 3)
+
+
+class AdminHLSHealthQueueTests(APITestCase):
+
+    def test_reports_queue_and_stalled_jobs(self):
+        admin = User.objects.create_user(email='admin@example.com', password='Password123!', role='Admin')
+        movie = Movie.objects.create(
+            title='Stuck', overview='Test', release_date=date.today(), duration_minutes=90,
+        )
+        start_hls_transcode(movie.id)
+        transcode_queue.claim_job('dead-worker')
+        TranscodeJob.objects.update(lease_expires_at=timezone.now() - timedelta(minutes=1))
+
+        self.client.force_authenticate(user=admin)
+        response = self.client.get('/api/admin/dashboard/reports/hls-health/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['queue']['running'], 1)
+        self.assertEqual(response.data['queue']['stalled'], 1)
+        job = response.data['stuck_processing'][0]['job']
+        self.assertEqual(job['worker_id'], 'dead-worker')
+        self.assertTrue(job['lease_expired'])
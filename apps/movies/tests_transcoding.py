@@ -0,0 +1,194 @@
+import pickle
+import tempfile
+import threading
+from datetime import date
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import ffmpeg
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from . import transcoding
+from .hls_upload import HLSUploader
+from .models import Movie
+
+
+class ChunkPlanTests(SimpleTestCase):
+
+    def test_chunks_cover_the_source_on_segment_boundaries(self):
+        plan = transcoding._chunk_plan(duration=650.5, chunk_seconds=200, segment_duration=6)
+        self.assertEqual([start for start, _ in plan], [0, 198, 396, 594])
+        self.assertTrue(all(start % 6 == 0 for start, _ in plan))
+        self.assertAlmostEqual(sum(length for _, length in plan), 650.5)
+
+    def test_chunk_is_at_least_one_segment(self):
+        self.assertEqual(transcoding._chunk_plan(10, chunk_seconds=2, segment_duration=6), [(0, 6), (6, 4)])
+
+
+class ParallelismTests(SimpleTestCase):
+
+    @patch('apps.movies.transcoding.os.cpu_count', return_value=8)
+    def test_pool_is_capped_by_cores_and_splits_threads(self, _cpu):
+        self.assertEqual(transcoding._parallelism(4), (4, 2))
+        self.assertEqual(transcoding._parallelism(40), (8, 1))
+
+    @override_settings(HLS_MAX_PARALLEL_ENCODES=2)
+    @patch('apps.movies.transcoding.os.cpu_count', return_value=8)
+    def test_configured_limit(self, _cpu):
+        self.assertEqual(transcoding._parallelism(4), (2, 4))
+
+
+@override_settings(HLS_SEGMENT_PARALLEL_MIN_SECONDS=1200)
+class ModeDispatchTests(SimpleTestCase):
+
+    def _run(self, mode, tmp):
+        out_dir = Path(tmp) / 'out'
+        out_dir.mkdir()
+        transcoding._run_ffmpeg(Path(tmp) / 'source.mp4', out_dir, mode=mode)
+        self.assertTrue((out_dir / 'master.m3u8').exists())
+
+    @patch('apps.movies.transcoding._run_ffmpeg_renditions')
+    @patch('apps.movies.transcoding._run_ffmpeg_segments')
+    @patch('apps.movies.transcoding._probe_duration', return_value=300.0)
+    def test_short_sources_skip_segment_mode(self, _probe, segments, renditions):
+        with tempfile.TemporaryDirectory() as tmp:
+            self._run('segments', tmp)
+        segments.assert_not_called()
+        renditions.assert_called_once()
+
+    @patch('apps.movies.transcoding._run_ffmpeg_renditions')
+    @patch('apps.movies.transcoding._run_ffmpeg_segments')
+    @patch('apps.movies.transcoding._probe_duration', return_value=5400.0)
+    def test_long_sources_use_segment_mode(self, _probe, segments, renditions):
+        with tempfile.TemporaryDirectory() as tmp:
+            self._run('segments', tmp)
+        segments.assert_called_once()
+        renditions.assert_not_called()
+
+    def test_unknown_mode_is_rejected(self):
+        with self.assertRaises(ValueError):
+            transcoding._run_ffmpeg(Path('source.mp4'), Path('out'), mode='gpu')
+
+
+class FakeS3:
+    """Records uploads; ``fail`` maps key → number of failures before success."""
+
+    def __init__(self, fail=None):
+        self.fail = dict(fail or {})
+        self.uploaded = []
+        self.lock = threading.Lock()
+
+    def upload_file(self, filename, bucket, key, ExtraArgs=None):
+        with self.lock:
+            if self.fail.get(key):
+                self.fail[key] -= 1
+                raise ConnectionError('reset by peer')
+            self.uploaded.append((key, ExtraArgs['ContentType']))
+
+
+@override_settings(HLS_UPLOAD_CONCURRENCY=4, HLS_UPLOAD_RETRIES=3)
+@patch('apps.movies.hls_upload.time.sleep')
+class HLSUploaderTests(TestCase):
+
+    def setUp(self):
+        self.movie = Movie.objects.create(
+            title='Upload', overview='Test', release_date=date.today(), duration_minutes=90,
+        )
+        self.tmp = tempfile.TemporaryDirectory()
+        self.out_dir = Path(self.tmp.name)
+        for r in ('720p', '360p'):
+            (self.out_dir / r).mkdir()
+            (self.out_dir / r / 'playlist.m3u8').write_text('#EXTM3U\n')
+            for i in range(5):
+                (self.out_dir / r / f'seg{i:03d}.ts').write_bytes(b'ts')
+        (self.out_dir / 'master.m3u8').write_text('#EXTM3U\n')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_uploads_segments_before_playlists(self, _sleep):
+        s3 = FakeS3()
+        transcoding._upload_hls(s3, self.out_dir, self.movie.id)
+
+        keys = [key for key, _ in s3.uploaded]
+        self.assertEqual(len(keys), 13)
+        self.assertEqual(keys[-1], f'movies/hls/{self.movie.id}/master.m3u8')
+        self.assertTrue(all(k.endswith('.ts') for k in keys[:10]))
+        self.assertIn((f'movies/hls/{self.movie.id}/720p/seg000.ts', 'video/MP2T'), s3.uploaded)
+        self.movie.refresh_from_db()
+        self.assertEqual(self.movie.hls_progress, 100)
+
+    def test_each_object_is_retried(self, _sleep):
+        key = f'movies/hls/{self.movie.id}/360p/seg002.ts'
+        s3 = FakeS3(fail={key: 2})
+        transcoding._upload_hls(s3, self.out_dir, self.movie.id)
+        self.assertIn(key, [k for k, _ in s3.uploaded])
+
+    def test_persistent_failure_aborts_before_playlists(self, _sleep):
+        key = f'movies/hls/{self.movie.id}/360p/seg002.ts'
+        s3 = FakeS3(fail={key: 3})
+        with self.assertRaises(RuntimeError):
+            transcoding._upload_hls(s3, self.out_dir, self.movie.id)
+        self.assertFalse(any(k.endswith('.m3u8') for k, _ in s3.uploaded))
+
+    @patch.object(HLSUploader, 'report_progress')
+    def test_streaming_watch_skips_unfinished_segments(self, _report, _sleep):
+        (self.out_dir / '720p' / 'seg005.ts.tmp').write_bytes(b'partial')
+        s3 = FakeS3()
+        with HLSUploader(s3, self.movie.id, self.out_dir, expected=20) as uploader:
+            stop = threading.Event()
+            watcher = threading.Thread(target=uploader.watch, args=(stop,), kwargs={'poll_interval': 0.01})
+            watcher.start()
+            threading.Event().wait(0.1)
+            stop.set()
+            watcher.join()
+            uploader.wait()
+            self.assertEqual(len(s3.uploaded), 10)
+            uploader.upload_all()
+        self.assertFalse(any(k.endswith('.tmp') for k, _ in s3.uploaded))
+
+
+class SourceInputTests(SimpleTestCase):
+
+    def test_http_sources_reconnect(self):
+        url = 'https://bucket.s3.amazonaws.com/v.mp4?X-Amz-Signature=x'
+        args = transcoding._input(url, ss=60).output('out.ts').compile()
+        self.assertIn('-reconnect', args)
+        self.assertLess(args.index('-ss'), args.index(url))
+        self.assertNotIn('-reconnect', transcoding._input('/tmp/source.mp4').output('out.ts').compile())
+
+    def test_ffmpeg_failures_survive_the_process_pool(self):
+        stream = ffmpeg.input('in.mp4').output('out.ts')
+        with patch.object(type(stream), 'run', side_effect=ffmpeg.Error('ffmpeg', b'', b'frame=1\nConnection reset by peer\n')):
+            with self.assertRaises(transcoding.FFmpegError) as ctx:
+                transcoding._execute(stream, 'ffmpeg')
+        self.assertEqual(str(pickle.loads(pickle.dumps(ctx.exception))), 'Connection reset by peer')
+
+
+@override_settings(HLS_SOURCE_MODE='url', HLS_UPLOAD_STREAMING=False)
+@patch('apps.movies.transcoding.check_ffmpeg')
+class SourceModeTests(TestCase):
+
+    def setUp(self):
+        self.movie = Movie.objects.create(
+            title='Source', overview='Test', release_date=date.today(), duration_minutes=90,
+            video_file='movies/videos/source.mp4',
+        )
+        self.s3 = MagicMock()
+        self.s3.generate_presigned_url.return_value = 'https://bucket.s3.amazonaws.com/movies/videos/source.mp4?sig'
+
+    def test_url_mode_skips_the_download(self, _check):
+        with patch('apps.movies.transcoding.s3_client', return_value=self.s3), \
+                patch('apps.movies.transcoding._transcode_and_upload') as run:
+            transcoding.transcode_movie(self.movie.id)
+        self.s3.download_file.assert_not_called()
+        self.assertTrue(run.call_args.args[1].startswith('https://'))
+
+    def test_falls_back_to_download_when_streaming_read_fails(self, _check):
+        with patch('apps.movies.transcoding.s3_client', return_value=self.s3), \
+                patch('apps.movies.transcoding._transcode_and_upload',
+                      side_effect=[transcoding.FFmpegError('Connection reset by peer'), None]) as run:
+            key = transcoding.transcode_movie(self.movie.id)
+        self.assertEqual(key, f'movies/hls/{self.movie.id}/master.m3u8')
+        self.s3.download_file.assert_called_once()
+        self.assertTrue(run.call_args.args[1].endswith('source.mp4'))
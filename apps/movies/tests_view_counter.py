@@ -0,0 +1,76 @@
+from datetime import date
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from . import view_counter
+from .catalog_cache import apply_live_views
+from .models import Movie
+
+
+@override_settings(VIEW_COUNT_FLUSH_INTERVAL=60)
+@patch('apps.movies.view_counter._flusher')
+class ViewCounterTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        view_counter._dirty.clear()
+        self.movies = [
+            Movie.objects.create(
+                title=f'Movie {i}', overview='Test', release_date=date.today(),
+                duration_minutes=90, views=10,
+            )
+            for i in range(2)
+        ]
+
+    def test_views_are_counted_without_touching_the_database(self, _flusher):
+        with self.assertNumQueries(0):
+            for _ in range(3):
+                self.movies[0].increment_views()
+        self.assertEqual(self.movies[0].views, 13)
+        self.assertEqual(Movie.objects.get(pk=self.movies[0].pk).views, 10)
+        self.assertEqual(view_counter.pending_views([m.id for m in self.movies]), {self.movies[0].id: 3})
+        _flusher.ensure_started.assert_called()
+
+    def test_flush_applies_all_deltas_in_one_update(self, _flusher):
+        for _ in range(3):
+            view_counter.record_view(self.movies[0].id)
+        view_counter.record_view(self.movies[1].id)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(view_counter.flush(), 4)
+        self.assertEqual(
+            dict(Movie.objects.values_list('id', 'views')),
+            {self.movies[0].id: 13, self.movies[1].id: 11},
+        )
+        self.assertEqual(view_counter.pending_views([m.id for m in self.movies]), {})
+
+        # Nothing dirty: no query at all.
+        with self.assertNumQueries(0):
+            self.assertEqual(view_counter.flush(), 0)
+
+    def test_failed_flush_keeps_pending_views(self, _flusher):
+        view_counter.record_view(self.movies[0].id)
+        with patch.object(Movie.objects, 'filter', side_effect=RuntimeError('db down')):
+            self.assertEqual(view_counter.flush(), 0)
+        self.assertEqual(view_counter.pending_views([self.movies[0].id]), {self.movies[0].id: 1})
+
+        self.assertEqual(view_counter.flush(), 1)
+        self.assertEqual(Movie.objects.get(pk=self.movies[0].pk).views, 11)
+
+    def test_live_views_reorder_popular_page(self, _flusher):
+        body = {'results': [
+            {'id': self.movies[1].id, 'views': 10},
+            {'id': self.movies[0].id, 'views': 10},
+        ]}
+        for _ in range(5):
+            view_counter.record_view(self.movies[0].id)
+
+        live = apply_live_views(body, resort=True)
+        self.assertEqual(
+            [(m['id'], m['views']) for m in live['results']],
+            [(self.movies[0].id, 15), (self.movies[1].id, 10)],
+        )
+        # The cached body is never mutated.
+        self.assertEqual(body['results'][1]['views'], 10)
@@ -0,0 +1,293 @@
+"""
+Database-backed queue for HLS transcodes.
+
+The web process only records a TranscodeJob (``enqueue_transcode``); ffmpeg
+runs in ``manage.py run_transcode_worker``, so deploys and gunicorn worker
+recycles no longer kill transcodes half-way and leave movies in
+``processing``.
+
+- One active job per movie: a partial unique constraint
+  (transcodejob_one_active_per_movie) backs the locking read in
+  ``enqueue_transcode``, which finds nothing to lock when no job exists yet.
+  An enqueue that loses that race reuses the winner's job.
+- Claiming: a worker takes the oldest due job with ``SELECT ... FOR UPDATE
+  SKIP LOCKED`` (PostgreSQL) plus a conditional UPDATE, so two workers never
+  run the same job. Each worker runs at most TRANSCODE_CONCURRENCY jobs.
+- Leases: a claimed job holds a lease of TRANSCODE_LEASE_SECONDS that a
+  heartbeat thread renews. When a worker dies its leases expire and the job
+  is put back on the queue as a failed attempt.
+- Retries: a failed attempt is retried after TRANSCODE_RETRY_BACKOFF *
+  2**(attempt - 1) seconds (capped at TRANSCODE_RETRY_BACKOFF_MAX). After
+  ``max_attempts`` the job and the movie are marked failed.
+"""
+import logging
+import os
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import transcoding
+from .models import Movie, TranscodeJob
+
+logger = logging.getLogger(__name__)
+
+
+def _lease_seconds():
+    return getattr(settings, 'TRANSCODE_LEASE_SECONDS', 300)
+
+
+def default_worker_id():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def retry_delay(attempt):
+    """Backoff before retry number ``attempt`` (1-based)."""
+    base = getattr(settings, 'TRANSCODE_RETRY_BACKOFF', 60)
+    cap = getattr(settings, 'TRANSCODE_RETRY_BACKOFF_MAX', 3600)
+    return timedelta(seconds=min(base * 2 ** (attempt - 1), cap))
+
+
+# ─────────────────────────────────────────────
+# Producer side (web process)
+# ─────────────────────────────────────────────
+
+def enqueue_transcode(movie_id, replace=False):
+    """
+    Queue a transcode of ``movie_id`` and return its job.
+
+    An already queued/running job for the movie is reused, unless
+    ``replace`` is True (new video file) — then it is cancelled and a fresh
+    job is queued.
+    """
+    try:
+        return _enqueue(movie_id, replace)
+    except IntegrityError:
+        # A concurrent enqueue created the movie's active job first; the
+        # transcodejob_one_active_per_movie constraint allows only one.
+        if not replace:
+            job = TranscodeJob.objects.filter(
+                movie_id=movie_id, status__in=TranscodeJob.ACTIVE_STATUSES,
+            ).first()
+            if job is not None:
+                return job
+        return _enqueue(movie_id, replace)
+
+
+def _enqueue(movie_id, replace):
+    with transaction.atomic():
+        active = TranscodeJob.objects.select_for_update().filter(
+            movie_id=movie_id, status__in=TranscodeJob.ACTIVE_STATUSES,
+        )
+        if replace:
+            active.update(status='cancelled', finished_at=timezone.now(), lease_expires_at=None)
+        else:
+            job = active.first()
+            if job is not None:
+                return job
+        return TranscodeJob.objects.create(
+            movie_id=movie_id,
+            run_after=timezone.now(),
+            max_attempts=getattr(settings, 'TRANSCODE_MAX_ATTEMPTS', 3),
+        )
+
+
+# ─────────────────────────────────────────────
+# Worker side
+# ─────────────────────────────────────────────
+
+def claim_job(worker_id):
+    """Lease the oldest due queued job to ``worker_id``. Returns None if there is none."""
+    now = timezone.now()
+    with transaction.atomic():
+        job = (
+            TranscodeJob.objects.select_for_update(skip_locked=True)
+            .filter(status='queued', run_after__lte=now)
+            .order_by('run_after', 'id')
+            .first()
+        )
+        if job is None:
+            return None
+        claimed = TranscodeJob.objects.filter(pk=job.pk, status='queued').update(
+            status='running',
+            attempts=F('attempts') + 1,
+            worker_id=worker_id,
+            started_at=now,
+            heartbeat_at=now,
+            lease_expires_at=now + timedelta(seconds=_lease_seconds()),
+        )
+    if not claimed:
+        return None
+    job.refresh_from_db()
+    logger.info(f'[HLS] [{job.movie_id}] Job #{job.id} claimed by {worker_id} (attempt {job.attempts}/{job.max_attempts})')
+    return job
+
+
+def _owned(job):
+    """Queryset matching ``job`` only while this attempt still holds it."""
+    return TranscodeJob.objects.filter(
+        pk=job.pk, status='running', worker_id=job.worker_id, attempts=job.attempts,
+    )
+
+
+def heartbeat(job):
+    """Renew the lease. Returns False if the job was reclaimed or cancelled."""
+    now = timezone.now()
+    return bool(_owned(job).update(
+        heartbeat_at=now,
+        lease_expires_at=now + timedelta(seconds=_lease_seconds()),
+    ))
+
+
+def complete_job(job, master_key):
+    """Mark the attempt succeeded and the movie ready — unless the job was superseded."""
+    with transaction.atomic():
+        finished = _owned(job).update(
+            status='succeeded', finished_at=timezone.now(), lease_expires_at=None, last_error=None,
+        )
+        if finished:
+            transcoding.mark_ready(job.movie_id, master_key)
+        else:
+            logger.warning(f'[HLS] [{job.movie_id}] Job #{job.id} finished after losing its lease — result discarded')
+    return bool(finished)
+
+
+def _record_failure(job, queryset, error):
+    """Requeue with backoff, or give up after max_attempts. ``queryset`` guards the transition."""
+    now = timezone.now()
+    if job.attempts < job.max_attempts:
+        delay = retry_delay(job.attempts)
+        updated = queryset.update(
+            status='queued', run_after=now + delay, last_error=error,
+            worker_id='', lease_expires_at=None,
+        )
+        if updated:
+            logger.warning(f'[HLS] [{job.movie_id}] Job #{job.id} attempt {job.attempts} failed — retrying in {int(delay.total_seconds())}s')
+        return updated
+
+    with transaction.atomic():
+        updated = queryset.update(
+            status='failed', finished_at=now, last_error=error, lease_expires_at=None,
+        )
+        if updated:
+            Movie.objects.filter(id=job.movie_id, hls_status='processing').update(
+                hls_status='failed', hls_error_message=error,
+            )
+            logger.error(f'[HLS] [{job.movie_id}] Job #{job.id} failed after {job.attempts} attempt(s): {error}')
+    return updated
+
+
+def fail_job(job, error):
+    return _record_failure(job, _owned(job), error)
+
+
+def reclaim_expired_leases():
+    """
+    Treat running jobs whose worker stopped heartbeating as failed attempts
+    (requeued, or failed for good on the last attempt). Returns the count.
+    """
+    now = timezone.now()
+    reclaimed = 0
+    for job in TranscodeJob.objects.filter(status='running', lease_expires_at__lt=now):
+        guard = TranscodeJob.objects.filter(
+            pk=job.pk, status='running', attempts=job.attempts, lease_expires_at__lt=now,
+        )
+        reclaimed += _record_failure(
+            job, guard, f'Worker {job.worker_id} stopped heartbeating (lease expired).',
+        )
+    return reclaimed
+
+
+def requeue_orphans():
+    """
+    Queue a job for every movie left in 'processing' without an active job
+    (e.g. transcodes started by the old in-process threads). Returns the count.
+    """
+    orphans = Movie.objects.filter(hls_status='processing').exclude(
+        transcode_jobs__status__in=TranscodeJob.ACTIVE_STATUSES,
+    ).values_list('id', flat=True)
+    count = 0
+    for movie_id in orphans:
+        enqueue_transcode(movie_id)
+        count += 1
+    return count
+
+
+def _heartbeat_loop(job, stop):
+    interval = max(_lease_seconds() / 3, 1)
+    try:
+        while not stop.wait(interval):
+            if not heartbeat(job):
+                logger.warning(f'[HLS] [{job.movie_id}] Job #{job.id} lost its lease')
+                return
+    finally:
+        close_old_connections()
+
+
+def run_job(job):
+    """Run one claimed job to completion, heartbeating while ffmpeg works."""
+    stop = threading.Event()
+    beat = threading.Thread(
+        target=_heartbeat_loop, args=(job, stop), name=f'transcode-heartbeat-{job.id}', daemon=True,
+    )
+    beat.start()
+    try:
+        master_key = transcoding.transcode_movie(job.movie_id)
+    except Exception as e:
+        logger.exception(f'[HLS] [{job.movie_id}] Transcoding failed: {e}')
+        fail_job(job, str(e))
+    else:
+        complete_job(job, master_key)
+    finally:
+        stop.set()
+        beat.join()
+        close_old_connections()
+
+
+class TranscodeWorker:
+    """
+    Polls the queue and runs up to ``concurrency`` jobs at once on a thread
+    pool (each job is an ffmpeg subprocess, so threads are enough).
+    """
+
+    def __init__(self, concurrency=None, poll_interval=None, worker_id=None):
+        self.concurrency = concurrency or getattr(settings, 'TRANSCODE_CONCURRENCY', 2)
+        self.poll_interval = poll_interval or getattr(settings, 'TRANSCODE_POLL_INTERVAL', 5)
+        self.worker_id = worker_id or default_worker_id()
+        self._stop = threading.Event()
+
+    def stop(self):
+        """Stop claiming new jobs; running jobs are allowed to finish."""
+        self._stop.set()
+
+    def _run(self, job):
+        close_old_connections()
+        run_job(job)
+
+    def run(self, once=False):
+        """
+        Work until ``stop()``. With ``once`` the worker exits as soon as the
+        queue has no due jobs and nothing is running.
+        """
+        requeued = requeue_orphans()
+        if requeued:
+            logger.info(f'[HLS] Requeued {requeued} orphaned transcode(s)')
+
+        running = set()
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='transcode') as pool:
+            while not self._stop.is_set():
+                running = {f for f in running if not f.done()}
+                reclaim_expired_leases()
+                while len(running) < self.concurrency:
+                    job = claim_job(self.worker_id)
+                    if job is None:
+                        break
+                    running.add(pool.submit(self._run, job))
+                if once and not running:
+                    break
+                self._stop.wait(self.poll_interval)
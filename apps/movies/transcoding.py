@@ -1,14 +1,21 @@
 import logging
+import math
+import multiprocessing
+import os
+import shutil
 import subprocess
 import tempfile
 import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 
-import boto3
 import ffmpeg
 from django.conf import settings
+from django.db import transaction
 from django.utils import timezone
 
+from .hls_upload import HLSUploader, s3_client
+
 logger = logging.getLogger(__name__)
 
 RENDITIONS = [
@@ -38,69 +45,108 @@ def check_ffmpeg():
 
 def start_hls_transcode(movie_id: int, force: bool = False):
     """
-    Atomically set hls_status to 'processing' and start a background thread.
+    Atomically set hls_status to 'processing' and queue a TranscodeJob for
+    the transcode workers (``manage.py run_transcode_worker``).
     Safe to call from multiple requests — uses an atomic filter to prevent double-triggering.
 
     force=True also pre-empts an in-progress transcode (used when a new video
-    file replaces the old one). The status transition is still atomic, so only
-    one thread can win the update race.
+    file replaces the old one): any active job for the movie is cancelled and
+    a fresh one is queued. The status transition is still atomic, so only
+    one request can win the update race.
     """
     from apps.movies.models import Movie
+    from apps.movies.transcode_queue import enqueue_transcode
     allowed_statuses = ['not_started', 'failed']
     if force:
         allowed_statuses.append('processing')
-    updated = Movie.objects.filter(
-        id=movie_id,
-        hls_status__in=allowed_statuses,
-    ).update(hls_status='processing', hls_started_at=timezone.now())
-    if not updated:
-        # Already processing (non-force path) or movie not found
-        return
-    t = threading.Thread(target=_transcode_worker, args=(movie_id,), daemon=True)
-    t.start()
-
+    with transaction.atomic():
+        updated = Movie.objects.filter(
+            id=movie_id,
+            hls_status__in=allowed_statuses,
+        ).update(hls_status='processing', hls_started_at=timezone.now(), hls_progress=0)
+        if not updated:
+            # Already processing (non-force path) or movie not found
+            return None
+        return enqueue_transcode(movie_id, replace=force)
 
-def _transcode_worker(movie_id: int):
-    """Background thread: download → transcode → upload → update status."""
-    from django.db import close_old_connections
-    close_old_connections()
 
+def transcode_movie(movie_id: int):
+    """
+    Read source → transcode → upload. Returns the S3 key of the master playlist;
+    the caller marks the movie ready (``mark_ready``).
+    Raises on any failure; the caller decides whether to retry.
+    """
     from apps.movies.models import Movie
 
-    try:
-        check_ffmpeg()
-        movie = Movie.objects.get(id=movie_id)
-
-        s3 = boto3.client(
-            's3',
-            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-            region_name=settings.AWS_S3_REGION_NAME,
-        )
+    check_ffmpeg()
+    movie = Movie.objects.get(id=movie_id)
 
-        with tempfile.TemporaryDirectory() as tmp:
-            tmp = Path(tmp)
-            src = tmp / 'source.mp4'
+    s3 = s3_client()
 
-            logger.info(f"[HLS] [{movie_id}] Downloading source from S3: {movie.video_file.name}")
-            s3.download_file(settings.AWS_STORAGE_BUCKET_NAME, movie.video_file.name, str(src))
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        out_dir = tmp / 'out'
 
-            out_dir = tmp / 'out'
-            logger.info(f"[HLS] [{movie_id}] Transcoding to HLS...")
-            _run_ffmpeg(src, out_dir)
+        if settings.HLS_SOURCE_MODE == 'url':
+            # ffmpeg reads the source over HTTPS with ranged GETs: encoding
+            # starts on the first bytes and the source never touches disk.
+            logger.info(f"[HLS] [{movie_id}] Reading source directly from S3: {movie.video_file.name}")
+            try:
+                _transcode_and_upload(s3, _source_url(s3, movie.video_file.name), out_dir, movie_id)
+                return f"movies/hls/{movie_id}/master.m3u8"
+            except FFmpegError as e:
+                logger.warning(f"[HLS] [{movie_id}] Streaming source read failed, falling back to download: {e}")
+                shutil.rmtree(tmp / 'out', ignore_errors=True)
+                shutil.rmtree(tmp / 'chunks', ignore_errors=True)
 
-            logger.info(f"[HLS] [{movie_id}] Uploading HLS files to S3...")
-            _upload_hls(s3, out_dir, movie_id)
+        src = tmp / 'source.mp4'
+        logger.info(f"[HLS] [{movie_id}] Downloading source from S3: {movie.video_file.name}")
+        s3.download_file(settings.AWS_STORAGE_BUCKET_NAME, movie.video_file.name, str(src))
+        _transcode_and_upload(s3, str(src), out_dir, movie_id)
 
-        master_key = f"movies/hls/{movie_id}/master.m3u8"
-        Movie.objects.filter(id=movie_id).update(
-            hls_status='ready',
-            hls_master_key=master_key,
-            hls_completed_at=timezone.now(),
-            hls_error_message=None,
-        )
-        logger.info(f"[HLS] [{movie_id}] Transcoding complete.")
+    return f"movies/hls/{movie_id}/master.m3u8"
+
+
+def _transcode_and_upload(s3, src: str, out_dir: Path, movie_id: int):
+    if settings.HLS_UPLOAD_STREAMING:
+        logger.info(f"[HLS] [{movie_id}] Transcoding to HLS and uploading segments as they finish...")
+        _transcode_streaming(s3, src, out_dir, movie_id)
+    else:
+        logger.info(f"[HLS] [{movie_id}] Transcoding to HLS...")
+        _run_ffmpeg(src, out_dir)
+
+        logger.info(f"[HLS] [{movie_id}] Uploading HLS files to S3...")
+        _upload_hls(s3, out_dir, movie_id)
+
+
+def _source_url(s3, key: str) -> str:
+    """Presigned GET for the source video, valid for the whole transcode."""
+    return s3.generate_presigned_url(
+        'get_object',
+        Params={'Bucket': settings.AWS_STORAGE_BUCKET_NAME, 'Key': key},
+        ExpiresIn=settings.HLS_SOURCE_URL_EXPIRY,
+    )
+
+
+def mark_ready(movie_id: int, master_key: str):
+    from apps.movies.models import Movie
+    Movie.objects.filter(id=movie_id).update(
+        hls_status='ready',
+        hls_master_key=master_key,
+        hls_completed_at=timezone.now(),
+        hls_error_message=None,
+        hls_progress=100,
+    )
+    logger.info(f"[HLS] [{movie_id}] Transcoding complete.")
 
+
+def _transcode_worker(movie_id: int):
+    """Synchronous one-shot transcode (``manage.py transcode_movie``): failures mark the movie failed."""
+    from django.db import close_old_connections
+    close_old_connections()
+
+    try:
+        mark_ready(movie_id, transcode_movie(movie_id))
     except Exception as e:
         logger.exception(f"[HLS] [{movie_id}] Transcoding failed: {e}")
         from apps.movies.models import Movie
@@ -112,9 +158,135 @@ def _transcode_worker(movie_id: int):
         close_old_connections()
 
 
-def _run_ffmpeg(src: Path, out_dir: Path):
-    """Run FFmpeg to produce multi-rendition HLS output."""
-    inp = ffmpeg.input(str(src))
+# ─────────────────────────────────────────────
+# Encoding modes (settings.HLS_TRANSCODE_MODE)
+#   merged     — one ffmpeg process, source decoded once, all renditions
+#                encoded inside it (original behaviour)
+#   renditions — one ffmpeg process per rendition on a process pool
+#   segments   — long sources are cut into chunks; every (chunk, rendition)
+#                pair is encoded in parallel, then each rendition's chunks
+#                are concatenated (stream copy) and packaged as HLS
+# ─────────────────────────────────────────────
+
+TRANSCODE_MODES = ('merged', 'renditions', 'segments')
+
+# Input options for an http(s) source: reconnect (resuming with a ranged GET
+# at the current offset) instead of failing the whole encode on a dropped
+# connection.
+HTTP_INPUT_ARGS = {
+    'reconnect': 1,
+    'reconnect_on_network_error': 1,
+    'reconnect_delay_max': 30,
+}
+
+
+class FFmpegError(RuntimeError):
+    """ffmpeg exited non-zero. Picklable, unlike ``ffmpeg.Error``, so it survives the process pool."""
+
+
+def _input(src: str, **kwargs):
+    if src.startswith(('http://', 'https://')):
+        kwargs = {**HTTP_INPUT_ARGS, **kwargs}
+    return ffmpeg.input(src, **kwargs)
+
+
+def _execute(stream, ffmpeg_path: str):
+    try:
+        stream.run(cmd=ffmpeg_path, quiet=True, overwrite_output=True)
+    except ffmpeg.Error as e:
+        stderr = (e.stderr or b'').decode(errors='replace').strip().splitlines()
+        raise FFmpegError(stderr[-1] if stderr else str(e)) from None
+
+
+def _encode_args(r: dict, threads: int = 0) -> dict:
+    args = {
+        'vcodec': 'libx264',
+        'video_bitrate': r['video_bitrate'],
+        'acodec': 'aac',
+        'audio_bitrate': r['audio_bitrate'],
+    }
+    if threads:
+        args['threads'] = threads
+    return args
+
+
+def _hls_args(rdir: Path, segment_duration: int) -> dict:
+    return {
+        'format': 'hls',
+        'hls_time': segment_duration,
+        'hls_playlist_type': 'vod',
+        'hls_segment_filename': str(rdir / 'seg%03d.ts'),
+        # Segments are written as *.ts.tmp and renamed when complete, so the
+        # streaming uploader never picks up a half-written segment.
+        'hls_flags': 'temp_file',
+    }
+
+
+def _parallelism(tasks: int):
+    """
+    (pool size, ffmpeg -threads per process) for ``tasks`` parallel encodes,
+    sized so the pool never asks for more threads than there are cores.
+    """
+    cores = os.cpu_count() or 1
+    limit = getattr(settings, 'HLS_MAX_PARALLEL_ENCODES', 0) or cores
+    workers = max(1, min(tasks, cores, limit))
+    return workers, max(1, cores // workers)
+
+
+def _process_pool(workers: int):
+    # spawn, not fork: transcodes run on TranscodeWorker threads, and forking
+    # a threaded process with open DB connections is unsafe.
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+
+
+def _probe_duration(src) -> float:
+    """Source duration in seconds (ffprobe; ``src`` may be a path or URL)."""
+    try:
+        info = ffmpeg.probe(str(src), cmd=settings.FFPROBE_PATH)
+    except ffmpeg.Error as e:
+        raise FFmpegError(f'ffprobe failed: {(e.stderr or b"").decode(errors="replace").strip()}') from None
+    return float(info['format']['duration'])
+
+
+def _chunk_plan(duration: float, chunk_seconds: int, segment_duration: int):
+    """
+    [(start, length), ...] covering ``duration``. Chunk length is rounded to a
+    whole number of HLS segments so chunk boundaries fall on segment
+    boundaries and concatenation keeps segments aligned.
+    """
+    chunk = max(segment_duration, (chunk_seconds // segment_duration) * segment_duration)
+    plan = []
+    start = 0
+    while start < duration:
+        plan.append((start, min(chunk, duration - start)))
+        start += chunk
+    return plan
+
+
+def _run_ffmpeg(src, out_dir: Path, mode: str = None):
+    """Run FFmpeg to produce multi-rendition HLS output. ``src`` is a local path or a URL."""
+    src = str(src)
+    mode = mode or settings.HLS_TRANSCODE_MODE
+    if mode not in TRANSCODE_MODES:
+        raise ValueError(f"Unknown HLS_TRANSCODE_MODE '{mode}' (expected one of {', '.join(TRANSCODE_MODES)})")
+
+    if mode == 'segments':
+        duration = _probe_duration(src)
+        if duration < settings.HLS_SEGMENT_PARALLEL_MIN_SECONDS:
+            mode = 'renditions'  # too short for chunking to pay off
+        else:
+            _run_ffmpeg_segments(src, out_dir, duration)
+
+    if mode == 'merged':
+        _run_ffmpeg_merged(src, out_dir)
+    elif mode == 'renditions':
+        _run_ffmpeg_renditions(src, out_dir)
+
+    (out_dir / 'master.m3u8').write_text(_build_master_playlist())
+
+
+def _run_ffmpeg_merged(src: str, out_dir: Path):
+    inp = _input(src)
     streams = []
 
     for r in RENDITIONS:
@@ -128,24 +300,112 @@ def _run_ffmpeg(src: Path, out_dir: Path):
             ffmpeg.output(
                 v, a,
                 str(rdir / 'playlist.m3u8'),
-                vcodec='libx264',
-                video_bitrate=r['video_bitrate'],
-                acodec='aac',
-                audio_bitrate=r['audio_bitrate'],
-                format='hls',
-                hls_time=settings.HLS_SEGMENT_DURATION,
-                hls_playlist_type='vod',
-                hls_segment_filename=str(rdir / 'seg%03d.ts'),
+                **_encode_args(r),
+                **_hls_args(rdir, settings.HLS_SEGMENT_DURATION),
             )
         )
 
-    ffmpeg.merge_outputs(*streams).run(
-        cmd=settings.FFMPEG_PATH,
-        quiet=True,
-        overwrite_output=True,
-    )
+    _execute(ffmpeg.merge_outputs(*streams), settings.FFMPEG_PATH)
 
-    (out_dir / 'master.m3u8').write_text(_build_master_playlist())
+
+def _run_ffmpeg_renditions(src: str, out_dir: Path):
+    workers, threads = _parallelism(len(RENDITIONS))
+    with _process_pool(workers) as pool:
+        futures = [
+            pool.submit(
+                _encode_rendition,
+                settings.FFMPEG_PATH, src, str(out_dir / r['name']), r,
+                settings.HLS_SEGMENT_DURATION, threads,
+            )
+            for r in RENDITIONS
+        ]
+        for future in as_completed(futures):
+            future.result()  # re-raise the first ffmpeg failure
+
+
+def _run_ffmpeg_segments(src: str, out_dir: Path, duration: float):
+    segment_duration = settings.HLS_SEGMENT_DURATION
+    plan = _chunk_plan(duration, settings.HLS_CHUNK_SECONDS, segment_duration)
+    chunk_dir = out_dir.parent / 'chunks'  # outside out_dir so chunks are never uploaded
+
+    tasks = [(r, i, start, length) for r in RENDITIONS for i, (start, length) in enumerate(plan)]
+    workers, threads = _parallelism(len(tasks))
+    chunk_files = {r['name']: [None] * len(plan) for r in RENDITIONS}
+
+    with _process_pool(workers) as pool:
+        futures = {}
+        for r, i, start, length in tasks:
+            out_file = chunk_dir / r['name'] / f'chunk{i:04d}.ts'
+            futures[pool.submit(
+                _encode_chunk,
+                settings.FFMPEG_PATH, src, str(out_file), r, start, length,
+                segment_duration, threads,
+            )] = (r['name'], i, out_file)
+        for future in as_completed(futures):
+            future.result()
+            name, i, out_file = futures[future]
+            chunk_files[name][i] = out_file
+
+        packaging = [
+            pool.submit(
+                _package_rendition,
+                settings.FFMPEG_PATH, [str(f) for f in chunk_files[r['name']]],
+                str(chunk_dir / f"{r['name']}.txt"), str(out_dir / r['name']), segment_duration,
+            )
+            for r in RENDITIONS
+        ]
+        for future in as_completed(packaging):
+            future.result()
+
+
+# Process-pool entry points: module level (picklable) and given plain
+# arguments so the spawned child never needs Django settings.
+
+def _encode_rendition(ffmpeg_path, src, rdir, r, segment_duration, threads):
+    rdir = Path(rdir)
+    rdir.mkdir(parents=True, exist_ok=True)
+    inp = _input(src)
+    v = inp.video.filter('scale', r['width'], r['height'])
+    _execute(ffmpeg.output(
+        v, inp.audio,
+        str(rdir / 'playlist.m3u8'),
+        **_encode_args(r, threads),
+        **_hls_args(rdir, segment_duration),
+    ), ffmpeg_path)
+    return r['name']
+
+
+def _encode_chunk(ffmpeg_path, src, out_file, r, start, length, segment_duration, threads):
+    """Encode [start, start + length) of the source as one MPEG-TS chunk."""
+    out_file = Path(out_file)
+    out_file.parent.mkdir(parents=True, exist_ok=True)
+    inp = _input(src, ss=start, t=length)
+    v = inp.video.filter('scale', r['width'], r['height'])
+    _execute(ffmpeg.output(
+        v, inp.audio,
+        str(out_file),
+        format='mpegts',
+        # Keyframe on every HLS segment boundary (and none elsewhere) so the
+        # packager can cut identical segments from the concatenated stream.
+        force_key_frames=f'expr:gte(t,n_forced*{segment_duration})',
+        sc_threshold=0,
+        **_encode_args(r, threads),
+    ), ffmpeg_path)
+    return str(out_file)
+
+
+def _package_rendition(ffmpeg_path, chunk_files, list_file, rdir, segment_duration):
+    """Concatenate a rendition's chunks (no re-encode) and cut them into HLS segments."""
+    rdir = Path(rdir)
+    rdir.mkdir(parents=True, exist_ok=True)
+    list_file = Path(list_file)
+    list_file.write_text(''.join(f"file '{f}'\n" for f in chunk_files))
+    _execute(ffmpeg.input(str(list_file), format='concat', safe=0).output(
+        str(rdir / 'playlist.m3u8'),
+        c='copy',
+        **_hls_args(rdir, segment_duration),
+    ), ffmpeg_path)
+    return rdir.name
 
 
 def _build_master_playlist() -> str:
@@ -157,13 +417,32 @@ def _build_master_playlist() -> str:
 
 
 def _upload_hls(s3, local_dir: Path, movie_id: int):
-    """Upload all HLS files from local_dir to S3 under movies/hls/{movie_id}/."""
-    bucket = settings.AWS_STORAGE_BUCKET_NAME
-    for f in local_dir.rglob('*'):
-        if not f.is_file():
-            continue
-        rel = f.relative_to(local_dir)
-        key = f"movies/hls/{movie_id}/{rel.as_posix()}"
-        ct = 'application/vnd.apple.mpegurl' if f.suffix == '.m3u8' else 'video/MP2T'
-        cache = 'max-age=0' if f.suffix == '.m3u8' else 'max-age=86400'
-        s3.upload_file(str(f), bucket, key, ExtraArgs={'ContentType': ct, 'CacheControl': cache})
+    """Upload all HLS files from local_dir to S3 under movies/hls/{movie_id}/ (in parallel)."""
+    with HLSUploader(s3, movie_id, local_dir) as uploader:
+        uploader.upload_all()
+
+
+def _expected_objects(src: str) -> int:
+    """Estimated HLS object count (segments + playlists), for streaming progress."""
+    try:
+        segments = math.ceil(_probe_duration(src) / settings.HLS_SEGMENT_DURATION)
+    except Exception:
+        return 0
+    return (segments + 1) * len(RENDITIONS) + 1
+
+
+def _transcode_streaming(s3, src: str, out_dir: Path, movie_id: int):
+    """Run ffmpeg while a watcher thread uploads each finished segment."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    with HLSUploader(s3, movie_id, out_dir, expected=_expected_objects(src)) as uploader:
+        stop = threading.Event()
+        watcher = threading.Thread(
+            target=uploader.watch, args=(stop,), name=f'hls-watch-{movie_id}', daemon=True,
+        )
+        watcher.start()
+        try:
+            _run_ffmpeg(src, out_dir)
+        finally:
+            stop.set()
+            watcher.join()
+        uploader.upload_all()
@@ -4,10 +4,10 @@ from rest_framework import status
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.authentication import SessionAuthentication
 from apps.users.permissions import IsAdminRole
+from apps.users.pagination import approximate_count, cursor_requested, keyset_paginate
 from django.utils import timezone
 from django.conf import settings
-from django.db.models import Q, TextField
-from django.db.models.functions import Cast
+from django.db.models import Q
 from drf_spectacular.utils import (
     extend_schema,
     OpenApiParameter,
@@ -18,17 +18,21 @@ from drf_spectacular.utils import (
 from drf_spectacular.types import OpenApiTypes
 from rest_framework import serializers as drf_serializers
 from rest_framework.permissions import IsAuthenticated
-from apps.payments.models import Payment
-from .emails import send_new_movie_email, send_new_trailer_email
-from .cloudfront_signing import sign_hls_url
+from apps.payments.entitlements import entitled_movie_ids, has_entitlement
+from .announcements import queue_announcement
+from .cloudfront_signing import set_hls_cookies, sign_urls
+from . import catalog_cache, progress_buffer
+from .search import search_movies
 from .models import Movie, WatchProgress, Subtitle
 from .serializers import (
     MovieSerializer,
     MovieDetailSerializer,
     MovieVideoAccessSerializer,
+    purchased_movie_ids,
     MovieCreateSerializer,
     MyListMovieSerializer,
     WatchProgressSerializer,
+    WatchProgressInputSerializer,
     SubtitleSerializer,
     SubtitleUploadSerializer,
     SubtitleUpdateSerializer,
@@ -42,6 +46,12 @@ import os
 # ─────────────────────────────────────────────
 
 _PAGE_PARAM = OpenApiParameter('page', OpenApiTypes.INT, description='Page number (default: 1)', required=False)
+_CURSOR_PARAM = OpenApiParameter(
+    'cursor', OpenApiTypes.STR,
+    description='Opt into cursor pagination: pass an empty value for the first page, then `next_cursor` '
+                'from the previous response. Ignores `page`; `total_results` may be approximate.',
+    required=False,
+)
 _SORT_PARAM = OpenApiParameter(
     'sort_by', OpenApiTypes.STR,
     description='Sort order: popularity.desc | release_date.desc | rating.desc',
@@ -56,22 +66,84 @@ _PAGINATED_RESPONSE = inline_serializer(
         'results': MovieSerializer(many=True),
         'total_results': drf_serializers.IntegerField(),
         'total_pages': drf_serializers.IntegerField(),
+        'next_cursor': drf_serializers.CharField(allow_null=True, required=False, help_text='Cursor mode only'),
     }
 )
 
 
-def _paginate(queryset, request):
-    """Helper: paginate a queryset and return (page, page_size, slice)."""
+def _page_number(request):
+    """Helper: parse the ?page= query param, defaulting to 1."""
     try:
-        page = max(1, int(request.GET.get('page', 1)))
+        return max(1, int(request.GET.get('page', 1)))
     except (TypeError, ValueError):
-        page = 1
+        return 1
+
+
+def _paginate(queryset, request):
+    """Helper: paginate a queryset and return (page, page_size, slice)."""
+    page = _page_number(request)
     page_size = 20
     start = (page - 1) * page_size
     total = queryset.count()
     return page, total, queryset[start:start + page_size]
 
 
+def _list_context(request, movies_page):
+    """
+    Helper: evaluate a page of movies and build the serializer context.
+
+    Resolves ``has_purchased`` for the whole page in one query so list
+    endpoints cost a fixed number of queries regardless of page size.
+    Returns (movies, context).
+    """
+    movies = list(movies_page)
+    return movies, {
+        'request': request,
+        'purchased_ids': purchased_movie_ids(request.user, [m.id for m in movies]),
+    }
+
+
+def _cached_list_response(request, endpoint, queryset, ordering, sort='', extra=None):
+    """
+    Helper: serve a catalog list page through the versioned catalog cache.
+
+    The cached body is built anonymously; has_purchased is overlaid per user
+    afterwards so every viewer shares the same cached page. With ?cursor=
+    the page is fetched by keyset on ``ordering`` instead of OFFSET.
+    """
+    context = {'request': request, 'purchased_ids': set()}
+
+    if cursor_requested(request):
+        page = f"cursor:{request.GET.get('cursor', '')}"
+
+        def build():
+            movies, next_cursor = keyset_paginate(queryset, request, ordering)
+            return {
+                **(extra or {}),
+                'results': MovieSerializer(movies, many=True, context=context).data,
+                'next_cursor': next_cursor,
+                'total_results': approximate_count(queryset),
+            }
+    else:
+        page = _page_number(request)
+
+        def build():
+            _, total, movies_page = _paginate(queryset, request)
+            return {
+                **(extra or {}),
+                'page': page,
+                'results': MovieSerializer(list(movies_page), many=True, context=context).data,
+                'total_results': total,
+                'total_pages': (total + 19) // 20,
+            }
+
+    body = catalog_cache.get_or_build_page(endpoint, sort, page, build)
+    body = catalog_cache.apply_live_views(
+        body, resort=ordering == '-views' and not cursor_requested(request),
+    )
+    return Response(catalog_cache.apply_purchase_overlay(body, request.user))
+
+
 # ─────────────────────────────────────────────
 # Discovery / List endpoints
 # ─────────────────────────────────────────────
@@ -88,6 +160,7 @@ class DiscoverMoviesView(APIView):
                 type=OpenApiTypes.INT,
                 location='query'
             ),
+            _CURSOR_PARAM,
             OpenApiParameter(
                 name='sort_by',
                 description='Sort movies by: popularity.desc (default), release_date.desc, or rating.desc',
@@ -102,24 +175,17 @@ class DiscoverMoviesView(APIView):
     )
     def get(self, request):
         sort_by = request.GET.get('sort_by', 'popularity.desc')
-        movies = Movie.objects.filter(is_active=True).prefetch_related('subtitles')
+        movies = Movie.objects.filter(is_active=True).select_related('producer_profile').prefetch_related('subtitles')
 
         order_map = {
             'popularity.desc': '-views',
             'release_date.desc': '-release_date',
             'rating.desc': '-rating',
         }
-        movies = movies.order_by(order_map.get(sort_by, '-views'))
+        ordering = order_map.get(sort_by, '-views')
+        movies = movies.order_by(ordering)
 
-        page, total, movies_page = _paginate(movies, request)
-        serializer = MovieSerializer(movies_page, many=True, context={'request': request})
-
-        return Response({
-            'page': page,
-            'results': serializer.data,
-            'total_results': total,
-            'total_pages': (total + 19) // 20,
-        })
+        return _cached_list_response(request, 'discover', movies, ordering, sort=ordering)
 
 
 class MovieSearchView(APIView):
@@ -138,7 +204,7 @@ class MovieSearchView(APIView):
         ],
         tags=['Movies'],
         summary='Search movies',
-        description='Search active movies by title, overview, genre, or cast member. Results are ordered by popularity.',
+        description='Search active movies by title, overview, genre, or cast member. Every word is prefix-matched and results are ordered by relevance, then popularity.',
         responses={
             200: _PAGINATED_RESPONSE,
             400: OpenApiResponse(description='Missing or blank search term'),
@@ -149,21 +215,16 @@ class MovieSearchView(APIView):
         if not q:
             return Response({'error': 'Search term "q" is required.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        movies = Movie.objects.annotate(
-            genres_text=Cast('genres', output_field=TextField()),
-            cast_text=Cast('cast', output_field=TextField()),
-        ).filter(
-            Q(title__icontains=q) |
-            Q(overview__icontains=q) |
-            Q(genres_text__icontains=q) |
-            Q(cast_text__icontains=q),
-            is_active=True,
-        ).prefetch_related('subtitles').order_by('-views')
+        movies = search_movies(
+            Movie.objects.filter(is_active=True).select_related('producer_profile').prefetch_related('subtitles'),
+            q,
+        )
 
         page, total, movies_page = _paginate(movies, request)
+        movies_page, context = _list_context(request, movies_page)
         return Response({
             'page': page,
-            'results': MovieSerializer(movies_page, many=True, context={'request': request}).data,
+            'results': MovieSerializer(movies_page, many=True, context=context).data,
             'total_results': total,
             'total_pages': (total + 19) // 20,
         })
@@ -180,20 +241,15 @@ class PopularMoviesView(APIView):
                 type=OpenApiTypes.INT,
                 location='query'
             ),
+            _CURSOR_PARAM,
         ],
         tags=['Movies'],
         summary='Get popular movies',
         description='Get a list of the most viewed movies.',
     )
     def get(self, request):
-        movies = Movie.objects.filter(is_active=True).prefetch_related('subtitles').order_by('-views')
-        page, total, movies_page = _paginate(movies, request)
-        return Response({
-            'page': page,
-            'results': MovieSerializer(movies_page, many=True, context={'request': request}).data,
-            'total_results': total,
-            'total_pages': (total + 19) // 20,
-        })
+        movies = Movie.objects.filter(is_active=True).select_related('producer_profile').prefetch_related('subtitles').order_by('-views')
+        return _cached_list_response(request, 'popular', movies, '-views')
 
 
 class NowPlayingMoviesView(APIView):
@@ -207,20 +263,15 @@ class NowPlayingMoviesView(APIView):
                 type=OpenApiTypes.INT,
                 location='query'
             ),
+            _CURSOR_PARAM,
         ],
         tags=['Movies'],
         summary='Get now playing movies',
         description='Get a list of recently added movies.',
     )
     def get(self, request):
-        movies = Movie.objects.filter(is_active=True).prefetch_related('subtitles').order_by('-created_at')
-        page, total, movies_page = _paginate(movies, request)
-        return Response({
-            'page': page,
-            'results': MovieSerializer(movies_page, many=True, context={'request': request}).data,
-            'total_results': total,
-            'total_pages': (total + 19) // 20,
-        })
+        movies = Movie.objects.filter(is_active=True).select_related('producer_profile').prefetch_related('subtitles').order_by('-created_at')
+        return _cached_list_response(request, 'now-playing', movies, '-created_at')
 
 
 class TopRatedMoviesView(APIView):
@@ -234,20 +285,15 @@ class TopRatedMoviesView(APIView):
                 type=OpenApiTypes.INT,
                 location='query'
             ),
+            _CURSOR_PARAM,
         ],
         tags=['Movies'],
         summary='Get top rated movies',
         description='Get a list of the highest rated movies (rating >= 4.0).',
     )
     def get(self, request):
-        movies = Movie.objects.filter(is_active=True, rating__gte=4.0).prefetch_related('subtitles').order_by('-rating')
-        page, total, movies_page = _paginate(movies, request)
-        return Response({
-            'page': page,
-            'results': MovieSerializer(movies_page, many=True, context={'request': request}).data,
-            'total_results': total,
-            'total_pages': (total + 19) // 20,
-        })
+        movies = Movie.objects.filter(is_active=True, rating__gte=4.0).select_related('producer_profile').prefetch_related('subtitles').order_by('-rating')
+        return _cached_list_response(request, 'top-rated', movies, '-rating')
 
 
 class UpcomingMoviesView(APIView):
@@ -261,6 +307,7 @@ class UpcomingMoviesView(APIView):
                 type=OpenApiTypes.INT,
                 location='query'
             ),
+            _CURSOR_PARAM,
         ],
         tags=['Movies'],
         summary='Get upcoming movies',
@@ -268,14 +315,8 @@ class UpcomingMoviesView(APIView):
     )
     def get(self, request):
         today = timezone.now().date()
-        movies = Movie.objects.filter(is_active=True, release_date__gte=today).prefetch_related('subtitles').order_by('release_date')
-        page, total, movies_page = _paginate(movies, request)
-        return Response({
-            'page': page,
-            'results': MovieSerializer(movies_page, many=True, context={'request': request}).data,
-            'total_results': total,
-            'total_pages': (total + 19) // 20,
-        })
+        movies = Movie.objects.filter(is_active=True, release_date__gte=today).select_related('producer_profile').prefetch_related('subtitles').order_by('release_date')
+        return _cached_list_response(request, 'upcoming', movies, 'release_date', sort=today.isoformat())
 
 
 # ─────────────────────────────────────────────
@@ -381,7 +422,10 @@ class MovieStreamView(APIView):
         description=(
             'Returns the streaming URL (HLS or MP4 fallback) for a purchased movie '
             'and increments its view counter. '
-            'Requires a completed payment for the movie.'
+            'Requires a completed payment for the movie. '
+            'When `stream_auth` is `cookie`, the response sets CloudFront signed cookies '
+            'covering the whole HLS tree of the movie and `stream_url` is unsigned — the '
+            'player must send cookies with its playlist and segment requests (`withCredentials`).'
         ),
         responses={
             200: MovieVideoAccessSerializer,
@@ -402,10 +446,7 @@ class MovieStreamView(APIView):
         )
         if not is_own_movie:
             # Payment gate: verify the user has purchased this movie.
-            has_access = Payment.objects.filter(
-                user=request.user, movie=movie, status='Completed'
-            ).exists()
-            if not has_access:
+            if not has_entitlement(request.user, movie.id):
                 return Response(
                     {'error': 'Purchase required to stream this movie.'},
                     status=status.HTTP_403_FORBIDDEN,
@@ -417,14 +458,26 @@ class MovieStreamView(APIView):
             movie.subtitles.all().order_by('ordering', 'language_code'), many=True
         ).data
         if movie.hls_status == 'ready' and movie.hls_url:
-            return Response({
+            # Cookie mode: one signature covers every playlist and segment of
+            # this movie and the playlist URL itself stays unsigned.
+            response = Response()
+            use_cookies = settings.CLOUDFRONT_SIGNED_COOKIES and set_hls_cookies(response, movie.id)
+
+            # One batch: the master playlist and every subtitle track share an expiry.
+            urls = [s['url'] for s in subtitles] if use_cookies else [movie.hls_url] + [s['url'] for s in subtitles]
+            signed = sign_urls(urls)
+            stream_url = movie.hls_url if use_cookies else signed.pop(0)
+            subtitles = [{**s, 'url': url} for s, url in zip(subtitles, signed)]
+            response.data = {
                 'movie': serializer.data,
-                'stream_url': sign_hls_url(movie.hls_url),
+                'stream_url': stream_url,
                 'stream_type': 'hls',
+                'stream_auth': 'cookie' if use_cookies else 'url',
                 'hls_status': movie.hls_status,
                 'fallback_url': movie.video_url,
                 'subtitles': subtitles,
-            })
+            }
+            return response
         return Response({
             'movie': serializer.data,
             'stream_url': movie.video_url,
@@ -443,8 +496,9 @@ class MovieTranscodeView(APIView):
         tags=['Movies - Media'],
         summary='Trigger HLS transcoding',
         description=(
-            'Starts HLS adaptive bitrate transcoding for a movie in a background thread. '
-            'Returns immediately with status 202. Poll the movie detail or stream endpoint '
+            'Queues an HLS adaptive bitrate transcode job for a movie. The job is run by the '
+            '`run_transcode_worker` process (retried with backoff on failure), not by the web '
+            'server. Returns immediately with status 202. Poll the movie detail or stream endpoint '
             'to check `hls_status` (processing → ready / failed).'
         ),
         responses={
@@ -487,6 +541,7 @@ class MovieHlsStatusView(APIView):
         description=(
             'Returns the current HLS transcoding status for a movie. '
             'Poll this endpoint after upload until `hls_status` is `ready` or `failed`. '
+            '`hls_progress` is the percentage of the HLS output uploaded so far. '
             'Authentication required. The streaming URL is only issued by the '
             'payment-gated `stream/` endpoint.'
         ),
@@ -496,6 +551,7 @@ class MovieHlsStatusView(APIView):
                 fields={
                     'id': drf_serializers.IntegerField(),
                     'hls_status': drf_serializers.ChoiceField(choices=['not_started', 'processing', 'ready', 'failed']),
+                    'hls_progress': drf_serializers.IntegerField(help_text='0–100'),
                 },
             ),
             401: OpenApiResponse(description='Authentication required'),
@@ -504,12 +560,13 @@ class MovieHlsStatusView(APIView):
     )
     def get(self, request, id):
         try:
-            movie = Movie.objects.only('id', 'hls_status').get(id=id)
+            movie = Movie.objects.only('id', 'hls_status', 'hls_progress').get(id=id)
         except Movie.DoesNotExist:
             return Response({'error': 'Movie not found'}, status=status.HTTP_404_NOT_FOUND)
         return Response({
             'id': movie.id,
             'hls_status': movie.hls_status,
+            'hls_progress': movie.hls_progress,
         })
 
 
@@ -641,9 +698,9 @@ class MovieCreateView(APIView):
         serializer = MovieCreateSerializer(data=request.data)
         if serializer.is_valid():
             movie = serializer.save()
-            send_new_movie_email(movie)
+            queue_announcement(movie, 'new_movie')
             if movie.trailer_file:
-                send_new_trailer_email(movie)
+                queue_announcement(movie, 'new_trailer')
             if movie.video_file:
                 from .transcoding import start_hls_transcode
                 start_hls_transcode(movie.id)
@@ -689,7 +746,7 @@ class MovieUpdateView(APIView):
             serializer.save()
             movie.refresh_from_db()
             if 'trailer_file' in request.data and movie.trailer_file and not had_trailer_before:
-                send_new_trailer_email(movie)
+                queue_announcement(movie, 'new_trailer')
             if 'video_file' in request.data and movie.video_file:
                 from .transcoding import start_hls_transcode
                 start_hls_transcode(movie.id, force=True)
@@ -1134,9 +1191,7 @@ class MyListView(APIView):
     )
     def get(self, request):
         # Fetch movie IDs the user has paid for.
-        paid_movie_ids = Payment.objects.filter(
-            user=request.user, status='Completed'
-        ).values_list('movie_id', flat=True)
+        paid_movie_ids = entitled_movie_ids(request.user)
 
         movies = Movie.objects.filter(id__in=paid_movie_ids, is_active=True).prefetch_related('subtitles')
 
@@ -1147,6 +1202,7 @@ class MyListView(APIView):
                 user=request.user, movie_id__in=paid_movie_ids
             )
         }
+        progress_map.update(progress_buffer.buffered_progress(request.user.id, paid_movie_ids))
 
         # Annotate each movie with its progress object so the serializer can
         # access it without triggering additional queries.
@@ -1173,17 +1229,28 @@ class ContinueWatchingView(APIView):
         responses={200: MyListMovieSerializer(many=True)},
     )
     def get(self, request):
-        progress_qs = WatchProgress.objects.filter(
-            user=request.user,
-            completed=False,
-            progress_seconds__gt=0,
-        ).select_related('movie').order_by('-last_watched_at')
-
-        movies = []
-        for wp in progress_qs:
-            if wp.movie and wp.movie.is_active:
-                wp.movie.watch_progress_obj = wp
-                movies.append(wp.movie)
+        progress_by_movie = {
+            wp.movie_id: wp
+            for wp in WatchProgress.objects.filter(
+                user=request.user,
+                completed=False,
+                progress_seconds__gt=0,
+            )
+        }
+        # Unflushed heartbeats override stored rows (and may add or finish
+        # movies). Heartbeats need an entitlement, so only those are checked.
+        progress_by_movie.update(
+            progress_buffer.buffered_progress(request.user.id, entitled_movie_ids(request.user))
+        )
+        progress_by_movie = {
+            movie_id: wp for movie_id, wp in progress_by_movie.items()
+            if not wp.completed and wp.progress_seconds > 0
+        }
+
+        movies = list(Movie.objects.filter(id__in=progress_by_movie, is_active=True))
+        for movie in movies:
+            movie.watch_progress_obj = progress_by_movie[movie.id]
+        movies.sort(key=lambda m: m.watch_progress_obj.last_watched_at, reverse=True)
 
         serializer = MyListMovieSerializer(movies, many=True)
         return Response(serializer.data)
@@ -1212,17 +1279,20 @@ class WatchProgressView(APIView):
         },
     )
     def get(self, request, id):
-        try:
-            wp = WatchProgress.objects.get(user=request.user, movie_id=id)
-        except WatchProgress.DoesNotExist:
-            return Response({'progress_seconds': 0, 'duration_seconds': 0, 'completed': False})
+        wp = progress_buffer.buffered_progress(request.user.id, [int(id)]).get(int(id))
+        if wp is None:
+            try:
+                wp = WatchProgress.objects.get(user=request.user, movie_id=id)
+            except WatchProgress.DoesNotExist:
+                return Response({'progress_seconds': 0, 'duration_seconds': 0, 'completed': False})
         serializer = WatchProgressSerializer(wp)
         return Response(serializer.data)
 
     @extend_schema(
         tags=['Movies - Viewer'],
         summary='Save watch progress for a movie',
-        request=WatchProgressSerializer,
+        description='Heartbeat endpoint (call every ~15 s). Writes are buffered and flushed in bulk; reads include unflushed progress.',
+        request=WatchProgressInputSerializer,
         responses={
             200: WatchProgressSerializer(),
             403: OpenApiResponse(description='User has not purchased this movie'),
@@ -1230,45 +1300,24 @@ class WatchProgressView(APIView):
     )
     def post(self, request, id):
         # Only users who have purchased the movie can save progress.
-        has_access = Payment.objects.filter(
-            user=request.user, movie_id=id, status='Completed'
-        ).exists()
-        if not has_access:
+        if not has_entitlement(request.user, id):
             return Response(
                 {'error': 'You have not purchased this movie.'},
                 status=status.HTTP_403_FORBIDDEN,
             )
 
-        try:
-            movie = Movie.objects.get(pk=id)
-        except Movie.DoesNotExist:
-            return Response({'error': 'Movie not found.'}, status=status.HTTP_404_NOT_FOUND)
-
-        # Run all input validation through the serializer to prevent type errors
-        # from raw string values reaching numeric comparisons.
-        # Inject the movie id so the serializer's cross-field validator can run.
-        input_serializer = WatchProgressSerializer(
-            data={**request.data, 'movie': id}
-        )
+        # An entitlement implies the movie exists (it cascades on delete), so
+        # the heartbeat path needs no Movie fetch. Validation is DB-free too.
+        input_serializer = WatchProgressInputSerializer(data=request.data)
         input_serializer.is_valid(raise_exception=True)
-        progress_seconds = input_serializer.validated_data.get('progress_seconds', 0)
-        duration_seconds = input_serializer.validated_data.get('duration_seconds', 0)
-
-        # Mark as completed when the viewer reaches ≥ 90% of the total duration.
-        # Server-side computation — the client cannot force completion.
-        completed = (
-            duration_seconds > 0
-            and progress_seconds >= duration_seconds * 0.9
-        )
 
-        wp, _ = WatchProgress.objects.update_or_create(
-            user=request.user,
-            movie=movie,
-            defaults={
-                'progress_seconds': progress_seconds,
-                'duration_seconds': duration_seconds,
-                'completed': completed,
-            },
+        # Buffered write-behind: coalesced per (user, movie) and flushed in
+        # bulk. Completion (≥ 90%) is computed server-side by the buffer.
+        wp = progress_buffer.record_progress(
+            request.user.id,
+            int(id),
+            input_serializer.validated_data['progress_seconds'],
+            input_serializer.validated_data['duration_seconds'],
         )
         serializer = WatchProgressSerializer(wp)
         return Response(serializer.data)
@@ -1351,6 +1400,7 @@ class MoviesByProducerView(APIView):
         parameters=[
             OpenApiParameter('producer_id', OpenApiTypes.INT, location='path', description='Producer user ID'),
             _PAGE_PARAM,
+            _CURSOR_PARAM,
         ],
         tags=['Movies - Producers'],
         summary='Movies by producer',
@@ -1371,16 +1421,14 @@ class MoviesByProducerView(APIView):
 
         movies = Movie.objects.filter(
             producer_profile=producer, is_active=True
-        ).order_by('-created_at')
-
-        page, total, movies_page = _paginate(movies, request)
-        return Response({
-            'producer': {
-                'id': producer.id,
-                'name': producer.full_name or producer.email or f'Producer #{producer.id}',
+        ).select_related('producer_profile').prefetch_related('subtitles').order_by('-created_at')
+
+        return _cached_list_response(
+            request, f'producer:{producer.id}', movies, '-created_at',
+            extra={
+                'producer': {
+                    'id': producer.id,
+                    'name': producer.full_name or producer.email or f'Producer #{producer.id}',
+                },
             },
-            'page': page,
-            'results': MovieSerializer(movies_page, many=True, context={'request': request}).data,
-            'total_results': total,
-            'total_pages': (total + 19) // 20,
-        })
+        )
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Payment, WithdrawalRequest
+from .models import Entitlement, OutboxEvent, Payment, ProducerWallet, WalletEntry, WithdrawalRequest
 
 @admin.register(Payment)
 class PaymentAdmin(admin.ModelAdmin):
@@ -10,3 +10,29 @@ class PaymentAdmin(admin.ModelAdmin):
 class WithdrawalRequestAdmin(admin.ModelAdmin):
     list_display = ('producer', 'amount', 'status', 'created_at')
     list_filter = ('status', 'created_at')
+
+@admin.register(Entitlement)
+class EntitlementAdmin(admin.ModelAdmin):
+    list_display = ('user', 'movie', 'payment', 'granted_at')
+    raw_id_fields = ('user', 'movie', 'payment')
+
+@admin.register(OutboxEvent)
+class OutboxEventAdmin(admin.ModelAdmin):
+    list_display = ('idempotency_key', 'kind', 'status', 'attempts', 'available_at', 'processed_at')
+    list_filter = ('kind', 'status')
+    search_fields = ('idempotency_key',)
+
+@admin.register(ProducerWallet)
+class ProducerWalletAdmin(admin.ModelAdmin):
+    list_display = ('producer', 'gross_revenue', 'locked_amount', 'pending_withdrawals', 'total_withdrawn', 'updated_at')
+    raw_id_fields = ('producer',)
+    readonly_fields = ('gross_revenue', 'locked_amount', 'pending_withdrawals', 'total_withdrawn')
+
+@admin.register(WalletEntry)
+class WalletEntryAdmin(admin.ModelAdmin):
+    list_display = ('producer', 'payment', 'withdrawal', 'status', 'gross_revenue', 'locked_amount', 'balance_after', 'created_at')
+    list_filter = ('status',)
+    raw_id_fields = ('producer', 'payment', 'withdrawal')
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -4,3 +4,6 @@ class PaymentsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.payments'
     verbose_name = 'Payments & Finance'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -1,6 +1,5 @@
 import logging
-from django.core.mail import EmailMultiAlternatives
-from django.conf import settings
+from apps.users.email_rendering import EmailTemplate
 from apps.users.emails import _base_html, _cta_button, _send, _GOLD, _DARK
 
 logger = logging.getLogger(__name__)
@@ -10,31 +9,22 @@ logger = logging.getLogger(__name__)
 # Payment confirmation
 # ---------------------------------------------------------------------------
 
-def send_payment_completed_email(payment) -> None:
-    """Send a purchase confirmation email to the viewer after MoMo payment is confirmed."""
-    user = payment.user
-    if not user.email:
-        return
-
-    movie_title = payment.movie.title if payment.movie else 'your movie'
-    name = user.first_name or 'there'
-    amount = f'{payment.amount:,} RWF'
-
-    plain = (
-        f'Hi {name},\n\n'
-        f'Your payment of {amount} for "{movie_title}" has been confirmed.\n'
-        f'You can now stream the movie from your library.\n\n'
-        f'Enjoy watching!\n'
-        f'— The Ikigembe Team'
-    )
-
-    body_html = f"""
+_PAYMENT_COMPLETED = EmailTemplate(
+    subject='Purchase confirmed — $movie_title',
+    plain=(
+        'Hi $name,\n\n'
+        'Your payment of $amount for "$movie_title" has been confirmed.\n'
+        'You can now stream the movie from your library.\n\n'
+        'Enjoy watching!\n'
+        '— The Ikigembe Team'
+    ),
+    html=_base_html('Purchase Confirmed', f"""
         <p style="margin:0 0 4px;color:{_GOLD};font-size:11px;letter-spacing:3px;
                   text-transform:uppercase;font-family:Arial,sans-serif;">
           Purchase Confirmed
         </p>
         <p style="font-size:22px;font-weight:bold;margin:6px 0 20px;color:{_DARK};">
-          Enjoy the film, {name}.
+          Enjoy the film, $name.
         </p>
         <div style="width:48px;height:2px;background:{_GOLD};margin:0 0 24px;"></div>
 
@@ -52,7 +42,7 @@ def send_payment_completed_email(payment) -> None:
               <p style="margin:0 0 4px;font-size:11px;color:#888888;letter-spacing:2px;
                         text-transform:uppercase;font-family:Arial,sans-serif;">Film</p>
               <p style="margin:0;font-size:16px;font-weight:bold;color:#ffffff;
-                        font-family:Arial,sans-serif;">{movie_title}</p>
+                        font-family:Arial,sans-serif;">$movie_title</p>
             </td>
           </tr>
           <tr>
@@ -60,7 +50,7 @@ def send_payment_completed_email(payment) -> None:
               <p style="margin:0 0 4px;font-size:11px;color:#888888;letter-spacing:2px;
                         text-transform:uppercase;font-family:Arial,sans-serif;">Amount Paid</p>
               <p style="margin:0;font-size:20px;font-weight:bold;color:{_GOLD};
-                        font-family:Arial,sans-serif;">{amount}</p>
+                        font-family:Arial,sans-serif;">$amount</p>
             </td>
           </tr>
         </table>
@@ -70,18 +60,32 @@ def send_payment_completed_email(payment) -> None:
         <p style="margin:0;color:#888888;font-size:12px;font-family:Arial,sans-serif;">
           This film has been added to your library and is available any time.
         </p>
+    """),
+)
+
+
+def send_payment_completed_email(payment, fail_silently: bool = True) -> None:
     """
+    Send a purchase confirmation email to the viewer after MoMo payment is confirmed.
+    Errors are logged; with ``fail_silently=False`` (outbox dispatch) they are re-raised.
+    """
+    user = payment.user
+    if not user.email:
+        return
 
+    movie_title = payment.movie.title if payment.movie else 'your movie'
+    subject, plain, html = _PAYMENT_COMPLETED.render(
+        name=user.first_name or 'there',
+        movie_title=movie_title,
+        amount=f'{payment.amount:,} RWF',
+    )
     try:
-        _send(
-            subject=f'Purchase confirmed — {movie_title}',
-            plain=plain,
-            html=_base_html('Purchase Confirmed', body_html),
-            to=user.email,
-        )
+        _send(subject=subject, plain=plain, html=html, to=user.email)
         logger.info('Payment confirmation email sent to %s for "%s"', user.email, movie_title)
     except Exception:
         logger.exception('Failed to send payment confirmation email to %s', user.email)
+        if not fail_silently:
+            raise
 
 
 # ---------------------------------------------------------------------------
@@ -132,34 +136,19 @@ _WITHDRAWAL_STATUS_CONFIG = {
 }
 
 
-def send_withdrawal_status_email(withdrawal) -> None:
-    """
-    Notify a producer about a status change on their withdrawal request.
-    Handles: Approved, Rejected, Completed, Failed.
-    """
-    producer = withdrawal.producer
-    if not producer.email:
-        return
-
-    config = _WITHDRAWAL_STATUS_CONFIG.get(withdrawal.status)
-    if not config:
-        return
-
-    name   = producer.first_name or 'there'
-    amount = f'{withdrawal.amount:,} RWF'
-    method = withdrawal.payment_method or 'N/A'
+def _withdrawal_template(config) -> EmailTemplate:
     accent = config['accent']
-
-    plain = (
-        f'Hi {name},\n\n'
-        f'{config["intro"]}\n\n'
-        f'{config["message"]}\n\n'
-        f'Amount: {amount}\n'
-        f'Method: {method}\n\n'
-        f'— The Ikigembe Team'
-    )
-
-    body_html = f"""
+    return EmailTemplate(
+        subject=config['subject'],
+        plain=(
+            'Hi $name,\n\n'
+            f'{config["intro"]}\n\n'
+            f'{config["message"]}\n\n'
+            'Amount: $amount\n'
+            'Method: $method\n\n'
+            '— The Ikigembe Team'
+        ),
+        html=_base_html(config['heading'], f"""
         <p style="margin:0 0 4px;color:{accent};font-size:11px;letter-spacing:3px;
                   text-transform:uppercase;font-family:Arial,sans-serif;">
           Withdrawal · {config['label']}
@@ -169,7 +158,7 @@ def send_withdrawal_status_email(withdrawal) -> None:
         </p>
         <div style="width:48px;height:2px;background:{accent};margin:0 0 24px;"></div>
 
-        <p style="margin:0 0 12px;">Hi {name},</p>
+        <p style="margin:0 0 12px;">Hi $name,</p>
         <p style="margin:0 0 24px;">{config['intro']}</p>
         <p style="margin:0 0 28px;color:#555555;">{config['message']}</p>
 
@@ -182,7 +171,7 @@ def send_withdrawal_status_email(withdrawal) -> None:
               <p style="margin:0 0 4px;font-size:11px;color:#888888;letter-spacing:2px;
                         text-transform:uppercase;font-family:Arial,sans-serif;">Amount</p>
               <p style="margin:0;font-size:20px;font-weight:bold;color:{_GOLD};
-                        font-family:Arial,sans-serif;">{amount}</p>
+                        font-family:Arial,sans-serif;">$amount</p>
             </td>
           </tr>
           <tr>
@@ -190,7 +179,7 @@ def send_withdrawal_status_email(withdrawal) -> None:
               <p style="margin:0 0 4px;font-size:11px;color:#888888;letter-spacing:2px;
                         text-transform:uppercase;font-family:Arial,sans-serif;">Payment Method</p>
               <p style="margin:0;font-size:15px;color:#ffffff;
-                        font-family:Arial,sans-serif;">{method}</p>
+                        font-family:Arial,sans-serif;">$method</p>
             </td>
           </tr>
           <tr>
@@ -210,15 +199,37 @@ def send_withdrawal_status_email(withdrawal) -> None:
           <a href="mailto:support@ikigembe.com"
              style="color:{_GOLD};text-decoration:none;">support@ikigembe.com</a>
         </p>
+    """),
+    )
+
+
+# One precompiled template per status.
+_WITHDRAWAL_TEMPLATES = {
+    status: _withdrawal_template(config) for status, config in _WITHDRAWAL_STATUS_CONFIG.items()
+}
+
+
+def send_withdrawal_status_email(withdrawal, fail_silently: bool = True) -> None:
+    """
+    Notify a producer about a status change on their withdrawal request.
+    Handles: Approved, Rejected, Completed, Failed.
+    Errors are logged; with ``fail_silently=False`` (outbox dispatch) they are re-raised.
     """
+    producer = withdrawal.producer
+    if not producer.email:
+        return
+
+    template = _WITHDRAWAL_TEMPLATES.get(withdrawal.status)
+    if not template:
+        return
 
+    subject, plain, html = template.render(
+        name=producer.first_name or 'there',
+        amount=f'{withdrawal.amount:,} RWF',
+        method=withdrawal.payment_method or 'N/A',
+    )
     try:
-        _send(
-            subject=config['subject'],
-            plain=plain,
-            html=_base_html(config['heading'], body_html),
-            to=producer.email,
-        )
+        _send(subject=subject, plain=plain, html=html, to=producer.email)
         logger.info(
             'Withdrawal status email (%s) sent to %s for withdrawal #%s',
             withdrawal.status, producer.email, withdrawal.id,
@@ -228,3 +239,5 @@ def send_withdrawal_status_email(withdrawal) -> None:
             'Failed to send withdrawal status email to %s for withdrawal #%s',
             producer.email, withdrawal.id,
         )
+        if not fail_silently:
+            raise
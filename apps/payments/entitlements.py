@@ -0,0 +1,191 @@
+"""
+Entitlement lookups for the playback gates.
+
+``has_entitlement`` is called on every stream request and every 15-second
+watch-progress heartbeat, so positive answers are remembered in a small
+per-process LRU. Only grants are cached: a purchase completed in another
+worker must never be hidden by a stale "no".
+
+An entitlement is revoked when its payment is deleted or leaves Completed,
+unless another Completed payment covers the same movie. The revoking process
+drops its own LRU entry and bumps a shared revocation counter; every other
+process clears its LRU when it sees the counter change, which it checks at
+most every REVOCATION_CHECK_INTERVAL seconds.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Entitlement, Payment
+
+ENTITLEMENT_CACHE_SIZE = 4096
+ENTITLEMENT_CACHE_TTL = 300  # seconds
+REVOCATIONS_KEY = 'payments:entitlements:revocations'
+REVOCATION_CHECK_INTERVAL = 1  # seconds
+
+
+class _EntitlementLRU:
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            expires_at = self._data.get(key)
+            if expires_at is None:
+                return False
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return False
+            self._data.move_to_end(key)
+            return True
+
+    def add(self, key):
+        with self._lock:
+            self._data[key] = time.monotonic() + self.ttl
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def discard(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+entitlement_cache = _EntitlementLRU(ENTITLEMENT_CACHE_SIZE, ENTITLEMENT_CACHE_TTL)
+
+_seen_revocations = None
+_revocations_checked_at = 0.0
+
+
+def _sync_revocations():
+    """Clear the LRU if any process revoked an entitlement since the last check."""
+    global _seen_revocations, _revocations_checked_at
+    now = time.monotonic()
+    if now - _revocations_checked_at < REVOCATION_CHECK_INTERVAL:
+        return
+    _revocations_checked_at = now
+    revocations = cache.get(REVOCATIONS_KEY, 0)
+    if revocations != _seen_revocations:
+        entitlement_cache.clear()
+        _seen_revocations = revocations
+
+
+def _publish_revocation(key):
+    entitlement_cache.discard(key)
+    cache.add(REVOCATIONS_KEY, 0, timeout=None)
+    try:
+        cache.incr(REVOCATIONS_KEY)
+    except ValueError:  # evicted between add and incr
+        cache.add(REVOCATIONS_KEY, 1, timeout=None)
+
+
+def grant_entitlement(payment):
+    """
+    Record that ``payment.user`` may watch ``payment.movie``. Idempotent.
+
+    Call inside the transaction that marks the payment Completed; the LRU is
+    only primed once that transaction commits.
+    """
+    if not payment.movie_id:
+        return None
+    entitlement, _ = Entitlement.objects.get_or_create(
+        user_id=payment.user_id,
+        movie_id=payment.movie_id,
+        defaults={'payment': payment},
+    )
+    key = (payment.user_id, payment.movie_id)
+    transaction.on_commit(lambda: entitlement_cache.add(key))
+    return entitlement
+
+
+def revoke_entitlement(payment):
+    """
+    Withdraw the entitlement backed by ``payment``, which is being deleted or
+    is no longer Completed. If another Completed payment covers the same
+    movie, the entitlement is moved to it instead.
+    """
+    if not payment.movie_id or not payment.pk:
+        return
+    with transaction.atomic():
+        entitlement = Entitlement.objects.select_for_update().filter(payment_id=payment.pk).first()
+        if entitlement is None:
+            return
+        other = (
+            Payment.objects
+            .filter(user_id=entitlement.user_id, movie_id=entitlement.movie_id, status='Completed')
+            .exclude(pk=payment.pk)
+            .order_by('created_at', 'id')
+            .first()
+        )
+        if other is not None:
+            entitlement.payment = other
+            entitlement.save(update_fields=['payment'])
+            return
+        entitlement.delete()
+        key = (entitlement.user_id, entitlement.movie_id)
+        entitlement_cache.discard(key)
+        transaction.on_commit(lambda: _publish_revocation(key))
+
+
+def has_entitlement(user, movie_id):
+    """True if ``user`` has bought ``movie_id``."""
+    if user is None or not user.is_authenticated:
+        return False
+    _sync_revocations()
+    key = (user.id, int(movie_id))
+    if entitlement_cache.get(key):
+        return True
+    if Entitlement.objects.filter(user_id=user.id, movie_id=movie_id).exists():
+        entitlement_cache.add(key)
+        return True
+    return False
+
+
+def entitled_movie_ids(user, movie_ids=None):
+    """
+    Return the set of movie IDs ``user`` has bought, optionally restricted to
+    ``movie_ids``. One indexed query.
+    """
+    if user is None or not user.is_authenticated:
+        return set()
+    qs = Entitlement.objects.filter(user_id=user.id)
+    if movie_ids is not None:
+        if not movie_ids:
+            return set()
+        qs = qs.filter(movie_id__in=movie_ids)
+    return set(qs.values_list('movie_id', flat=True))
+
+
+def backfill_entitlements(payment_model, entitlement_model, batch_size=1000):
+    """
+    Create missing entitlements for every Completed payment, linked to the
+    earliest payment per (user, movie). Returns the number of pairs seen.
+    """
+    seen, batch = set(), []
+    completed = (
+        payment_model.objects
+        .filter(status='Completed', movie__isnull=False)
+        .order_by('created_at', 'id')
+        .values_list('id', 'user_id', 'movie_id')
+    )
+    for payment_id, user_id, movie_id in completed.iterator(chunk_size=batch_size):
+        if (user_id, movie_id) in seen:
+            continue
+        seen.add((user_id, movie_id))
+        batch.append(entitlement_model(user_id=user_id, movie_id=movie_id, payment_id=payment_id))
+        if len(batch) >= batch_size:
+            entitlement_model.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        entitlement_model.objects.bulk_create(batch, ignore_conflicts=True)
+    return len(seen)
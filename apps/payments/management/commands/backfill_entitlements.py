@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from apps.payments.entitlements import backfill_entitlements, entitlement_cache
+from apps.payments.models import Entitlement, Payment
+
+
+class Command(BaseCommand):
+    help = 'Create missing Entitlement rows for every Completed payment (safe to re-run).'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Rows per bulk insert (default: 1000)',
+        )
+
+    def handle(self, *args, **options):
+        before = Entitlement.objects.count()
+        pairs = backfill_entitlements(Payment, Entitlement, batch_size=options['batch_size'])
+        created = Entitlement.objects.count() - before
+        entitlement_cache.clear()
+        self.stdout.write(self.style.SUCCESS(
+            f'Checked {pairs} purchased (user, movie) pair(s); created {created} entitlement(s).'
+        ))
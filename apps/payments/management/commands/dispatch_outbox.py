@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.payments.outbox import dispatch_pending
+
+
+class Command(BaseCommand):
+    help = 'Send queued payment side effects (OutboxEvent): confirmation and withdrawal emails.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            type=float,
+            metavar='SECONDS',
+            help='Keep polling every SECONDS instead of exiting once the outbox is drained',
+        )
+
+    def handle(self, *args, **options):
+        interval = options.get('loop')
+        while True:
+            sent = dispatch_pending()
+            if sent or not interval:
+                self.stdout.write(self.style.SUCCESS(f'Dispatched {sent} outbox event(s).'))
+            if not interval:
+                return
+            time.sleep(interval)
@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.payments.reconciliation import reconcile
+
+
+class Command(BaseCommand):
+    help = (
+        'Ask PawaPay for the status of aged Pending payments and Processing MoMo withdrawals '
+        'and apply any final status whose webhook never arrived.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            type=float,
+            metavar='SECONDS',
+            help='Keep sweeping every SECONDS instead of exiting after one sweep',
+        )
+        parser.add_argument('--min-age', type=int, help='Only rows older than this many seconds (default: RECONCILE_MIN_AGE)')
+        parser.add_argument('--batch-size', type=int, help='Rows per batch (default: RECONCILE_BATCH_SIZE)')
+        parser.add_argument('--concurrency', type=int, help='Parallel status lookups (default: RECONCILE_CONCURRENCY)')
+
+    def handle(self, *args, **options):
+        interval = options.get('loop')
+        while True:
+            results = reconcile(
+                min_age=options.get('min_age'),
+                batch_size=options.get('batch_size'),
+                concurrency=options.get('concurrency'),
+            )
+            for kind, outcomes in results.items():
+                summary = ', '.join(f'{k}={v}' for k, v in sorted(outcomes.items())) or 'nothing to do'
+                self.stdout.write(f'{kind}: {summary}')
+            if not interval:
+                return
+            time.sleep(interval)
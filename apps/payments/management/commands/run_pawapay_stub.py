@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.payments.pawapay_stub import PawaPayStub
+
+
+class Command(BaseCommand):
+    help = 'Serve a local fake PawaPay API for offline development (point PAWAPAY_BASE_URL at it).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--port', type=int, default=8765, help='Port to listen on (default: 8765)')
+        parser.add_argument('--api-key', default=None, help='Bearer token to accept (default: PAWAPAY_API_KEY)')
+
+    def handle(self, *args, **options):
+        from django.conf import settings
+
+        stub = PawaPayStub(port=options['port'], api_key=options['api_key'] or settings.PAWAPAY_API_KEY)
+        with stub:
+            self.stdout.write(self.style.SUCCESS(f'PawaPay stub listening on {stub.url} — Ctrl+C to stop.'))
+            try:
+                while True:
+                    time.sleep(3600)
+            except KeyboardInterrupt:
+                self.stdout.write('Stopping PawaPay stub.')
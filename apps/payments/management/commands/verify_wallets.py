@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+
+from apps.payments.wallet import find_drift, repair_wallet
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute every producer wallet from payments and withdrawals and report any '
+        'difference from the ledger totals (--fix repairs them).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fix',
+            action='store_true',
+            help='Append correcting ledger entries for every drifting wallet',
+        )
+
+    def handle(self, *args, **options):
+        drift = find_drift()
+        if not drift:
+            self.stdout.write(self.style.SUCCESS('All wallets match their payments and withdrawals.'))
+            return
+
+        for producer_id, field, recorded, expected in drift:
+            self.stdout.write(self.style.WARNING(
+                f'Producer #{producer_id}: {field} is {recorded}, expected {expected}'
+            ))
+        producer_ids = sorted({producer_id for producer_id, *_ in drift})
+        if not options['fix']:
+            self.stdout.write(f'{len(producer_ids)} wallet(s) drifted. Re-run with --fix to repair.')
+            return
+
+        appended = sum(repair_wallet(producer_id) for producer_id in producer_ids)
+        remaining = find_drift()
+        self.stdout.write(self.style.SUCCESS(
+            f'Repaired {len(producer_ids)} wallet(s) with {appended} ledger entr{"y" if appended == 1 else "ies"}; '
+            f'{len(remaining)} difference(s) remain.'
+        ))
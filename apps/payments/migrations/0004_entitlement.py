@@ -0,0 +1,60 @@
+# Generated by Django 6.0.3 on 2026-10-17 02:09
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def forward_backfill_entitlements(apps, schema_editor, batch_size=1000):
+    """
+    Grant an entitlement for every purchase completed before this table
+    existed, linked to the earliest payment per (user, movie).
+
+    A frozen copy of apps.payments.entitlements.backfill_entitlements, so
+    later changes to that module don't alter this migration.
+    """
+    Payment = apps.get_model('payments', 'Payment')
+    Entitlement = apps.get_model('payments', 'Entitlement')
+    seen, batch = set(), []
+    completed = (
+        Payment.objects
+        .filter(status='Completed', movie__isnull=False)
+        .order_by('created_at', 'id')
+        .values_list('id', 'user_id', 'movie_id')
+    )
+    for payment_id, user_id, movie_id in completed.iterator(chunk_size=batch_size):
+        if (user_id, movie_id) in seen:
+            continue
+        seen.add((user_id, movie_id))
+        batch.append(Entitlement(user_id=user_id, movie_id=movie_id, payment_id=payment_id))
+        if len(batch) >= batch_size:
+            Entitlement.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        Entitlement.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0012_movie_search'),
+        ('payments', '0003_payment_deposit_id_payment_phone_number_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Entitlement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granted_at', models.DateTimeField(auto_now_add=True)),
+                ('movie', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='entitlements', to='movies.movie')),
+                ('payment', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='entitlements', to='payments.payment')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='entitlements', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('user', 'movie')},
+            },
+        ),
+        migrations.RunPython(forward_backfill_entitlements, migrations.RunPython.noop),
+    ]
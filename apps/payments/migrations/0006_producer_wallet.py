@@ -0,0 +1,111 @@
+# Generated by Django 6.0.3 on 2026-10-17 03:00
+
+from collections import defaultdict
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# Frozen copies of the apps.payments.wallet rules as of this migration, so
+# later changes to that module don't alter what the backfill does.
+LOCKING_STATUSES = ('Pending', 'Approved', 'Processing', 'Completed')
+AMOUNT_FIELDS = ('gross_revenue', 'locked_amount', 'pending_withdrawals', 'total_withdrawn')
+_ZERO = dict.fromkeys(AMOUNT_FIELDS, 0)
+
+
+def payment_amounts(status, amount):
+    return {**_ZERO, 'gross_revenue': amount if status == 'Completed' else 0}
+
+
+def withdrawal_amounts(status, amount):
+    return {
+        'gross_revenue': 0,
+        'locked_amount': amount if status in LOCKING_STATUSES else 0,
+        'pending_withdrawals': amount if status == 'Pending' else 0,
+        'total_withdrawn': amount if status == 'Completed' else 0,
+    }
+
+
+def _balance(totals):
+    gross = totals['gross_revenue']
+    return (gross * 70) // 100 - totals['locked_amount']
+
+
+def forward_backfill_wallets(apps, schema_editor, batch_size=1000):
+    """Build wallets and their ledger from the payments and withdrawals made before the ledger existed."""
+    Payment = apps.get_model('payments', 'Payment')
+    WithdrawalRequest = apps.get_model('payments', 'WithdrawalRequest')
+    ProducerWallet = apps.get_model('payments', 'ProducerWallet')
+    WalletEntry = apps.get_model('payments', 'WalletEntry')
+
+    rows = [
+        (created_at, pid, {'payment_id': pk}, status, payment_amounts(status, amount))
+        for pk, pid, status, amount, created_at in Payment.objects.filter(
+            status='Completed', movie__producer_profile__isnull=False,
+        ).values_list('id', 'movie__producer_profile_id', 'status', 'amount', 'created_at')
+    ]
+    rows += [
+        (created_at, pid, {'withdrawal_id': pk}, status, withdrawal_amounts(status, amount))
+        for pk, pid, status, amount, created_at in WithdrawalRequest.objects.filter(
+            status__in=LOCKING_STATUSES,
+        ).values_list('id', 'producer_id', 'status', 'amount', 'created_at')
+    ]
+    rows.sort(key=lambda row: row[0])
+
+    totals = defaultdict(lambda: dict(_ZERO))
+    entries = []
+    for _, pid, source, status, amounts in rows:
+        wallet = totals[pid]
+        for field in AMOUNT_FIELDS:
+            wallet[field] += amounts[field]
+        entries.append(WalletEntry(
+            producer_id=pid, status=status, balance_after=_balance(wallet), **amounts, **source,
+        ))
+    WalletEntry.objects.bulk_create(entries, batch_size=batch_size)
+    ProducerWallet.objects.bulk_create(
+        [ProducerWallet(producer_id=pid, **wallet) for pid, wallet in totals.items()], batch_size=batch_size,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0015_email_broadcast'),
+        ('payments', '0005_outboxevent'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProducerWallet',
+            fields=[
+                ('producer', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='wallet', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('gross_revenue', models.BigIntegerField(default=0, help_text="Completed payments for the producer's movies (RWF)")),
+                ('locked_amount', models.BigIntegerField(default=0, help_text='Pending/Approved/Processing/Completed withdrawals (RWF)')),
+                ('pending_withdrawals', models.BigIntegerField(default=0, help_text='Pending withdrawals (RWF)')),
+                ('total_withdrawn', models.BigIntegerField(default=0, help_text='Completed withdrawals (RWF)')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='WalletEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(blank=True, help_text='Source row status this entry accounts for', max_length=20)),
+                ('gross_revenue', models.BigIntegerField(default=0)),
+                ('locked_amount', models.BigIntegerField(default=0)),
+                ('pending_withdrawals', models.BigIntegerField(default=0)),
+                ('total_withdrawn', models.BigIntegerField(default=0)),
+                ('balance_after', models.BigIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('payment', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='wallet_entries', to='payments.payment')),
+                ('producer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='wallet_entries', to=settings.AUTH_USER_MODEL)),
+                ('withdrawal', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='wallet_entries', to='payments.withdrawalrequest')),
+            ],
+            options={
+                'ordering': ['-id'],
+                'indexes': [models.Index(fields=['producer', '-id'], name='walletentry_producer_idx')],
+            },
+        ),
+        migrations.RunPython(forward_backfill_wallets, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 6.0.3 on 2026-10-17 04:27
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Sum
+
+
+def forward_backfill_producers(apps, schema_editor):
+    """
+    Credit each payment to its movie's producer, or, for payments whose
+    movie is already deleted, to the producer the wallet ledger credited.
+    """
+    Payment = apps.get_model('payments', 'Payment')
+    Movie = apps.get_model('movies', 'Movie')
+    WalletEntry = apps.get_model('payments', 'WalletEntry')
+    Payment.objects.filter(movie__isnull=False).update(
+        producer_id=Subquery(Movie.objects.filter(pk=OuterRef('movie_id')).values('producer_profile_id')[:1]),
+    )
+    credited = (
+        WalletEntry.objects.filter(payment__isnull=False, payment__producer__isnull=True)
+        .values('payment_id', 'producer_id').annotate(gross=Sum('gross_revenue')).filter(gross__gt=0)
+    )
+    for row in credited:
+        Payment.objects.filter(pk=row['payment_id']).update(producer_id=row['producer_id'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0007_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payment',
+            name='producer',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='sales', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(forward_backfill_producers, migrations.RunPython.noop),
+    ]
@@ -3,7 +3,26 @@ from django.conf import settings
 
 User = settings.AUTH_USER_MODEL
 
-class Payment(models.Model):
+
+class TracksUpdates(models.Model):
+    """
+    Adds ``updated_at``, bumped on every save including ``update_fields``
+    saves, so the report rollups (apps/users/rollups.py) can find the rows
+    that changed since their last refresh.
+    """
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'updated_at'}
+        super().save(*args, **kwargs)
+
+
+class Payment(TracksUpdates):
     """
     Model representing a user paying to watch a movie.
     """
@@ -14,6 +33,9 @@ class Payment(models.Model):
     )
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='payments')
     movie = models.ForeignKey('movies.Movie', on_delete=models.SET_NULL, null=True, related_name='payments')
+    # The movie's producer when the payment was made. Credited in the wallet
+    # ledger (wallet.py) and kept when the movie is deleted.
+    producer = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='sales')
     amount = models.PositiveIntegerField(help_text="Amount in RWF")
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='Pending')
     deposit_id = models.CharField(max_length=100, unique=True, null=True, blank=True, help_text="PawaPay deposit ID")
@@ -23,11 +45,39 @@ class Payment(models.Model):
     class Meta:
         ordering = ['-created_at']
 
+    def save(self, *args, **kwargs):
+        if self.producer_id is None and self.movie_id is not None:
+            self.producer_id = self.movie.producer_profile_id
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'producer'}
+        super().save(*args, **kwargs)
+
     def __str__(self):
         movie_title = self.movie.title if self.movie else "Unknown Movie"
         return f"{self.user} - {movie_title} - {self.amount} RWF"
 
-class WithdrawalRequest(models.Model):
+class Entitlement(models.Model):
+    """
+    Denormalised "user may watch movie" record.
+
+    Written in the same transaction that marks a Payment Completed, and
+    removed when that payment is deleted or leaves Completed (see
+    signals.py), so playback gates hit a unique (user, movie) index instead
+    of scanning Payment rows.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='entitlements')
+    movie = models.ForeignKey('movies.Movie', on_delete=models.CASCADE, related_name='entitlements')
+    payment = models.ForeignKey(Payment, on_delete=models.SET_NULL, null=True, blank=True, related_name='entitlements')
+    granted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('user', 'movie')
+
+    def __str__(self):
+        return f"{self.user} → movie #{self.movie_id}"
+
+class WithdrawalRequest(TracksUpdates):
     """
     Model representing a producer requesting to withdraw earnings.
     Workflow: Pending → Approved (Admin) → Completed (Finance).
@@ -70,3 +120,93 @@ class WithdrawalRequest(models.Model):
 
     def __str__(self):
         return f"Withdrawal - {self.producer} - {self.amount} RWF ({self.status})"
+
+
+class OutboxEvent(models.Model):
+    """
+    Side effect of a payment state change (e.g. a confirmation email),
+    written in the same transaction as the change and carried out later by
+    the outbox dispatcher (see outbox.py).
+
+    ``idempotency_key`` identifies the logical effect, so duplicate webhook
+    deliveries cannot queue it twice.
+    """
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('processing', 'Processing'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    )
+
+    kind = models.CharField(max_length=50)
+    idempotency_key = models.CharField(max_length=150, unique=True)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    available_at = models.DateTimeField(help_text="Not dispatched before this time (retry backoff)")
+    locked_by = models.CharField(max_length=100, blank=True, default='')
+    locked_until = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'available_at'], name='outboxevent_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.idempotency_key} ({self.status})"
+
+
+class ProducerWallet(models.Model):
+    """
+    Running totals of a producer's wallet, kept current by appending
+    WalletEntry rows (see wallet.py) in the same transaction as the payment
+    or withdrawal status change. Reading a wallet is one primary-key lookup.
+
+    The earnings split and balance are derived from these totals exactly as
+    get_producer_wallet always computed them.
+    """
+    producer = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='wallet')
+    gross_revenue = models.BigIntegerField(default=0, help_text="Completed payments for the producer's movies (RWF)")
+    locked_amount = models.BigIntegerField(default=0, help_text="Pending/Approved/Processing/Completed withdrawals (RWF)")
+    pending_withdrawals = models.BigIntegerField(default=0, help_text="Pending withdrawals (RWF)")
+    total_withdrawn = models.BigIntegerField(default=0, help_text="Completed withdrawals (RWF)")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Wallet - {self.producer}"
+
+
+class WalletEntry(models.Model):
+    """
+    Append-only change to a ProducerWallet caused by one Payment or
+    WithdrawalRequest. The deltas of all entries for a source row add up
+    to that row's current contribution to the wallet. ``balance_after``
+    snapshots the withdrawable balance once the entry is applied.
+    """
+    producer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='wallet_entries')
+    payment = models.ForeignKey(Payment, on_delete=models.SET_NULL, null=True, blank=True, related_name='wallet_entries')
+    withdrawal = models.ForeignKey(
+        WithdrawalRequest, on_delete=models.SET_NULL, null=True, blank=True, related_name='wallet_entries',
+    )
+    status = models.CharField(max_length=20, blank=True, help_text="Source row status this entry accounts for")
+    gross_revenue = models.BigIntegerField(default=0)
+    locked_amount = models.BigIntegerField(default=0)
+    pending_withdrawals = models.BigIntegerField(default=0)
+    total_withdrawn = models.BigIntegerField(default=0)
+    balance_after = models.BigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-id']
+        indexes = [
+            models.Index(fields=['producer', '-id'], name='walletentry_producer_idx'),
+        ]
+
+    def __str__(self):
+        source = f"payment #{self.payment_id}" if self.payment_id else f"withdrawal #{self.withdrawal_id}"
+        return f"{self.producer} - {source} ({self.status})"
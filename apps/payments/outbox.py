@@ -0,0 +1,187 @@
+"""
+Transactional outbox for payment side effects.
+
+The PawaPay webhook used to send confirmation emails inline, so a slow SMTP
+server delayed the 200 to PawaPay and invited callback retries. Now the
+webhook only writes an OutboxEvent in the same transaction as the status
+change (``record_event``) and returns; a dispatcher sends the email later:
+
+- in-process: a daemon thread started after the commit drains the outbox
+  every OUTBOX_DISPATCH_INTERVAL seconds (0 disables it);
+- ``manage.py dispatch_outbox``: drains anything left behind, e.g. by a
+  restarted web process (run it from cron or as a worker).
+
+Events are claimed with ``SELECT ... FOR UPDATE SKIP LOCKED`` and a lease of
+OUTBOX_LEASE_SECONDS, so several dispatchers never run the same event. A
+failed attempt is retried after OUTBOX_RETRY_BACKOFF * 2**(attempt - 1)
+seconds; after ``max_attempts`` the event is marked failed.
+"""
+import logging
+import os
+import socket
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from apps.movies.background import PeriodicFlusher
+from .emails import send_payment_completed_email, send_withdrawal_status_email
+from .models import OutboxEvent, Payment, WithdrawalRequest
+
+logger = logging.getLogger(__name__)
+
+PAYMENT_COMPLETED_EMAIL = 'payment_completed_email'
+WITHDRAWAL_STATUS_EMAIL = 'withdrawal_status_email'
+
+
+def _send_payment_completed(payload):
+    payment = Payment.objects.select_related('user', 'movie').get(pk=payload['payment_id'])
+    send_payment_completed_email(payment, fail_silently=False)
+
+
+def _send_withdrawal_status(payload):
+    withdrawal = WithdrawalRequest.objects.select_related('producer').get(pk=payload['withdrawal_id'])
+    # Describe the transition that was recorded, even if the row has moved on since.
+    withdrawal.status = payload['status']
+    send_withdrawal_status_email(withdrawal, fail_silently=False)
+
+
+HANDLERS = {
+    PAYMENT_COMPLETED_EMAIL: _send_payment_completed,
+    WITHDRAWAL_STATUS_EMAIL: _send_withdrawal_status,
+}
+
+
+def _dispatch_interval():
+    return getattr(settings, 'OUTBOX_DISPATCH_INTERVAL', 5)
+
+
+def default_worker_id():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def retry_delay(attempt):
+    """Backoff before retry number ``attempt`` (1-based)."""
+    base = getattr(settings, 'OUTBOX_RETRY_BACKOFF', 30)
+    cap = getattr(settings, 'OUTBOX_RETRY_BACKOFF_MAX', 3600)
+    return timedelta(seconds=min(base * 2 ** (attempt - 1), cap))
+
+
+# ─────────────────────────────────────────────
+# Producer side
+# ─────────────────────────────────────────────
+
+def record_event(kind, idempotency_key, payload):
+    """
+    Queue a side effect. Call inside the transaction that makes the state
+    change; the event commits (or rolls back) with it. Returns (event,
+    created) — an event with the same key is never queued twice.
+    """
+    if kind not in HANDLERS:
+        raise ValueError(f'Unknown outbox event kind: {kind}')
+    event, created = OutboxEvent.objects.get_or_create(
+        idempotency_key=idempotency_key,
+        defaults={
+            'kind': kind,
+            'payload': payload,
+            'available_at': timezone.now(),
+            'max_attempts': getattr(settings, 'OUTBOX_MAX_ATTEMPTS', 5),
+        },
+    )
+    if created:
+        transaction.on_commit(wake_dispatcher)
+    return event, created
+
+
+def wake_dispatcher():
+    global _has_work
+    _has_work = True
+    if _dispatch_interval() > 0:
+        _dispatcher.ensure_started()
+
+
+# ─────────────────────────────────────────────
+# Dispatcher side
+# ─────────────────────────────────────────────
+
+def claim_events(worker_id, limit):
+    """Lease up to ``limit`` due events (or events whose lease expired) to ``worker_id``."""
+    now = timezone.now()
+    due = Q(status='pending', available_at__lte=now) | Q(status='processing', locked_until__lt=now)
+    lease = getattr(settings, 'OUTBOX_LEASE_SECONDS', 120)
+    with transaction.atomic():
+        ids = list(
+            OutboxEvent.objects.select_for_update(skip_locked=True)
+            .filter(due)
+            .order_by('available_at', 'id')
+            .values_list('id', flat=True)[:limit]
+        )
+        if not ids:
+            return []
+        OutboxEvent.objects.filter(id__in=ids).update(
+            status='processing',
+            locked_by=worker_id,
+            locked_until=now + timedelta(seconds=lease),
+            attempts=F('attempts') + 1,
+        )
+    return list(OutboxEvent.objects.filter(id__in=ids).order_by('available_at', 'id'))
+
+
+def _owned(event):
+    return OutboxEvent.objects.filter(
+        pk=event.pk, status='processing', locked_by=event.locked_by, attempts=event.attempts,
+    )
+
+
+def dispatch_event(event):
+    """Run one claimed event's handler and record the outcome. Returns True on success."""
+    try:
+        HANDLERS[event.kind](event.payload)
+    except Exception as e:
+        error = str(e) or e.__class__.__name__
+        now = timezone.now()
+        if event.attempts < event.max_attempts:
+            delay = retry_delay(event.attempts)
+            _owned(event).update(
+                status='pending', available_at=now + delay, last_error=error, locked_by='', locked_until=None,
+            )
+            logger.warning(
+                'Outbox %s attempt %s failed — retrying in %ss: %s',
+                event.idempotency_key, event.attempts, int(delay.total_seconds()), error,
+            )
+        else:
+            _owned(event).update(status='failed', processed_at=now, last_error=error, locked_until=None)
+            logger.error('Outbox %s failed after %s attempt(s): %s', event.idempotency_key, event.attempts, error)
+        return False
+
+    if not _owned(event).update(status='done', processed_at=timezone.now(), last_error=None, locked_until=None):
+        logger.warning('Outbox %s finished after losing its lease', event.idempotency_key)
+    return True
+
+
+def dispatch_pending(worker_id=None, batch_size=None):
+    """Dispatch every due event. Returns the number dispatched successfully."""
+    global _has_work
+    _has_work = False
+    worker_id = worker_id or default_worker_id()
+    batch_size = batch_size or getattr(settings, 'OUTBOX_BATCH_SIZE', 50)
+    succeeded = 0
+    while True:
+        events = claim_events(worker_id, batch_size)
+        if not events:
+            break
+        for event in events:
+            succeeded += dispatch_event(event)
+    # Keep the in-process dispatcher polling while retries are waiting out their backoff.
+    if OutboxEvent.objects.filter(status='pending').exists():
+        _has_work = True
+    return succeeded
+
+
+_has_work = False
+
+_dispatcher = PeriodicFlusher(
+    'outbox-dispatcher', dispatch_pending, _dispatch_interval, has_pending=lambda: _has_work,
+)
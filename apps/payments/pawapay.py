@@ -1,11 +1,22 @@
+import logging
 import re
-import requests
+import threading
+import time
+from collections import defaultdict, deque
 from datetime import datetime, timezone
+
+import requests
 from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
 
 SANDBOX_URL = 'https://api.sandbox.pawapay.cloud'
 LIVE_URL = 'https://api.pawapay.cloud'
 
+LATENCY_SAMPLE_SIZE = 500  # latencies kept per endpoint for percentiles
+
 # Rwanda MTN prefixes: 078, 079 → international: 25078, 25079
 # Rwanda Airtel prefixes: 072, 073 → international: 25072, 25073
 _CORRESPONDENT_MAP = {
@@ -21,26 +32,231 @@ def _clean_description(text: str) -> str:
     return re.sub(r'[^a-zA-Z0-9 ]', '', text)[:22]
 
 
-def _post(endpoint: str, payload: dict) -> dict:
-    """POST to a PawaPay API endpoint and return the JSON response."""
-    base_url = getattr(settings, 'PAWAPAY_BASE_URL', SANDBOX_URL)
-    response = requests.post(
-        f'{base_url}/{endpoint}',
-        json=payload,
-        headers={
-            'Authorization': f'Bearer {settings.PAWAPAY_API_KEY}',
+# ─────────────────────────────────────────────
+# HTTP client
+# ─────────────────────────────────────────────
+
+class PawaPayUnavailable(requests.ConnectionError):
+    """Raised without contacting PawaPay while the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Opens after ``failure_threshold`` consecutive failures (connection
+    errors, timeouts, 5xx/429) and rejects calls for ``reset_timeout``
+    seconds. Then one trial call is let through (half-open): success closes
+    the breaker, failure opens it again.
+    """
+
+    def __init__(self, failure_threshold, reset_timeout, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    def allow(self):
+        with self._lock:
+            if self.state == 'closed':
+                return True
+            if self.state == 'open' and self._clock() - self.opened_at >= self.reset_timeout:
+                self.state = 'half_open'
+            if self.state == 'half_open' and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = 'closed'
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.state == 'half_open' or self.failures >= self.failure_threshold:
+                if self.state != 'open':
+                    logger.error('PawaPay circuit breaker opened after %s failure(s)', self.failures)
+                self.state = 'open'
+                self.opened_at = self._clock()
+
+    def snapshot(self):
+        with self._lock:
+            retry_in = None
+            if self.state == 'open':
+                retry_in = max(self.reset_timeout - (self._clock() - self.opened_at), 0)
+            return {'state': self.state, 'consecutive_failures': self.failures, 'retry_in_seconds': retry_in}
+
+
+class _EndpointStats:
+    """Call count, errors and a rolling window of latencies for one endpoint."""
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.rejected = 0
+        self.max_ms = 0.0
+        self.samples = deque(maxlen=LATENCY_SAMPLE_SIZE)
+
+    def record(self, elapsed_ms, error):
+        self.calls += 1
+        self.errors += error
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.samples.append(elapsed_ms)
+
+    def snapshot(self):
+        ordered = sorted(self.samples)
+
+        def pct(p):
+            return round(ordered[min(int(len(ordered) * p), len(ordered) - 1)], 1) if ordered else None
+
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'rejected_by_breaker': self.rejected,
+            'avg_ms': round(sum(ordered) / len(ordered), 1) if ordered else None,
+            'p50_ms': pct(0.50),
+            'p95_ms': pct(0.95),
+            'max_ms': round(self.max_ms, 1),
+        }
+
+
+class PawaPayClient:
+    """
+    PawaPay API client on one keep-alive ``requests.Session``.
+
+    - Timeouts: (PAWAPAY_CONNECT_TIMEOUT, PAWAPAY_READ_TIMEOUT) instead of a
+      flat 30 s, so an unreachable API fails within seconds.
+    - Retries: up to PAWAPAY_RETRIES with backoff. Connection failures are
+      retried for every call (nothing reached PawaPay); read timeouts and
+      5xx/429 responses only for GETs — a re-sent POST could start a second
+      MoMo prompt or be reported back as DUPLICATE_IGNORED.
+    - Circuit breaker: see CircuitBreaker.
+    - Latency: ``metrics()`` returns per-endpoint statistics for this process.
+    """
+
+    def __init__(self, base_url, api_key, connect_timeout=3.05, read_timeout=15,
+                 retries=2, pool_size=10, breaker=None):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = (connect_timeout, read_timeout)
+        self.breaker = breaker or CircuitBreaker(5, 30)
+        self.session = requests.Session()
+        self.session.headers.update({
+            'Authorization': f'Bearer {api_key}',
             'Content-Type': 'application/json',
-        },
-        timeout=30,
+        })
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=pool_size,
+            max_retries=Retry(
+                total=retries,
+                connect=retries,
+                read=retries,
+                status=retries,
+                other=0,
+                allowed_methods=frozenset({'GET'}),
+                status_forcelist=(429, 500, 502, 503, 504),
+                backoff_factor=0.3,
+                raise_on_status=False,
+            ),
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self._stats = defaultdict(_EndpointStats)
+        self._stats_lock = threading.Lock()
+
+    def request(self, method, path, metric, json=None):
+        """Call PawaPay and return the decoded JSON body; ``metric`` names the endpoint in metrics()."""
+        name = f'{method} {metric}'
+        if not self.breaker.allow():
+            with self._stats_lock:
+                self._stats[name].rejected += 1
+            raise PawaPayUnavailable('PawaPay circuit breaker is open — not calling the provider.')
+
+        started = time.perf_counter()
+        try:
+            response = self.session.request(method, f'{self.base_url}/{path}', json=json, timeout=self.timeout)
+        except requests.RequestException:
+            self.breaker.record_failure()
+            self._record(name, started, error=True)
+            raise
+        if response.status_code >= 500 or response.status_code == 429:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        self._record(name, started, error=response.status_code >= 400)
+
+        response.raise_for_status()
+        try:
+            return response.json()
+        except ValueError as exc:
+            raise requests.RequestException(
+                f'PawaPay returned non-JSON response (status {response.status_code}): '
+                f'{response.text[:200]}'
+            ) from exc
+
+    def _record(self, name, started, error):
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._stats_lock:
+            self._stats[name].record(elapsed_ms, error)
+
+    def metrics(self):
+        with self._stats_lock:
+            return {name: stats.snapshot() for name, stats in sorted(self._stats.items())}
+
+    def close(self):
+        self.session.close()
+
+
+_client = None
+_client_config = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> PawaPayClient:
+    """Process-wide client; rebuilt only if the PawaPay settings change."""
+    global _client, _client_config
+    config = (
+        getattr(settings, 'PAWAPAY_BASE_URL', SANDBOX_URL),
+        settings.PAWAPAY_API_KEY,
+        getattr(settings, 'PAWAPAY_CONNECT_TIMEOUT', 3.05),
+        getattr(settings, 'PAWAPAY_READ_TIMEOUT', 15),
+        getattr(settings, 'PAWAPAY_RETRIES', 2),
+        getattr(settings, 'PAWAPAY_POOL_SIZE', 10),
+        getattr(settings, 'PAWAPAY_BREAKER_THRESHOLD', 5),
+        getattr(settings, 'PAWAPAY_BREAKER_RESET', 30),
     )
-    response.raise_for_status()
-    try:
-        return response.json()
-    except ValueError as exc:
-        raise requests.RequestException(
-            f'PawaPay returned non-JSON response (status {response.status_code}): '
-            f'{response.text[:200]}'
-        ) from exc
+    if _client_config == config:
+        return _client
+    with _client_lock:
+        if _client_config != config:
+            base_url, api_key, connect_timeout, read_timeout, retries, pool_size, threshold, reset = config
+            if _client is not None:
+                _client.close()
+            _client = PawaPayClient(
+                base_url, api_key,
+                connect_timeout=connect_timeout,
+                read_timeout=read_timeout,
+                retries=retries,
+                pool_size=pool_size,
+                breaker=CircuitBreaker(threshold, reset),
+            )
+            _client_config = config
+        return _client
+
+
+def _post(endpoint: str, payload: dict) -> dict:
+    """POST to a PawaPay API endpoint and return the JSON response."""
+    return get_client().request('POST', endpoint, endpoint, json=payload)
+
+
+def _get(path: str, metric: str):
+    return get_client().request('GET', path, metric)
 
 
 def normalize_phone(phone: str) -> str:
@@ -109,3 +325,21 @@ def initiate_payout(payout_id: str, amount: int, phone_number: str, description:
         'customerTimestamp': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
         'statementDescription': _clean_description(description),
     })
+
+
+def get_deposit(deposit_id: str) -> dict | None:
+    """
+    Look up a deposit's current status. Returns None if PawaPay does not know it.
+    Safe to retry (GET).
+    """
+    results = _get(f'deposits/{deposit_id}', 'deposits/{id}')
+    return results[0] if results else None
+
+
+def get_payout(payout_id: str) -> dict | None:
+    """
+    Look up a payout's current status. Returns None if PawaPay does not know it.
+    Safe to retry (GET).
+    """
+    results = _get(f'payouts/{payout_id}', 'payouts/{id}')
+    return results[0] if results else None
@@ -0,0 +1,141 @@
+"""
+Local stand-in for the PawaPay API, used as the test double for
+PawaPayClient and for offline development:
+
+    python manage.py run_pawapay_stub --port 8765
+    PAWAPAY_BASE_URL=http://127.0.0.1:8765 python manage.py runserver
+
+Implements POST /deposits, POST /payouts and GET /deposits/{id},
+GET /payouts/{id} (v1 shapes). Deposits and payouts are ACCEPTED and stay
+so until ``set_status`` changes them. ``fail_next`` and ``delay`` simulate a
+degraded provider. Speaks HTTP/1.1 keep-alive, and ``connections`` counts
+the TCP connections clients opened.
+"""
+import json
+import re
+import sys
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_ITEM = re.compile(r'^/(deposits|payouts)/([^/]+)$')
+_ID_FIELD = {'deposits': 'depositId', 'payouts': 'payoutId'}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        with self.server.stub._lock:
+            self.server.stub.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _handle(self, method):
+        stub = self.server.stub
+        length = int(self.headers.get('Content-Length') or 0)
+        body = json.loads(self.rfile.read(length)) if length else None
+        with stub._lock:
+            stub.requests.append((method, self.path, body))
+            failure = stub._failures.popleft() if stub._failures else None
+        if stub.delay:
+            stub._release.wait(stub.delay)
+        if failure is not None:
+            return self._reply(failure, {'errorMessage': 'stubbed failure'})
+        if self.headers.get('Authorization') != f'Bearer {stub.api_key}':
+            return self._reply(401, {'errorMessage': 'bad token'})
+
+        if method == 'POST' and self.path in ('/deposits', '/payouts'):
+            kind = self.path.strip('/')
+            record = {
+                _ID_FIELD[kind]: body[_ID_FIELD[kind]],
+                'status': 'ACCEPTED',
+                'amount': body.get('amount'),
+                'currency': body.get('currency'),
+                'created': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+            }
+            with stub._lock:
+                stub.records[kind].setdefault(record[_ID_FIELD[kind]], record)
+            return self._reply(200, {k: record[k] for k in (_ID_FIELD[kind], 'status', 'created')})
+
+        match = _ITEM.match(self.path)
+        if method == 'GET' and match:
+            with stub._lock:
+                record = stub.records[match.group(1)].get(match.group(2))
+            return self._reply(200, [record] if record else [])
+
+        return self._reply(404, {'errorMessage': f'No stub for {method} {self.path}'})
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_POST(self):
+        self._handle('POST')
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients that time out hang up before the (delayed) reply — expected here.
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class PawaPayStub:
+    """Fake PawaPay API on 127.0.0.1 (random port by default). Use as a context manager."""
+
+    def __init__(self, port=0, api_key='stub-key'):
+        self.api_key = api_key
+        self.records = {'deposits': {}, 'payouts': {}}
+        self.requests = []
+        self.connections = 0
+        self.delay = 0
+        self._failures = deque()
+        self._lock = threading.Lock()
+        self._release = threading.Event()
+        self._server = _Server(('127.0.0.1', port), _Handler)
+        self._server.stub = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f'http://{host}:{port}'
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name='pawapay-stub', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._release.set()
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def fail_next(self, count=1, status=503):
+        """Answer the next ``count`` requests with HTTP ``status``."""
+        with self._lock:
+            self._failures.extend([status] * count)
+
+    def set_status(self, kind, record_id, status, **extra):
+        """Resolve a deposit/payout, e.g. ``set_status('deposits', id, 'COMPLETED')``."""
+        with self._lock:
+            self.records[kind][record_id].update(status=status, **extra)
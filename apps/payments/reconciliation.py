@@ -0,0 +1,115 @@
+"""
+Reconciliation of payments whose PawaPay callback never arrived.
+
+``reconcile()`` sweeps Pending payments and Processing MoMo withdrawals
+older than RECONCILE_MIN_AGE seconds, in id order and batches of
+RECONCILE_BATCH_SIZE. For each batch it asks PawaPay for the status of every
+deposit/payout at once, on a pool of RECONCILE_CONCURRENCY threads (HTTP
+only — the database is written from the calling thread). It then applies
+the same transitions as the webhook (transitions.py).
+
+A deposit PawaPay has never heard of (the initiation request was lost) is
+marked Failed once it is older than RECONCILE_NOT_FOUND_AFTER seconds.
+Unknown payouts are only reported: money may still be moving, so they need
+an admin.
+
+Run with ``manage.py reconcile_payments`` (once, e.g. from cron) or
+``manage.py reconcile_payments --loop 60`` as a worker.
+"""
+import logging
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import requests
+from django.conf import settings
+from django.utils import timezone
+
+from . import pawapay
+from .models import Payment, WithdrawalRequest
+from .transitions import apply_deposit_status, apply_payout_status
+
+logger = logging.getLogger(__name__)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _lookup(fetch, record_id):
+    """(record_id, PawaPay status or 'NOT_FOUND', error or None)."""
+    try:
+        result = fetch(record_id)
+    except (requests.RequestException, ValueError) as e:
+        return record_id, None, e
+    return record_id, result.get('status') if result else 'NOT_FOUND', None
+
+
+def _sweep(queryset, id_field, fetch, apply, pool, batch_size, not_found_cutoff=None):
+    """Reconcile every row of ``queryset`` (keyset batches on id). Returns a Counter of outcomes."""
+    outcomes = Counter()
+    last_id = 0
+    while True:
+        rows = list(
+            queryset.filter(id__gt=last_id).order_by('id').values_list('id', id_field, 'created_at')[:batch_size]
+        )
+        if not rows:
+            return outcomes
+        last_id = rows[-1][0]
+        created = {record_id: created_at for _, record_id, created_at in rows}
+
+        for record_id, pawapay_status, error in pool.map(lambda rid: _lookup(fetch, rid), list(created)):
+            if error is not None:
+                outcomes['errors'] += 1
+                logger.warning('Reconcile: status lookup for %s failed: %s', record_id, error)
+                if isinstance(error, pawapay.PawaPayUnavailable):
+                    outcomes['aborted'] += 1
+                    return outcomes
+                continue
+            if pawapay_status == 'NOT_FOUND':
+                if not_found_cutoff is not None and created[record_id] <= not_found_cutoff:
+                    pawapay_status = 'FAILED'
+                else:
+                    outcomes['not_found'] += 1
+                    continue
+            if pawapay_status in ('COMPLETED', 'FAILED'):
+                changed = apply(record_id, pawapay_status, source='reconcile')
+                outcomes[pawapay_status.lower() if changed else 'unchanged'] += 1
+            else:
+                outcomes['still_pending'] += 1
+
+
+def reconcile(min_age=None, batch_size=None, concurrency=None):
+    """
+    One sweep over aged Pending payments and Processing withdrawals.
+    Returns {'payments': Counter, 'withdrawals': Counter}.
+    """
+    now = timezone.now()
+    min_age = _setting('RECONCILE_MIN_AGE', 120) if min_age is None else min_age
+    batch_size = batch_size or _setting('RECONCILE_BATCH_SIZE', 100)
+    concurrency = concurrency or _setting('RECONCILE_CONCURRENCY', 8)
+    cutoff = now - timedelta(seconds=min_age)
+    not_found_cutoff = now - timedelta(seconds=_setting('RECONCILE_NOT_FOUND_AFTER', 3600))
+
+    payments = Payment.objects.filter(status='Pending', deposit_id__isnull=False, created_at__lte=cutoff)
+    # processed_at is stamped when the payout is sent to PawaPay.
+    withdrawals = WithdrawalRequest.objects.filter(
+        status='Processing', payout_id__isnull=False, processed_at__lte=cutoff,
+    )
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='reconcile') as pool:
+        results = {
+            'payments': _sweep(
+                payments, 'deposit_id', pawapay.get_deposit, apply_deposit_status, pool, batch_size,
+                not_found_cutoff=not_found_cutoff,
+            ),
+        }
+        if results['payments']['aborted']:
+            results['withdrawals'] = Counter(aborted=1)
+        else:
+            results['withdrawals'] = _sweep(
+                withdrawals, 'payout_id', pawapay.get_payout, apply_payout_status, pool, batch_size,
+            )
+    for kind, outcomes in results.items():
+        if outcomes:
+            logger.info('Reconcile %s: %s', kind, dict(outcomes))
+    return results
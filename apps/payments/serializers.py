@@ -1,60 +1,19 @@
 from rest_framework import serializers
-from django.db.models import Sum
-from django.db.models.functions import Coalesce
 
-from apps.payments.models import Payment, WithdrawalRequest
-
-
-def producer_split(gross: int) -> tuple:
-    """Return (producer_earnings, platform_commission) for a gross amount.
-
-    Producer share is computed first as (gross * 70) // 100; commission is
-    the remainder.  This guarantees producer_earnings + commission == gross
-    regardless of rounding, so all endpoints report consistent figures.
-    """
-    producer_earnings = (gross * 70) // 100
-    return producer_earnings, gross - producer_earnings
+from apps.payments.models import WithdrawalRequest
+from apps.payments.wallet import get_wallet, producer_split
 
 
 def get_producer_wallet(producer):
     """
-    Compute wallet stats for a producer.
+    Wallet stats for a producer, read from the ledger (see wallet.py).
 
     total_earnings  = 70% of all completed movie-payment revenue
     wallet_balance  = total_earnings minus all non-rejected withdrawal amounts
                       (Pending amounts are locked to prevent double-spending;
                        Rejected amounts are automatically freed)
     """
-    raw_revenue = Payment.objects.filter(
-        movie__producer_profile=producer,
-        status='Completed',
-    ).aggregate(total=Coalesce(Sum('amount'), 0))['total']
-
-    total_earnings, platform_commission = producer_split(raw_revenue)
-
-    locked = WithdrawalRequest.objects.filter(
-        producer=producer,
-        status__in=['Pending', 'Approved', 'Processing', 'Completed'],
-    ).aggregate(total=Coalesce(Sum('amount'), 0))['total']
-
-    pending = WithdrawalRequest.objects.filter(
-        producer=producer,
-        status='Pending',
-    ).aggregate(total=Coalesce(Sum('amount'), 0))['total']
-
-    total_withdrawn = WithdrawalRequest.objects.filter(
-        producer=producer,
-        status='Completed',
-    ).aggregate(total=Coalesce(Sum('amount'), 0))['total']
-
-    return {
-        'gross_revenue': raw_revenue,
-        'platform_commission': platform_commission,
-        'total_earnings': total_earnings,
-        'wallet_balance': total_earnings - locked,
-        'pending_withdrawals': pending,
-        'total_withdrawn': total_withdrawn,
-    }
+    return get_wallet(producer.id)
 
 
 class WithdrawalRequestSerializer(serializers.ModelSerializer):
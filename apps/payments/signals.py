@@ -0,0 +1,35 @@
+from django.db.models.signals import post_save, pre_delete
+from django.dispatch import receiver
+
+from . import wallet
+from .entitlements import grant_entitlement, revoke_entitlement
+from .models import Payment, WithdrawalRequest
+
+
+@receiver(post_save, sender=Payment)
+def payment_saved(sender, instance, created, **kwargs):
+    # Runs inside the caller's transaction, so the entitlement and the
+    # producer's wallet entry commit (or roll back) together with the
+    # status change.
+    if instance.status == 'Completed':
+        grant_entitlement(instance)
+    elif not created:
+        revoke_entitlement(instance)
+    if not created or instance.status == 'Completed':
+        wallet.record_payment(instance)
+
+
+@receiver(post_save, sender=WithdrawalRequest)
+def withdrawal_saved(sender, instance, **kwargs):
+    wallet.record_withdrawal(instance)
+
+
+@receiver(pre_delete, sender=Payment)
+def payment_deleted(sender, instance, **kwargs):
+    revoke_entitlement(instance)
+    wallet.forget_payment(instance)
+
+
+@receiver(pre_delete, sender=WithdrawalRequest)
+def withdrawal_deleted(sender, instance, **kwargs):
+    wallet.forget_withdrawal(instance)
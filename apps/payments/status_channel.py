@@ -0,0 +1,97 @@
+"""
+Notification channel for payment status changes, backing the long-poll
+mode of PaymentStatusView (``GET /api/payments/<deposit_id>/status/?wait=20``).
+
+``publish()`` runs once the transaction that finalised a payment commits
+(transitions.apply_deposit_status). It writes the new status to the cache
+and wakes the requests waiting on that deposit in this process at once.
+Requests held by other gunicorn workers see the cached status on their
+next check, every PAYMENT_STATUS_POLL_INTERVAL seconds. The cache is only
+shared between workers when REDIS_URL is set. With the per-process default,
+waiters also read the status from the database every
+PAYMENT_STATUS_FALLBACK_INTERVAL seconds, so a notification that never
+reaches them costs latency, not correctness.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+_lock = threading.Lock()
+_waiters = {}   # deposit_id -> _Waiters
+
+
+class _Waiters:
+    """Requests in this process waiting on one deposit."""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.count = 0
+        self.status = None
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _cache_key(deposit_id):
+    return f'payment-status:{deposit_id}'
+
+
+def publish(deposit_id, status):
+    """Announce that the payment for ``deposit_id`` is now ``status``."""
+    cache.set(_cache_key(deposit_id), status, timeout=_setting('PAYMENT_STATUS_CACHE_TTL', 600))
+    with _lock:
+        waiters = _waiters.get(deposit_id)
+        if waiters is not None:
+            waiters.status = status
+            waiters.event.set()
+
+
+def _subscribe(deposit_id):
+    with _lock:
+        waiters = _waiters.setdefault(deposit_id, _Waiters())
+        waiters.count += 1
+        return waiters
+
+
+def _unsubscribe(deposit_id):
+    with _lock:
+        waiters = _waiters[deposit_id]
+        waiters.count -= 1
+        if waiters.count == 0:
+            del _waiters[deposit_id]
+
+
+def wait_for_status(deposit_id, timeout, fallback=None):
+    """
+    Block until a status is published for ``deposit_id`` or ``timeout``
+    seconds pass. Returns the published status, or None on timeout.
+
+    ``fallback()`` (e.g. a database read) is called every
+    PAYMENT_STATUS_FALLBACK_INTERVAL seconds. It returns a final status to
+    stop waiting, or None to keep waiting.
+    """
+    poll_interval = _setting('PAYMENT_STATUS_POLL_INTERVAL', 1)
+    fallback_interval = _setting('PAYMENT_STATUS_FALLBACK_INTERVAL', 5)
+    deadline = time.monotonic() + timeout
+    next_fallback = time.monotonic() + fallback_interval
+    waiters = _subscribe(deposit_id)
+    try:
+        while True:
+            status = waiters.status or cache.get(_cache_key(deposit_id))
+            if status is not None:
+                return status
+            now = time.monotonic()
+            if fallback is not None and now >= next_fallback:
+                status = fallback()
+                if status is not None:
+                    return status
+                next_fallback = now + fallback_interval
+            remaining = deadline - now
+            if remaining <= 0:
+                return None
+            waiters.event.wait(min(remaining, poll_interval))
+    finally:
+        _unsubscribe(deposit_id)
@@ -0,0 +1,277 @@
+import threading
+import time
+from datetime import date, timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from apps.movies.models import Movie
+from . import outbox, status_channel
+from . import entitlements
+from .entitlements import entitlement_cache, has_entitlement
+from .models import Entitlement, OutboxEvent, Payment, WithdrawalRequest
+
+User = get_user_model()
+
+
+class EntitlementTests(APITestCase):
+
+    def setUp(self):
+        entitlement_cache.clear()
+        self.viewer = User.objects.create_user(
+            email='viewer@example.com', password='Password123!', role='Viewer',
+        )
+        self.movie = Movie.objects.create(
+            title='Entitled', overview='Test', price=1000,
+            release_date=date.today(), duration_minutes=90,
+        )
+
+    def _pending(self, deposit_id='dep-1'):
+        return Payment.objects.create(
+            user=self.viewer, movie=self.movie, amount=1000, deposit_id=deposit_id,
+        )
+
+    def test_webhook_completion_grants_entitlement(self):
+        payment = self._pending()
+        self.assertFalse(Entitlement.objects.exists())
+
+        response = self.client.post(
+            '/api/payments/webhook/pawapay/',
+            {'depositId': 'dep-1', 'status': 'COMPLETED'},
+            format='json',
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        entitlement = Entitlement.objects.get(user=self.viewer, movie=self.movie)
+        self.assertEqual(entitlement.payment, payment)
+        self.assertTrue(has_entitlement(self.viewer, self.movie.id))
+
+    def test_failed_deposit_grants_nothing(self):
+        self._pending()
+        self.client.post(
+            '/api/payments/webhook/pawapay/',
+            {'depositId': 'dep-1', 'status': 'FAILED'},
+            format='json',
+        )
+        self.assertFalse(Entitlement.objects.exists())
+        self.assertFalse(has_entitlement(self.viewer, self.movie.id))
+
+    def test_repeat_purchase_keeps_single_entitlement(self):
+        for deposit_id in ('dep-1', 'dep-2'):
+            payment = self._pending(deposit_id)
+            payment.status = 'Completed'
+            payment.save(update_fields=['status'])
+        self.assertEqual(Entitlement.objects.filter(user=self.viewer, movie=self.movie).count(), 1)
+
+    def test_backfill_command(self):
+        Payment.objects.create(user=self.viewer, movie=self.movie, amount=1000, status='Completed')
+        Entitlement.objects.all().delete()
+
+        out = StringIO()
+        call_command('backfill_entitlements', stdout=out)
+        self.assertTrue(Entitlement.objects.filter(user=self.viewer, movie=self.movie).exists())
+        self.assertIn('created 1 entitlement', out.getvalue())
+
+        call_command('backfill_entitlements', stdout=StringIO())
+        self.assertEqual(Entitlement.objects.count(), 1)
+
+    def test_heartbeat_skips_payment_scan_once_cached(self):
+        Payment.objects.create(user=self.viewer, movie=self.movie, amount=1000, status='Completed')
+        self.client.force_authenticate(user=self.viewer)
+        url = f'/api/movies/{self.movie.id}/progress/'
+        self.client.post(url, {'progress_seconds': 10, 'duration_seconds': 5400}, format='json')
+
+        with self.assertNumQueries(0):
+            self.assertTrue(has_entitlement(self.viewer, self.movie.id))
+
+        response = self.client.post(url, {'progress_seconds': 25, 'duration_seconds': 5400}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['progress_seconds'], 25)
+
+    def test_deleting_payment_revokes_entitlement(self):
+        payment = Payment.objects.create(user=self.viewer, movie=self.movie, amount=1000, status='Completed')
+        self.assertTrue(has_entitlement(self.viewer, self.movie.id))
+
+        payment.delete()
+        self.assertFalse(Entitlement.objects.exists())
+        self.assertFalse(has_entitlement(self.viewer, self.movie.id))
+
+    def test_status_change_revokes_unless_another_purchase_covers_it(self):
+        first = Payment.objects.create(user=self.viewer, movie=self.movie, amount=1000, status='Completed')
+        second = Payment.objects.create(user=self.viewer, movie=self.movie, amount=1000, status='Completed')
+
+        first.status = 'Failed'
+        first.save(update_fields=['status'])
+        self.assertEqual(Entitlement.objects.get(user=self.viewer, movie=self.movie).payment, second)
+        self.assertTrue(has_entitlement(self.viewer, self.movie.id))
+
+        second.status = 'Failed'
+        second.save(update_fields=['status'])
+        self.assertFalse(Entitlement.objects.exists())
+        self.assertFalse(has_entitlement(self.viewer, self.movie.id))
+
+    def test_revocation_clears_other_processes_cache(self):
+        payment = Payment.objects.create(user=self.viewer, movie=self.movie, amount=1000, status='Completed')
+        self.assertTrue(has_entitlement(self.viewer, self.movie.id))
+
+        # Another process revokes: the row goes and the shared counter moves,
+        # but this process's LRU still holds the grant.
+        with patch.object(entitlements, 'entitlement_cache', entitlements._EntitlementLRU(10, 300)), \
+                self.captureOnCommitCallbacks(execute=True):
+            payment.delete()
+        self.assertTrue(entitlement_cache.get((self.viewer.id, self.movie.id)))
+
+        with patch.object(entitlements, '_revocations_checked_at', 0.0):
+            self.assertFalse(has_entitlement(self.viewer, self.movie.id))
+
+    def test_progress_rejected_without_entitlement(self):
+        self.client.force_authenticate(user=self.viewer)
+        response = self.client.post(
+            f'/api/movies/{self.movie.id}/progress/',
+            {'progress_seconds': 10, 'duration_seconds': 5400},
+            format='json',
+        )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+@override_settings(
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    OUTBOX_MAX_ATTEMPTS=2, OUTBOX_RETRY_BACKOFF=30,
+)
+class OutboxTests(APITestCase):
+
+    def setUp(self):
+        self.viewer = User.objects.create_user(
+            email='viewer@example.com', password='Password123!', role='Viewer',
+        )
+        self.producer = User.objects.create_user(
+            email='producer@example.com', password='Password123!', role='Producer',
+        )
+        self.movie = Movie.objects.create(
+            title='Outboxed', overview='Test', price=1000,
+            release_date=date.today(), duration_minutes=90,
+        )
+
+    def _webhook(self, payload):
+        return self.client.post('/api/payments/webhook/pawapay/', payload, format='json')
+
+    def test_webhook_queues_email_instead_of_sending(self):
+        Payment.objects.create(user=self.viewer, movie=self.movie, amount=1000, deposit_id='dep-1')
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self._webhook({'depositId': 'dep-1', 'status': 'COMPLETED'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertIn(outbox.wake_dispatcher, callbacks)
+
+        event = OutboxEvent.objects.get()
+        self.assertEqual((event.kind, event.status), (outbox.PAYMENT_COMPLETED_EMAIL, 'pending'))
+
+        self.assertEqual(outbox.dispatch_pending(), 1)
+        self.assertEqual(mail.outbox[0].to, ['viewer@example.com'])
+        event.refresh_from_db()
+        self.assertEqual((event.status, event.attempts), ('done', 1))
+
+    def test_duplicate_callbacks_queue_one_event(self):
+        withdrawal = WithdrawalRequest.objects.create(
+            producer=self.producer, amount=5000, status='Processing', payout_id='pay-1', payment_method='MoMo',
+        )
+        for _ in range(2):
+            self._webhook({'payoutId': 'pay-1', 'status': 'COMPLETED'})
+        event = OutboxEvent.objects.get()
+        self.assertEqual(event.idempotency_key, f'withdrawal:{withdrawal.id}:completed')
+
+        outbox.dispatch_pending()
+        outbox.dispatch_pending()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].subject, 'Withdrawal completed — funds sent')
+
+    def test_failed_send_is_retried_with_backoff(self):
+        Payment.objects.create(user=self.viewer, movie=self.movie, amount=1000, deposit_id='dep-1')
+        self._webhook({'depositId': 'dep-1', 'status': 'COMPLETED'})
+
+        with patch('apps.payments.emails._send', side_effect=OSError('smtp timeout')):
+            self.assertEqual(outbox.dispatch_pending(), 0)
+        event = OutboxEvent.objects.get()
+        self.assertEqual((event.status, event.attempts, event.last_error), ('pending', 1, 'smtp timeout'))
+        self.assertGreater(event.available_at, timezone.now() + timedelta(seconds=25))
+        self.assertEqual(outbox.dispatch_pending(), 0, 'event must wait out its backoff')
+
+        OutboxEvent.objects.update(available_at=timezone.now())
+        with patch('apps.payments.emails._send', side_effect=OSError('smtp timeout')):
+            outbox.dispatch_pending()
+        event.refresh_from_db()
+        self.assertEqual((event.status, event.attempts), ('failed', 2))
+
+    def test_expired_lease_is_dispatched_again(self):
+        Payment.objects.create(user=self.viewer, movie=self.movie, amount=1000, deposit_id='dep-1')
+        self._webhook({'depositId': 'dep-1', 'status': 'COMPLETED'})
+        outbox.claim_events('dead-worker', 10)
+        self.assertEqual(outbox.dispatch_pending(), 0)
+
+        OutboxEvent.objects.update(locked_until=timezone.now() - timedelta(seconds=1))
+        out = StringIO()
+        call_command('dispatch_outbox', stdout=out)
+        self.assertIn('Dispatched 1 outbox event(s).', out.getvalue())
+        self.assertEqual(OutboxEvent.objects.get().attempts, 2)
+
+
+class PaymentStatusLongPollTests(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.viewer = User.objects.create_user(
+            email='viewer@example.com', password='Password123!', role='Viewer',
+        )
+        self.movie = Movie.objects.create(
+            title='Long polled', overview='Test', price=1000,
+            release_date=date.today(), duration_minutes=90,
+        )
+        self.payment = Payment.objects.create(
+            user=self.viewer, movie=self.movie, amount=1000, deposit_id='dep-1',
+        )
+        self.client.force_authenticate(user=self.viewer)
+
+    def _status(self, wait):
+        started = time.monotonic()
+        response = self.client.get(f'/api/payments/dep-1/status/?wait={wait}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data['status'], time.monotonic() - started
+
+    def test_resolved_payment_returns_without_waiting(self):
+        Payment.objects.filter(pk=self.payment.pk).update(status='Completed')
+        current, elapsed = self._status(wait=10)
+        self.assertEqual(current, 'Completed')
+        self.assertLess(elapsed, 1)
+
+    @override_settings(PAYMENT_STATUS_POLL_INTERVAL=30, PAYMENT_STATUS_FALLBACK_INTERVAL=30)
+    def test_publish_wakes_a_waiting_request(self):
+        timer = threading.Timer(0.2, status_channel.publish, args=('dep-1', 'Completed'))
+        timer.start()
+        self.addCleanup(timer.cancel)
+        current, elapsed = self._status(wait=10)
+        self.assertEqual(current, 'Completed')
+        self.assertLess(elapsed, 5)
+
+    @override_settings(PAYMENT_STATUS_MAX_WAIT=0.3)
+    def test_wait_is_capped_and_falls_back_to_current_status(self):
+        current, elapsed = self._status(wait=60)
+        self.assertEqual(current, 'Pending')
+        self.assertLess(elapsed, 2)
+        self.assertEqual(status_channel._waiters, {})
+
+    def test_webhook_publishes_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                '/api/payments/webhook/pawapay/',
+                {'depositId': 'dep-1', 'status': 'FAILED'},
+                format='json',
+            )
+        self.assertEqual(status_channel.wait_for_status('dep-1', timeout=0), 'Failed')
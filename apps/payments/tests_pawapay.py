@@ -0,0 +1,147 @@
+from datetime import date
+
+import requests
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from apps.movies.models import Movie
+from .models import Payment
+from .pawapay import CircuitBreaker, PawaPayUnavailable, get_client, get_deposit, initiate_deposit
+from .pawapay_stub import PawaPayStub
+
+User = get_user_model()
+
+
+class StubMixin:
+    """Runs a PawaPayStub per test and points the client at it."""
+
+    stub_settings = {}
+
+    def setUp(self):
+        super().setUp()
+        self.stub = PawaPayStub().start()
+        self.addCleanup(self.stub.stop)
+        override = override_settings(
+            PAWAPAY_BASE_URL=self.stub.url, PAWAPAY_API_KEY='stub-key', **self.stub_settings,
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def _deposit(self, deposit_id='dep-1'):
+        return initiate_deposit(deposit_id, 1000, '0781234567')
+
+
+class PawaPayClientTests(StubMixin, SimpleTestCase):
+
+    stub_settings = {'PAWAPAY_RETRIES': 2, 'PAWAPAY_BREAKER_THRESHOLD': 3, 'PAWAPAY_READ_TIMEOUT': 0.5}
+
+    def test_calls_reuse_one_keep_alive_connection(self):
+        for i in range(3):
+            self.assertEqual(self._deposit(f'dep-{i}')['status'], 'ACCEPTED')
+        self.assertEqual(len(self.stub.requests), 3)
+        self.assertEqual(self.stub.connections, 1)
+
+    def test_status_lookups_are_retried(self):
+        self._deposit()
+        self.stub.set_status('deposits', 'dep-1', 'COMPLETED')
+        self.stub.fail_next(2, status=503)
+        self.assertEqual(get_deposit('dep-1')['status'], 'COMPLETED')
+        self.assertEqual(len(self.stub.requests), 4)
+        self.assertIsNone(get_deposit('unknown'))
+
+    def test_deposits_are_not_resent(self):
+        self.stub.fail_next(1, status=503)
+        with self.assertRaises(requests.HTTPError):
+            self._deposit()
+        self.assertEqual(len(self.stub.requests), 1)
+
+    def test_read_timeout_is_short_and_not_retried_for_posts(self):
+        self.stub.delay = 2
+        with self.assertRaises(requests.Timeout):
+            self._deposit()
+        self.assertEqual(len(self.stub.requests), 1)
+
+    def test_breaker_fails_fast_once_open(self):
+        self.stub.fail_next(3, status=502)
+        for i in range(3):
+            with self.assertRaises(requests.HTTPError):
+                self._deposit(f'dep-{i}')
+        with self.assertRaises(PawaPayUnavailable):
+            self._deposit('dep-4')
+        self.assertEqual(len(self.stub.requests), 3)
+        self.assertEqual(get_client().breaker.snapshot()['state'], 'open')
+
+    def test_client_errors_do_not_trip_the_breaker(self):
+        for i in range(4):
+            with self.assertRaises(requests.HTTPError):
+                get_client().request('POST', 'unknown', 'unknown', json={})
+        self.assertEqual(get_client().breaker.state, 'closed')
+
+    def test_latency_metrics_per_endpoint(self):
+        self._deposit()
+        get_deposit('dep-1')
+        metrics = get_client().metrics()
+        self.assertEqual(metrics['POST deposits']['calls'], 1)
+        self.assertEqual(metrics['GET deposits/{id}']['calls'], 1)
+        self.assertIsNotNone(metrics['POST deposits']['p95_ms'])
+
+
+class CircuitBreakerTests(SimpleTestCase):
+
+    def test_half_open_allows_a_single_trial(self):
+        now = [0.0]
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30, clock=lambda: now[0])
+        breaker.record_failure()
+        self.assertTrue(breaker.allow())
+        breaker.record_failure()
+        self.assertFalse(breaker.allow())
+
+        now[0] = 31
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow(), 'only one trial call while half-open')
+        breaker.record_failure()
+        self.assertEqual(breaker.state, 'open')
+
+        now[0] = 62
+        self.assertTrue(breaker.allow())
+        breaker.record_success()
+        self.assertEqual(breaker.state, 'closed')
+        self.assertTrue(breaker.allow())
+
+
+class InitiatePaymentStubTests(StubMixin, APITestCase):
+
+    stub_settings = {'PAWAPAY_BREAKER_THRESHOLD': 1}
+
+    def setUp(self):
+        super().setUp()
+        self.viewer = User.objects.create_user(email='viewer@example.com', password='Password123!', role='Viewer')
+        self.movie = Movie.objects.create(
+            title='Stubbed', overview='Test', price=1000, release_date=date.today(), duration_minutes=90,
+        )
+        self.client.force_authenticate(user=self.viewer)
+
+    def _initiate(self):
+        return self.client.post(
+            '/api/payments/initiate/', {'movie_id': self.movie.id, 'phone_number': '0781234567'}, format='json',
+        )
+
+    def test_deposit_through_stub(self):
+        response = self._initiate()
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertIn(response.data['deposit_id'], self.stub.records['deposits'])
+
+    def test_open_breaker_fails_fast_with_502(self):
+        self.stub.fail_next(1, status=503)
+        self.assertEqual(self._initiate().status_code, status.HTTP_502_BAD_GATEWAY)
+        self.assertEqual(self._initiate().status_code, status.HTTP_502_BAD_GATEWAY)
+        self.assertEqual(len(self.stub.requests), 1)
+        self.assertEqual(set(Payment.objects.values_list('status', flat=True)), {'Failed'})
+
+        admin = User.objects.create_user(email='admin@example.com', password='Password123!', role='Admin')
+        self.client.force_authenticate(user=admin)
+        health = self.client.get('/api/admin/dashboard/reports/pawapay-health/').data
+        self.assertEqual(health['breaker']['state'], 'open')
+        self.assertEqual(health['endpoints']['POST deposits']['rejected_by_breaker'], 1)
@@ -0,0 +1,86 @@
+from datetime import date, timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.movies.models import Movie
+from .entitlements import has_entitlement
+from .models import OutboxEvent, Payment, WithdrawalRequest
+from .reconciliation import reconcile
+from .tests_pawapay import StubMixin
+
+User = get_user_model()
+
+
+@override_settings(RECONCILE_MIN_AGE=120, RECONCILE_NOT_FOUND_AFTER=3600, RECONCILE_BATCH_SIZE=2)
+class ReconciliationTests(StubMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.viewer = User.objects.create_user(email='viewer@example.com', password='Password123!', role='Viewer')
+        self.producer = User.objects.create_user(email='producer@example.com', password='Password123!', role='Producer')
+        self.movie = Movie.objects.create(
+            title='Lost callback', overview='Test', price=1000, release_date=date.today(), duration_minutes=90,
+        )
+
+    def _payment(self, deposit_id, age_seconds, stub_status=None):
+        payment = Payment.objects.create(user=self.viewer, movie=self.movie, amount=1000, deposit_id=deposit_id)
+        Payment.objects.filter(pk=payment.pk).update(created_at=timezone.now() - timedelta(seconds=age_seconds))
+        if stub_status:
+            self.stub.records['deposits'][deposit_id] = {'depositId': deposit_id, 'status': stub_status}
+        return payment
+
+    def test_applies_final_statuses_like_the_webhook(self):
+        completed = self._payment('dep-ok', 600, 'COMPLETED')
+        self._payment('dep-ko', 600, 'FAILED')
+        self._payment('dep-wait', 600, 'ACCEPTED')
+
+        results = reconcile()
+        self.assertEqual(results['payments'], {'completed': 1, 'failed': 1, 'still_pending': 1})
+        statuses = dict(Payment.objects.values_list('deposit_id', 'status'))
+        self.assertEqual(statuses, {'dep-ok': 'Completed', 'dep-ko': 'Failed', 'dep-wait': 'Pending'})
+        self.assertTrue(has_entitlement(self.viewer, self.movie.id))
+        # Only the completed deposit queues an email.
+        self.assertEqual(OutboxEvent.objects.get().idempotency_key, f'payment:{completed.id}:completed')
+
+    def test_recent_payments_are_left_to_the_webhook(self):
+        self._payment('dep-new', 30, 'COMPLETED')
+        reconcile()
+        self.assertEqual(self.stub.requests, [])
+        self.assertEqual(Payment.objects.get().status, 'Pending')
+
+    def test_deposit_unknown_to_pawapay_fails_only_when_old(self):
+        self._payment('dep-lost-old', 7200)
+        self._payment('dep-lost-new', 600)
+        results = reconcile()
+        self.assertEqual(results['payments'], {'failed': 1, 'not_found': 1})
+        self.assertEqual(Payment.objects.get(deposit_id='dep-lost-old').status, 'Failed')
+        self.assertEqual(Payment.objects.get(deposit_id='dep-lost-new').status, 'Pending')
+
+    def test_processing_withdrawal_is_completed(self):
+        withdrawal = WithdrawalRequest.objects.create(
+            producer=self.producer, amount=5000, status='Processing', payout_id='pay-1',
+            payment_method='MoMo', processed_at=timezone.now() - timedelta(minutes=10),
+        )
+        self.stub.records['payouts']['pay-1'] = {'payoutId': 'pay-1', 'status': 'COMPLETED'}
+
+        out = StringIO()
+        call_command('reconcile_payments', stdout=out)
+        self.assertIn('withdrawals: completed=1', out.getvalue())
+        withdrawal.refresh_from_db()
+        self.assertEqual(withdrawal.status, 'Completed')
+        self.assertTrue(OutboxEvent.objects.filter(idempotency_key=f'withdrawal:{withdrawal.id}:completed').exists())
+
+    @override_settings(PAWAPAY_BREAKER_THRESHOLD=1, PAWAPAY_RETRIES=0)
+    def test_sweep_stops_when_the_provider_is_down(self):
+        for i in range(4):
+            self._payment(f'dep-{i}', 600, 'COMPLETED')
+        self.stub.fail_next(10, status=503)
+        results = reconcile(concurrency=1)
+        self.assertEqual(results['payments']['aborted'], 1)
+        self.assertEqual(results['withdrawals'], {'aborted': 1})
+        self.assertLessEqual(len(self.stub.requests), 2)
+        self.assertFalse(Payment.objects.exclude(status='Pending').exists())
@@ -0,0 +1,132 @@
+from datetime import date
+from importlib import import_module
+from io import StringIO
+
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from apps.movies.models import Movie
+from .models import Payment, ProducerWallet, WalletEntry, WithdrawalRequest
+from .transitions import apply_deposit_status
+from .wallet import expected_totals, find_drift, get_wallet
+
+User = get_user_model()
+
+
+class ProducerWalletLedgerTests(APITestCase):
+
+    def setUp(self):
+        self.producer = User.objects.create_user(email='producer@example.com', password='Password123!', role='Producer')
+        self.viewer = User.objects.create_user(email='viewer@example.com', password='Password123!', role='Viewer')
+        self.admin = User.objects.create_user(email='admin@example.com', password='Password123!', role='Admin')
+        self.movie = Movie.objects.create(
+            title='Ledgered', overview='Test', price=10000, release_date=date.today(),
+            duration_minutes=90, producer_profile=self.producer,
+        )
+
+    def _sale(self, deposit_id, amount=10000):
+        Payment.objects.create(user=self.viewer, movie=self.movie, amount=amount, deposit_id=deposit_id)
+        return apply_deposit_status(deposit_id, 'COMPLETED')
+
+    def _withdraw(self, amount):
+        self.client.force_authenticate(user=self.producer)
+        return self.client.post('/api/producer/dashboard/withdrawals/', {
+            'amount': amount, 'payment_method': 'Bank', 'bank_name': 'BK',
+            'account_number': '123', 'account_holder_name': 'Producer',
+        }, format='json')
+
+    def _wallet(self):
+        self.client.force_authenticate(user=self.producer)
+        return self.client.get('/api/producer/dashboard/wallet/').data
+
+    def test_wallet_follows_payments_and_withdrawals(self):
+        self._sale('dep-1')
+        self._sale('dep-2', amount=5001)
+        self.assertEqual(self._wallet()['wallet_balance'], (15001 * 70) // 100)
+
+        self.assertEqual(self._withdraw(6000).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self._withdraw(5000).status_code, status.HTTP_400_BAD_REQUEST)
+        withdrawal = WithdrawalRequest.objects.get()
+
+        self.client.force_authenticate(user=self.admin)
+        self.client.post(f'/api/admin/dashboard/withdrawals/{withdrawal.id}/complete/')
+        wallet = self._wallet()
+        self.assertEqual(wallet['total_withdrawn'], 6000)
+        self.assertEqual(wallet['pending_withdrawals'], 0)
+        self.assertEqual(wallet['wallet_balance'], 10500 - 6000)
+
+        self.assertEqual(find_drift(), [])
+        entries = WalletEntry.objects.filter(producer=self.producer).order_by('id')
+        self.assertEqual([e.status for e in entries], ['Completed', 'Completed', 'Pending', 'Approved', 'Completed'])
+        self.assertEqual(entries.last().balance_after, 4500)
+
+    def test_rejection_frees_the_amount(self):
+        self._sale('dep-1')
+        self._withdraw(7000)
+        withdrawal = WithdrawalRequest.objects.get()
+        self.assertEqual(self._wallet()['wallet_balance'], 0)
+
+        self.client.force_authenticate(user=self.admin)
+        self.client.post(f'/api/admin/dashboard/withdrawals/{withdrawal.id}/reject/')
+        self.assertEqual(self._wallet()['wallet_balance'], 7000)
+        self.assertEqual(find_drift(), [])
+
+    def test_resaving_a_row_appends_nothing(self):
+        payment = self._sale('dep-1')
+        payment.save()
+        apply_deposit_status('dep-1', 'COMPLETED')
+        self.assertEqual(WalletEntry.objects.count(), 1)
+
+    def test_pending_purchases_do_not_touch_the_ledger(self):
+        Payment.objects.create(user=self.viewer, movie=self.movie, amount=1000, deposit_id='dep-1')
+        self.assertFalse(ProducerWallet.objects.exists())
+        self.assertFalse(WalletEntry.objects.exists())
+
+    def test_verify_reports_and_repairs_drift(self):
+        self._sale('dep-1')
+        payment = self._sale('dep-2')
+        # Bulk updates bypass the signals and leave the wallet stale.
+        Payment.objects.filter(pk=payment.pk).update(status='Failed')
+
+        out = StringIO()
+        call_command('verify_wallets', stdout=out)
+        self.assertIn(f'Producer #{self.producer.id}: gross_revenue is 20000, expected 10000', out.getvalue())
+
+        call_command('verify_wallets', '--fix', stdout=StringIO())
+        self.assertEqual(find_drift(), [])
+        self.assertEqual(get_wallet(self.producer.id)['gross_revenue'], 10000)
+
+        # The repaired row keeps accounting correctly afterwards.
+        payment.refresh_from_db()
+        payment.status = 'Completed'
+        payment.save()
+        self.assertEqual(get_wallet(self.producer.id)['gross_revenue'], 20000)
+        self.assertEqual(find_drift(), [])
+
+    def test_deleting_a_movie_keeps_its_earnings(self):
+        self._sale('dep-1')
+        self._withdraw(7000)
+        self.movie.delete()
+
+        out = StringIO()
+        call_command('verify_wallets', stdout=out)
+        self.assertIn('All wallets match', out.getvalue())
+        self.assertEqual(get_wallet(self.producer.id)['gross_revenue'], 10000)
+        self.assertEqual(get_wallet(self.producer.id)['wallet_balance'], 0)
+
+    def test_backfill_matches_source_rows(self):
+        self._sale('dep-1')
+        self._withdraw(3000)
+        expected = expected_totals()
+        WalletEntry.objects.all().delete()
+        ProducerWallet.objects.all().delete()
+
+        migration = import_module('apps.payments.migrations.0006_producer_wallet')
+        migration.forward_backfill_wallets(apps, None)
+        self.assertEqual(WalletEntry.objects.count(), 2)
+        self.assertEqual(find_drift(), [])
+        self.assertEqual(expected_totals(), expected)
+        self.assertEqual(WalletEntry.objects.order_by('-id').first().balance_after, 7000 - 3000)
@@ -0,0 +1,95 @@
+"""
+Payment and payout state transitions driven by PawaPay's final statuses.
+
+Shared by the webhook (PawapayWebhookView) and the reconciliation poller
+(reconciliation.py), so a deposit resolves the same way whichever of the two
+sees the final status first. Rows are locked, already-final rows are left
+alone, and the notification email is queued in the same transaction through
+the outbox.
+"""
+import logging
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import outbox, status_channel
+from .models import Payment, WithdrawalRequest
+
+logger = logging.getLogger(__name__)
+
+FINAL_STATUSES = ('Completed', 'Failed')
+
+
+def apply_deposit_status(deposit_id, pawapay_status, source='webhook'):
+    """
+    Mark the Payment for ``deposit_id`` Completed/Failed for a COMPLETED/FAILED
+    PawaPay status. Returns the payment if it changed, else None.
+
+    The status change commits together with the viewer's Entitlement
+    (granted by the Payment post_save signal) and the confirmation email.
+    """
+    with transaction.atomic():
+        try:
+            payment = Payment.objects.select_for_update().get(deposit_id=deposit_id)
+        except Payment.DoesNotExist:
+            logger.warning('%s: unknown depositId %s', source.capitalize(), deposit_id)
+            return None
+
+        if payment.status in FINAL_STATUSES:
+            return None
+
+        if pawapay_status == 'COMPLETED':
+            payment.status = 'Completed'
+        elif pawapay_status == 'FAILED':
+            payment.status = 'Failed'
+        else:
+            return None
+
+        payment.save(update_fields=['status'])
+        if payment.status == 'Completed':
+            # Sent by the outbox dispatcher once this transaction commits.
+            outbox.record_event(
+                outbox.PAYMENT_COMPLETED_EMAIL,
+                f'payment:{payment.id}:completed',
+                {'payment_id': payment.id},
+            )
+        # Wakes viewers long-polling PaymentStatusView for this deposit.
+        final_status = payment.status
+        transaction.on_commit(lambda: status_channel.publish(deposit_id, final_status))
+    logger.info('Deposit %s → Payment #%s marked %s (%s)', deposit_id, payment.id, payment.status, source)
+    return payment
+
+
+def apply_payout_status(payout_id, pawapay_status, source='webhook'):
+    """
+    Mark the WithdrawalRequest for ``payout_id`` Completed/Failed for a
+    COMPLETED/FAILED PawaPay status and queue the producer's email.
+    Returns the withdrawal if it changed, else None.
+    """
+    with transaction.atomic():
+        try:
+            withdrawal = WithdrawalRequest.objects.select_for_update().get(payout_id=payout_id)
+        except WithdrawalRequest.DoesNotExist:
+            logger.warning('%s: unknown payoutId %s', source.capitalize(), payout_id)
+            return None
+
+        if withdrawal.status in FINAL_STATUSES:
+            return None
+
+        if pawapay_status == 'COMPLETED':
+            withdrawal.status = 'Completed'
+            withdrawal.processed_at = timezone.now()
+            withdrawal.save(update_fields=['status', 'processed_at'])
+        elif pawapay_status == 'FAILED':
+            withdrawal.status = 'Failed'
+            withdrawal.save(update_fields=['status'])
+        else:
+            return None
+
+        outbox.record_event(
+            outbox.WITHDRAWAL_STATUS_EMAIL,
+            f'withdrawal:{withdrawal.id}:{withdrawal.status.lower()}',
+            {'withdrawal_id': withdrawal.id, 'status': withdrawal.status},
+        )
+    logger.info('Payout %s → Withdrawal #%s marked %s (%s)', payout_id, withdrawal.id, withdrawal.status, source)
+    return withdrawal
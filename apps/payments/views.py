@@ -9,15 +9,15 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated, AllowAny
-from drf_spectacular.utils import extend_schema, OpenApiResponse, inline_serializer
+from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiResponse, inline_serializer
 from drf_spectacular.types import OpenApiTypes
 from rest_framework import serializers as drf_serializers
 
-from django.utils import timezone
 from apps.movies.models import Movie
-from apps.payments.models import Payment, WithdrawalRequest
+from apps.payments.models import Payment
 from apps.payments.pawapay import initiate_deposit, detect_correspondent
-from apps.payments.emails import send_payment_completed_email, send_withdrawal_status_email
+from apps.payments import status_channel
+from apps.payments.transitions import apply_deposit_status, apply_payout_status
 import requests
 
 logger = logging.getLogger(__name__)
@@ -168,8 +168,17 @@ class PaymentStatusView(APIView):
         summary='Check payment status',
         description=(
             'Poll this endpoint after initiating a payment to check if PawaPay has confirmed it. '
-            'Returns the current status: Pending, Completed, or Failed.'
+            'Returns the current status: Pending, Completed, or Failed.\n\n'
+            'Pass `wait` (seconds) to long-poll: a Pending payment holds the request until '
+            'PawaPay confirms it or the wait expires (capped server-side), then returns the '
+            'current status. Re-issue the request while the status is still Pending.'
         ),
+        parameters=[
+            OpenApiParameter(
+                'wait', OpenApiTypes.INT, OpenApiParameter.QUERY,
+                description='Seconds to wait for a Pending payment to resolve (default 0).',
+            ),
+        ],
         responses={
             200: inline_serializer(
                 name='PaymentStatusResponse',
@@ -193,6 +202,14 @@ class PaymentStatusView(APIView):
         if payment.user != request.user:
             return Response({'error': 'Not your payment.'}, status=status.HTTP_403_FORBIDDEN)
 
+        wait = self._wait_seconds(request)
+        if payment.status == 'Pending' and wait:
+            published = status_channel.wait_for_status(
+                deposit_id, wait, fallback=lambda: self._final_status(payment.pk),
+            )
+            if published:
+                payment.status = published
+
         return Response({
             'deposit_id': payment.deposit_id,
             'status': payment.status,
@@ -204,6 +221,20 @@ class PaymentStatusView(APIView):
         })
 
 
+    @staticmethod
+    def _wait_seconds(request):
+        try:
+            wait = float(request.query_params.get('wait', 0))
+        except ValueError:
+            return 0
+        return min(max(wait, 0), getattr(settings, 'PAYMENT_STATUS_MAX_WAIT', 20))
+
+    @staticmethod
+    def _final_status(payment_id):
+        current = Payment.objects.filter(pk=payment_id).values_list('status', flat=True).first()
+        return current if current != 'Pending' else None
+
+
 class PaymentHistoryView(APIView):
     """Returns the authenticated viewer's own payment history."""
     permission_classes = [IsAuthenticated]
@@ -315,54 +346,13 @@ class PawapayWebhookView(APIView):
         return Response(status=status.HTTP_200_OK)
 
     def _handle_deposit(self, deposit_id, pawapay_status):
-        """Update Payment status when a deposit is resolved."""
-        try:
-            payment = Payment.objects.get(deposit_id=deposit_id)
-        except Payment.DoesNotExist:
-            logger.warning('Webhook: unknown depositId %s', deposit_id)
-            return Response(status=status.HTTP_200_OK)
-
-        if payment.status in ('Completed', 'Failed'):
-            return Response(status=status.HTTP_200_OK)
-
-        if pawapay_status == 'COMPLETED':
-            payment.status = 'Completed'
-        elif pawapay_status == 'FAILED':
-            payment.status = 'Failed'
-        else:
-            return Response(status=status.HTTP_200_OK)
-
-        payment.save(update_fields=['status'])
-        logger.info('Deposit %s → Payment #%s marked %s', deposit_id, payment.id, payment.status)
-
-        if payment.status == 'Completed':
-            send_payment_completed_email(payment)
-
+        """Update Payment status when a deposit is resolved (see transitions.py)."""
+        apply_deposit_status(deposit_id, pawapay_status)
         return Response(status=status.HTTP_200_OK)
 
     def _handle_payout(self, payout_id, pawapay_status):
-        """Update WithdrawalRequest status when a MoMo payout is resolved."""
-        try:
-            withdrawal = WithdrawalRequest.objects.get(payout_id=payout_id)
-        except WithdrawalRequest.DoesNotExist:
-            logger.warning('Webhook: unknown payoutId %s', payout_id)
-            return Response(status=status.HTTP_200_OK)
-
-        if withdrawal.status in ('Completed', 'Failed'):
-            return Response(status=status.HTTP_200_OK)
-
-        if pawapay_status == 'COMPLETED':
-            withdrawal.status = 'Completed'
-            withdrawal.processed_at = timezone.now()
-            withdrawal.save(update_fields=['status', 'processed_at'])
-        elif pawapay_status == 'FAILED':
-            withdrawal.status = 'Failed'
-            withdrawal.save(update_fields=['status'])
-        else:
-            return Response(status=status.HTTP_200_OK)
-
-        logger.info('Payout %s → Withdrawal #%s marked %s', payout_id, withdrawal.id, withdrawal.status)
-        send_withdrawal_status_email(withdrawal)
+        """Update WithdrawalRequest status when a MoMo payout is resolved (see transitions.py)."""
+        apply_payout_status(payout_id, pawapay_status)
         return Response(status=status.HTTP_200_OK)
 
     def _handle_refund(self, refund_id, pawapay_status):
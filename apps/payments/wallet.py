@@ -0,0 +1,218 @@
+"""
+Producer wallet ledger.
+
+Every status change of a Payment or WithdrawalRequest appends a WalletEntry
+with the change in that row's contribution to the producer's wallet, and
+applies it to the producer's ProducerWallet totals. The Payment and
+WithdrawalRequest post_save signals do both (see signals.py), inside the
+caller's transaction, with the wallet row locked. Wallet reads are then a
+single primary-key lookup instead of four SUMs over payments and
+withdrawals.
+
+Payments are credited to ``Payment.producer`` (the movie's producer when
+the payment was made), not to the movie's current producer: deleting a
+movie nulls ``Payment.movie`` without any signal, and the producer keeps
+those earnings.
+
+A row's contribution is recomputed from its current status and amount and
+compared with what its entries already add up to. Recording the same row
+twice therefore appends nothing, and re-recording a row repairs it.
+
+``find_drift()`` recomputes every wallet from the source rows the way
+get_producer_wallet used to. ``manage.py verify_wallets`` reports the
+differences, and ``--fix`` repairs them.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Q, Sum
+
+from .models import Payment, ProducerWallet, WalletEntry, WithdrawalRequest
+
+# Withdrawals in these states hold their amount (Rejected/Failed free it).
+LOCKING_STATUSES = ('Pending', 'Approved', 'Processing', 'Completed')
+AMOUNT_FIELDS = ('gross_revenue', 'locked_amount', 'pending_withdrawals', 'total_withdrawn')
+_ZERO = dict.fromkeys(AMOUNT_FIELDS, 0)
+
+
+def producer_split(gross: int) -> tuple:
+    """Return (producer_earnings, platform_commission) for a gross amount.
+
+    Producer share is computed first as (gross * 70) // 100; commission is
+    the remainder.  This guarantees producer_earnings + commission == gross
+    regardless of rounding, so all endpoints report consistent figures.
+    """
+    producer_earnings = (gross * 70) // 100
+    return producer_earnings, gross - producer_earnings
+
+
+def payment_amounts(status, amount):
+    return {**_ZERO, 'gross_revenue': amount if status == 'Completed' else 0}
+
+
+def withdrawal_amounts(status, amount):
+    return {
+        'gross_revenue': 0,
+        'locked_amount': amount if status in LOCKING_STATUSES else 0,
+        'pending_withdrawals': amount if status == 'Pending' else 0,
+        'total_withdrawn': amount if status == 'Completed' else 0,
+    }
+
+
+def _balance(totals):
+    return producer_split(totals['gross_revenue'])[0] - totals['locked_amount']
+
+
+def _totals(wallet):
+    return {field: getattr(wallet, field) for field in AMOUNT_FIELDS}
+
+
+def _summary(totals):
+    total_earnings, platform_commission = producer_split(totals['gross_revenue'])
+    return {
+        'gross_revenue': totals['gross_revenue'],
+        'platform_commission': platform_commission,
+        'total_earnings': total_earnings,
+        'wallet_balance': total_earnings - totals['locked_amount'],
+        'pending_withdrawals': totals['pending_withdrawals'],
+        'total_withdrawn': totals['total_withdrawn'],
+    }
+
+
+def summarize_wallet(wallet):
+    """The wallet dict returned by get_producer_wallet, for a ProducerWallet."""
+    return _summary(_totals(wallet))
+
+
+def get_wallet(producer_id):
+    wallet = ProducerWallet.objects.filter(pk=producer_id).first()
+    return _summary(_totals(wallet) if wallet else _ZERO)
+
+
+def get_wallets(producer_ids):
+    """{producer_id: wallet dict} for many producers in one query."""
+    found = {w.producer_id: _totals(w) for w in ProducerWallet.objects.filter(pk__in=producer_ids)}
+    return {pid: _summary(found.get(pid, _ZERO)) for pid in producer_ids}
+
+
+def lock_wallet(producer_id):
+    """Return the producer's wallet row locked for the current transaction (created if missing)."""
+    ProducerWallet.objects.get_or_create(producer_id=producer_id)
+    return ProducerWallet.objects.select_for_update().get(pk=producer_id)
+
+
+def _append(wallet, delta, **source):
+    for field in AMOUNT_FIELDS:
+        setattr(wallet, field, getattr(wallet, field) + delta[field])
+    wallet.save()
+    return WalletEntry.objects.create(
+        producer_id=wallet.producer_id, balance_after=_balance(_totals(wallet)), **delta, **source,
+    )
+
+
+def _sync(source_field, source, producer_id, amounts, status):
+    """Append the entries that make ``source``'s ledger total equal ``amounts`` under ``producer_id``."""
+    entries = WalletEntry.objects.filter(**{source_field: source}).order_by()
+    producer_ids = set(entries.values_list('producer_id', flat=True).distinct())
+    if producer_id is not None and (producer_ids or any(amounts.values())):
+        producer_ids.add(producer_id)
+    if not producer_ids:
+        return
+
+    with transaction.atomic():
+        # Sorted so concurrent writers lock wallets in the same order.
+        wallets = {pid: lock_wallet(pid) for pid in sorted(producer_ids)}
+        recorded = {
+            row['producer_id']: row
+            for row in entries.values('producer_id').annotate(**{f'{f}_sum': Sum(f) for f in AMOUNT_FIELDS})
+        }
+        for pid, wallet in wallets.items():
+            target = amounts if pid == producer_id else _ZERO
+            current = recorded.get(pid, {})
+            delta = {f: target[f] - (current.get(f'{f}_sum') or 0) for f in AMOUNT_FIELDS}
+            if any(delta.values()):
+                _append(wallet, delta, status=status, **{source_field: source})
+
+
+def record_payment(payment):
+    _sync('payment', payment, payment.producer_id, payment_amounts(payment.status, payment.amount), payment.status)
+
+
+def record_withdrawal(withdrawal):
+    _sync(
+        'withdrawal', withdrawal, withdrawal.producer_id,
+        withdrawal_amounts(withdrawal.status, withdrawal.amount), withdrawal.status,
+    )
+
+
+def forget_payment(payment):
+    """Reverse a payment's entries before it is deleted."""
+    _sync('payment', payment, None, _ZERO, 'Deleted')
+
+
+def forget_withdrawal(withdrawal):
+    _sync('withdrawal', withdrawal, None, _ZERO, 'Deleted')
+
+
+# ─────────────────────────────────────────────
+# Verification
+# ─────────────────────────────────────────────
+
+def expected_totals(payment_model=Payment, withdrawal_model=WithdrawalRequest, producer_ids=None):
+    """{producer_id: totals} recomputed from the source rows."""
+    payments = payment_model.objects.filter(status='Completed', producer__isnull=False)
+    withdrawals = withdrawal_model.objects.all()
+    if producer_ids is not None:
+        payments = payments.filter(producer_id__in=producer_ids)
+        withdrawals = withdrawals.filter(producer_id__in=producer_ids)
+
+    totals = defaultdict(lambda: dict(_ZERO))
+    for row in payments.values('producer_id').annotate(total=Sum('amount')):
+        totals[row['producer_id']]['gross_revenue'] = row['total']
+    for row in withdrawals.values('producer_id').annotate(
+        locked=Sum('amount', filter=Q(status__in=LOCKING_STATUSES)),
+        pending=Sum('amount', filter=Q(status='Pending')),
+        withdrawn=Sum('amount', filter=Q(status='Completed')),
+    ):
+        totals[row['producer_id']].update(
+            locked_amount=row['locked'] or 0,
+            pending_withdrawals=row['pending'] or 0,
+            total_withdrawn=row['withdrawn'] or 0,
+        )
+    return dict(totals)
+
+
+def find_drift():
+    """[(producer_id, field, recorded, expected)] for every wallet total that disagrees with the source rows."""
+    expected = expected_totals()
+    recorded = {w.producer_id: _totals(w) for w in ProducerWallet.objects.all()}
+    drift = []
+    for pid in sorted(expected.keys() | recorded.keys()):
+        want, have = expected.get(pid, _ZERO), recorded.get(pid, _ZERO)
+        drift.extend((pid, f, have[f], want[f]) for f in AMOUNT_FIELDS if have[f] != want[f])
+    return drift
+
+
+def repair_wallet(producer_id):
+    """
+    Re-record every source row of one producer, then book whatever is still
+    off (e.g. entries whose source row was deleted without signals) as a
+    single adjustment entry. Returns the number of entries appended.
+    """
+    before = WalletEntry.objects.filter(producer_id=producer_id).count()
+    payments = Payment.objects.filter(
+        Q(producer_id=producer_id) | Q(wallet_entries__producer_id=producer_id),
+    ).distinct()
+    for payment in payments:
+        record_payment(payment)
+    for withdrawal in WithdrawalRequest.objects.filter(producer_id=producer_id):
+        record_withdrawal(withdrawal)
+
+    with transaction.atomic():
+        wallet = lock_wallet(producer_id)
+        expected = expected_totals(producer_ids=[producer_id]).get(producer_id, _ZERO)
+        delta = {f: expected[f] - getattr(wallet, f) for f in AMOUNT_FIELDS}
+        if any(delta.values()):
+            _append(wallet, delta, status='Adjustment')
+    return WalletEntry.objects.filter(producer_id=producer_id).count() - before
+
@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User
+from .models import ReportJob, User
 
 
 @admin.register(User)
@@ -27,3 +27,10 @@ class UserAdmin(BaseUserAdmin):
             'fields': ('email', 'password1', 'password2'),
         }),
     )
+
+
+@admin.register(ReportJob)
+class ReportJobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'report', 'format', 'status', 'rows_written', 'rows_total', 'attempts', 'requested_by', 'created_at', 'finished_at']
+    list_filter = ['report', 'status', 'created_at']
+    raw_id_fields = ['requested_by']
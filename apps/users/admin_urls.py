@@ -26,8 +26,12 @@ from .admin_views import (
     AdminWithdrawalSummaryView,
     AdminProducerMoviePurchasesView,
     AdminPayingUsersReportView,
+    AdminReportJobCreateView,
+    AdminReportJobDetailView,
+    AdminReportJobDownloadView,
     AdminGenreRevenueView,
     AdminHLSHealthView,
+    AdminPawaPayHealthView,
     AdminWithdrawalPerformanceView,
     AdminPaymentLookupView,
     AdminPaymentResolveView,
@@ -64,8 +68,12 @@ urlpatterns = [
     path('reports/user-growth/', AdminUserGrowthView.as_view(), name='admin-user-growth'),
     path('reports/withdrawal-summary/', AdminWithdrawalSummaryView.as_view(), name='admin-withdrawal-summary'),
     path('reports/paying-users/', AdminPayingUsersReportView.as_view(), name='admin-paying-users-report'),
+    path('reports/jobs/', AdminReportJobCreateView.as_view(), name='admin-report-jobs'),
+    path('reports/jobs/<int:job_id>/', AdminReportJobDetailView.as_view(), name='admin-report-job-detail'),
+    path('reports/jobs/<int:job_id>/download/', AdminReportJobDownloadView.as_view(), name='admin-report-job-download'),
     path('reports/genre-revenue/', AdminGenreRevenueView.as_view(), name='admin-genre-revenue'),
     path('reports/hls-health/', AdminHLSHealthView.as_view(), name='admin-hls-health'),
+    path('reports/pawapay-health/', AdminPawaPayHealthView.as_view(), name='admin-pawapay-health'),
     path('reports/withdrawal-performance/', AdminWithdrawalPerformanceView.as_view(), name='admin-withdrawal-performance'),
 
     # Payment Dispute Resolution
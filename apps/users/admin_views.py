@@ -1,9 +1,9 @@
-import csv
+import itertools
 import uuid
 import secrets
 import logging
 
-from django.http import HttpResponse
+from django.http import FileResponse
 
 from rest_framework.views import APIView
 from rest_framework.response import Response
@@ -18,8 +18,8 @@ from drf_spectacular.utils import (
 )
 from drf_spectacular.types import OpenApiTypes
 from django.db import IntegrityError, transaction
-from django.db.models import Sum, Count, Avg, Q, Max, Min, ExpressionWrapper, FloatField, F, Value
-from django.db.models.functions import Coalesce, TruncDay, TruncMonth, TruncWeek, TruncYear, NullIf
+from django.db.models import Sum, Count, Q, Max, Min
+from django.db.models.functions import Coalesce
 from django.shortcuts import get_object_or_404
 from django.contrib.auth import get_user_model
 from django.utils import timezone
@@ -27,12 +27,16 @@ from requests import HTTPError as RequestsHTTPError
 from requests import RequestException as RequestsRequestException
 
 from apps.users.permissions import IsAdminRole
-from apps.users.serializers import AdminCreateProducerSerializer
-from apps.movies.models import Movie, Subtitle, WatchProgress
+from apps.users.pagination import approximate_count, cursor_requested, keyset_paginate
+from apps.users import analytics, exports, kpis, report_jobs, reports, rollups
+from apps.users.models import DailyActiveUser, DailySignupStats, DailyWithdrawalStats, ReportJob
+from apps.users.serializers import AdminCreateProducerSerializer, ReportJobRequestSerializer
+from apps.movies.models import Movie, Subtitle, TranscodeJob
 from apps.movies.serializers import SubtitleSerializer, SubtitleUploadSerializer, SubtitleUpdateSerializer
 from apps.payments.models import Payment, WithdrawalRequest
 from apps.payments.serializers import AdminWithdrawalRequestSerializer, get_producer_wallet, producer_split
-from apps.payments.pawapay import initiate_payout, detect_correspondent
+from apps.payments.wallet import get_wallets
+from apps.payments.pawapay import initiate_payout, detect_correspondent, get_client as get_pawapay_client
 from apps.payments.emails import send_withdrawal_status_email, send_payment_completed_email
 
 logger = logging.getLogger(__name__)
@@ -40,6 +44,12 @@ logger = logging.getLogger(__name__)
 User = get_user_model()
 
 
+def _save_withdrawal(withdrawal, update_fields):
+    """Save a withdrawal status change in one transaction with its wallet ledger entry."""
+    with transaction.atomic():
+        withdrawal.save(update_fields=update_fields)
+
+
 def _log_admin_action(request, action, detail=None, target_user=None, target_withdrawal=None):
     """Persist an audit trail entry for every sensitive admin action."""
     from apps.users.models import AdminAuditLog
@@ -59,16 +69,6 @@ _TAG = 'Admin Dashboard'
 _REPORTS_TAG = 'Admin Reports'
 
 
-def _csv_response(filename, headers, rows):
-    """Return a CSV file download response."""
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
-    writer = csv.writer(response)
-    writer.writerow(headers)
-    writer.writerows(rows)
-    return response
-
-
 def _safe_page(request):
     """Return a valid page number from ?page=, defaulting to 1 for any invalid input."""
     try:
@@ -130,7 +130,8 @@ class AdminDashboardOverviewView(AdminBaseView):
         summary='Platform activity overview',
         description=(
             'Returns platform-wide counters and a full financials breakdown. '
-            'Revenue split: 70% producer / 30% Ikigembe commission.'
+            'Revenue split: 70% producer / 30% Ikigembe commission. '
+            'Figures are cached briefly; `metric_ages` gives the age of each one in seconds.'
         ),
         responses={
             200: inline_serializer(
@@ -152,6 +153,10 @@ class AdminDashboardOverviewView(AdminBaseView):
                             'total_profit': drf_serializers.IntegerField(help_text='total_revenue minus total_paid_to_producers (RWF)'),
                         },
                     ),
+                    'metric_ages': drf_serializers.DictField(
+                        child=drf_serializers.IntegerField(),
+                        help_text='Seconds since each metric (by field name) was computed',
+                    ),
                 },
             ),
             401: OpenApiResponse(description='Authentication credentials not provided'),
@@ -159,41 +164,7 @@ class AdminDashboardOverviewView(AdminBaseView):
         },
     )
     def get(self, request):
-        total_viewers = User.objects.filter(role='Viewer').count()
-        total_producers = User.objects.filter(role='Producer').count()
-        total_movies = Movie.objects.count()
-        total_views = Movie.objects.aggregate(total=Sum('views'))['total'] or 0
-
-        from django.utils import timezone
-        now = timezone.now()
-        today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-        month_start = today_start.replace(day=1)
-
-        total_revenue = Payment.objects.filter(status='Completed').aggregate(total=Sum('amount'))['total'] or 0
-        producer_revenue = (total_revenue * 70) // 100
-        platform_commission = total_revenue - producer_revenue
-
-        revenue_today = Payment.objects.filter(status='Completed', created_at__gte=today_start).aggregate(total=Sum('amount'))['total'] or 0
-        revenue_this_month = Payment.objects.filter(status='Completed', created_at__gte=month_start).aggregate(total=Sum('amount'))['total'] or 0
-
-        total_paid_to_producers = WithdrawalRequest.objects.filter(status__in=['Approved', 'Completed']).aggregate(total=Sum('amount'))['total'] or 0
-        total_profit = total_revenue - total_paid_to_producers
-
-        return Response({
-            'total_viewers': total_viewers,
-            'total_producers': total_producers,
-            'total_movies': total_movies,
-            'total_views': total_views,
-            'financials': {
-                'total_revenue': total_revenue,
-                'producer_revenue': producer_revenue,
-                'platform_commission': platform_commission,
-                'revenue_today': revenue_today,
-                'revenue_this_month': revenue_this_month,
-                'total_paid_to_producers': total_paid_to_producers,
-                'total_profit': total_profit
-            }
-        })
+        return Response(kpis.dashboard_overview())
 
 
 # ─────────────────────────────────────────────
@@ -207,8 +178,10 @@ class AdminTransactionHistoryView(AdminBaseView):
         description=(
             'Returns three lists: completed/failed movie payments, '
             'processed withdrawal requests (Approved/Completed/Rejected), '
-            'and pending withdrawal requests awaiting admin action.'
+            'and pending withdrawal requests awaiting admin action. '
+            'Add ?export=csv to stream every payment and withdrawal as one CSV file.'
         ),
+        parameters=[exports.EXPORT_PARAMETER],
         responses={
             200: inline_serializer(
                 name='TransactionHistory',
@@ -238,6 +211,24 @@ class AdminTransactionHistoryView(AdminBaseView):
         withdrawals = WithdrawalRequest.objects.exclude(status='Pending').select_related('producer').order_by('-created_at')
         pending_withdrawals = WithdrawalRequest.objects.filter(status='Pending').select_related('producer').order_by('-created_at')
 
+        fmt = exports.export_format(request)
+        if fmt:
+            headers = ['Type', 'ID', 'Name', 'Movie', 'Amount (RWF)', 'Status', 'Date']
+            rows = itertools.chain(
+                (
+                    ['Payment', p.id, p.user.full_name, p.movie.title if p.movie else 'Unknown',
+                     p.amount, p.status, p.created_at]
+                    for p in exports.iterate(payments)
+                ),
+                (
+                    ['Withdrawal', w.id, w.producer.full_name, '', w.amount, w.status, w.created_at]
+                    for w in exports.iterate(
+                        WithdrawalRequest.objects.select_related('producer').order_by('-created_at')
+                    )
+                ),
+            )
+            return exports.csv_export('transactions.csv', headers, rows, fmt)
+
         payments_data = [{
             'id': p.id,
             'user': p.user.full_name,
@@ -510,64 +501,7 @@ class AdminProducersListView(AdminBaseView):
         },
     )
     def get(self, request):
-        producers = list(User.objects.filter(role='Producer').annotate(
-            movies_uploaded_count=Count('uploaded_movies', distinct=True),
-        ))
-        producer_ids = [p.id for p in producers]
-
-        # Batch all financial aggregations in 3 queries (instead of 3–4 per producer).
-        revenue_map = {
-            row['movie__producer_profile_id']: row['total']
-            for row in Payment.objects.filter(
-                movie__producer_profile_id__in=producer_ids,
-                status='Completed',
-            ).values('movie__producer_profile_id').annotate(total=Sum('amount'))
-        }
-
-        locked_map = {
-            row['producer_id']: row['total']
-            for row in WithdrawalRequest.objects.filter(
-                producer_id__in=producer_ids,
-                status__in=['Pending', 'Approved', 'Processing', 'Completed'],
-            ).values('producer_id').annotate(total=Sum('amount'))
-        }
-
-        pending_map = {
-            row['producer_id']: row['total']
-            for row in WithdrawalRequest.objects.filter(
-                producer_id__in=producer_ids,
-                status='Pending',
-            ).values('producer_id').annotate(total=Sum('amount'))
-        }
-
-        withdrawn_map = {
-            row['producer_id']: row['total']
-            for row in WithdrawalRequest.objects.filter(
-                producer_id__in=producer_ids,
-                status='Completed',
-            ).values('producer_id').annotate(total=Sum('amount'))
-        }
-
-        data = []
-        for p in producers:
-            raw_revenue = revenue_map.get(p.id) or 0
-            total_earnings = (raw_revenue * 70) // 100
-            locked = locked_map.get(p.id) or 0
-            data.append({
-                'id': p.id,
-                'name': p.full_name,
-                'email': p.email,
-                'phone_number': p.phone_number,
-                'address': p.address,
-                'copyright_code': p.copyright_code,
-                'movies_uploaded': p.movies_uploaded_count,
-                'total_earnings': total_earnings,
-                'balance': total_earnings - locked,
-                'pending_withdrawals': pending_map.get(p.id) or 0,
-                'total_withdrawn': withdrawn_map.get(p.id) or 0,
-                'is_active': p.is_active,
-                'date_joined': p.date_joined,
-            })
+        data = list(reports.producers())
         return Response(data)
 
 
@@ -768,12 +702,20 @@ class AdminProducerMoviePurchasesView(AdminBaseView):
                 default=1,
                 description='Page number (20 results per page)',
             ),
+            OpenApiParameter(
+                name='cursor',
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                required=False,
+                description='Opt into cursor pagination (empty for the first page, then `next_cursor`). Ignores `page`.',
+            ),
         ],
         responses={
             200: inline_serializer(
                 name='AdminMoviePurchaseList',
                 fields={
                     'page': drf_serializers.IntegerField(),
+                    'next_cursor': drf_serializers.CharField(allow_null=True, required=False, help_text='Cursor mode only'),
                     'total_results': drf_serializers.IntegerField(),
                     'total_pages': drf_serializers.IntegerField(),
                     'results': inline_serializer(
@@ -807,23 +749,33 @@ class AdminProducerMoviePurchasesView(AdminBaseView):
             .order_by('-created_at')
         )
 
+        def _serialize(payments):
+            return [
+                {
+                    'payment_id': p.id,
+                    'buyer_name': p.user.full_name,
+                    'phone_number': p.phone_number,
+                    'amount': p.amount,
+                    'status': p.status,
+                    'deposit_id': p.deposit_id,
+                    'purchased_at': p.created_at,
+                }
+                for p in payments
+            ]
+
+        if cursor_requested(request):
+            payments, next_cursor = keyset_paginate(qs, request, '-created_at')
+            return Response({
+                'next_cursor': next_cursor,
+                'total_results': approximate_count(qs),
+                'results': _serialize(payments),
+            })
+
         page = _safe_page(request)
         page_size = 20
         start = (page - 1) * page_size
         total = qs.count()
-
-        results = [
-            {
-                'payment_id': p.id,
-                'buyer_name': p.user.full_name,
-                'phone_number': p.phone_number,
-                'amount': p.amount,
-                'status': p.status,
-                'deposit_id': p.deposit_id,
-                'purchased_at': p.created_at,
-            }
-            for p in qs[start:start + page_size]
-        ]
+        results = _serialize(qs[start:start + page_size])
 
         return Response({
             'page': page,
@@ -1004,12 +956,20 @@ class AdminWithdrawalsListView(AdminBaseView):
                 default=1,
                 description='Page number (20 results per page)',
             ),
+            OpenApiParameter(
+                name='cursor',
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                required=False,
+                description='Opt into cursor pagination (empty for the first page, then `next_cursor`). Ignores `page`.',
+            ),
         ],
         responses={
             200: inline_serializer(
                 name='WithdrawalListResponse',
                 fields={
                     'page': drf_serializers.IntegerField(),
+                    'next_cursor': drf_serializers.CharField(allow_null=True, required=False, help_text='Cursor mode only'),
                     'total_results': drf_serializers.IntegerField(),
                     'total_pages': drf_serializers.IntegerField(),
                     'results': AdminWithdrawalRequestSerializer(many=True),
@@ -1025,49 +985,32 @@ class AdminWithdrawalsListView(AdminBaseView):
         if status_filter:
             qs = qs.filter(status=status_filter)
 
-        page = _safe_page(request)
-        page_size = 20
-        start = (page - 1) * page_size
-        total = qs.count()
-
-        page_qs = list(qs[start:start + page_size])
-
-        # Batch wallet balance calculation — 2 queries for all unique producers on this page.
-        producer_ids = list({wr.producer_id for wr in page_qs})
-        revenue_map = {
-            row['movie__producer_profile_id']: row['total']
-            for row in Payment.objects.filter(
-                movie__producer_profile_id__in=producer_ids,
-                status='Completed',
-            ).values('movie__producer_profile_id').annotate(total=Sum('amount'))
-        }
-        locked_map = {
-            row['producer_id']: row['total']
-            for row in WithdrawalRequest.objects.filter(
-                producer_id__in=producer_ids,
-                status__in=['Pending', 'Approved', 'Processing', 'Completed'],
-            ).values('producer_id').annotate(total=Sum('amount'))
-        }
+        if cursor_requested(request):
+            page_qs, next_cursor = keyset_paginate(qs, request, '-created_at')
+            pagination = {'next_cursor': next_cursor, 'total_results': approximate_count(qs)}
+        else:
+            page = _safe_page(request)
+            page_size = 20
+            start = (page - 1) * page_size
+            total = qs.count()
+            page_qs = list(qs[start:start + page_size])
+            pagination = {
+                'page': page,
+                'total_results': total,
+                'total_pages': (total + page_size - 1) // page_size,
+            }
 
-        def _wallet_balance(producer_id):
-            raw = revenue_map.get(producer_id) or 0
-            earnings = (raw * 70) // 100
-            locked = locked_map.get(producer_id) or 0
-            return earnings - locked
+        # Wallet balances for every producer on this page in one query.
+        wallets = get_wallets({wr.producer_id for wr in page_qs})
 
         serialized = AdminWithdrawalRequestSerializer(page_qs, many=True).data
         results = []
         for item, wr in zip(serialized, page_qs):
             entry = dict(item)
-            entry['wallet_balance'] = _wallet_balance(wr.producer_id)
+            entry['wallet_balance'] = wallets[wr.producer_id]['wallet_balance']
             results.append(entry)
 
-        return Response({
-            'page': page,
-            'results': results,
-            'total_results': total,
-            'total_pages': (total + page_size - 1) // page_size,
-        })
+        return Response({**pagination, 'results': results})
 
 
 class AdminWithdrawalApproveView(AdminBaseView):
@@ -1102,7 +1045,7 @@ class AdminWithdrawalApproveView(AdminBaseView):
 
         withdrawal.status = 'Approved'
         withdrawal.processed_at = timezone.now()
-        withdrawal.save(update_fields=['status', 'processed_at'])
+        _save_withdrawal(withdrawal, ['status', 'processed_at'])
         send_withdrawal_status_email(withdrawal)
         _log_admin_action(request, 'approve_withdrawal', target_withdrawal=withdrawal,
                           detail={'producer': withdrawal.producer.email, 'amount': str(withdrawal.amount),
@@ -1183,7 +1126,7 @@ class AdminWithdrawalCompleteView(AdminBaseView):
         # a single completion notification below, which is the meaningful one.
         if withdrawal.status == 'Pending':
             withdrawal.status = 'Approved'
-            withdrawal.save(update_fields=['status'])
+            _save_withdrawal(withdrawal, ['status'])
             _log_admin_action(request, 'approve_withdrawal', target_withdrawal=withdrawal,
                               detail={'producer': withdrawal.producer.email, 'amount': str(withdrawal.amount),
                                       'payment_method': withdrawal.payment_method, 'auto_approved': True})
@@ -1192,7 +1135,7 @@ class AdminWithdrawalCompleteView(AdminBaseView):
         if withdrawal.payment_method == 'Bank':
             withdrawal.status = 'Completed'
             withdrawal.processed_at = timezone.now()
-            withdrawal.save(update_fields=['status', 'processed_at'])
+            _save_withdrawal(withdrawal, ['status', 'processed_at'])
             send_withdrawal_status_email(withdrawal)
             _log_admin_action(request, 'complete_withdrawal', target_withdrawal=withdrawal,
                               detail={'producer': withdrawal.producer.email, 'amount': str(withdrawal.amount),
@@ -1219,7 +1162,7 @@ class AdminWithdrawalCompleteView(AdminBaseView):
             withdrawal.payout_id = payout_id
             withdrawal.status = 'Failed'
             withdrawal.processed_at = timezone.now()
-            withdrawal.save(update_fields=['payout_id', 'status', 'processed_at'])
+            _save_withdrawal(withdrawal, ['payout_id', 'status', 'processed_at'])
             send_withdrawal_status_email(withdrawal)
             logger.error('PawaPay payout error for withdrawal %s: %s', withdrawal_id, e)
             return Response(
@@ -1230,7 +1173,7 @@ class AdminWithdrawalCompleteView(AdminBaseView):
             withdrawal.payout_id = payout_id
             withdrawal.status = 'Failed'
             withdrawal.processed_at = timezone.now()
-            withdrawal.save(update_fields=['payout_id', 'status', 'processed_at'])
+            _save_withdrawal(withdrawal, ['payout_id', 'status', 'processed_at'])
             send_withdrawal_status_email(withdrawal)
             logger.error('PawaPay payout connection error for withdrawal %s: %s', withdrawal_id, e)
             return Response(
@@ -1242,7 +1185,7 @@ class AdminWithdrawalCompleteView(AdminBaseView):
         if pawapay_status not in ('ACCEPTED', 'COMPLETED'):
             withdrawal.status = 'Failed'
             withdrawal.processed_at = timezone.now()
-            withdrawal.save(update_fields=['status', 'processed_at'])
+            _save_withdrawal(withdrawal, ['status', 'processed_at'])
             send_withdrawal_status_email(withdrawal)
             return Response(
                 {'error': f'Payout rejected by provider: {pawapay_status}'},
@@ -1252,7 +1195,7 @@ class AdminWithdrawalCompleteView(AdminBaseView):
         withdrawal.payout_id = payout_id
         withdrawal.status = 'Processing'
         withdrawal.processed_at = timezone.now()
-        withdrawal.save(update_fields=['payout_id', 'status', 'processed_at'])
+        _save_withdrawal(withdrawal, ['payout_id', 'status', 'processed_at'])
         _log_admin_action(request, 'complete_withdrawal', target_withdrawal=withdrawal,
                           detail={'producer': withdrawal.producer.email, 'amount': str(withdrawal.amount),
                                   'payment_method': 'MoMo', 'payout_id': payout_id})
@@ -1299,7 +1242,7 @@ class AdminWithdrawalRejectView(AdminBaseView):
 
         withdrawal.status = 'Rejected'
         withdrawal.processed_at = timezone.now()
-        withdrawal.save(update_fields=['status', 'processed_at'])
+        _save_withdrawal(withdrawal, ['status', 'processed_at'])
         send_withdrawal_status_email(withdrawal)
         _log_admin_action(request, 'reject_withdrawal', target_withdrawal=withdrawal,
                           detail={'producer': withdrawal.producer.email, 'amount': str(withdrawal.amount),
@@ -1323,7 +1266,8 @@ class AdminAuditLogView(AdminBaseView):
         description=(
             'Returns a chronological record of all sensitive admin actions. '
             'Filter by action type with `?action=<action>`. '
-            'Up to 200 most recent entries are returned.'
+            'Up to 200 most recent entries are returned. Pass `?cursor=` to page through the full log '
+            '(50 per page) using `next_cursor`.'
         ),
         parameters=[
             OpenApiParameter(
@@ -1338,11 +1282,20 @@ class AdminAuditLogView(AdminBaseView):
                 ],
                 description='Filter by action type',
             ),
+            OpenApiParameter(
+                name='cursor',
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                required=False,
+                description='Opt into cursor pagination (empty for the first page, then `next_cursor`).',
+            ),
         ],
         responses={
             200: inline_serializer(
                 name='AuditLogResponse',
                 fields={
+                    'next_cursor': drf_serializers.CharField(allow_null=True, required=False, help_text='Cursor mode only'),
+                    'total_results': drf_serializers.IntegerField(required=False, help_text='Cursor mode only; may be approximate'),
                     'results': inline_serializer(
                         name='AuditLogEntry',
                         fields={
@@ -1369,20 +1322,30 @@ class AdminAuditLogView(AdminBaseView):
         action_filter = request.query_params.get('action')
         if action_filter:
             logs = logs.filter(action=action_filter)
-        data = [
-            {
-                'id': l.id,
-                'admin': l.admin.email if l.admin else None,
-                'action': l.action,
-                'target_user': l.target_user.email if l.target_user else None,
-                'target_withdrawal_id': l.target_withdrawal_id,
-                'detail': l.detail,
-                'ip_address': l.ip_address,
-                'timestamp': l.timestamp,
-            }
-            for l in logs[:200]
-        ]
-        return Response({'results': data})
+
+        def _serialize(entries):
+            return [
+                {
+                    'id': l.id,
+                    'admin': l.admin.email if l.admin else None,
+                    'action': l.action,
+                    'target_user': l.target_user.email if l.target_user else None,
+                    'target_withdrawal_id': l.target_withdrawal_id,
+                    'detail': l.detail,
+                    'ip_address': l.ip_address,
+                    'timestamp': l.timestamp,
+                }
+                for l in entries
+            ]
+
+        if cursor_requested(request):
+            entries, next_cursor = keyset_paginate(logs, request, '-timestamp', page_size=50)
+            return Response({
+                'results': _serialize(entries),
+                'next_cursor': next_cursor,
+                'total_results': approximate_count(logs),
+            })
+        return Response({'results': _serialize(logs[:200])})
 
 
 # ─────────────────────────────────────────────
@@ -1445,6 +1408,7 @@ class AdminRevenueTrendView(AdminBaseView):
                 required=False,
                 description='End of date range inclusive (YYYY-MM-DD). Defaults to today.',
             ),
+            exports.EXPORT_PARAMETER,
         ],
         responses={
             200: inline_serializer(
@@ -1485,74 +1449,26 @@ class AdminRevenueTrendView(AdminBaseView):
         period = request.GET.get('period', 'monthly')
 
         if period == 'daily':
-            trunc_fn = TruncDay
             default_days = _safe_int(request, 'periods', 30, maximum=90)
         elif period == 'weekly':
-            trunc_fn = TruncWeek
             default_days = _safe_int(request, 'periods', 12, maximum=52) * 7
         elif period == 'yearly':
-            trunc_fn = TruncYear
             default_days = _safe_int(request, 'periods', 5, maximum=10) * 366
         else:
             period = 'monthly'
-            trunc_fn = TruncMonth
             default_days = _safe_int(request, 'periods', 12, maximum=36) * 31
 
         since, until = _parse_date_range(request, default_days)
 
-        # Completed payments — the actual collected revenue
-        completed_rows = (
-            Payment.objects
-            .filter(status='Completed', created_at__gte=since, created_at__lte=until)
-            .annotate(period_start=trunc_fn('created_at'))
-            .values('period_start')
-            .annotate(total_revenue=Sum('amount'), purchase_count=Count('id'))
-            .order_by('period_start')
-        )
-
-        # Failed payment attempt counts per period — informational only.
-        # Failed payments were never collected so they are NOT deducted from revenue.
-        failed_map = {
-            row['period_start']: row['failed_attempts']
-            for row in (
-                Payment.objects
-                .filter(status='Failed', created_at__gte=since, created_at__lte=until)
-                .annotate(period_start=trunc_fn('created_at'))
-                .values('period_start')
-                .annotate(failed_attempts=Count('id'))
-            )
-        }
-
-        trend = []
-        for row in completed_rows:
-            rev = row['total_revenue'] or 0
-            producer_share, platform_commission = producer_split(rev)
-            trend.append({
-                'period_start': row['period_start'],
-                'total_revenue': rev,
-                'failed_attempts': failed_map.get(row['period_start'], 0),
-                'producer_share': producer_share,
-                'platform_commission': platform_commission,
-                'purchase_count': row['purchase_count'],
-            })
+        trend = reports.revenue_trend(since, until, period)
 
         total_revenue = sum(r['total_revenue'] for r in trend)
         summary_producer_share, summary_platform_commission = producer_split(total_revenue)
 
-        if request.GET.get('export') == 'csv':
-            headers = [
-                'Period Start', 'Total Revenue (RWF)', 'Failed Attempts',
-                'Producer Share (RWF)', 'Platform Commission (RWF)', 'Purchase Count',
-            ]
-            rows = [
-                [
-                    r['period_start'].date() if r['period_start'] else '',
-                    r['total_revenue'], r['failed_attempts'],
-                    r['producer_share'], r['platform_commission'], r['purchase_count'],
-                ]
-                for r in trend
-            ]
-            return _csv_response(f'revenue-trend-{period}.csv', headers, rows)
+        fmt = exports.export_format(request)
+        if fmt:
+            rows = (reports.revenue_trend_row(r) for r in trend)
+            return exports.csv_export(f'revenue-trend-{period}.csv', reports.REVENUE_TREND_HEADERS, rows, fmt)
 
         return Response({
             'period': period,
@@ -1608,6 +1524,7 @@ class AdminTopMoviesView(AdminBaseView):
                 required=False,
                 description='Only count payments up to this date inclusive (YYYY-MM-DD).',
             ),
+            exports.EXPORT_PARAMETER,
         ],
         responses={
             200: inline_serializer(
@@ -1640,141 +1557,22 @@ class AdminTopMoviesView(AdminBaseView):
     )
     def get(self, request):
         sort = request.GET.get('sort', 'revenue')
+        if sort not in analytics.SORTS:
+            sort = 'revenue'
         limit = min(_safe_int(request, 'limit', 10), 50)
         since, until = _parse_date_range(request, default_days=365)
 
-        completed_filter = Q(status='Completed', created_at__gte=since, created_at__lte=until)
+        results = analytics.get_snapshot().top_movies(sort, limit, *rollups.day_range(since, until))
 
-        # ── Step 1: Determine the top-N movie_ids using a single-model query
-        # for each sort key so there is no cross-join between payments and
-        # watch_progress that would inflate counts and sums.
-        if sort == 'views':
-            ordered_ids = list(
-                Movie.objects
-                .order_by(F('views').desc(nulls_last=True))
-                .values_list('id', flat=True)[:limit]
-            )
-        elif sort == 'unique_viewers':
-            ordered_ids = [
-                row['movie_id']
-                for row in (
-                    WatchProgress.objects
-                    .values('movie_id')
-                    .annotate(unique_viewers=Count('user', distinct=True))
-                    .order_by(F('unique_viewers').desc(nulls_last=True))[:limit]
-                )
-            ]
-        elif sort == 'completion_rate':
-            ordered_ids = [
-                row['movie_id']
-                for row in (
-                    WatchProgress.objects
-                    .values('movie_id')
-                    .annotate(
-                        total_watches=Count('id'),
-                        completed_watches=Count('id', filter=Q(completed=True)),
-                    )
-                    .annotate(
-                        completion_rate_value=ExpressionWrapper(
-                            F('completed_watches') * 1.0 / NullIf(F('total_watches'), Value(0)),
-                            output_field=FloatField(),
-                        )
-                    )
-                    .order_by(F('completion_rate_value').desc(nulls_last=True))[:limit]
-                )
-            ]
-        else:
-            sort = 'revenue'
-            ordered_ids = [
-                row['movie_id']
-                for row in (
-                    Payment.objects
-                    .filter(completed_filter)
-                    .values('movie_id')
-                    .annotate(total_revenue=Sum('amount'))
-                    .order_by(F('total_revenue').desc(nulls_last=True))[:limit]
-                )
-            ]
-
-        if not ordered_ids:
-            return Response({'sort': sort, 'results': []})
-
-        # ── Step 2: Payment aggregates — one query, no watch_progress join ────
-        payment_agg = {
-            row['movie_id']: row
-            for row in (
-                Payment.objects
-                .filter(movie_id__in=ordered_ids)
-                .values('movie_id')
-                .annotate(
-                    total_revenue=Coalesce(Sum('amount', filter=completed_filter), 0),
-                    purchase_count=Count('id', filter=completed_filter),
-                )
-            )
-        }
-
-        # ── Step 3: Watch-progress aggregates — one query, no payments join ───
-        watch_agg = {
-            row['movie_id']: row
-            for row in (
-                WatchProgress.objects
-                .filter(movie_id__in=ordered_ids)
-                .values('movie_id')
-                .annotate(
-                    unique_viewers=Count('user', distinct=True),
-                    avg_watch_seconds=Avg('progress_seconds'),
-                    total_watches=Count('id'),
-                    completed_watches=Count('id', filter=Q(completed=True)),
-                )
-            )
-        }
-
-        # ── Step 4: Movie objects (metadata only — no aggregated joins) ────────
-        movie_map = {
-            m.id: m
-            for m in Movie.objects.filter(id__in=ordered_ids).select_related('producer_profile')
-        }
-
-        # ── Step 5: Assemble results preserving the sort order from Step 1 ────
-        results = []
-        for movie_id in ordered_ids:
-            movie = movie_map.get(movie_id)
-            if not movie:
-                continue
-            p = payment_agg.get(movie_id, {})
-            w = watch_agg.get(movie_id, {})
-
-            total_watches = w.get('total_watches') or 0
-            completed_watches = w.get('completed_watches') or 0
-            completion_rate = round(completed_watches / total_watches, 4) if total_watches > 0 else 0.0
-            avg_watch_seconds = w.get('avg_watch_seconds') or 0
-            views = movie.views or 0
-            total_revenue = p.get('total_revenue') or 0
-            producer_share, platform_commission = producer_split(total_revenue)
-
-            results.append({
-                'id': movie.id,
-                'title': movie.title,
-                'producer': movie.producer_profile.full_name if movie.producer_profile else 'Unknown',
-                'views': views,
-                'unique_viewers': w.get('unique_viewers') or 0,
-                'avg_watch_time_minutes': round(avg_watch_seconds / 60, 2),
-                'completion_rate': completion_rate,
-                'purchase_count': p.get('purchase_count') or 0,
-                'total_revenue': total_revenue,
-                'producer_share': producer_share,
-                'platform_commission': platform_commission,
-                'revenue_per_view': round(total_revenue / views, 2) if views > 0 else 0.0,
-            })
-
-        if request.GET.get('export') == 'csv':
+        fmt = exports.export_format(request)
+        if fmt:
             headers = [
                 'Rank', 'Movie ID', 'Title', 'Producer', 'Views', 'Unique Viewers',
                 'Avg Watch Time (min)', 'Completion Rate', 'Purchase Count',
                 'Total Revenue (RWF)', 'Producer Share (RWF)', 'Platform Commission (RWF)',
                 'Revenue Per View',
             ]
-            rows = [
+            rows = (
                 [
                     i + 1, r['id'], r['title'], r['producer'], r['views'], r['unique_viewers'],
                     r['avg_watch_time_minutes'], r['completion_rate'], r['purchase_count'],
@@ -1782,8 +1580,8 @@ class AdminTopMoviesView(AdminBaseView):
                     r['revenue_per_view'],
                 ]
                 for i, r in enumerate(results)
-            ]
-            return _csv_response('top-movies.csv', headers, rows)
+            )
+            return exports.csv_export('top-movies.csv', headers, rows, fmt)
 
         return Response({'sort': sort, 'results': results})
 
@@ -1819,6 +1617,7 @@ class AdminUserGrowthView(AdminBaseView):
                 required=False,
                 description='End of date range inclusive (YYYY-MM-DD). Defaults to today.',
             ),
+            exports.EXPORT_PARAMETER,
         ],
         responses={
             200: inline_serializer(
@@ -1855,84 +1654,52 @@ class AdminUserGrowthView(AdminBaseView):
         months = _safe_int(request, 'months', 12, maximum=24)
         since, until = _parse_date_range(request, default_days=months * 31)
 
-        viewer_rows = {
-            row['month']: row['count']
-            for row in (
-                User.objects
-                .filter(role='Viewer', date_joined__gte=since, date_joined__lte=until)
-                .annotate(month=TruncMonth('date_joined'))
-                .values('month')
-                .annotate(count=Count('id'))
-            )
-        }
-
-        producer_rows = {
-            row['month']: row['count']
-            for row in (
-                User.objects
-                .filter(role='Producer', date_joined__gte=since, date_joined__lte=until)
-                .annotate(month=TruncMonth('date_joined'))
-                .values('month')
-                .annotate(count=Count('id'))
-            )
-        }
-
-        active_map = {
-            row['month']: row['active_users']
-            for row in (
-                WatchProgress.objects
-                .filter(last_watched_at__gte=since, last_watched_at__lte=until)
-                .annotate(month=TruncMonth('last_watched_at'))
-                .values('month')
-                .annotate(active_users=Count('user', distinct=True))
-            )
-        }
-
-        paying_map = {
-            row['month']: row['paying_users']
-            for row in (
-                Payment.objects
-                .filter(status='Completed', created_at__gte=since, created_at__lte=until)
-                .annotate(month=TruncMonth('created_at'))
-                .values('month')
-                .annotate(paying_users=Count('user', distinct=True))
-            )
-        }
+        rollups.ensure_fresh()
+        first_day, last_day = rollups.day_range(since, until)
+        signups = dict(rollups.rebucket(
+            DailySignupStats.objects.filter(day__gte=first_day, day__lte=last_day).values('day', 'viewers', 'producers'),
+            'monthly', ('viewers', 'producers'),
+        ))
+        active_map = rollups.distinct_users(DailyActiveUser.WATCHED, first_day, last_day, 'monthly')
+        paying_map = rollups.distinct_users(DailyActiveUser.PURCHASED, first_day, last_day, 'monthly')
 
-        all_months = sorted(set(viewer_rows) | set(producer_rows) | set(active_map) | set(paying_map))
-        trend = [
-            {
-                'month': m,
-                'viewers': viewer_rows.get(m, 0),
-                'producers': producer_rows.get(m, 0),
-                'total': viewer_rows.get(m, 0) + producer_rows.get(m, 0),
+        all_months = sorted(set(signups) | set(active_map) | set(paying_map))
+        trend = []
+        for m in all_months:
+            joined = signups.get(m, {'viewers': 0, 'producers': 0})
+            trend.append({
+                'month': rollups.period_start(m),
+                'viewers': joined['viewers'],
+                'producers': joined['producers'],
+                'total': joined['viewers'] + joined['producers'],
                 'active_users': active_map.get(m, 0),
                 'paying_users': paying_map.get(m, 0),
-            }
-            for m in all_months
-        ]
+            })
 
-        if request.GET.get('export') == 'csv':
+        fmt = exports.export_format(request)
+        if fmt:
             headers = [
                 'Month', 'New Viewers', 'New Producers', 'Total New Users',
                 'Active Users', 'Paying Users',
             ]
-            rows = [
+            rows = (
                 [
                     r['month'].date() if r['month'] else '',
                     r['viewers'], r['producers'], r['total'],
                     r['active_users'], r['paying_users'],
                 ]
                 for r in trend
-            ]
-            return _csv_response('user-growth.csv', headers, rows)
+            )
+            return exports.csv_export('user-growth.csv', headers, rows, fmt)
 
         return Response({
             'summary': {
                 'total_users': User.objects.count(),
                 'total_producers': User.objects.filter(role='Producer').count(),
                 'total_viewers': User.objects.filter(role='Viewer').count(),
-                'paying_users_all_time': Payment.objects.filter(status='Completed').values('user').distinct().count(),
+                'paying_users_all_time': (
+                    DailyActiveUser.objects.filter(kind=DailyActiveUser.PURCHASED).values('user').distinct().count()
+                ),
             },
             'trend': trend,
         })
@@ -1951,7 +1718,8 @@ class AdminPayingUsersReportView(AdminBaseView):
         description=(
             'Returns paginated viewers who have at least one completed payment, '
             'with contact details, total spend, purchase count, and individual payment history. '
-            'Access is audit-logged. 50 users per page.'
+            'Access is audit-logged. 50 users per page. '
+            'Add ?export=csv to stream every paying user (without payment history) as a CSV file.'
         ),
         parameters=[
             OpenApiParameter(
@@ -1976,6 +1744,7 @@ class AdminPayingUsersReportView(AdminBaseView):
                 required=False,
                 description='Only include payments up to this date inclusive (YYYY-MM-DD).',
             ),
+            exports.EXPORT_PARAMETER,
         ],
         responses={
             200: inline_serializer(
@@ -2017,24 +1786,13 @@ class AdminPayingUsersReportView(AdminBaseView):
     )
     def get(self, request):
         since, until = _parse_date_range(request, default_days=None)  # default: all data since 2000-01-01
-        date_filter = Q(
-            payments__status='Completed',
-            payments__created_at__gte=since,
-            payments__created_at__lte=until,
-        )
+        base_qs = reports.paying_users(since, until)
 
-        base_qs = (
-            User.objects
-            .filter(role='Viewer')
-            .annotate(
-                payment_count=Count('payments', filter=date_filter),
-                total_paid_rwf=Coalesce(Sum('payments__amount', filter=date_filter), 0),
-                first_payment_date=Min('payments__created_at', filter=date_filter),
-                last_payment_date=Max('payments__created_at', filter=date_filter),
-            )
-            .filter(payment_count__gt=0)
-            .order_by('-total_paid_rwf')
-        )
+        fmt = exports.export_format(request)
+        if fmt:
+            _log_admin_action(request, 'view_paying_users_report', detail={'export': fmt})
+            rows = (reports.paying_user_row(v) for v in exports.iterate(base_qs))
+            return exports.csv_export('paying-users.csv', reports.PAYING_USERS_HEADERS, rows, fmt)
 
         total = base_qs.count()
         page = _safe_page(request)
@@ -2093,6 +1851,124 @@ class AdminPayingUsersReportView(AdminBaseView):
         })
 
 
+# ─────────────────────────────────────────────
+# Report jobs (built in the background by run_report_worker)
+# ─────────────────────────────────────────────
+
+_REPORT_JOB_SCHEMA = inline_serializer(
+    name='ReportJob',
+    fields={
+        'id': drf_serializers.IntegerField(),
+        'report': drf_serializers.CharField(help_text='paying_users | revenue_trend | producers'),
+        'format': drf_serializers.CharField(help_text='csv | csv.gz'),
+        'params': drf_serializers.DictField(help_text='Normalised report parameters'),
+        'status': drf_serializers.CharField(help_text='queued | running | succeeded | failed'),
+        'progress': drf_serializers.IntegerField(allow_null=True, help_text='Percent of rows written; null until counted'),
+        'rows_written': drf_serializers.IntegerField(),
+        'rows_total': drf_serializers.IntegerField(allow_null=True),
+        'download_url': drf_serializers.URLField(allow_null=True, help_text='Set once the job has succeeded'),
+        'error': drf_serializers.CharField(allow_null=True),
+        'created_at': drf_serializers.DateTimeField(),
+        'finished_at': drf_serializers.DateTimeField(allow_null=True),
+    },
+)
+
+
+def _audit_report_access(request, job, access):
+    """Paying-users files hold viewer PII: log every request, link and download of one."""
+    if job.report == 'paying_users':
+        _log_admin_action(
+            request, 'view_paying_users_report', detail={'report_job': job.id, 'access': access, **job.params},
+        )
+
+
+def _report_job_data(job, request):
+    return {
+        'id': job.id,
+        'report': job.report,
+        'format': job.format,
+        'params': job.params,
+        'status': job.status,
+        'progress': job.progress,
+        'rows_written': job.rows_written,
+        'rows_total': job.rows_total,
+        'download_url': report_jobs.download_url(job, request),
+        'error': job.last_error if job.status == 'failed' else None,
+        'created_at': job.created_at,
+        'finished_at': job.finished_at,
+    }
+
+
+class AdminReportJobCreateView(AdminBaseView):
+    @extend_schema(
+        tags=[_REPORTS_TAG],
+        summary='Generate a report in the background',
+        description=(
+            'Queues a full paying-users, revenue-trend or producers report as a CSV file '
+            '(or gzip-compressed CSV) and returns the job. Poll the job until it has a '
+            '`download_url`. An identical request that is still queued or running returns '
+            'the existing job instead of starting another. Every request, download link and '
+            'download of a paying-users report is recorded in the audit log.'
+        ),
+        request=ReportJobRequestSerializer,
+        responses={
+            202: _REPORT_JOB_SCHEMA,
+            400: OpenApiResponse(description='Invalid report parameters'),
+            401: OpenApiResponse(description='Authentication credentials not provided'),
+            403: OpenApiResponse(description='Admin role required'),
+        },
+    )
+    def post(self, request):
+        serializer = ReportJobRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        job, created = report_jobs.queue_report(data['report'], data['format'], data['params'], request.user)
+        _audit_report_access(request, job, 'queued' if created else 'joined')
+        return Response(_report_job_data(job, request), status=status.HTTP_202_ACCEPTED)
+
+
+class AdminReportJobDetailView(AdminBaseView):
+    @extend_schema(
+        tags=[_REPORTS_TAG],
+        summary='Report job progress',
+        description='Returns the status and progress of a report job, and its download link once it has succeeded.',
+        responses={
+            200: _REPORT_JOB_SCHEMA,
+            401: OpenApiResponse(description='Authentication credentials not provided'),
+            403: OpenApiResponse(description='Admin role required'),
+            404: OpenApiResponse(description='Report job not found'),
+        },
+    )
+    def get(self, request, job_id):
+        job = get_object_or_404(ReportJob, pk=job_id)
+        data = _report_job_data(job, request)
+        if data['download_url']:
+            _audit_report_access(request, job, 'download_url')
+        return Response(data)
+
+
+class AdminReportJobDownloadView(AdminBaseView):
+    @extend_schema(
+        tags=[_REPORTS_TAG],
+        summary='Download a finished report',
+        description='Streams the report file. With S3 storage, the presigned `download_url` of the job can be used instead.',
+        responses={
+            (200, 'application/octet-stream'): OpenApiTypes.BINARY,
+            401: OpenApiResponse(description='Authentication credentials not provided'),
+            403: OpenApiResponse(description='Admin role required'),
+            404: OpenApiResponse(description='Report job not found or not finished'),
+        },
+    )
+    def get(self, request, job_id):
+        job = get_object_or_404(ReportJob, pk=job_id, status='succeeded')
+        _audit_report_access(request, job, 'download')
+        return FileResponse(
+            report_jobs.get_storage().open(job.artifact, 'rb'),
+            as_attachment=True,
+            filename=report_jobs.filename(job),
+        )
+
+
 # ─────────────────────────────────────────────
 # Admin: Force-reset a user's password
 # ─────────────────────────────────────────────
@@ -2215,43 +2091,21 @@ class AdminWithdrawalSummaryView(AdminBaseView):
         months = _safe_int(request, 'months', 12, maximum=24)
         since, until = _parse_date_range(request, default_days=months * 31)
 
-        def _by_status(status_filter):
-            return {
-                row['month']: row['total']
-                for row in (
-                    WithdrawalRequest.objects
-                    .filter(status=status_filter, created_at__gte=since, created_at__lte=until)
-                    .annotate(month=TruncMonth('created_at'))
-                    .values('month')
-                    .annotate(total=Sum('amount'))
-                )
-            }
-
-        completed_map = _by_status('Completed')
-        rejected_map = _by_status('Rejected')
-        pending_map = _by_status('Pending')
-
-        count_map = {
-            row['month']: row['count']
-            for row in (
-                WithdrawalRequest.objects
-                .filter(created_at__gte=since, created_at__lte=until)
-                .annotate(month=TruncMonth('created_at'))
-                .values('month')
-                .annotate(count=Count('id'))
+        rollups.ensure_fresh()
+        first_day, last_day = rollups.day_range(since, until)
+        daily = (
+            DailyWithdrawalStats.objects
+            .filter(day__gte=first_day, day__lte=last_day)
+            .values('day')
+            .annotate(
+                completed=Sum('completed'), rejected=Sum('rejected'),
+                pending=Sum('pending'), request_count=Sum('requests'),
             )
-        }
-
-        all_months = sorted(set(completed_map) | set(rejected_map) | set(pending_map))
+        )
         trend = [
-            {
-                'month': m,
-                'completed': completed_map.get(m, 0),
-                'rejected': rejected_map.get(m, 0),
-                'pending': pending_map.get(m, 0),
-                'request_count': count_map.get(m, 0),
-            }
-            for m in all_months
+            {'month': rollups.period_start(m), **totals}
+            for m, totals in rollups.rebucket(daily, 'monthly', ('completed', 'rejected', 'pending', 'request_count'))
+            if totals['completed'] or totals['rejected'] or totals['pending']
         ]
 
         return Response({'trend': trend})
@@ -2311,55 +2165,7 @@ class AdminGenreRevenueView(AdminBaseView):
     )
     def get(self, request):
         since, until = _parse_date_range(request, default_days=365)
-
-        # Step 1: aggregate revenue + count per movie in the DB — one row per movie,
-        # not one row per payment. This is O(movies with sales) instead of O(payments).
-        movie_stats = {
-            row['movie_id']: {'revenue': row['total'], 'count': row['count']}
-            for row in (
-                Payment.objects
-                .filter(
-                    status='Completed',
-                    created_at__gte=since,
-                    created_at__lte=until,
-                    movie__isnull=False,
-                )
-                .values('movie_id')
-                .annotate(total=Sum('amount'), count=Count('id'))
-            )
-        }
-
-        if not movie_stats:
-            return Response({'results': []})
-
-        # Step 2: fetch genres for only the movies that had sales — one query.
-        # ORM cannot GROUP BY JSON array elements so we expand genres in Python,
-        # but now we iterate movies (small set) rather than payments (large set).
-        movies = Movie.objects.filter(id__in=movie_stats.keys()).values('id', 'genres')
-
-        genre_stats = {}
-        for movie in movies:
-            stats = movie_stats[movie['id']]
-            for genre in (movie['genres'] or []):
-                if genre not in genre_stats:
-                    genre_stats[genre] = {'revenue': 0, 'count': 0, 'movie_ids': set()}
-                genre_stats[genre]['revenue'] += stats['revenue']
-                genre_stats[genre]['count'] += stats['count']
-                genre_stats[genre]['movie_ids'].add(movie['id'])
-
-        results = []
-        for genre, stats in genre_stats.items():
-            producer_share, commission = producer_split(stats['revenue'])
-            results.append({
-                'genre': genre,
-                'total_revenue': stats['revenue'],
-                'producer_share': producer_share,
-                'platform_commission': commission,
-                'purchase_count': stats['count'],
-                'movie_count': len(stats['movie_ids']),
-            })
-
-        results.sort(key=lambda x: x['total_revenue'], reverse=True)
+        results = analytics.get_snapshot().genre_revenue(*rollups.day_range(since, until))
         return Response({'results': results})
 
 
@@ -2374,8 +2180,10 @@ class AdminHLSHealthView(AdminBaseView):
         description=(
             'Returns a breakdown of movie HLS transcoding statuses across the platform. '
             'Highlights failed conversions (with error messages) and movies stuck in processing '
-            '(with hours elapsed since conversion started). '
-            '`success_rate_pct` is calculated over movies that have attempted conversion (ready + failed).'
+            '(with hours elapsed since conversion started and their transcode job). '
+            '`success_rate_pct` is calculated over movies that have attempted conversion (ready + failed). '
+            '`queue` summarises the transcode job queue; `stalled` counts running jobs whose worker '
+            'stopped heartbeating (they are requeued by the next worker poll).'
         ),
         responses={
             200: inline_serializer(
@@ -2411,9 +2219,36 @@ class AdminHLSHealthView(AdminBaseView):
                             'producer': drf_serializers.CharField(allow_null=True),
                             'started_at': drf_serializers.DateTimeField(allow_null=True),
                             'hours_stuck': drf_serializers.FloatField(allow_null=True, help_text='Hours since HLS conversion started'),
+                            'job': inline_serializer(
+                                name='AdminHLSJob',
+                                fields={
+                                    'id': drf_serializers.IntegerField(),
+                                    'status': drf_serializers.ChoiceField(choices=['queued', 'running']),
+                                    'attempts': drf_serializers.IntegerField(),
+                                    'max_attempts': drf_serializers.IntegerField(),
+                                    'worker_id': drf_serializers.CharField(),
+                                    'run_after': drf_serializers.DateTimeField(),
+                                    'heartbeat_at': drf_serializers.DateTimeField(allow_null=True),
+                                    'lease_expired': drf_serializers.BooleanField(),
+                                    'last_error': drf_serializers.CharField(allow_null=True),
+                                },
+                                allow_null=True,
+                                help_text='Active transcode job; null if none is queued or running',
+                            ),
                         },
                         many=True,
                     ),
+                    'queue': inline_serializer(
+                        name='AdminHLSQueue',
+                        fields={
+                            'queued': drf_serializers.IntegerField(),
+                            'retrying': drf_serializers.IntegerField(help_text='Queued jobs waiting out a retry backoff'),
+                            'running': drf_serializers.IntegerField(),
+                            'stalled': drf_serializers.IntegerField(help_text='Running jobs whose lease has expired'),
+                            'failed': drf_serializers.IntegerField(),
+                            'oldest_queued_at': drf_serializers.DateTimeField(allow_null=True),
+                        },
+                    ),
                 },
             ),
             401: OpenApiResponse(description='Authentication credentials not provided'),
@@ -2446,6 +2281,20 @@ class AdminHLSHealthView(AdminBaseView):
         ]
 
         now = timezone.now()
+        active_jobs = {
+            job.movie_id: {
+                'id': job.id,
+                'status': job.status,
+                'attempts': job.attempts,
+                'max_attempts': job.max_attempts,
+                'worker_id': job.worker_id,
+                'run_after': job.run_after,
+                'heartbeat_at': job.heartbeat_at,
+                'lease_expired': job.status == 'running' and job.lease_expires_at is not None and job.lease_expires_at < now,
+                'last_error': job.last_error,
+            }
+            for job in TranscodeJob.objects.filter(status__in=TranscodeJob.ACTIVE_STATUSES).order_by('created_at')
+        }
         stuck_processing = [
             {
                 'id': m.id,
@@ -2453,10 +2302,20 @@ class AdminHLSHealthView(AdminBaseView):
                 'producer': m.producer_profile.full_name if m.producer_profile else None,
                 'started_at': m.hls_started_at,
                 'hours_stuck': round((now - m.hls_started_at).total_seconds() / 3600, 1) if m.hls_started_at else None,
+                'job': active_jobs.get(m.id),
             }
             for m in Movie.objects.filter(hls_status='processing').select_related('producer_profile')
         ]
 
+        queue = TranscodeJob.objects.aggregate(
+            queued=Count('id', filter=Q(status='queued')),
+            retrying=Count('id', filter=Q(status='queued', attempts__gt=0)),
+            running=Count('id', filter=Q(status='running')),
+            stalled=Count('id', filter=Q(status='running', lease_expires_at__lt=now)),
+            failed=Count('id', filter=Q(status='failed')),
+            oldest_queued_at=Min('created_at', filter=Q(status='queued')),
+        )
+
         return Response({
             'summary': {
                 'total_movies': total,
@@ -2468,6 +2327,62 @@ class AdminHLSHealthView(AdminBaseView):
             },
             'failed_movies': failed_movies,
             'stuck_processing': stuck_processing,
+            'queue': queue,
+        })
+
+
+# ─────────────────────────────────────────────
+# Report: PawaPay Client Health
+# ─────────────────────────────────────────────
+
+class AdminPawaPayHealthView(AdminBaseView):
+    @extend_schema(
+        tags=[_REPORTS_TAG],
+        summary='PawaPay client health',
+        description=(
+            'Circuit-breaker state and per-endpoint latency of calls to PawaPay made by the '
+            'web process that serves this request (metrics are per process, kept since it started; '
+            'latency percentiles cover the most recent calls). `rejected_by_breaker` counts calls '
+            'failed fast while the breaker was open.'
+        ),
+        responses={
+            200: inline_serializer(
+                name='AdminPawaPayHealth',
+                fields={
+                    'breaker': inline_serializer(
+                        name='AdminPawaPayBreaker',
+                        fields={
+                            'state': drf_serializers.ChoiceField(choices=['closed', 'open', 'half_open']),
+                            'consecutive_failures': drf_serializers.IntegerField(),
+                            'retry_in_seconds': drf_serializers.FloatField(allow_null=True, help_text='Seconds until a trial call is allowed; null unless open'),
+                        },
+                    ),
+                    'endpoints': drf_serializers.DictField(
+                        child=inline_serializer(
+                            name='AdminPawaPayEndpoint',
+                            fields={
+                                'calls': drf_serializers.IntegerField(),
+                                'errors': drf_serializers.IntegerField(),
+                                'rejected_by_breaker': drf_serializers.IntegerField(),
+                                'avg_ms': drf_serializers.FloatField(allow_null=True),
+                                'p50_ms': drf_serializers.FloatField(allow_null=True),
+                                'p95_ms': drf_serializers.FloatField(allow_null=True),
+                                'max_ms': drf_serializers.FloatField(),
+                            },
+                        ),
+                        help_text='Keyed by "METHOD endpoint", e.g. "POST deposits"',
+                    ),
+                },
+            ),
+            401: OpenApiResponse(description='Authentication credentials not provided'),
+            403: OpenApiResponse(description='Admin role required'),
+        },
+    )
+    def get(self, request):
+        client = get_pawapay_client()
+        return Response({
+            'breaker': client.breaker.snapshot(),
+            'endpoints': client.metrics(),
         })
 
 
@@ -2752,8 +2667,10 @@ class AdminPaymentResolveView(AdminBaseView):
             )
 
         previous_status = payment.status
-        payment.status = 'Completed'
-        payment.save(update_fields=['status'])
+        with transaction.atomic():
+            # The Payment post_save signal grants the Entitlement in this transaction.
+            payment.status = 'Completed'
+            payment.save(update_fields=['status'])
 
         send_payment_completed_email(payment)
 
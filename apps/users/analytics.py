@@ -0,0 +1,235 @@
+"""
+In-memory columnar snapshot behind the genre-revenue and top-movies reports.
+
+Instead of aggregating Payment and WatchProgress on every request and
+merging the results in Python, each process keeps a Snapshot of NumPy
+arrays:
+
+- per movie (sorted by id): views, unique viewers, watches, completed
+  watches and total watch seconds;
+- the daily sales rollup (DailyMovieStats) as parallel arrays sorted by
+  day, so a date window is two binary searches plus a ``bincount``;
+- a movie × genre incidence matrix, so genre totals are one matrix product.
+
+Date windows are whole Kigali days, like the other rollup-backed reports.
+The snapshot is rebuilt when it is older than ANALYTICS_SNAPSHOT_TTL
+seconds: the first request after that keeps using the old one while a
+background thread builds the next. ANALYTICS_SNAPSHOT_TTL = 0 rebuilds on
+every call (the test suite). ``manage.py benchmark_analytics`` compares it
+with the ORM queries it replaced.
+"""
+import logging
+import threading
+import time
+
+import numpy as np
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Count, Q, Sum
+
+from apps.movies.models import Movie, WatchProgress
+from apps.payments.wallet import producer_split
+from . import rollups
+from .models import DailyMovieStats
+
+logger = logging.getLogger(__name__)
+
+SORTS = ('revenue', 'views', 'unique_viewers', 'completion_rate')
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class Snapshot:
+
+    def __init__(self, movies, watch_rows, sales_rows):
+        self.built_at = time.monotonic()
+        self.movie_ids = np.array([m['id'] for m in movies], dtype=np.int64)
+        self.titles = [m['title'] for m in movies]
+        self.producers = [
+            f"{m['producer_profile__first_name'] or ''} {m['producer_profile__last_name'] or ''}".strip()
+            if m['producer_profile_id'] else 'Unknown'
+            for m in movies
+        ]
+        self.views = np.array([m['views'] or 0 for m in movies], dtype=np.int64)
+
+        n = len(movies)
+        self.unique_viewers = np.zeros(n, dtype=np.int64)
+        self.total_watches = np.zeros(n, dtype=np.int64)
+        self.completed_watches = np.zeros(n, dtype=np.int64)
+        self.watch_seconds = np.zeros(n, dtype=np.int64)
+        if watch_rows:
+            watch = np.array(watch_rows, dtype=np.int64)
+            idx = self._index(watch[:, 0])
+            self.unique_viewers[idx] = watch[:, 1]
+            self.total_watches[idx] = watch[:, 2]
+            self.completed_watches[idx] = watch[:, 3]
+            self.watch_seconds[idx] = watch[:, 4]
+
+        sales = np.array(sales_rows, dtype=np.int64).reshape(-1, 4)
+        sales = sales[np.isin(sales[:, 1], self.movie_ids)]
+        order = np.argsort(sales[:, 0], kind='stable')
+        self.sale_days = sales[order, 0]
+        self.sale_movies = self._index(sales[order, 1])
+        self.sale_revenue = sales[order, 2]
+        self.sale_purchases = sales[order, 3]
+
+        self.genres = sorted({g for m in movies for g in (m['genres'] or [])})
+        column = {genre: i for i, genre in enumerate(self.genres)}
+        self.incidence = np.zeros((n, len(self.genres)), dtype=np.int64)
+        for i, m in enumerate(movies):
+            for genre in set(m['genres'] or []):
+                self.incidence[i, column[genre]] = 1
+
+    def _index(self, ids):
+        return np.searchsorted(self.movie_ids, ids)
+
+    def window(self, first_day, last_day):
+        """(revenue, purchases) per movie over the local days [first_day, last_day]."""
+        lo = np.searchsorted(self.sale_days, first_day.toordinal(), side='left')
+        hi = np.searchsorted(self.sale_days, last_day.toordinal(), side='right')
+        movies, n = self.sale_movies[lo:hi], len(self.movie_ids)
+        return (
+            np.bincount(movies, weights=self.sale_revenue[lo:hi], minlength=n).round().astype(np.int64),
+            np.bincount(movies, weights=self.sale_purchases[lo:hi], minlength=n).round().astype(np.int64),
+        )
+
+    def genre_revenue(self, first_day, last_day):
+        """AdminGenreRevenueView results: genres with sales in the window, by revenue."""
+        revenue, purchases = self.window(first_day, last_day)
+        genre_revenue = revenue @ self.incidence
+        genre_purchases = purchases @ self.incidence
+        genre_movies = (purchases > 0).astype(np.int64) @ self.incidence
+
+        results = []
+        for i in np.flatnonzero(genre_purchases):
+            total = int(genre_revenue[i])
+            producer_share, commission = producer_split(total)
+            results.append({
+                'genre': self.genres[i],
+                'total_revenue': total,
+                'producer_share': producer_share,
+                'platform_commission': commission,
+                'purchase_count': int(genre_purchases[i]),
+                'movie_count': int(genre_movies[i]),
+            })
+        results.sort(key=lambda r: r['total_revenue'], reverse=True)
+        return results
+
+    def top_movies(self, sort, limit, first_day, last_day):
+        """AdminTopMoviesView results: the ``limit`` best movies by ``sort``, revenue over the window."""
+        revenue, purchases = self.window(first_day, last_day)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            completion = np.where(self.total_watches > 0, self.completed_watches / self.total_watches, 0.0)
+            avg_seconds = np.where(self.total_watches > 0, self.watch_seconds / self.total_watches, 0.0)
+
+        # Candidates match the ORM ranking queries: movies with sales, with
+        # watch activity, or every movie for views.
+        if sort == 'views':
+            metric, candidates = self.views, np.arange(len(self.movie_ids))
+        elif sort == 'unique_viewers':
+            metric, candidates = self.unique_viewers, np.flatnonzero(self.total_watches)
+        elif sort == 'completion_rate':
+            metric, candidates = completion, np.flatnonzero(self.total_watches)
+        else:
+            metric, candidates = revenue, np.flatnonzero(purchases)
+
+        if len(candidates) > limit:
+            candidates = candidates[np.argpartition(-metric[candidates], limit - 1)[:limit]]
+        top = candidates[np.lexsort((self.movie_ids[candidates], -metric[candidates]))]
+
+        results = []
+        for i in top:
+            total_revenue, views = int(revenue[i]), int(self.views[i])
+            producer_share, platform_commission = producer_split(total_revenue)
+            results.append({
+                'id': int(self.movie_ids[i]),
+                'title': self.titles[i],
+                'producer': self.producers[i],
+                'views': views,
+                'unique_viewers': int(self.unique_viewers[i]),
+                'avg_watch_time_minutes': round(float(avg_seconds[i]) / 60, 2),
+                'completion_rate': round(float(completion[i]), 4),
+                'purchase_count': int(purchases[i]),
+                'total_revenue': total_revenue,
+                'producer_share': producer_share,
+                'platform_commission': platform_commission,
+                'revenue_per_view': round(total_revenue / views, 2) if views > 0 else 0.0,
+            })
+        return results
+
+
+def build_snapshot():
+    rollups.ensure_fresh()
+    movies = list(
+        Movie.objects.order_by('id').values(
+            'id', 'title', 'views', 'genres', 'producer_profile_id',
+            'producer_profile__first_name', 'producer_profile__last_name',
+        )
+    )
+    watch_rows = list(
+        WatchProgress.objects.order_by().values('movie_id').annotate(
+            unique_viewers=Count('user', distinct=True),
+            total=Count('id'),
+            completed=Count('id', filter=Q(completed=True)),
+            seconds=Sum('progress_seconds'),
+        ).values_list('movie_id', 'unique_viewers', 'total', 'completed', 'seconds')
+    )
+    sales_rows = [
+        (day.toordinal(), movie_id, revenue, purchases)
+        for day, movie_id, revenue, purchases in DailyMovieStats.objects.filter(purchases__gt=0, movie__isnull=False)
+        .order_by('day').values_list('day', 'movie_id', 'revenue', 'purchases').iterator()
+    ]
+    return Snapshot(movies, [tuple(r[:4]) + (r[4] or 0,) for r in watch_rows], sales_rows)
+
+
+# ─────────────────────────────────────────────
+# Per-process refresh
+# ─────────────────────────────────────────────
+
+_current = None
+_lock = threading.Lock()
+_rebuilding = False
+
+
+def _spawn(target):
+    threading.Thread(target=target, name='analytics-snapshot', daemon=True).start()
+
+
+def _rebuild_in_background():
+    global _rebuilding
+    with _lock:
+        if _rebuilding:
+            return
+        _rebuilding = True
+
+    def run():
+        global _current, _rebuilding
+        close_old_connections()
+        try:
+            _current = build_snapshot()
+        except Exception:
+            logger.exception('Analytics snapshot rebuild failed')
+        finally:
+            _rebuilding = False
+            close_old_connections()
+
+    _spawn(run)
+
+
+def get_snapshot():
+    """The current snapshot, built now if there is none and refreshed in the background when stale."""
+    global _current
+    ttl = _setting('ANALYTICS_SNAPSHOT_TTL', 300)
+    if ttl <= 0:
+        return build_snapshot()
+    snapshot = _current
+    if snapshot is None:
+        with _lock:
+            if _current is None:
+                _current = build_snapshot()
+            return _current
+    if time.monotonic() - snapshot.built_at >= ttl:
+        _rebuild_in_background()
+    return snapshot
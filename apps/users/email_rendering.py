@@ -0,0 +1,84 @@
+"""
+Precompiled transactional email templates.
+
+The HTML shell (``_base_html``), CTA buttons and every other static
+fragment of a message are rendered once, when its EmailTemplate is built at
+import time. What is left are ``$name`` placeholders for the per-recipient
+fields, so sending is a list join instead of re-running every f-string.
+
+The subject, plain-text and HTML parts are split into literal chunks and
+field slots when the template is built. Field values are HTML-escaped in
+the HTML part only. ``$$`` is a literal dollar sign.
+
+    RECEIPT = EmailTemplate(
+        subject='Purchase confirmed — $movie_title',
+        plain='Hi $name, ...',
+        html=_base_html('Purchase Confirmed', f'... {_cta_button(...)} ... $amount ...'),
+    )
+    subject, plain, html = RECEIPT.render(name='Aline', movie_title='Umurage', amount='500 RWF')
+"""
+import html as html_lib
+from string import Template
+
+_PLACEHOLDER = Template.pattern
+
+
+class CompiledText:
+    """A string split once into literal chunks and ``$field`` slots."""
+
+    __slots__ = ('source', 'parts', 'slots', 'escape')
+
+    def __init__(self, text: str, escape: bool = False):
+        self.source = text
+        self.parts = []
+        self.slots = []  # (index in parts, field name)
+        self.escape = escape
+        literal = []
+        position = 0
+        for match in _PLACEHOLDER.finditer(text):
+            literal.append(text[position:match.start()])
+            position = match.end()
+            if match.group('escaped') is not None:
+                literal.append('$')
+                continue
+            name = match.group('named') or match.group('braced')
+            if name is None:
+                raise ValueError(f'Invalid placeholder in email template at offset {match.start()}')
+            self.parts.append(''.join(literal))
+            literal = []
+            self.slots.append((len(self.parts), name))
+            self.parts.append('')
+        literal.append(text[position:])
+        self.parts.append(''.join(literal))
+
+    @property
+    def fields(self):
+        return {name for _, name in self.slots}
+
+    def render(self, fields) -> str:
+        if not self.slots:
+            return self.parts[0]
+        out = self.parts.copy()
+        for index, name in self.slots:
+            value = str(fields[name])
+            out[index] = html_lib.escape(value) if self.escape else value
+        return ''.join(out)
+
+
+class EmailTemplate:
+    """Subject, plain-text body and full HTML document of one message type."""
+
+    __slots__ = ('subject', 'plain', 'html')
+
+    def __init__(self, subject: str, plain: str, html: str):
+        self.subject = CompiledText(subject)
+        self.plain = CompiledText(plain)
+        self.html = CompiledText(html, escape=True)
+
+    @property
+    def fields(self):
+        return self.subject.fields | self.plain.fields | self.html.fields
+
+    def render(self, **fields):
+        """Return (subject, plain, html). Raises KeyError for a missing field."""
+        return self.subject.render(fields), self.plain.render(fields), self.html.render(fields)
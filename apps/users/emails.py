@@ -2,6 +2,8 @@ import logging
 from django.core.mail import EmailMultiAlternatives
 from django.conf import settings
 
+from .email_rendering import EmailTemplate
+
 logger = logging.getLogger(__name__)
 
 _LOGO_URL = 'https://ikigembe-film.vercel.app/assets/ikigembe.log.png'
@@ -11,6 +13,8 @@ _DARK     = '#0A0A0A'
 # ---------------------------------------------------------------------------
 # Shared HTML shell
 # ---------------------------------------------------------------------------
+# Called once per message type when its EmailTemplate is built (see
+# email_rendering.py), not on every send.
 
 def _base_html(title: str, body_html: str) -> str:
     return f"""<!DOCTYPE html>
@@ -97,27 +101,20 @@ def _send(subject: str, plain: str, html: str, to: str) -> None:
 
 
 # ---------------------------------------------------------------------------
-# Welcome email
+# Password reset email
 # ---------------------------------------------------------------------------
 
-def send_password_reset_email(user, token: str) -> None:
-    """Send a password-reset link to the user's email address."""
-    if not user.email:
-        return
-
-    name = user.first_name or 'there'
-    reset_url = f'https://ikigembe-film.vercel.app/reset-password?token={token}'
-
-    plain = (
-        f'Hi {name},\n\n'
-        f'We received a request to reset your Ikigembe password.\n\n'
-        f'Click the link below to set a new password (valid for 1 hour):\n'
-        f'{reset_url}\n\n'
-        f'If you did not request this, ignore this email — your account is safe.\n\n'
-        f'— The Ikigembe Team'
-    )
-
-    body_html = f"""
+_PASSWORD_RESET = EmailTemplate(
+    subject='Reset your Ikigembe password',
+    plain=(
+        'Hi $name,\n\n'
+        'We received a request to reset your Ikigembe password.\n\n'
+        'Click the link below to set a new password (valid for 1 hour):\n'
+        '$reset_url\n\n'
+        'If you did not request this, ignore this email — your account is safe.\n\n'
+        '— The Ikigembe Team'
+    ),
+    html=_base_html('Reset your password', f"""
         <p style="font-size:22px;font-weight:bold;margin:0 0 6px;color:{_DARK};">
           Reset your password
         </p>
@@ -127,52 +124,56 @@ def send_password_reset_email(user, token: str) -> None:
         </p>
         <div style="width:48px;height:2px;background:{_GOLD};margin:16px 0 24px;"></div>
 
-        <p style="margin:0 0 16px;">Hi {name},</p>
+        <p style="margin:0 0 16px;">Hi $name,</p>
         <p style="margin:0 0 16px;">
           We received a request to reset the password for your Ikigembe account.
           Click the button below to choose a new password. This link is valid for
           <strong>1 hour</strong>.
         </p>
 
-        {_cta_button('Reset My Password', reset_url)}
+        {_cta_button('Reset My Password', '$reset_url')}
 
         <p style="margin:24px 0 0;color:#777777;font-size:13px;
                   font-family:Arial,sans-serif;">
           If you did not request a password reset, you can safely ignore this email.
           Your account will remain unchanged.
         </p>
-    """
+    """),
+)
+
+
+def send_password_reset_email(user, token: str) -> None:
+    """Send a password-reset link to the user's email address."""
+    if not user.email:
+        return
 
+    subject, plain, html = _PASSWORD_RESET.render(
+        name=user.first_name or 'there',
+        reset_url=f'https://ikigembe-film.vercel.app/reset-password?token={token}',
+    )
     try:
-        _send(
-            subject='Reset your Ikigembe password',
-            plain=plain,
-            html=_base_html('Reset your password', body_html),
-            to=user.email,
-        )
+        _send(subject=subject, plain=plain, html=html, to=user.email)
         logger.info('Password reset email sent to %s', user.email)
     except Exception:
         logger.exception('Failed to send password reset email to %s', user.email)
 
 
-def send_welcome_email(user) -> None:
-    """Send a welcome email to a newly registered user."""
-    if not user.email:
-        return
-
-    name = user.first_name or 'there'
-
-    plain = (
-        f'Hi {name},\n\n'
-        f'Welcome to Ikigembe! Your account is ready.\n\n'
-        f'Discover and stream Rwandan-produced movies on your favourite device.\n\n'
-        f'Enjoy watching!\n'
-        f'— The Ikigembe Team'
-    )
+# ---------------------------------------------------------------------------
+# Welcome email
+# ---------------------------------------------------------------------------
 
-    body_html = f"""
+_WELCOME = EmailTemplate(
+    subject='Welcome to Ikigembe — Your account is ready',
+    plain=(
+        'Hi $name,\n\n'
+        'Welcome to Ikigembe! Your account is ready.\n\n'
+        'Discover and stream Rwandan-produced movies on your favourite device.\n\n'
+        'Enjoy watching!\n'
+        '— The Ikigembe Team'
+    ),
+    html=_base_html('Welcome to Ikigembe', f"""
         <p style="font-size:22px;font-weight:bold;margin:0 0 6px;color:{_DARK};">
-          Welcome, {name}.
+          Welcome, $name.
         </p>
         <p style="margin:0 0 4px;color:{_GOLD};font-size:12px;letter-spacing:2px;
                   text-transform:uppercase;font-family:Arial,sans-serif;">
@@ -194,15 +195,18 @@ def send_welcome_email(user) -> None:
                   font-family:Arial,sans-serif;">
           Questions? Reply to this email and we'll be happy to help.
         </p>
-    """
+    """),
+)
+
+
+def send_welcome_email(user) -> None:
+    """Send a welcome email to a newly registered user."""
+    if not user.email:
+        return
 
+    subject, plain, html = _WELCOME.render(name=user.first_name or 'there')
     try:
-        _send(
-            subject='Welcome to Ikigembe — Your account is ready',
-            plain=plain,
-            html=_base_html('Welcome to Ikigembe', body_html),
-            to=user.email,
-        )
+        _send(subject=subject, plain=plain, html=html, to=user.email)
         logger.info('Welcome email sent to %s', user.email)
     except Exception:
         logger.exception('Failed to send welcome email to %s', user.email)
@@ -0,0 +1,197 @@
+"""
+Cached KPIs for the admin dashboard overview.
+
+The overview counters come from one conditional-aggregate query per table
+(users, movies, completed payments, withdrawals) instead of a separate
+COUNT/SUM per figure. Each group is cached on its own with the time it was
+computed, so the response can report how old every metric is.
+
+A group older than ADMIN_KPI_TTL seconds is still served, and a single
+background thread recomputes it; the cache.add lock makes concurrent admins
+(in every worker) share that computation. A group missing from the cache is
+computed in-line by whichever request takes the lock, while the others wait
+up to ADMIN_KPI_LOCK_WAIT seconds for its result. ADMIN_KPI_TTL = 0 disables
+the cache (the test suite).
+"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import close_old_connections
+from django.db.models import Count, Q, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.movies.models import Movie
+from apps.payments.models import Payment, WithdrawalRequest
+from apps.payments.wallet import producer_split
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+_CACHE_PREFIX = 'admin-kpis:'
+_LOCK_KEY = 'admin-kpis:computing'
+_LOCK_TIMEOUT = 120
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _sum(field, **filters):
+    return Coalesce(Sum(field, filter=Q(**filters) if filters else None), Value(0))
+
+
+# ─────────────────────────────────────────────
+# Metric groups: one query each
+# ─────────────────────────────────────────────
+
+def _users():
+    return User.objects.aggregate(
+        total_viewers=Count('id', filter=Q(role='Viewer')),
+        total_producers=Count('id', filter=Q(role='Producer')),
+    )
+
+
+def _movies():
+    return Movie.objects.aggregate(total_movies=Count('id'), total_views=_sum('views'))
+
+
+def _revenue():
+    today_start = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
+    month_start = today_start.replace(day=1)
+    return Payment.objects.filter(status='Completed').aggregate(
+        total_revenue=_sum('amount'),
+        revenue_today=_sum('amount', created_at__gte=today_start),
+        revenue_this_month=_sum('amount', created_at__gte=month_start),
+    )
+
+
+def _payouts():
+    return WithdrawalRequest.objects.aggregate(
+        total_paid_to_producers=_sum('amount', status__in=['Approved', 'Completed']),
+    )
+
+
+GROUPS = {
+    'users': _users,
+    'movies': _movies,
+    'revenue': _revenue,
+    'payouts': _payouts,
+}
+
+
+# ─────────────────────────────────────────────
+# Caching
+# ─────────────────────────────────────────────
+
+def _compute(names, store=True):
+    """{group: {'values': ..., 'computed_at': epoch seconds}}, cached unless ``store`` is False."""
+    entries = {name: {'values': GROUPS[name](), 'computed_at': time.time()} for name in names}
+    if store:
+        # Kept well past the TTL so stale values can be served while refreshing.
+        cache.set_many(
+            {_CACHE_PREFIX + name: entry for name, entry in entries.items()},
+            timeout=_setting('ADMIN_KPI_MAX_STALE', 3600),
+        )
+    return entries
+
+
+def _cached(names):
+    found = cache.get_many([_CACHE_PREFIX + name for name in names])
+    return {name: found[_CACHE_PREFIX + name] for name in names if _CACHE_PREFIX + name in found}
+
+
+def _spawn(target):
+    threading.Thread(target=target, name='admin-kpis', daemon=True).start()
+
+
+def _refresh_in_background(names):
+    # Another request (or worker) is already refreshing.
+    if not cache.add(_LOCK_KEY, 1, timeout=_LOCK_TIMEOUT):
+        return
+
+    def run():
+        close_old_connections()
+        try:
+            _compute(names)
+        except Exception:
+            logger.exception('Admin KPI refresh failed')
+        finally:
+            cache.delete(_LOCK_KEY)
+            close_old_connections()
+
+    _spawn(run)
+
+
+def _compute_missing(names):
+    if cache.add(_LOCK_KEY, 1, timeout=_LOCK_TIMEOUT):
+        try:
+            return _compute(names)
+        finally:
+            cache.delete(_LOCK_KEY)
+
+    deadline = time.monotonic() + _setting('ADMIN_KPI_LOCK_WAIT', 5)
+    entries = {}
+    while time.monotonic() < deadline:
+        time.sleep(0.05)
+        entries = _cached(names)
+        if len(entries) == len(names):
+            return entries
+    # The holder is slow or died: compute the rest here.
+    return {**entries, **_compute([name for name in names if name not in entries])}
+
+
+def get_entries():
+    """{group: {'values', 'computed_at'}} for every group, cached per ADMIN_KPI_TTL."""
+    ttl = _setting('ADMIN_KPI_TTL', 30)
+    if ttl <= 0:
+        return _compute(GROUPS, store=False)
+
+    entries = _cached(GROUPS)
+    missing = [name for name in GROUPS if name not in entries]
+    if missing:
+        entries.update(_compute_missing(missing))
+    now = time.time()
+    stale = [name for name, entry in entries.items() if now - entry['computed_at'] >= ttl]
+    if stale:
+        _refresh_in_background(stale)
+    return entries
+
+
+# ─────────────────────────────────────────────
+# Overview
+# ─────────────────────────────────────────────
+
+def dashboard_overview():
+    """The AdminDashboardOverviewView payload, with ``metric_ages`` in whole seconds."""
+    entries = get_entries()
+    now = time.time()
+    values, ages = {}, {}
+    for entry in entries.values():
+        values.update(entry['values'])
+        ages.update(dict.fromkeys(entry['values'], max(int(now - entry['computed_at']), 0)))
+
+    producer_revenue, platform_commission = producer_split(values['total_revenue'])
+    ages['producer_revenue'] = ages['platform_commission'] = ages['total_revenue']
+    ages['total_profit'] = max(ages['total_revenue'], ages['total_paid_to_producers'])
+    return {
+        'total_viewers': values['total_viewers'],
+        'total_producers': values['total_producers'],
+        'total_movies': values['total_movies'],
+        'total_views': values['total_views'],
+        'financials': {
+            'total_revenue': values['total_revenue'],
+            'producer_revenue': producer_revenue,
+            'platform_commission': platform_commission,
+            'revenue_today': values['revenue_today'],
+            'revenue_this_month': values['revenue_this_month'],
+            'total_paid_to_producers': values['total_paid_to_producers'],
+            'total_profit': values['total_revenue'] - values['total_paid_to_producers'],
+        },
+        'metric_ages': ages,
+    }
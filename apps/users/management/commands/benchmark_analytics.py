@@ -0,0 +1,213 @@
+import time
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Avg, Count, ExpressionWrapper, F, FloatField, Q, Sum, Value
+from django.db.models.functions import Coalesce, NullIf
+from django.utils import timezone
+
+from apps.movies.models import Movie, WatchProgress
+from apps.payments.models import Payment
+from apps.payments.wallet import producer_split
+from apps.users import analytics
+
+# ─────────────────────────────────────────────
+# Baseline: the per-request ORM queries the snapshot replaced
+# ─────────────────────────────────────────────
+
+def _orm_genre_revenue(since, until):
+    movie_stats = {
+        row['movie_id']: {'revenue': row['total'], 'count': row['count']}
+        for row in (
+            Payment.objects
+            .filter(status='Completed', created_at__gte=since, created_at__lte=until, movie__isnull=False)
+            .values('movie_id')
+            .annotate(total=Sum('amount'), count=Count('id'))
+        )
+    }
+    genre_stats = {}
+    for movie in Movie.objects.filter(id__in=movie_stats.keys()).values('id', 'genres'):
+        stats = movie_stats[movie['id']]
+        for genre in (movie['genres'] or []):
+            entry = genre_stats.setdefault(genre, {'revenue': 0, 'count': 0, 'movie_ids': set()})
+            entry['revenue'] += stats['revenue']
+            entry['count'] += stats['count']
+            entry['movie_ids'].add(movie['id'])
+
+    results = []
+    for genre, stats in genre_stats.items():
+        producer_share, commission = producer_split(stats['revenue'])
+        results.append({
+            'genre': genre,
+            'total_revenue': stats['revenue'],
+            'producer_share': producer_share,
+            'platform_commission': commission,
+            'purchase_count': stats['count'],
+            'movie_count': len(stats['movie_ids']),
+        })
+    results.sort(key=lambda x: x['total_revenue'], reverse=True)
+    return results
+
+
+def _orm_top_movies(sort, limit, since, until):
+    completed_filter = Q(status='Completed', created_at__gte=since, created_at__lte=until)
+    if sort == 'views':
+        ordered_ids = list(
+            Movie.objects.order_by(F('views').desc(nulls_last=True)).values_list('id', flat=True)[:limit]
+        )
+    elif sort == 'unique_viewers':
+        ordered_ids = [
+            row['movie_id'] for row in (
+                WatchProgress.objects.values('movie_id')
+                .annotate(unique_viewers=Count('user', distinct=True))
+                .order_by(F('unique_viewers').desc(nulls_last=True))[:limit]
+            )
+        ]
+    elif sort == 'completion_rate':
+        ordered_ids = [
+            row['movie_id'] for row in (
+                WatchProgress.objects.values('movie_id')
+                .annotate(total_watches=Count('id'), completed_watches=Count('id', filter=Q(completed=True)))
+                .annotate(completion_rate_value=ExpressionWrapper(
+                    F('completed_watches') * 1.0 / NullIf(F('total_watches'), Value(0)),
+                    output_field=FloatField(),
+                ))
+                .order_by(F('completion_rate_value').desc(nulls_last=True))[:limit]
+            )
+        ]
+    else:
+        ordered_ids = [
+            row['movie_id'] for row in (
+                Payment.objects.filter(completed_filter).values('movie_id')
+                .annotate(total_revenue=Sum('amount'))
+                .order_by(F('total_revenue').desc(nulls_last=True))[:limit]
+            )
+        ]
+    if not ordered_ids:
+        return []
+
+    payment_agg = {
+        row['movie_id']: row for row in (
+            Payment.objects.filter(movie_id__in=ordered_ids).values('movie_id').annotate(
+                total_revenue=Coalesce(Sum('amount', filter=completed_filter), 0),
+                purchase_count=Count('id', filter=completed_filter),
+            )
+        )
+    }
+    watch_agg = {
+        row['movie_id']: row for row in (
+            WatchProgress.objects.filter(movie_id__in=ordered_ids).values('movie_id').annotate(
+                unique_viewers=Count('user', distinct=True),
+                avg_watch_seconds=Avg('progress_seconds'),
+                total_watches=Count('id'),
+                completed_watches=Count('id', filter=Q(completed=True)),
+            )
+        )
+    }
+    movie_map = {m.id: m for m in Movie.objects.filter(id__in=ordered_ids).select_related('producer_profile')}
+
+    results = []
+    for movie_id in ordered_ids:
+        movie = movie_map.get(movie_id)
+        if not movie:
+            continue
+        p = payment_agg.get(movie_id, {})
+        w = watch_agg.get(movie_id, {})
+        total_watches = w.get('total_watches') or 0
+        completed_watches = w.get('completed_watches') or 0
+        views = movie.views or 0
+        total_revenue = p.get('total_revenue') or 0
+        producer_share, platform_commission = producer_split(total_revenue)
+        results.append({
+            'id': movie.id,
+            'title': movie.title,
+            'producer': movie.producer_profile.full_name if movie.producer_profile else 'Unknown',
+            'views': views,
+            'unique_viewers': w.get('unique_viewers') or 0,
+            'avg_watch_time_minutes': round((w.get('avg_watch_seconds') or 0) / 60, 2),
+            'completion_rate': round(completed_watches / total_watches, 4) if total_watches > 0 else 0.0,
+            'purchase_count': p.get('purchase_count') or 0,
+            'total_revenue': total_revenue,
+            'producer_share': producer_share,
+            'platform_commission': platform_commission,
+            'revenue_per_view': round(total_revenue / views, 2) if views > 0 else 0.0,
+        })
+    return results
+
+
+# ─────────────────────────────────────────────
+# Comparison
+# ─────────────────────────────────────────────
+
+_METRIC = {
+    'revenue': 'total_revenue',
+    'views': 'views',
+    'unique_viewers': 'unique_viewers',
+    'completion_rate': 'completion_rate',
+}
+
+
+def _same_top_movies(sort, snapshot_rows, orm_rows):
+    """Same ranking values, and identical rows for the movies both returned (ties may differ)."""
+    metric = _METRIC[sort]
+    if [r[metric] for r in snapshot_rows] != [r[metric] for r in orm_rows]:
+        return False
+    orm_by_id = {r['id']: r for r in orm_rows}
+    return all(r == orm_by_id[r['id']] for r in snapshot_rows if r['id'] in orm_by_id)
+
+
+def _rate(fn, seconds):
+    count = 0
+    started = time.perf_counter()
+    deadline = started + seconds
+    while True:
+        fn()
+        count += 1
+        now = time.perf_counter()
+        if now >= deadline:
+            return count / (now - started)
+
+
+class Command(BaseCommand):
+    help = 'Measure genre-revenue and top-movies reports per second: analytics snapshot vs ORM queries'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seconds', type=float, default=1.0, help='Time spent on each measurement (default: 1)')
+        parser.add_argument('--days', type=int, default=365, help='Report window in days (default: 365)')
+        parser.add_argument('--limit', type=int, default=10, help='Top movies returned (default: 10)')
+
+    def handle(self, *args, **options):
+        seconds, limit = options['seconds'], options['limit']
+        last_day = timezone.localdate()
+        first_day = last_day - timedelta(days=options['days'])
+        since = timezone.make_aware(datetime.combine(first_day, datetime.min.time()))
+        until = timezone.make_aware(datetime.combine(last_day, datetime.max.time()))
+
+        started = time.perf_counter()
+        snapshot = analytics.build_snapshot()
+        self.stdout.write(
+            f'snapshot: {len(snapshot.movie_ids):,} movie(s), {len(snapshot.sale_days):,} daily sale row(s), '
+            f'{len(snapshot.genres):,} genre(s), built in {(time.perf_counter() - started) * 1000:,.1f} ms'
+        )
+
+        cases = [('genre_revenue', lambda: snapshot.genre_revenue(first_day, last_day),
+                  lambda: _orm_genre_revenue(since, until), None)]
+        for sort in analytics.SORTS:
+            cases.append((
+                f'top_movies:{sort}',
+                lambda sort=sort: snapshot.top_movies(sort, limit, first_day, last_day),
+                lambda sort=sort: _orm_top_movies(sort, limit, since, until),
+                sort,
+            ))
+
+        self.stdout.write(f'{"report":<28} {"snapshot/s":>12} {"orm/s":>10} {"speed-up":>9}')
+        for name, columnar, orm, sort in cases:
+            if sort is None:
+                same = {r['genre']: r for r in columnar()} == {r['genre']: r for r in orm()}
+            else:
+                same = _same_top_movies(sort, columnar(), orm())
+            if not same:
+                raise CommandError(f'{name}: snapshot results differ from the ORM queries')
+            fast = _rate(columnar, seconds)
+            baseline = _rate(orm, seconds)
+            self.stdout.write(f'{name:<28} {fast:>12,.0f} {baseline:>10,.0f} {fast / baseline:>8.1f}x')
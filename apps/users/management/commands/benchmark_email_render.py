@@ -0,0 +1,65 @@
+import html
+import time
+from string import Template
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.movies.emails import _NEW_MOVIE
+from apps.payments.emails import _PAYMENT_COMPLETED, _WITHDRAWAL_TEMPLATES
+from apps.users.emails import _PASSWORD_RESET, _WELCOME
+
+SAMPLES = [
+    ('welcome', _WELCOME, {'name': 'Aline'}),
+    ('password_reset', _PASSWORD_RESET, {
+        'name': 'Aline', 'reset_url': 'https://ikigembe-film.vercel.app/reset-password?token=abc123',
+    }),
+    ('payment_completed', _PAYMENT_COMPLETED, {
+        'name': 'Aline', 'movie_title': 'Umurage', 'amount': '1,500 RWF',
+    }),
+    ('withdrawal_completed', _WITHDRAWAL_TEMPLATES['Completed'], {
+        'name': 'Eric', 'amount': '75,000 RWF', 'method': 'MTN MoMo',
+    }),
+    ('new_movie', _NEW_MOVIE, {
+        'title': 'Umurage', 'snippet': 'A family saga across three generations...', 'price_line': '1,500 RWF',
+    }),
+]
+
+
+def _substitute(template, fields):
+    """Baseline: parse and substitute every part on each render."""
+    escaped = {name: html.escape(str(value)) for name, value in fields.items()}
+    return (
+        Template(template.subject.source).substitute(fields),
+        Template(template.plain.source).substitute(fields),
+        Template(template.html.source).substitute(escaped),
+    )
+
+
+def _rate(fn, seconds):
+    count = 0
+    started = time.perf_counter()
+    deadline = started + seconds
+    while True:
+        for _ in range(100):
+            fn()
+        count += 100
+        now = time.perf_counter()
+        if now >= deadline:
+            return count / (now - started)
+
+
+class Command(BaseCommand):
+    help = 'Measure transactional email renders per second: precompiled templates vs string.Template'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seconds', type=float, default=1.0, help='Time spent on each measurement (default: 1)')
+
+    def handle(self, *args, **options):
+        seconds = options['seconds']
+        self.stdout.write(f'{"message":<22} {"precompiled/s":>14} {"substitute/s":>14} {"speed-up":>9}')
+        for name, template, fields in SAMPLES:
+            if template.render(**fields) != _substitute(template, fields):
+                raise CommandError(f'{name}: precompiled render differs from string.Template')
+            compiled = _rate(lambda: template.render(**fields), seconds)
+            baseline = _rate(lambda: _substitute(template, fields), seconds)
+            self.stdout.write(f'{name:<22} {compiled:>14,.0f} {baseline:>14,.0f} {compiled / baseline:>8.1f}x')
@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.users.rollups import refresh_rollups
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily report rollups for the days changed since the last refresh.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Rebuild every day from scratch instead of only the changed ones',
+        )
+        parser.add_argument(
+            '--loop',
+            type=float,
+            metavar='SECONDS',
+            help='Keep refreshing every SECONDS instead of exiting after one refresh',
+        )
+
+    def handle(self, *args, **options):
+        interval = options.get('loop')
+        full = options['full']
+        while True:
+            rebuilt = refresh_rollups(full=full)
+            summary = ', '.join(f'{kind}={days}' for kind, days in rebuilt.items())
+            self.stdout.write(f'Rebuilt day(s): {summary}')
+            if not interval:
+                return
+            full = False
+            time.sleep(interval)
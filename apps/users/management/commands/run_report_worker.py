@@ -0,0 +1,27 @@
+import signal
+
+from django.core.management.base import BaseCommand
+
+from apps.users.report_jobs import ReportWorker
+
+
+class Command(BaseCommand):
+    help = 'Build queued admin reports (ReportJob) and store them for download'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--poll-interval', type=float, help='Seconds between queue polls (default: REPORT_POLL_INTERVAL)')
+        parser.add_argument('--once', action='store_true', help='Exit once no job is due instead of polling forever')
+
+    def handle(self, *args, **options):
+        worker = ReportWorker(poll_interval=options.get('poll_interval'))
+
+        def _shutdown(signum, frame):
+            self.stdout.write('Shutting down — finishing the current report...')
+            worker.stop()
+
+        signal.signal(signal.SIGTERM, _shutdown)
+        signal.signal(signal.SIGINT, _shutdown)
+
+        self.stdout.write(f'Report worker {worker.worker_id} started')
+        worker.run(once=options['once'])
+        self.stdout.write(self.style.SUCCESS('Report worker stopped.'))
@@ -0,0 +1,73 @@
+# Generated by Django 6.0.3 on 2026-10-17 03:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0015_email_broadcast'),
+        ('users', '0006_user_address_user_copyright_code'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySignupStats',
+            fields=[
+                ('day', models.DateField(primary_key=True, serialize=False)),
+                ('viewers', models.PositiveIntegerField(default=0)),
+                ('producers', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('refreshed_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DailyActiveUser',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('kind', models.CharField(choices=[('watched', 'Watched'), ('purchased', 'Purchased')], max_length=10)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('kind', 'day', 'user')},
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyMovieStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('revenue', models.BigIntegerField(default=0, help_text='Completed payments (RWF)')),
+                ('purchases', models.PositiveIntegerField(default=0)),
+                ('failed_attempts', models.PositiveIntegerField(default=0)),
+                ('movie', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='movies.movie')),
+                ('producer', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['day'], name='dailymoviestats_day_idx'), models.Index(fields=['producer', 'day'], name='dailymoviestats_producer_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyWithdrawalStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('requests', models.PositiveIntegerField(default=0)),
+                ('completed', models.BigIntegerField(default=0, help_text='RWF')),
+                ('rejected', models.BigIntegerField(default=0, help_text='RWF')),
+                ('pending', models.BigIntegerField(default=0, help_text='RWF')),
+                ('producer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('day', 'producer')},
+            },
+        ),
+    ]
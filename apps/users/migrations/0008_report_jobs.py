@@ -0,0 +1,41 @@
+# Generated by Django 6.0.3 on 2026-10-17 03:21
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0007_report_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('report', models.CharField(choices=[('paying_users', 'Paying users'), ('revenue_trend', 'Revenue trend'), ('producers', 'Producers')], max_length=30)),
+                ('format', models.CharField(choices=[('csv', 'CSV'), ('csv.gz', 'Gzip-compressed CSV')], default='csv', max_length=10)),
+                ('params', models.JSONField(default=dict)),
+                ('dedupe_key', models.CharField(db_index=True, max_length=64)),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('succeeded', 'Succeeded'), ('failed', 'Failed')], default='queued', max_length=20)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('worker_id', models.CharField(blank=True, default='', max_length=100)),
+                ('lease_expires_at', models.DateTimeField(blank=True, null=True)),
+                ('rows_total', models.PositiveIntegerField(blank=True, null=True)),
+                ('rows_written', models.PositiveIntegerField(default=0)),
+                ('artifact', models.CharField(blank=True, default='', help_text="Name in the 'reports' storage", max_length=255)),
+                ('last_error', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('requested_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='reportjob_claim_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 6.0.3 on 2026-10-17 04:06
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def fail_duplicate_active_jobs(apps, schema_editor):
+    """Keep one active job per dedupe_key (running first, then the oldest) so the constraint can be added."""
+    ReportJob = apps.get_model('users', 'ReportJob')
+    active = ReportJob.objects.filter(status__in=['queued', 'running'])
+    kept = set()
+    duplicates = []
+    for job in active.order_by('dedupe_key', '-status', 'created_at', 'id'):  # 'running' > 'queued'
+        if job.dedupe_key in kept:
+            duplicates.append(job.pk)
+        else:
+            kept.add(job.dedupe_key)
+    ReportJob.objects.filter(pk__in=duplicates).update(
+        status='failed', last_error='Duplicate of another queued job', finished_at=timezone.now(),
+        lease_expires_at=None,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0008_report_jobs'),
+    ]
+
+    operations = [
+        migrations.RunPython(fail_duplicate_active_jobs, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='reportjob',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ['queued', 'running'])), fields=('dedupe_key',), name='reportjob_one_active_per_key'),
+        ),
+    ]
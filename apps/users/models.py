@@ -132,3 +132,140 @@ class PasswordResetToken(models.Model):
 
     def __str__(self):
         return f'reset token for {self.user} (used={self.used})'
+
+
+# ─────────────────────────────────────────────
+# Report rollups (maintained by rollups.refresh_rollups)
+# ─────────────────────────────────────────────
+
+class DailyMovieStats(models.Model):
+    """Completed revenue and payment attempts per movie per day (Kigali date of Payment.created_at)."""
+    day = models.DateField()
+    movie = models.ForeignKey('movies.Movie', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    producer = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='+',
+    )
+    revenue = models.BigIntegerField(default=0, help_text='Completed payments (RWF)')
+    purchases = models.PositiveIntegerField(default=0)
+    failed_attempts = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['day'], name='dailymoviestats_day_idx'),
+            models.Index(fields=['producer', 'day'], name='dailymoviestats_producer_idx'),
+        ]
+
+
+class DailyWithdrawalStats(models.Model):
+    """Withdrawal requests per producer per day they were requested, by current status."""
+    day = models.DateField()
+    producer = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    requests = models.PositiveIntegerField(default=0)
+    completed = models.BigIntegerField(default=0, help_text='RWF')
+    rejected = models.BigIntegerField(default=0, help_text='RWF')
+    pending = models.BigIntegerField(default=0, help_text='RWF')
+
+    class Meta:
+        unique_together = ('day', 'producer')
+
+
+class DailySignupStats(models.Model):
+    day = models.DateField(primary_key=True)
+    viewers = models.PositiveIntegerField(default=0)
+    producers = models.PositiveIntegerField(default=0)
+
+
+class DailyActiveUser(models.Model):
+    """
+    One row per user per day they watched or bought something, so distinct
+    active/paying users can be counted for any week, month or year. Rows
+    are only ever added: watch activity stays recorded after
+    WatchProgress.last_watched_at moves on.
+    """
+    WATCHED = 'watched'
+    PURCHASED = 'purchased'
+    KIND_CHOICES = ((WATCHED, 'Watched'), (PURCHASED, 'Purchased'))
+
+    day = models.DateField()
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+
+    class Meta:
+        unique_together = ('kind', 'day', 'user')
+
+
+class RollupWatermark(models.Model):
+    """Start time of the last rollup refresh; rows changed after it are picked up by the next one."""
+    name = models.CharField(max_length=50, primary_key=True)
+    refreshed_at = models.DateTimeField()
+
+
+class ReportJob(models.Model):
+    """
+    One admin report built in the background by ``manage.py run_report_worker``
+    and stored as a file in the 'reports' storage (S3, or the local disk in
+    development). Identical requests share a job while it is queued or
+    running. See report_jobs.py.
+    """
+    REPORT_CHOICES = [
+        ('paying_users',  'Paying users'),
+        ('revenue_trend', 'Revenue trend'),
+        ('producers',     'Producers'),
+    ]
+    FORMAT_CHOICES = [
+        ('csv',    'CSV'),
+        ('csv.gz', 'Gzip-compressed CSV'),
+    ]
+    STATUS_CHOICES = [
+        ('queued',    'Queued'),
+        ('running',   'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed',    'Failed'),
+    ]
+    ACTIVE_STATUSES = ('queued', 'running')
+
+    report = models.CharField(max_length=30, choices=REPORT_CHOICES)
+    format = models.CharField(max_length=10, choices=FORMAT_CHOICES, default='csv')
+    params = models.JSONField(default=dict)
+    # sha256 of report, format and params: identical requests have the same key.
+    dedupe_key = models.CharField(max_length=64, db_index=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='+',
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    worker_id = models.CharField(max_length=100, blank=True, default='')
+    lease_expires_at = models.DateTimeField(null=True, blank=True)
+    rows_total = models.PositiveIntegerField(null=True, blank=True)
+    rows_written = models.PositiveIntegerField(default=0)
+    artifact = models.CharField(max_length=255, blank=True, default='', help_text="Name in the 'reports' storage")
+    last_error = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='reportjob_claim_idx'),
+        ]
+        constraints = [
+            # At most one queued/running job (ACTIVE_STATUSES) per dedupe_key.
+            models.UniqueConstraint(
+                fields=['dedupe_key'],
+                condition=models.Q(status__in=['queued', 'running']),
+                name='reportjob_one_active_per_key',
+            ),
+        ]
+
+    def __str__(self):
+        return f'Report #{self.id} — {self.report} ({self.status})'
+
+    @property
+    def progress(self):
+        """Percentage of rows written (0–100); None until the row count is known."""
+        if self.status == 'succeeded':
+            return 100
+        if not self.rows_total:
+            return None if self.rows_total is None else 0
+        return min(100, self.rows_written * 100 // self.rows_total)
@@ -0,0 +1,259 @@
+"""
+Background generation of large admin reports.
+
+The admin request only records a ReportJob (``queue_report``); the file is
+built by ``manage.py run_report_worker``, so a multi-year or full-history
+report is no longer cut off by the gunicorn request timeout:
+
+- Dedupe: a queued or running job with the same report, format and params
+  (``dedupe_key``) is returned instead of queuing a second one; a partial
+  unique constraint keeps concurrent requests to one job as well.
+- Building: rows come from reports.py, the same queries the report views
+  run, and are encoded (and gzipped for csv.gz) into a temporary file that
+  is then saved to the 'reports' storage — S3, or the local disk in
+  development (REPORT_STORAGE).
+- Progress: the row count is stored first; rows_written is saved every
+  REPORT_PROGRESS_EVERY rows, which also renews the job's lease.
+- Leases: a job whose worker stopped renewing its REPORT_LEASE_SECONDS lease
+  is claimed again, up to REPORT_MAX_ATTEMPTS attempts; failed builds are
+  retried the same way.
+- Download: ``download_url()`` is a presigned S3 URL valid for
+  REPORT_URL_EXPIRY seconds, or the API download endpoint for storages that
+  cannot sign URLs.
+"""
+import hashlib
+import json
+import logging
+import os
+import socket
+import tempfile
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import storages
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import F, Q
+from django.urls import reverse
+from django.utils import timezone
+
+from . import exports, reports
+from .models import ReportJob
+
+logger = logging.getLogger(__name__)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _lease_until():
+    return timezone.now() + timedelta(seconds=_setting('REPORT_LEASE_SECONDS', 300))
+
+
+def default_worker_id():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def get_storage():
+    return storages['reports']
+
+
+def dedupe_key(report, fmt, params):
+    raw = json.dumps([report, fmt, params], sort_keys=True)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+# ─────────────────────────────────────────────
+# Web process
+# ─────────────────────────────────────────────
+
+def queue_report(report, fmt, params, requested_by=None):
+    """
+    Queue ``report`` and return (job, created). An identical job that is
+    still queued or running is returned instead of a new one.
+    """
+    if report not in reports.REPORTS:
+        raise ValueError(f'Unknown report: {report}')
+    key = dedupe_key(report, fmt, params)
+    try:
+        return _queue(report, fmt, params, key, requested_by)
+    except IntegrityError:
+        # A concurrent request created the job first; the
+        # reportjob_one_active_per_key constraint allows only one.
+        job = ReportJob.objects.filter(dedupe_key=key, status__in=ReportJob.ACTIVE_STATUSES).first()
+        if job is not None:
+            return job, False
+        return _queue(report, fmt, params, key, requested_by)
+
+
+def _queue(report, fmt, params, key, requested_by):
+    with transaction.atomic():
+        job = (
+            ReportJob.objects.select_for_update()
+            .filter(dedupe_key=key, status__in=ReportJob.ACTIVE_STATUSES)
+            .first()
+        )
+        if job is not None:
+            return job, False
+        job = ReportJob.objects.create(
+            report=report, format=fmt, params=params, dedupe_key=key, requested_by=requested_by,
+        )
+    logger.info(f'[Reports] Queued {report} job #{job.id} ({fmt}, {params})')
+    return job, True
+
+
+def download_url(job, request):
+    """Where the finished file of ``job`` can be downloaded, or None if there is none yet."""
+    if job.status != 'succeeded' or not job.artifact:
+        return None
+    storage = get_storage()
+    if getattr(storage, 'querystring_auth', False):
+        return storage.url(job.artifact)
+    return request.build_absolute_uri(reverse('admin-report-job-download', args=[job.id]))
+
+
+def filename(job):
+    return f'{job.report.replace("_", "-")}-{job.id}.{job.format}'
+
+
+# ─────────────────────────────────────────────
+# Worker side
+# ─────────────────────────────────────────────
+
+class LeaseLost(Exception):
+    pass
+
+
+def claim_job(worker_id):
+    """
+    Lease the oldest queued job, or a running one whose lease has expired,
+    to ``worker_id``. Returns None if there is none.
+    """
+    now = timezone.now()
+    due = (
+        Q(status='queued') | Q(status='running', lease_expires_at__lt=now)
+    ) & Q(attempts__lt=_setting('REPORT_MAX_ATTEMPTS', 3))
+    with transaction.atomic():
+        job = (
+            ReportJob.objects.select_for_update(skip_locked=True)
+            .filter(due)
+            .order_by('created_at', 'id')
+            .first()
+        )
+        if job is None:
+            return None
+        claimed = ReportJob.objects.filter(pk=job.pk).filter(due).update(
+            status='running',
+            attempts=F('attempts') + 1,
+            worker_id=worker_id,
+            lease_expires_at=_lease_until(),
+            started_at=now,
+            rows_written=0,
+        )
+    if not claimed:
+        return None
+    job.refresh_from_db()
+    logger.info(f'[Reports] Job #{job.id} claimed by {worker_id} (attempt {job.attempts})')
+    return job
+
+
+def fail_abandoned():
+    """Fail running jobs whose lease expired on their last attempt. Returns the count."""
+    return ReportJob.objects.filter(
+        status='running',
+        lease_expires_at__lt=timezone.now(),
+        attempts__gte=_setting('REPORT_MAX_ATTEMPTS', 3),
+    ).update(
+        status='failed', finished_at=timezone.now(), lease_expires_at=None,
+        last_error='Worker stopped renewing its lease.',
+    )
+
+
+def _owned(job):
+    return ReportJob.objects.filter(
+        pk=job.pk, status='running', worker_id=job.worker_id, attempts=job.attempts,
+    )
+
+
+def _counted(job, rows):
+    """Yield ``rows``, saving progress (and renewing the lease) every REPORT_PROGRESS_EVERY rows."""
+    every = _setting('REPORT_PROGRESS_EVERY', 1000)
+    written = 0
+    for row in rows:
+        yield row
+        written += 1
+        if written % every == 0 and not _owned(job).update(rows_written=written, lease_expires_at=_lease_until()):
+            raise LeaseLost()
+    job.rows_written = written
+
+
+def build(job):
+    """Write the report of a claimed ``job`` to the reports storage. Returns the stored name."""
+    builder, _ = reports.REPORTS[job.report]
+    headers, total, rows = builder(job.params)
+    _owned(job).update(rows_total=total, lease_expires_at=_lease_until())
+
+    chunks = exports.encode_csv(headers, _counted(job, rows))
+    if job.format == 'csv.gz':
+        chunks = exports.gzip_chunks(chunks)
+    with tempfile.TemporaryFile() as tmp:
+        for chunk in chunks:
+            tmp.write(chunk)
+        tmp.seek(0)
+        return get_storage().save(f'{job.id}/{filename(job)}', File(tmp))
+
+
+def run_job(job):
+    """Build one claimed job; a failed attempt is requeued until REPORT_MAX_ATTEMPTS."""
+    try:
+        artifact = build(job)
+    except LeaseLost:
+        logger.warning(f'[Reports] Job #{job.id} lost its lease — result discarded')
+        return
+    except Exception as e:
+        logger.exception(f'[Reports] Job #{job.id} ({job.report}) failed: {e}')
+        final = job.attempts >= _setting('REPORT_MAX_ATTEMPTS', 3)
+        _owned(job).update(
+            status='failed' if final else 'queued',
+            finished_at=timezone.now() if final else None,
+            worker_id='', lease_expires_at=None, last_error=str(e),
+        )
+        return
+
+    finished = _owned(job).update(
+        status='succeeded', artifact=artifact, rows_written=job.rows_written,
+        finished_at=timezone.now(), lease_expires_at=None, last_error=None,
+    )
+    if finished:
+        logger.info(f'[Reports] Job #{job.id} ({job.report}): {job.rows_written} row(s) → {artifact}')
+    else:
+        get_storage().delete(artifact)
+        logger.warning(f'[Reports] Job #{job.id} finished after losing its lease — result discarded')
+
+
+class ReportWorker:
+    """Polls for report jobs and builds them one at a time."""
+
+    def __init__(self, poll_interval=None, worker_id=None):
+        self.poll_interval = poll_interval or _setting('REPORT_POLL_INTERVAL', 5)
+        self.worker_id = worker_id or default_worker_id()
+        self._stop = threading.Event()
+
+    def stop(self):
+        """Stop after the current job."""
+        self._stop.set()
+
+    def run(self, once=False):
+        """Work until ``stop()``. With ``once`` the worker exits when nothing is due."""
+        while not self._stop.is_set():
+            close_old_connections()
+            fail_abandoned()
+            job = claim_job(self.worker_id)
+            if job is not None:
+                run_job(job)
+                continue
+            if once:
+                break
+            self._stop.wait(self.poll_interval)
@@ -0,0 +1,204 @@
+"""
+Query logic of the admin reports that can also run as background jobs.
+
+The paying-users, revenue-trend and producers reports are used both by
+their API views (JSON and ?export=csv) and by the report worker
+(report_jobs.py), which writes the same rows to a downloadable file. Each
+entry of REPORTS takes the job's normalised params and returns
+(headers, total rows, row iterator).
+"""
+from datetime import date, datetime, time
+
+from django.contrib.auth import get_user_model
+from django.db.models import Count, Max, Min, Q, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.payments.wallet import get_wallets, producer_split
+from . import exports, rollups
+from .models import DailyMovieStats
+
+User = get_user_model()
+
+PERIODS = ('daily', 'weekly', 'monthly', 'yearly')
+# Default ranges when start_date is omitted, as in the report views.
+ALL_TIME_START = date(2000, 1, 1)
+TREND_DEFAULT_DAYS = {'daily': 30, 'weekly': 12 * 7, 'monthly': 12 * 31, 'yearly': 5 * 366}
+
+
+# ─────────────────────────────────────────────
+# Paying users
+# ─────────────────────────────────────────────
+
+PAYING_USERS_HEADERS = [
+    'User ID', 'Name', 'Email', 'Phone Number', 'Payment Count',
+    'Total Paid (RWF)', 'First Payment', 'Last Payment',
+]
+
+
+def paying_users(since, until):
+    """Viewers with a completed payment in [since, until], biggest spenders first."""
+    date_filter = Q(
+        payments__status='Completed',
+        payments__created_at__gte=since,
+        payments__created_at__lte=until,
+    )
+    return (
+        User.objects
+        .filter(role='Viewer')
+        .annotate(
+            payment_count=Count('payments', filter=date_filter),
+            total_paid_rwf=Coalesce(Sum('payments__amount', filter=date_filter), 0),
+            first_payment_date=Min('payments__created_at', filter=date_filter),
+            last_payment_date=Max('payments__created_at', filter=date_filter),
+        )
+        .filter(payment_count__gt=0)
+        .order_by('-total_paid_rwf')
+    )
+
+
+def paying_user_row(user):
+    return [
+        user.id, user.full_name, user.email or '', user.phone_number or '', user.payment_count,
+        user.total_paid_rwf, user.first_payment_date, user.last_payment_date,
+    ]
+
+
+# ─────────────────────────────────────────────
+# Revenue trend
+# ─────────────────────────────────────────────
+
+REVENUE_TREND_HEADERS = [
+    'Period Start', 'Total Revenue (RWF)', 'Failed Attempts',
+    'Producer Share (RWF)', 'Platform Commission (RWF)', 'Purchase Count',
+]
+
+
+def revenue_trend(since, until, period):
+    """
+    Completed revenue per ``period`` bucket from the daily rollups. Failed
+    attempts are informational only: they were never collected, so they are
+    NOT deducted from revenue. Buckets with no sales are omitted.
+    """
+    rollups.ensure_fresh()
+    first_day, last_day = rollups.day_range(since, until)
+    daily = (
+        DailyMovieStats.objects
+        .filter(day__gte=first_day, day__lte=last_day)
+        .values('day')
+        .annotate(revenue=Sum('revenue'), purchases=Sum('purchases'), failed_attempts=Sum('failed_attempts'))
+    )
+
+    trend = []
+    for start, totals in rollups.rebucket(daily, period, ('revenue', 'purchases', 'failed_attempts')):
+        if not totals['purchases']:
+            continue
+        producer_share, platform_commission = producer_split(totals['revenue'])
+        trend.append({
+            'period_start': rollups.period_start(start),
+            'total_revenue': totals['revenue'],
+            'failed_attempts': totals['failed_attempts'],
+            'producer_share': producer_share,
+            'platform_commission': platform_commission,
+            'purchase_count': totals['purchases'],
+        })
+    return trend
+
+
+def revenue_trend_row(bucket):
+    return [
+        bucket['period_start'].date() if bucket['period_start'] else '',
+        bucket['total_revenue'], bucket['failed_attempts'],
+        bucket['producer_share'], bucket['platform_commission'], bucket['purchase_count'],
+    ]
+
+
+# ─────────────────────────────────────────────
+# Producers
+# ─────────────────────────────────────────────
+
+PRODUCERS_HEADERS = [
+    'Producer ID', 'Name', 'Email', 'Phone Number', 'Address', 'Copyright Code', 'Movies Uploaded',
+    'Total Earnings (RWF)', 'Balance (RWF)', 'Pending Withdrawals (RWF)', 'Total Withdrawn (RWF)',
+    'Active', 'Date Joined',
+]
+
+
+def producers_queryset():
+    return User.objects.filter(role='Producer').annotate(
+        movies_uploaded_count=Count('uploaded_movies', distinct=True),
+    )
+
+
+def producers(queryset=None, batch_size=500):
+    """Every producer with upload and wallet stats, wallets fetched ``batch_size`` at a time."""
+    batch = []
+    for producer in exports.iterate(queryset if queryset is not None else producers_queryset()):
+        batch.append(producer)
+        if len(batch) >= batch_size:
+            yield from _producer_items(batch)
+            batch = []
+    yield from _producer_items(batch)
+
+
+def _producer_items(batch):
+    wallets = get_wallets([p.id for p in batch]) if batch else {}
+    for p in batch:
+        wallet = wallets[p.id]
+        yield {
+            'id': p.id,
+            'name': p.full_name,
+            'email': p.email,
+            'phone_number': p.phone_number,
+            'address': p.address,
+            'copyright_code': p.copyright_code,
+            'movies_uploaded': p.movies_uploaded_count,
+            'total_earnings': wallet['total_earnings'],
+            'balance': wallet['wallet_balance'],
+            'pending_withdrawals': wallet['pending_withdrawals'],
+            'total_withdrawn': wallet['total_withdrawn'],
+            'is_active': p.is_active,
+            'date_joined': p.date_joined,
+        }
+
+
+def producer_row(item):
+    return [
+        item['id'], item['name'], item['email'] or '', item['phone_number'] or '', item['address'],
+        item['copyright_code'], item['movies_uploaded'], item['total_earnings'], item['balance'],
+        item['pending_withdrawals'], item['total_withdrawn'], item['is_active'], item['date_joined'],
+    ]
+
+
+# ─────────────────────────────────────────────
+# Background job entry points
+# ─────────────────────────────────────────────
+
+def _date_range(params):
+    """Aware (since, until) for the job's inclusive YYYY-MM-DD start_date/end_date."""
+    since = timezone.make_aware(datetime.combine(datetime.strptime(params['start_date'], '%Y-%m-%d'), time.min))
+    until = timezone.make_aware(datetime.combine(datetime.strptime(params['end_date'], '%Y-%m-%d'), time.max))
+    return since, until
+
+
+def _paying_users_job(params):
+    queryset = paying_users(*_date_range(params))
+    return PAYING_USERS_HEADERS, queryset.count(), (paying_user_row(u) for u in exports.iterate(queryset))
+
+
+def _revenue_trend_job(params):
+    trend = revenue_trend(*_date_range(params), params['period'])
+    return REVENUE_TREND_HEADERS, len(trend), (revenue_trend_row(b) for b in trend)
+
+
+def _producers_job(params):
+    queryset = producers_queryset()
+    return PRODUCERS_HEADERS, queryset.count(), (producer_row(p) for p in producers(queryset))
+
+
+# report → (builder, params it takes)
+REPORTS = {
+    'paying_users':  (_paying_users_job,  ('start_date', 'end_date')),
+    'revenue_trend': (_revenue_trend_job, ('start_date', 'end_date', 'period')),
+    'producers':     (_producers_job,     ()),
+}
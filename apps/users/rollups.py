@@ -0,0 +1,274 @@
+"""
+Daily rollups behind the trend reports.
+
+The revenue, earnings, withdrawal and user-growth reports read per-day fact
+rows (DailyMovieStats, DailyWithdrawalStats, DailySignupStats,
+DailyActiveUser) and re-bucket them into weeks, months or years in memory,
+instead of grouping the raw Payment/WithdrawalRequest/User/WatchProgress
+tables on every request. Days are Kigali calendar days (TIME_ZONE), like the
+Trunc* grouping they replace.
+
+``refresh_rollups()`` is incremental. It finds the days touched by rows
+that changed since the watermark (Payment/WithdrawalRequest.updated_at,
+User.date_joined, WatchProgress.last_watched_at), rebuilds only those days,
+and moves the watermark. The scan starts ROLLUP_WATERMARK_OVERLAP seconds
+before the watermark, so rows committed by transactions still open during
+the previous refresh are not missed. Rebuilding a day is idempotent.
+
+It runs from ``manage.py refresh_report_rollups`` (a Render cron), whose
+first run does the full build. Reports call ``ensure_fresh()`` first, which
+refreshes in-line (incrementally only) when the cron has not run for
+ROLLUP_MAX_STALENESS seconds.
+"""
+import logging
+from collections import defaultdict
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, DateField, Q, Sum
+from django.db.models.functions import Trunc, TruncDate
+from django.utils import timezone
+
+from apps.movies.models import WatchProgress
+from apps.payments.models import Payment, WithdrawalRequest
+from .models import DailyActiveUser, DailyMovieStats, DailySignupStats, DailyWithdrawalStats, RollupWatermark
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+WATERMARK = 'reports'
+_REFRESH_LOCK_KEY = 'report-rollups:refreshing'
+_EPOCH = datetime(2000, 1, 1, tzinfo=dt_timezone.utc)
+_TRUNC_KINDS = {'daily': 'day', 'weekly': 'week', 'monthly': 'month', 'yearly': 'year'}
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+# ─────────────────────────────────────────────
+# Refresh
+# ─────────────────────────────────────────────
+
+def _day_bounds(days):
+    """Aware [start, end) datetimes covering the local calendar days ``days``."""
+    start = timezone.make_aware(datetime.combine(min(days), time.min))
+    end = timezone.make_aware(datetime.combine(max(days) + timedelta(days=1), time.min))
+    return start, end
+
+
+def _touched_days(queryset, field):
+    return set(
+        queryset.annotate(day=TruncDate(field)).order_by().values_list('day', flat=True).distinct()
+    )
+
+
+def _rebuild_movie_stats(days):
+    start, end = _day_bounds(days)
+    rows = (
+        Payment.objects
+        .filter(created_at__gte=start, created_at__lt=end)
+        .annotate(day=TruncDate('created_at'))
+        .values('day', 'movie_id', 'movie__producer_profile_id')
+        .annotate(
+            revenue=Sum('amount', filter=Q(status='Completed')),
+            purchases=Count('id', filter=Q(status='Completed')),
+            failed_attempts=Count('id', filter=Q(status='Failed')),
+        )
+    )
+    DailyMovieStats.objects.filter(day__in=days).delete()
+    DailyMovieStats.objects.bulk_create([
+        DailyMovieStats(
+            day=row['day'], movie_id=row['movie_id'], producer_id=row['movie__producer_profile_id'],
+            revenue=row['revenue'] or 0, purchases=row['purchases'], failed_attempts=row['failed_attempts'],
+        )
+        for row in rows
+        if row['day'] in days and (row['purchases'] or row['failed_attempts'])
+    ])
+
+
+def _rebuild_withdrawal_stats(days):
+    start, end = _day_bounds(days)
+    rows = (
+        WithdrawalRequest.objects
+        .filter(created_at__gte=start, created_at__lt=end)
+        .annotate(day=TruncDate('created_at'))
+        .values('day', 'producer_id')
+        .annotate(
+            requests=Count('id'),
+            completed=Sum('amount', filter=Q(status='Completed')),
+            rejected=Sum('amount', filter=Q(status='Rejected')),
+            pending=Sum('amount', filter=Q(status='Pending')),
+        )
+    )
+    DailyWithdrawalStats.objects.filter(day__in=days).delete()
+    DailyWithdrawalStats.objects.bulk_create([
+        DailyWithdrawalStats(
+            day=row['day'], producer_id=row['producer_id'], requests=row['requests'],
+            completed=row['completed'] or 0, rejected=row['rejected'] or 0, pending=row['pending'] or 0,
+        )
+        for row in rows
+        if row['day'] in days
+    ])
+
+
+def _rebuild_signup_stats(days):
+    start, end = _day_bounds(days)
+    rows = (
+        User.objects
+        .filter(date_joined__gte=start, date_joined__lt=end)
+        .annotate(day=TruncDate('date_joined'))
+        .values('day')
+        .annotate(
+            viewers=Count('id', filter=Q(role='Viewer')),
+            producers=Count('id', filter=Q(role='Producer')),
+        )
+    )
+    DailySignupStats.objects.filter(day__in=days).delete()
+    DailySignupStats.objects.bulk_create([
+        DailySignupStats(day=row['day'], viewers=row['viewers'], producers=row['producers'])
+        for row in rows
+        if row['day'] in days
+    ])
+
+
+def _record_activity(since):
+    """Add (day, user) rows for watch progress and completed purchases changed since ``since``."""
+    watched = WatchProgress.objects.all()
+    purchased = Payment.objects.filter(status='Completed')
+    if since is not None:
+        watched = watched.filter(last_watched_at__gte=since)
+        purchased = purchased.filter(updated_at__gte=since)
+    batch_size = _setting('ROLLUP_BATCH_SIZE', 2000)
+    for kind, queryset, field in (
+        (DailyActiveUser.WATCHED, watched, 'last_watched_at'),
+        (DailyActiveUser.PURCHASED, purchased, 'created_at'),
+    ):
+        pairs = queryset.annotate(day=TruncDate(field)).order_by().values_list('day', 'user_id').distinct()
+        DailyActiveUser.objects.bulk_create(
+            (DailyActiveUser(kind=kind, day=day, user_id=user_id) for day, user_id in pairs.iterator()),
+            batch_size=batch_size, ignore_conflicts=True,
+        )
+
+
+def refresh_rollups(full=False):
+    """
+    Rebuild the days touched since the last refresh (every day when ``full``
+    or on the first run). Returns {'payments': n, 'withdrawals': n, 'signups': n}
+    days rebuilt.
+    """
+    with transaction.atomic():
+        # Serializes concurrent refreshes (cron and an in-line ensure_fresh()).
+        RollupWatermark.objects.get_or_create(name=WATERMARK, defaults={'refreshed_at': _EPOCH})
+        watermark = RollupWatermark.objects.select_for_update().get(name=WATERMARK)
+        started = timezone.now()
+        full = full or watermark.refreshed_at == _EPOCH
+
+        payments, withdrawals, users = Payment.objects.all(), WithdrawalRequest.objects.all(), User.objects.all()
+        since = None
+        if full:
+            DailyMovieStats.objects.all().delete()
+            DailyWithdrawalStats.objects.all().delete()
+            DailySignupStats.objects.all().delete()
+        else:
+            since = watermark.refreshed_at - timedelta(seconds=_setting('ROLLUP_WATERMARK_OVERLAP', 300))
+            payments = payments.filter(updated_at__gte=since)
+            withdrawals = withdrawals.filter(updated_at__gte=since)
+            users = users.filter(date_joined__gte=since)
+
+        rebuilt = {}
+        for name, queryset, field, rebuild in (
+            ('payments', payments, 'created_at', _rebuild_movie_stats),
+            ('withdrawals', withdrawals, 'created_at', _rebuild_withdrawal_stats),
+            ('signups', users, 'date_joined', _rebuild_signup_stats),
+        ):
+            days = _touched_days(queryset, field)
+            if days:
+                rebuild(days)
+            rebuilt[name] = len(days)
+        _record_activity(since)
+
+        watermark.refreshed_at = started
+        watermark.save(update_fields=['refreshed_at'])
+    logger.info('Report rollups refreshed (%s): %s day(s) rebuilt', 'full' if full else 'incremental', rebuilt)
+    return rebuilt
+
+
+def ensure_fresh():
+    """
+    Refresh in-line if the last refresh is older than ROLLUP_MAX_STALENESS
+    seconds. Only incremental refreshes run in a request: until the first
+    full build (the cron, or ``refresh_report_rollups --full``) reports are
+    served from whatever rollups exist.
+    """
+    max_age = _setting('ROLLUP_MAX_STALENESS', 900)
+    refreshed_at = RollupWatermark.objects.filter(name=WATERMARK).values_list('refreshed_at', flat=True).first()
+    if refreshed_at is None or refreshed_at == _EPOCH:
+        return
+    if timezone.now() - refreshed_at < timedelta(seconds=max_age):
+        return
+    # Another request is already refreshing: serve what is there.
+    if not cache.add(_REFRESH_LOCK_KEY, 1, timeout=300):
+        return
+    try:
+        refresh_rollups()
+    finally:
+        cache.delete(_REFRESH_LOCK_KEY)
+
+
+# ─────────────────────────────────────────────
+# Reading
+# ─────────────────────────────────────────────
+
+def day_range(since, until):
+    """Local calendar days (first, last) covered by a report's datetime range."""
+    return timezone.localdate(since), timezone.localdate(until)
+
+
+def bucket_start(day, period):
+    if period == 'daily':
+        return day
+    if period == 'weekly':
+        return day - timedelta(days=day.weekday())
+    if period == 'yearly':
+        return day.replace(month=1, day=1)
+    return day.replace(day=1)
+
+
+def period_start(day):
+    """Aware local midnight of ``day`` — the value the Trunc* reports returned."""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def rebucket(rows, period, fields):
+    """
+    Sum ``fields`` of per-day ``rows`` (dicts with a ``day`` key) into
+    ``period`` buckets. Returns [(bucket start date, totals)] in date order.
+    """
+    buckets = defaultdict(lambda: dict.fromkeys(fields, 0))
+    for row in rows:
+        totals = buckets[bucket_start(row['day'], period)]
+        for field in fields:
+            totals[field] += row[field] or 0
+    return sorted(buckets.items())
+
+
+def distinct_users(kind, first_day, last_day, period):
+    """
+    {bucket start date: distinct users} active (``kind``) per period.
+    Distinct counts cannot be summed from daily rows, so this one groups in
+    the database, over the compact DailyActiveUser table.
+    """
+    return dict(
+        DailyActiveUser.objects
+        .filter(kind=kind, day__gte=first_day, day__lte=last_day)
+        .annotate(bucket=Trunc('day', _TRUNC_KINDS[period], output_field=DateField()))
+        .order_by()
+        .values('bucket')
+        .annotate(users=Count('user', distinct=True))
+        .values_list('bucket', 'users')
+    )
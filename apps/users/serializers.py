@@ -1,7 +1,13 @@
+from datetime import timedelta
+
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
+from django.utils import timezone
 from rest_framework import serializers
 
+from .models import ReportJob
+from .reports import ALL_TIME_START, PERIODS, REPORTS, TREND_DEFAULT_DAYS
+
 User = get_user_model()
 
 
@@ -303,3 +309,30 @@ class AdminCreateProducerSerializer(serializers.ModelSerializer):
             **validated_data
         )
         return user
+
+
+class ReportJobRequestSerializer(serializers.Serializer):
+    report = serializers.ChoiceField(choices=ReportJob.REPORT_CHOICES)
+    format = serializers.ChoiceField(choices=ReportJob.FORMAT_CHOICES, default='csv')
+    start_date = serializers.DateField(
+        required=False,
+        help_text='Start of the range (YYYY-MM-DD). Defaults to all data for paying_users, '
+                  'and to the revenue trend view\'s default range for revenue_trend.',
+    )
+    end_date = serializers.DateField(required=False, help_text='End of the range inclusive (YYYY-MM-DD). Defaults to today.')
+    period = serializers.ChoiceField(choices=PERIODS, default='monthly', help_text='revenue_trend only')
+
+    def validate(self, attrs):
+        """Resolve defaults into ``params``, so identical requests share one job."""
+        end = attrs.get('end_date') or timezone.localdate()
+        start = attrs.get('start_date') or (
+            ALL_TIME_START if attrs['report'] == 'paying_users'
+            else end - timedelta(days=TREND_DEFAULT_DAYS[attrs['period']])
+        )
+        if start > end:
+            raise serializers.ValidationError({'start_date': 'Must not be after end_date.'})
+
+        values = {'start_date': start.isoformat(), 'end_date': end.isoformat(), 'period': attrs['period']}
+        _, accepted = REPORTS[attrs['report']]
+        attrs['params'] = {name: values[name] for name in accepted}
+        return attrs
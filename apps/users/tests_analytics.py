@@ -0,0 +1,130 @@
+from datetime import date, timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from apps.movies.models import Movie, WatchProgress
+from apps.payments.models import Payment
+from . import analytics, rollups
+
+User = get_user_model()
+
+
+class AnalyticsSnapshotTests(APITestCase):
+
+    def setUp(self):
+        rollups.refresh_rollups(full=True)  # the first full build, done by the cron
+        self.admin = User.objects.create_user(email='admin@example.com', password='Password123!', role='Admin')
+        self.producer = User.objects.create_user(
+            email='producer@example.com', password='Password123!', role='Producer',
+            first_name='Eric', last_name='Mugisha',
+        )
+        self.viewers = [
+            User.objects.create_user(email=f'viewer{i}@example.com', password='Password123!', role='Viewer')
+            for i in range(3)
+        ]
+        self.drama = self._movie('Umurage', ['Drama', 'Family'], views=40)
+        self.action = self._movie('Intambara', ['Action', 'Drama'], views=90)
+        self.unsold = self._movie('Ijoro', ['Horror'], views=5)
+        self.client.force_authenticate(user=self.admin)
+
+    def _movie(self, title, genres, views):
+        return Movie.objects.create(
+            title=title, overview='Test', price=1000, release_date=date.today(), duration_minutes=90,
+            producer_profile=self.producer, genres=genres, views=views,
+        )
+
+    def _payment(self, movie, amount, days_ago=0, status='Completed', viewer=0):
+        payment = Payment.objects.create(user=self.viewers[viewer], movie=movie, amount=amount, status=status)
+        if days_ago:
+            Payment.objects.filter(pk=payment.pk).update(created_at=timezone.now() - timedelta(days=days_ago))
+
+    def _watch(self, movie, viewer, seconds, completed=False):
+        WatchProgress.objects.create(
+            user=self.viewers[viewer], movie=movie, progress_seconds=seconds, completed=completed,
+        )
+
+    def test_genre_revenue(self):
+        self._payment(self.drama, 1000)
+        self._payment(self.drama, 1000, viewer=1)
+        self._payment(self.action, 3000)
+        self._payment(self.action, 9000, status='Failed')
+        self._payment(self.action, 5000, days_ago=400)
+
+        results = self.client.get('/api/admin/dashboard/reports/genre-revenue/').data['results']
+        self.assertEqual(results, [
+            {'genre': 'Drama', 'total_revenue': 5000, 'producer_share': 3500, 'platform_commission': 1500,
+             'purchase_count': 3, 'movie_count': 2},
+            {'genre': 'Action', 'total_revenue': 3000, 'producer_share': 2100, 'platform_commission': 900,
+             'purchase_count': 1, 'movie_count': 1},
+            {'genre': 'Family', 'total_revenue': 2000, 'producer_share': 1400, 'platform_commission': 600,
+             'purchase_count': 2, 'movie_count': 1},
+        ])
+
+    def test_date_window(self):
+        self._payment(self.drama, 1000, days_ago=10)
+        self._payment(self.drama, 2000, days_ago=3)
+        self._payment(self.action, 4000)
+
+        start = (timezone.localdate() - timedelta(days=5)).isoformat()
+        end = (timezone.localdate() - timedelta(days=1)).isoformat()
+        response = self.client.get(f'/api/admin/dashboard/reports/top-movies/?start_date={start}&end_date={end}')
+        self.assertEqual([(r['id'], r['total_revenue']) for r in response.data['results']], [(self.drama.id, 2000)])
+
+    def test_top_movies_sorts(self):
+        self._payment(self.drama, 1000)
+        self._payment(self.action, 3000)
+        self._watch(self.drama, 0, 600, completed=True)
+        self._watch(self.drama, 1, 300, completed=True)
+        self._watch(self.drama, 2, 900)
+        self._watch(self.unsold, 0, 1200, completed=True)
+
+        def ranking(sort, limit=10):
+            data = self.client.get(f'/api/admin/dashboard/reports/top-movies/?sort={sort}&limit={limit}').data
+            return data['results']
+
+        self.assertEqual([r['id'] for r in ranking('revenue')], [self.action.id, self.drama.id])
+        self.assertEqual([r['id'] for r in ranking('views')], [self.action.id, self.drama.id, self.unsold.id])
+        self.assertEqual([r['id'] for r in ranking('views', limit=1)], [self.action.id])
+        self.assertEqual([r['id'] for r in ranking('unique_viewers')], [self.drama.id, self.unsold.id])
+        self.assertEqual([r['id'] for r in ranking('completion_rate')], [self.unsold.id, self.drama.id])
+
+        drama = ranking('unique_viewers')[0]
+        self.assertEqual(drama, {
+            'id': self.drama.id, 'title': 'Umurage', 'producer': 'Eric Mugisha', 'views': 40,
+            'unique_viewers': 3, 'avg_watch_time_minutes': 10.0, 'completion_rate': 0.6667,
+            'purchase_count': 1, 'total_revenue': 1000, 'producer_share': 700, 'platform_commission': 300,
+            'revenue_per_view': 25.0,
+        })
+
+    @override_settings(ANALYTICS_SNAPSHOT_TTL=300)
+    def test_stale_snapshot_is_served_while_rebuilding(self):
+        self._payment(self.drama, 1000)
+        with mock.patch.object(analytics, '_current', None):
+            first = analytics.get_snapshot()
+            self._payment(self.drama, 2000)
+            self.assertIs(analytics.get_snapshot(), first)
+
+            background = []
+            with mock.patch('apps.users.analytics.time.monotonic', return_value=first.built_at + 301), \
+                    mock.patch('apps.users.analytics._spawn', side_effect=background.append):
+                self.assertIs(analytics.get_snapshot(), first)
+                self.assertIs(analytics.get_snapshot(), first)
+            self.assertEqual(len(background), 1)
+
+            background[0]()
+            revenue, _ = analytics.get_snapshot().window(timezone.localdate(), timezone.localdate())
+            self.assertEqual(int(revenue.sum()), 3000)
+
+    def test_benchmark_matches_orm(self):
+        self._payment(self.drama, 1000)
+        self._payment(self.action, 3000, viewer=1)
+        self._watch(self.drama, 0, 600, completed=True)
+        out = StringIO()
+        call_command('benchmark_analytics', '--seconds', '0.01', stdout=out)
+        self.assertIn('top_movies:completion_rate', out.getvalue())
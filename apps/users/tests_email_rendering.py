@@ -0,0 +1,73 @@
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.core import mail
+from django.test import SimpleTestCase, override_settings
+
+from apps.payments.emails import send_payment_completed_email, send_withdrawal_status_email
+from .email_rendering import EmailTemplate
+
+
+class EmailTemplateTests(SimpleTestCase):
+
+    def test_renders_fields_into_every_part(self):
+        template = EmailTemplate(
+            subject='Hello $name', plain='Hi $name, you owe $$5', html='<p>$name</p><p>${name}!</p>',
+        )
+        self.assertEqual(template.fields, {'name'})
+        self.assertEqual(
+            template.render(name='Aline'),
+            ('Hello Aline', 'Hi Aline, you owe $5', '<p>Aline</p><p>Aline!</p>'),
+        )
+
+    def test_escapes_fields_in_html_only(self):
+        template = EmailTemplate(subject='$title', plain='$title', html='<b>$title</b>')
+        subject, plain, html = template.render(title='Tom & <Jerry>')
+        self.assertEqual(subject, 'Tom & <Jerry>')
+        self.assertEqual(plain, 'Tom & <Jerry>')
+        self.assertEqual(html, '<b>Tom &amp; &lt;Jerry&gt;</b>')
+
+    def test_missing_field_raises(self):
+        with self.assertRaises(KeyError):
+            EmailTemplate(subject='$a', plain='', html='').render()
+
+    def test_invalid_placeholder_is_rejected_when_built(self):
+        with self.assertRaises(ValueError):
+            EmailTemplate(subject='Costs $5', plain='', html='')
+
+
+@override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+class PrecompiledTransactionalEmailTests(SimpleTestCase):
+
+    def test_receipt_does_not_rebuild_the_shell(self):
+        payment = SimpleNamespace(
+            user=SimpleNamespace(email='viewer@example.com', first_name='Aline'),
+            movie=SimpleNamespace(title='Umurage'),
+            amount=1500,
+        )
+        with patch('apps.users.emails._base_html') as base_html:
+            send_payment_completed_email(payment)
+        base_html.assert_not_called()
+
+        message = mail.outbox[0]
+        self.assertEqual(message.subject, 'Purchase confirmed — Umurage')
+        self.assertIn('Your payment of 1,500 RWF for "Umurage"', message.body)
+        html = message.alternatives[0][0]
+        self.assertIn('Enjoy the film, Aline.', html)
+        self.assertIn('<title>Purchase Confirmed</title>', html)
+
+    def test_withdrawal_email_per_status(self):
+        withdrawal = SimpleNamespace(
+            id=1, status='Rejected', amount=75000, payment_method='MTN MoMo',
+            producer=SimpleNamespace(email='producer@example.com', first_name=''),
+        )
+        send_withdrawal_status_email(withdrawal)
+        message = mail.outbox[0]
+        self.assertEqual(message.subject, 'Your withdrawal request could not be approved')
+        self.assertIn('Hi there,', message.body)
+        self.assertIn('75,000 RWF', message.alternatives[0][0])
+        self.assertIn('#C0392B', message.alternatives[0][0])
+
+        withdrawal.status = 'Pending'
+        send_withdrawal_status_email(withdrawal)
+        self.assertEqual(len(mail.outbox), 1)
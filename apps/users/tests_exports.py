@@ -0,0 +1,87 @@
+import csv
+import gzip
+import io
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.http import StreamingHttpResponse
+from django.test import override_settings
+from rest_framework.test import APITestCase
+
+from apps.movies.models import Movie
+from apps.payments.models import Payment, WithdrawalRequest
+from .exports import csv_export
+from .rollups import refresh_rollups
+
+User = get_user_model()
+
+
+def _rows(response):
+    return list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+
+
+class StreamingExportTests(APITestCase):
+
+    def setUp(self):
+        refresh_rollups(full=True)  # the first full build, done by the cron
+        self.admin = User.objects.create_user(email='admin@example.com', password='Password123!', role='Admin')
+        self.producer = User.objects.create_user(
+            email='producer@example.com', password='Password123!', role='Producer', first_name='Pro',
+        )
+        self.viewer = User.objects.create_user(
+            email='viewer@example.com', password='Password123!', role='Viewer', first_name='Vee',
+        )
+        self.movie = Movie.objects.create(
+            title='Exported', overview='Test', price=1000, release_date=date.today(),
+            duration_minutes=90, producer_profile=self.producer,
+        )
+        for amount in (1000, 2000, 3000):
+            Payment.objects.create(user=self.viewer, movie=self.movie, amount=amount, status='Completed')
+        WithdrawalRequest.objects.create(producer=self.producer, amount=500, status='Pending')
+
+    def test_rows_are_streamed_in_bounded_chunks(self):
+        rows = ([i, 'x' * 40] for i in range(1000))
+        with override_settings(EXPORT_BUFFER_BYTES=1024):
+            response = csv_export('big.csv', ['N', 'Text'], rows)
+            chunks = list(response.streaming_content)
+        self.assertIsInstance(response, StreamingHttpResponse)
+        self.assertGreater(len(chunks), 30)
+        self.assertTrue(all(len(chunk) < 1024 + 64 for chunk in chunks))
+        lines = b''.join(chunks).decode().splitlines()
+        self.assertEqual((len(lines), lines[0], lines[-1]), (1001, 'N,Text', '999,' + 'x' * 40))
+
+    def test_admin_transactions_csv(self):
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.get('/api/admin/dashboard/transactions/?export=csv')
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertIn('filename="transactions.csv"', response['Content-Disposition'])
+        rows = _rows(response)
+        self.assertEqual(rows[0][:3], ['Type', 'ID', 'Name'])
+        self.assertEqual([(r[0], r[4]) for r in rows[1:]], [
+            ('Payment', '3000'), ('Payment', '2000'), ('Payment', '1000'), ('Withdrawal', '500'),
+        ])
+
+    def test_gzip_variant(self):
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.get('/api/admin/dashboard/reports/paying-users/?export=csv.gz')
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertIn('filename="paying-users.csv.gz"', response['Content-Disposition'])
+        text = gzip.decompress(b''.join(response.streaming_content)).decode()
+        rows = list(csv.reader(io.StringIO(text)))
+        self.assertEqual(rows[1][:2], [str(self.viewer.id), 'Vee'])
+        self.assertEqual(rows[1][4:6], ['3', '6000'])
+        self.assertEqual(len(rows), 2)
+
+    def test_producer_transaction_history_csv(self):
+        self.client.force_authenticate(user=self.producer)
+        rows = _rows(self.client.get('/api/producer/dashboard/transactions/?export=csv'))
+        self.assertEqual(rows[1][:5], ['Payment', rows[1][1], 'Exported', '3000', '2100'])
+        self.assertEqual(rows[-1][0], 'Withdrawal')
+        self.assertEqual(len(rows), 5)
+
+    def test_earnings_report_keeps_its_sections(self):
+        self.client.force_authenticate(user=self.producer)
+        rows = _rows(self.client.get('/api/producer/dashboard/earnings/report/?export=csv'))
+        self.assertEqual(rows[0], ['Total Gross Revenue (RWF)', '6000'])
+        self.assertIn([], rows)
+        self.assertEqual(rows[rows.index([]) + 1][0], 'Period Start')
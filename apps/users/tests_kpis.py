@@ -0,0 +1,109 @@
+from datetime import date, timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from apps.movies.models import Movie
+from apps.payments.models import Payment, WithdrawalRequest
+from . import kpis
+
+User = get_user_model()
+
+
+class AdminKpiTests(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(email='admin@example.com', password='Password123!', role='Admin')
+        self.producer = User.objects.create_user(email='producer@example.com', password='Password123!', role='Producer')
+        self.viewer = User.objects.create_user(email='viewer@example.com', password='Password123!', role='Viewer')
+        self.movie = Movie.objects.create(
+            title='Counted', overview='Test', price=1000, release_date=date.today(),
+            duration_minutes=90, producer_profile=self.producer, views=7,
+        )
+
+    def _payment(self, amount, created_at=None, status='Completed'):
+        payment = Payment.objects.create(user=self.viewer, movie=self.movie, amount=amount, status=status)
+        if created_at:
+            Payment.objects.filter(pk=payment.pk).update(created_at=created_at)
+
+    def _overview(self):
+        self.client.force_authenticate(user=self.admin)
+        return self.client.get('/api/admin/dashboard/overview/').data
+
+    def test_one_query_per_table(self):
+        self._payment(1000)
+        self._payment(2000, created_at=timezone.now() - timedelta(days=400))
+        self._payment(5000, status='Failed')
+        WithdrawalRequest.objects.create(producer=self.producer, amount=500, status='Completed')
+        WithdrawalRequest.objects.create(producer=self.producer, amount=900, status='Rejected')
+
+        with CaptureQueriesContext(connection) as queries:
+            data = kpis.dashboard_overview()
+        self.assertEqual(len(queries), len(kpis.GROUPS))
+        self.assertEqual(
+            (data['total_viewers'], data['total_producers'], data['total_movies'], data['total_views']), (1, 1, 1, 7),
+        )
+        self.assertEqual(data['financials'], {
+            'total_revenue': 3000, 'producer_revenue': 2100, 'platform_commission': 900,
+            'revenue_today': 1000, 'revenue_this_month': 1000,
+            'total_paid_to_producers': 500, 'total_profit': 2500,
+        })
+        self.assertEqual(set(data['metric_ages']), {
+            'total_viewers', 'total_producers', 'total_movies', 'total_views',
+            *data['financials'],
+        })
+
+    @override_settings(ADMIN_KPI_TTL=30)
+    def test_cached_figures_report_their_age(self):
+        self._payment(1000)
+        self.assertEqual(self._overview()['financials']['total_revenue'], 1000)
+
+        self._payment(2000)
+        with mock.patch('apps.users.kpis.time.time', return_value=kpis.time.time() + 12), \
+                mock.patch('apps.users.kpis._spawn') as spawn:
+            data = self._overview()
+        self.assertEqual(data['financials']['total_revenue'], 1000)
+        self.assertEqual(data['metric_ages']['total_revenue'], 12)
+        spawn.assert_not_called()
+
+    @override_settings(ADMIN_KPI_TTL=30)
+    def test_stale_figures_refresh_once_in_the_background(self):
+        self._payment(1000)
+        self._overview()
+        self._payment(2000)
+
+        later = kpis.time.time() + 60
+        background = []
+        with mock.patch('apps.users.kpis.time.time', return_value=later), \
+                mock.patch('apps.users.kpis._spawn', side_effect=background.append):
+            first = self._overview()
+            second = self._overview()
+        # Both admins get the stale figures; only one refresh is started.
+        self.assertEqual(first['financials']['total_revenue'], 1000)
+        self.assertEqual(second['metric_ages']['total_revenue'], 60)
+        self.assertEqual(len(background), 1)
+
+        background[0]()
+        data = self._overview()
+        self.assertEqual(data['financials']['total_revenue'], 3000)
+        self.assertEqual(data['metric_ages']['total_revenue'], 0)
+
+    @override_settings(ADMIN_KPI_TTL=30, ADMIN_KPI_LOCK_WAIT=1)
+    def test_waits_for_the_request_already_computing(self):
+        cache.add('admin-kpis:computing', 1)
+        shared = kpis._compute(kpis.GROUPS, store=False)
+
+        def published(*args):
+            cache.set_many({f'admin-kpis:{name}': entry for name, entry in shared.items()})
+
+        with mock.patch('apps.users.kpis.time.sleep', side_effect=published), \
+                CaptureQueriesContext(connection) as queries:
+            self.assertEqual(kpis.get_entries(), shared)
+        self.assertEqual(len(queries), 0)
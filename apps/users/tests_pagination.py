@@ -0,0 +1,89 @@
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from apps.movies.models import Movie
+from apps.payments.models import WithdrawalRequest
+from apps.users.models import AdminAuditLog
+
+User = get_user_model()
+
+
+class CursorPaginationTests(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(
+            email='admin@example.com', password='Password123!', role='Admin',
+        )
+        self.producer = User.objects.create_user(
+            email='producer@example.com', password='Password123!', role='Producer',
+        )
+        # 45 movies with heavy ties on views so the id tie-breaker matters.
+        for i in range(45):
+            Movie.objects.create(
+                title=f'Movie {i}', overview='Cursor test', release_date=date.today(),
+                views=i % 3, producer_profile=self.producer,
+            )
+
+    def _walk(self, url, key='results'):
+        ids, cursor, pages = [], '', 0
+        while cursor is not None:
+            response = self.client.get(url, {'cursor': cursor})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids.extend(item['id'] for item in response.data[key])
+            cursor = response.data['next_cursor']
+            pages += 1
+        return ids, pages
+
+    def test_popular_cursor_walks_every_movie_once_in_order(self):
+        ids, pages = self._walk('/api/movies/popular/')
+        expected = list(
+            Movie.objects.order_by('-views', '-id').values_list('id', flat=True)
+        )
+        self.assertEqual(ids, expected)
+        self.assertEqual(pages, 3)
+
+    def test_cursor_response_shape(self):
+        response = self.client.get('/api/movies/now-playing/', {'cursor': ''})
+        self.assertEqual(response.data['total_results'], 45)
+        self.assertNotIn('page', response.data)
+        self.assertEqual(len(response.data['results']), 20)
+
+    def test_offset_mode_unchanged(self):
+        response = self.client.get('/api/movies/popular/', {'page': 3})
+        self.assertEqual(response.data['page'], 3)
+        self.assertEqual(response.data['total_pages'], 3)
+        self.assertEqual(len(response.data['results']), 5)
+
+    def test_invalid_cursor_rejected(self):
+        for bad in ['garbage', 'WyJ4IiwgMV0']:  # 2nd = ["x", 1]
+            response = self.client.get('/api/movies/popular/', {'cursor': bad})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertEqual(response.data, {'error': 'Invalid cursor.'})
+
+    def test_admin_audit_log_cursor(self):
+        for i in range(60):
+            AdminAuditLog.objects.create(admin=self.admin, action='suspend_user', detail={'i': i})
+        self.client.force_authenticate(user=self.admin)
+        ids, pages = self._walk('/api/admin/dashboard/audit-logs/')
+        self.assertEqual(pages, 2)
+        self.assertEqual(ids, list(
+            AdminAuditLog.objects.order_by('-timestamp', '-id').values_list('id', flat=True)
+        ))
+
+    def test_withdrawal_lists_cursor(self):
+        for amount in range(1, 26):
+            WithdrawalRequest.objects.create(producer=self.producer, amount=amount)
+        expected = list(
+            WithdrawalRequest.objects.order_by('-created_at', '-id').values_list('id', flat=True)
+        )
+
+        self.client.force_authenticate(user=self.admin)
+        self.assertEqual(self._walk('/api/admin/dashboard/withdrawals/')[0], expected)
+
+        self.client.force_authenticate(user=self.producer)
+        self.assertEqual(self._walk('/api/producer/dashboard/withdrawals/')[0], expected)
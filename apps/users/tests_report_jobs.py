@@ -0,0 +1,153 @@
+import csv
+import gzip
+import io
+import shutil
+import tempfile
+from datetime import date, timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from apps.movies.models import Movie
+from apps.payments.models import Payment
+from . import report_jobs, rollups
+from .models import AdminAuditLog, ReportJob
+
+User = get_user_model()
+
+
+class ReportJobTests(APITestCase):
+
+    def setUp(self):
+        rollups.refresh_rollups(full=True)  # the first full build, done by the cron
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location, ignore_errors=True)
+        storages = {**settings.STORAGES, 'reports': {
+            'BACKEND': 'django.core.files.storage.FileSystemStorage', 'OPTIONS': {'location': location},
+        }}
+        overrides = override_settings(STORAGES=storages)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+        self.admin = User.objects.create_user(email='admin@example.com', password='Password123!', role='Admin')
+        self.producer = User.objects.create_user(email='producer@example.com', password='Password123!', role='Producer')
+        self.viewers = [
+            User.objects.create_user(email=f'viewer{i}@example.com', password='Password123!', role='Viewer')
+            for i in range(3)
+        ]
+        self.movie = Movie.objects.create(
+            title='Reported', overview='Test', price=1000, release_date=date.today(),
+            duration_minutes=90, producer_profile=self.producer,
+        )
+        for i, viewer in enumerate(self.viewers):
+            Payment.objects.create(user=viewer, movie=self.movie, amount=1000 * (i + 1), status='Completed')
+        self.client.force_authenticate(user=self.admin)
+
+    def _submit(self, **data):
+        return self.client.post('/api/admin/dashboard/reports/jobs/', data, format='json')
+
+    def _work(self):
+        report_jobs.ReportWorker(poll_interval=0.01, worker_id='test').run(once=True)
+
+    def _download(self, job_id):
+        response = self.client.get(f'/api/admin/dashboard/reports/jobs/{job_id}/download/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return b''.join(response.streaming_content)
+
+    def test_identical_in_flight_requests_share_a_job(self):
+        first = self._submit(report='paying_users')
+        self.assertEqual(first.status_code, status.HTTP_202_ACCEPTED)
+        today = timezone.localdate().isoformat()
+        self.assertEqual(first.data['params'], {'start_date': '2000-01-01', 'end_date': today})
+        self.assertEqual(self._submit(report='paying_users', end_date=today).data['id'], first.data['id'])
+        self.assertNotEqual(self._submit(report='paying_users', format='csv.gz').data['id'], first.data['id'])
+        self.assertEqual(ReportJob.objects.count(), 2)
+
+        # Once the job has finished, the same request builds a fresh report.
+        self._work()
+        self.assertNotEqual(self._submit(report='paying_users').data['id'], first.data['id'])
+
+    def test_concurrent_requests_share_the_winning_job(self):
+        winner, _ = report_jobs.queue_report('paying_users', 'csv', {})
+        # The loser's locking read ran before the winner committed, so it saw no job.
+        with mock.patch.object(ReportJob.objects, 'select_for_update', return_value=ReportJob.objects.none()):
+            job, created = report_jobs.queue_report('paying_users', 'csv', {})
+        self.assertEqual((job, created), (winner, False))
+        self.assertEqual(ReportJob.objects.count(), 1)
+
+    def test_every_paying_users_access_is_audited(self):
+        job_id = self._submit(report='paying_users').data['id']
+        other_admin = User.objects.create_user(email='admin2@example.com', password='Password123!', role='Admin')
+        self.client.force_authenticate(user=other_admin)
+        self.assertEqual(self._submit(report='paying_users').data['id'], job_id)
+        self._work()
+        self.client.get(f'/api/admin/dashboard/reports/jobs/{job_id}/')
+        self._download(job_id)
+
+        logs = AdminAuditLog.objects.filter(action='view_paying_users_report').order_by('id')
+        self.assertEqual(
+            [(log.admin, log.detail['access']) for log in logs],
+            [(self.admin, 'queued'), (other_admin, 'joined'), (other_admin, 'download_url'), (other_admin, 'download')],
+        )
+
+    def test_worker_builds_the_same_rows_as_the_view(self):
+        job_id = self._submit(report='paying_users').data['id']
+        self.assertEqual(self.client.get(f'/api/admin/dashboard/reports/jobs/{job_id}/').data['status'], 'queued')
+
+        with override_settings(REPORT_PROGRESS_EVERY=1):
+            self._work()
+        data = self.client.get(f'/api/admin/dashboard/reports/jobs/{job_id}/').data
+        self.assertEqual((data['status'], data['progress'], data['rows_written'], data['rows_total']), ('succeeded', 100, 3, 3))
+        self.assertTrue(data['download_url'].endswith(f'/api/admin/dashboard/reports/jobs/{job_id}/download/'))
+
+        exported = self.client.get('/api/admin/dashboard/reports/paying-users/?export=csv')
+        self.assertEqual(self._download(job_id), b''.join(exported.streaming_content))
+
+    def test_gzip_revenue_trend(self):
+        today = timezone.localdate()
+        job_id = self._submit(report='revenue_trend', format='csv.gz', period='yearly').data['id']
+        self._work()
+        rows = list(csv.reader(io.StringIO(gzip.decompress(self._download(job_id)).decode())))
+        self.assertEqual(rows[0][:2], ['Period Start', 'Total Revenue (RWF)'])
+        self.assertEqual(rows[1][:3], [today.replace(month=1, day=1).isoformat(), '6000', '0'])
+
+    def test_producers_report(self):
+        job_id = self._submit(report='producers').data['id']
+        self._work()
+        rows = list(csv.reader(io.StringIO(self._download(job_id).decode())))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1][0], str(self.producer.id))
+        self.assertEqual(rows[1][7], str(6000 * 70 // 100))
+
+    def test_rejects_an_inverted_range(self):
+        response = self._submit(report='revenue_trend', start_date='2026-02-01', end_date='2026-01-01')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('start_date', response.data)
+
+    @override_settings(REPORT_MAX_ATTEMPTS=2)
+    def test_failed_builds_are_retried_then_failed(self):
+        job_id = self._submit(report='producers').data['id']
+        broken = {**report_jobs.reports.REPORTS, 'producers': (mock.Mock(side_effect=RuntimeError('boom')), ())}
+        with mock.patch.object(report_jobs.reports, 'REPORTS', broken):
+            self._work()
+        job = ReportJob.objects.get(pk=job_id)
+        self.assertEqual((job.status, job.attempts), ('failed', 2))
+        data = self.client.get(f'/api/admin/dashboard/reports/jobs/{job_id}/').data
+        self.assertEqual((data['error'], data['download_url']), ('boom', None))
+
+    def test_abandoned_jobs_are_reclaimed(self):
+        job = ReportJob.objects.create(
+            report='producers', dedupe_key='x', status='running', attempts=1, worker_id='dead',
+            lease_expires_at=timezone.now() - timedelta(seconds=1),
+        )
+        claimed = report_jobs.claim_job('alive')
+        self.assertEqual((claimed.id, claimed.attempts, claimed.worker_id), (job.id, 2, 'alive'))
+
+        ReportJob.objects.filter(pk=job.pk).update(lease_expires_at=timezone.now() - timedelta(seconds=1), attempts=3)
+        self.assertIsNone(report_jobs.claim_job('alive'))
+        self.assertEqual(report_jobs.fail_abandoned(), 1)
@@ -0,0 +1,147 @@
+from datetime import date, datetime, time
+
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from apps.movies.models import Movie, WatchProgress
+from apps.payments.models import Payment, WithdrawalRequest
+from .models import DailyActiveUser, DailyMovieStats, RollupWatermark
+from .rollups import ensure_fresh, refresh_rollups
+
+User = get_user_model()
+
+
+def _at(day, hour=12):
+    return timezone.make_aware(datetime.combine(day, time(hour)))
+
+
+class ReportRollupTests(APITestCase):
+
+    def setUp(self):
+        refresh_rollups(full=True)  # the first full build, done by the cron
+        self.admin = User.objects.create_user(email='admin@example.com', password='Password123!', role='Admin')
+        self.producer = User.objects.create_user(email='producer@example.com', password='Password123!', role='Producer')
+        self.viewer = User.objects.create_user(email='viewer@example.com', password='Password123!', role='Viewer')
+        self.movie = Movie.objects.create(
+            title='Rolled up', overview='Test', price=1000, release_date=date.today(),
+            duration_minutes=90, producer_profile=self.producer,
+        )
+        # Mondays, so weekly buckets are easy to predict.
+        self.day1 = date(2026, 3, 2)
+        self.day2 = date(2026, 3, 9)
+        self.day3 = date(2026, 4, 6)
+
+    def _payment(self, day, amount=1000, status='Completed', user=None):
+        payment = Payment.objects.create(user=user or self.viewer, movie=self.movie, amount=amount, status=status)
+        Payment.objects.filter(pk=payment.pk).update(created_at=_at(day))
+        return payment
+
+    def _get(self, url):
+        self.client.force_authenticate(user=self.admin)
+        return self.client.get(url).data
+
+    def test_revenue_trend_rebuckets_daily_rows(self):
+        self._payment(self.day1, 1000)
+        self._payment(self.day1, 3000)
+        self._payment(self.day1, 500, status='Failed')
+        self._payment(self.day2, 2000)
+        self._payment(self.day3, 4000)
+        range_ = 'start_date=2026-03-01&end_date=2026-04-30'
+
+        monthly = self._get(f'/api/admin/dashboard/reports/revenue-trend/?period=monthly&{range_}')
+        self.assertEqual(
+            [(t['period_start'].date(), t['total_revenue'], t['purchase_count'], t['failed_attempts'])
+             for t in monthly['trend']],
+            [(date(2026, 3, 1), 6000, 3, 1), (date(2026, 4, 1), 4000, 1, 0)],
+        )
+        self.assertEqual(monthly['summary']['total_revenue'], 10000)
+        self.assertEqual(monthly['trend'][0]['producer_share'], 4200)
+
+        weekly = self._get(f'/api/admin/dashboard/reports/revenue-trend/?period=weekly&{range_}')
+        self.assertEqual(
+            [(t['period_start'].date(), t['total_revenue']) for t in weekly['trend']],
+            [(self.day1, 4000), (self.day2, 2000), (self.day3, 4000)],
+        )
+
+    @override_settings(ROLLUP_WATERMARK_OVERLAP=0)
+    def test_refresh_rebuilds_only_changed_days(self):
+        self._payment(self.day1)
+        pending = self._payment(self.day2, status='Pending')
+        self.assertEqual(refresh_rollups()['payments'], 2)
+        self.assertEqual(refresh_rollups(), {'payments': 0, 'withdrawals': 0, 'signups': 0})
+
+        pending.status = 'Completed'
+        pending.save(update_fields=['status'])
+        self.assertEqual(refresh_rollups()['payments'], 1)
+        self.assertEqual(
+            sorted(DailyMovieStats.objects.values_list('day', 'revenue')),
+            [(self.day1, 1000), (self.day2, 1000)],
+        )
+
+    def test_user_growth_counts_distinct_users_per_month(self):
+        other = User.objects.create_user(email='other@example.com', password='Password123!', role='Viewer')
+        self._payment(self.day1, user=self.viewer)
+        self._payment(self.day2, user=self.viewer)
+        self._payment(self.day2, user=other)
+        progress = WatchProgress.objects.create(user=self.viewer, movie=self.movie, progress_seconds=60)
+        WatchProgress.objects.filter(pk=progress.pk).update(last_watched_at=_at(self.day1))
+        refresh_rollups(full=True)
+
+        # Watching again moves last_watched_at to now; March activity stays recorded.
+        progress.save()
+        today = timezone.localdate()
+        data = self._get(f'/api/admin/dashboard/reports/user-growth/?start_date=2026-03-01&end_date={today}')
+        by_month = {t['month'].date(): t for t in data['trend']}
+        self.assertEqual(by_month[date(2026, 3, 1)]['paying_users'], 2)
+        self.assertEqual(by_month[date(2026, 3, 1)]['active_users'], 1)
+        self.assertEqual(by_month[today.replace(day=1)]['active_users'], 1)
+        self.assertEqual(data['summary']['paying_users_all_time'], 2)
+        self.assertEqual(DailyActiveUser.objects.filter(kind=DailyActiveUser.WATCHED).count(), 2)
+
+        # Two viewers and the producer joined today; admins are not counted.
+        joined = by_month[today.replace(day=1)]
+        self.assertEqual((joined['viewers'], joined['producers']), (2, 1))
+
+    def test_withdrawal_summary_by_month(self):
+        for amount, status in ((1000, 'Completed'), (2000, 'Rejected'), (3000, 'Pending'), (4000, 'Approved')):
+            withdrawal = WithdrawalRequest.objects.create(producer=self.producer, amount=amount, status=status)
+            WithdrawalRequest.objects.filter(pk=withdrawal.pk).update(created_at=_at(self.day1))
+        data = self._get('/api/admin/dashboard/reports/withdrawal-summary/?start_date=2026-03-01&end_date=2026-03-31')
+        self.assertEqual(data['trend'], [{
+            'month': _at(date(2026, 3, 1), hour=0),
+            'completed': 1000, 'rejected': 2000, 'pending': 3000, 'request_count': 4,
+        }])
+
+    def test_producer_earnings_report_reads_rollups(self):
+        self._payment(self.day1, 1000)
+        self._payment(self.day3, 3000)
+        self._payment(self.day3, 9999, status='Failed')
+        self.client.force_authenticate(user=self.producer)
+        data = self.client.get(
+            '/api/producer/dashboard/earnings/report/?period=monthly&start_date=2026-03-01&end_date=2026-04-30',
+        ).data
+        self.assertEqual([t['gross_revenue'] for t in data['trend']], [1000, 3000])
+        self.assertEqual(data['trend'][1]['period_start'], _at(date(2026, 4, 1), hour=0))
+        self.assertEqual(data['kpis']['total_gross_revenue'], 4000)
+        self.assertEqual(data['kpis']['total_purchases'], 2)
+        self.assertEqual(data['kpis']['best_movie'], {'id': self.movie.id, 'title': 'Rolled up', 'revenue': 4000})
+
+    def test_full_refresh_drops_days_without_data(self):
+        payment = self._payment(self.day1)
+        refresh_rollups()
+        Payment.objects.filter(pk=payment.pk).delete()
+        refresh_rollups(full=True)
+        self.assertFalse(DailyMovieStats.objects.exists())
+
+    def test_requests_never_run_the_first_full_build(self):
+        RollupWatermark.objects.all().delete()
+        self._payment(self.day1)
+        ensure_fresh()
+        self.assertFalse(DailyMovieStats.objects.exists())
+
+        refresh_rollups(full=True)
+        self._payment(self.day2)
+        ensure_fresh()
+        self.assertEqual(DailyMovieStats.objects.count(), 2)
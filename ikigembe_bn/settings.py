@@ -251,6 +251,27 @@ STORAGES = {
 
 MEDIA_URL = f'https://{AWS_S3_CUSTOM_DOMAIN}/'
 
+# Background report files (apps/users/report_jobs.py; worker: python manage.py run_report_worker)
+# 's3' = private objects under reports/ with presigned download links; 'local' = disk (dev, tests).
+REPORT_STORAGE = os.getenv('REPORT_STORAGE', 'local' if DEBUG or 'test' in sys.argv else 's3')
+REPORT_URL_EXPIRY = 3600            # seconds a presigned download link stays valid
+if REPORT_STORAGE == 's3':
+    STORAGES['reports'] = {
+        'BACKEND': 'storages.backends.s3boto3.S3Boto3Storage',
+        'OPTIONS': {
+            'location': 'reports',
+            'custom_domain': None,
+            'querystring_auth': True,
+            'querystring_expire': REPORT_URL_EXPIRY,
+            'object_parameters': {},
+        },
+    }
+else:
+    STORAGES['reports'] = {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+        'OPTIONS': {'location': BASE_DIR / 'media' / 'reports'},
+    }
+
 # Upload limits
 DATA_UPLOAD_MAX_MEMORY_SIZE = 5242880000  # 5GB
 FILE_UPLOAD_MAX_MEMORY_SIZE = 5242880000  # 5GB
@@ -272,6 +293,43 @@ CSRF_TRUSTED_ORIGINS = [
 ]
 
 
+# Cache
+# Catalog invalidation (the movies:catalog:version key), the view counter and
+# the payment status channel only work across gunicorn workers and processes
+# with a shared cache, so REDIS_URL is required when DEBUG is off (render.yaml
+# provisions it). Development and the test suite fall back to per-process memory.
+REDIS_URL = os.getenv('REDIS_URL', '')
+if not REDIS_URL and not DEBUG and 'test' not in sys.argv:
+    from django.core.exceptions import ImproperlyConfigured
+    raise ImproperlyConfigured('REDIS_URL must be set when DEBUG is off (see CACHES in settings.py).')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'ikigembe',
+            # Buffered heartbeats and view counts use a key each; the default 300 evicts them early.
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        }
+    }
+# Seconds a cached catalog list page lives (saves/deletes invalidate sooner).
+CATALOG_CACHE_TIMEOUT = int(os.getenv('CATALOG_CACHE_TIMEOUT', '300'))
+# Seconds between bulk flushes of buffered watch-progress heartbeats.
+# 0 = write-through (each heartbeat is written immediately); used by the test suite.
+WATCH_PROGRESS_FLUSH_INTERVAL = int(os.getenv(
+    'WATCH_PROGRESS_FLUSH_INTERVAL', '0' if 'test' in sys.argv else '10'
+))
+# Seconds between batched F('views') + n flushes of stream view counts (0 = immediate).
+VIEW_COUNT_FLUSH_INTERVAL = int(os.getenv(
+    'VIEW_COUNT_FLUSH_INTERVAL', '0' if 'test' in sys.argv else '10'
+))
+
 # Security settings
 SECURE_CROSS_ORIGIN_OPENER_POLICY = None
 X_FRAME_OPTIONS = 'SAMEORIGIN'
@@ -282,11 +340,40 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # CloudFront signed URLs (HLS streaming)
 CLOUDFRONT_KEY_PAIR_ID = os.getenv('CLOUDFRONT_KEY_PAIR_ID', '')
 CLOUDFRONT_PRIVATE_KEY = os.getenv('CLOUDFRONT_PRIVATE_KEY', '')  # PEM string
+CLOUDFRONT_SIGNATURE_BUCKET = 300  # seconds; streams within one window reuse a signed URL
+# Signed-cookie mode: the stream endpoint sets CloudFront cookies covering
+# movies/hls/{id}/* instead of signing the playlist URL. The cookie domain
+# must be shared by the API and the CloudFront distribution (e.g. .ikigembe.com);
+# while it is empty, streams fall back to signed URLs.
+CLOUDFRONT_SIGNED_COOKIES = os.getenv('CLOUDFRONT_SIGNED_COOKIES', 'False') == 'True'
+CLOUDFRONT_COOKIE_DOMAIN = os.getenv('CLOUDFRONT_COOKIE_DOMAIN', '')
 
 # HLS Adaptive Bitrate Streaming
 FFMPEG_PATH = os.getenv('FFMPEG_PATH', 'ffmpeg')
+FFPROBE_PATH = os.getenv('FFPROBE_PATH', 'ffprobe')
 HLS_SEGMENT_DURATION = 6
 HLS_TEMP_DIR = BASE_DIR / 'tmp' / 'hls'
+# merged | renditions | segments — see apps/movies/transcoding.py
+HLS_TRANSCODE_MODE = os.getenv('HLS_TRANSCODE_MODE', 'merged')
+HLS_MAX_PARALLEL_ENCODES = int(os.getenv('HLS_MAX_PARALLEL_ENCODES', '0'))  # 0 = one per core
+HLS_CHUNK_SECONDS = 300                    # segments mode: chunk length (rounded to whole segments)
+HLS_SEGMENT_PARALLEL_MIN_SECONDS = 1200    # shorter sources use renditions mode instead
+HLS_UPLOAD_CONCURRENCY = int(os.getenv('HLS_UPLOAD_CONCURRENCY', '16'))  # parallel S3 uploads per transcode
+HLS_UPLOAD_RETRIES = 3
+# Source input: 'url' = ffmpeg reads a presigned S3 URL (no local copy; falls
+# back to 'download' if the streamed read fails), 'download' = copy to disk first.
+HLS_SOURCE_MODE = os.getenv('HLS_SOURCE_MODE', 'url')
+HLS_SOURCE_URL_EXPIRY = 6 * 3600  # must outlast the longest transcode
+# Upload segments while ffmpeg is still encoding instead of after it finishes.
+HLS_UPLOAD_STREAMING = os.getenv('HLS_UPLOAD_STREAMING', 'False') == 'True'
+
+# HLS transcode queue (python manage.py run_transcode_worker)
+TRANSCODE_CONCURRENCY = int(os.getenv('TRANSCODE_CONCURRENCY', '2'))  # ffmpeg runs per worker
+TRANSCODE_POLL_INTERVAL = 5           # seconds between queue polls
+TRANSCODE_LEASE_SECONDS = 300         # renewed by heartbeats every lease/3
+TRANSCODE_MAX_ATTEMPTS = 3
+TRANSCODE_RETRY_BACKOFF = 60          # seconds, doubled per attempt
+TRANSCODE_RETRY_BACKOFF_MAX = 3600
 
 # PawaPay
 PAWAPAY_API_KEY = os.getenv('PAWAPAY_API_KEY', '').strip()
@@ -294,6 +381,66 @@ PAWAPAY_BASE_URL = os.getenv('PAWAPAY_BASE_URL', 'https://api.sandbox.pawapay.cl
 # Optional dedicated callback token (PawaPay dashboard → Settings → Callback Authentication Token).
 # In sandbox, PawaPay reuses the API key — leave this unset and the API key is used instead.
 PAWAPAY_CALLBACK_TOKEN = os.getenv('PAWAPAY_CALLBACK_TOKEN', '').strip()
+PAWAPAY_CONNECT_TIMEOUT = 3.05      # seconds
+PAWAPAY_READ_TIMEOUT = 15
+PAWAPAY_RETRIES = 2                 # connection errors for every call; read/5xx errors for GETs only
+PAWAPAY_POOL_SIZE = 10              # keep-alive connections per process
+PAWAPAY_BREAKER_THRESHOLD = 5       # consecutive failures before failing fast
+PAWAPAY_BREAKER_RESET = 30          # seconds before a trial call is allowed
+
+# Reconciliation of lost callbacks (python manage.py reconcile_payments)
+RECONCILE_MIN_AGE = 120             # seconds before a Pending/Processing row is looked up
+RECONCILE_BATCH_SIZE = 100
+RECONCILE_CONCURRENCY = 8           # parallel status lookups (≤ PAWAPAY_POOL_SIZE)
+RECONCILE_NOT_FOUND_AFTER = 3600    # deposits PawaPay never received are failed after this
+
+# Long-poll payment status (GET /api/payments/<deposit_id>/status/?wait=N, see status_channel.py)
+PAYMENT_STATUS_MAX_WAIT = 20            # seconds; keep below gunicorn's --timeout
+PAYMENT_STATUS_POLL_INTERVAL = 1        # seconds between checks of the shared cache
+PAYMENT_STATUS_FALLBACK_INTERVAL = 5    # seconds between database reads while waiting
+
+# Report rollups (apps/users/rollups.py; cron: python manage.py refresh_report_rollups)
+# Reports refresh in-line when the last refresh is older than this; 0 = always (test suite).
+ROLLUP_MAX_STALENESS = int(os.getenv(
+    'ROLLUP_MAX_STALENESS', '0' if 'test' in sys.argv else '900'
+))
+ROLLUP_WATERMARK_OVERLAP = 300      # seconds re-scanned before the watermark (late commits)
+ROLLUP_BATCH_SIZE = 2000
+
+# Admin dashboard overview KPIs (apps/users/kpis.py)
+# Seconds before cached figures are recomputed in the background; 0 = no cache (test suite).
+ADMIN_KPI_TTL = int(os.getenv(
+    'ADMIN_KPI_TTL', '0' if 'test' in sys.argv else '30'
+))
+ADMIN_KPI_MAX_STALE = 3600          # seconds a stale figure may still be served while refreshing
+ADMIN_KPI_LOCK_WAIT = 5             # seconds a request waits for another one's computation
+
+# Genre revenue / top movies snapshot (apps/users/analytics.py)
+# Seconds before each process rebuilds its snapshot in the background; 0 = rebuild per request (test suite).
+ANALYTICS_SNAPSHOT_TTL = int(os.getenv(
+    'ANALYTICS_SNAPSHOT_TTL', '0' if 'test' in sys.argv else '300'
+))
+
+# Streaming CSV exports (?export=csv / csv.gz, see apps/users/exports.py)
+EXPORT_CHUNK_SIZE = 2000            # rows fetched per server-side cursor round-trip
+EXPORT_BUFFER_BYTES = 64 * 1024     # encoded CSV sent per response chunk
+
+# Report jobs queue (see REPORT_STORAGE above)
+REPORT_POLL_INTERVAL = 5            # seconds between queue polls
+REPORT_LEASE_SECONDS = 300          # renewed every REPORT_PROGRESS_EVERY rows
+REPORT_PROGRESS_EVERY = 1000
+REPORT_MAX_ATTEMPTS = 3
+
+# Payment side-effect outbox (see apps/payments/outbox.py)
+# Seconds between in-process dispatches after a webhook; 0 = only `manage.py dispatch_outbox`.
+OUTBOX_DISPATCH_INTERVAL = int(os.getenv(
+    'OUTBOX_DISPATCH_INTERVAL', '0' if 'test' in sys.argv else '5'
+))
+OUTBOX_BATCH_SIZE = 50
+OUTBOX_LEASE_SECONDS = 120
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_RETRY_BACKOFF = 30         # seconds, doubled per attempt
+OUTBOX_RETRY_BACKOFF_MAX = 3600
 
 # Email
 # Dev default: print emails to console. Set EMAIL_BACKEND in .env for production SMTP.
@@ -304,3 +451,12 @@ EMAIL_USE_TLS = os.getenv('EMAIL_USE_TLS', 'True') == 'True'
 EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER', '')
 EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD', '')
 DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', 'Ikigembe <noreply@ikigembe.com>')
+
+# Announcement broadcasts (python manage.py run_email_worker)
+EMAIL_RATE_LIMIT = float(os.getenv('EMAIL_RATE_LIMIT', '10'))  # messages/second, 0 = unthrottled
+EMAIL_BATCH_SIZE = 100          # messages per SMTP connection
+EMAIL_RECIPIENT_CHUNK = 1000    # users copied into EmailDelivery per query
+EMAIL_MAX_ATTEMPTS = 3
+EMAIL_RETRY_BACKOFF = 300       # seconds before failed messages are retried
+EMAIL_LEASE_SECONDS = 300       # renewed after every batch
+EMAIL_POLL_INTERVAL = 10